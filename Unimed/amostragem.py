@@ -0,0 +1,108 @@
+# Resolução adaptativa das séries diárias dos gráficos. Um ponto por dia em intervalos de vários
+# anos deixa o JSON da figura grande e o navegador lento sem mostrar nada a mais: a tela não tem
+# largura para milhares de pontos. Aqui o intervalo selecionado define a resolução:
+#   - até PONTOS_POR_GRAFICO dias, um ponto por dia;
+#   - até PONTOS_POR_GRAFICO semanas, um ponto por semana (iniciada na segunda-feira);
+#   - acima disso, um ponto por mês.
+# Gráficos de barras somam (ou recalculam) cada período; gráficos de linha mantêm os pontos
+# diários e são reduzidos pelo LTTB (Largest-Triangle-Three-Buckets), que preserva picos e vales.
+import numpy as np
+import pandas as pd
+
+# Máximo de pontos enviados por série
+PONTOS_POR_GRAFICO = 180
+
+DIARIA, SEMANAL, MENSAL = 'D', 'W', 'M'
+
+# Formato das datas no eixo X e no hover (sintaxe d3 do Plotly) de cada resolução
+FORMATO_DATA = {DIARIA: '%d/%m/%Y', SEMANAL: '%d/%m/%Y', MENSAL: '%m/%Y'}
+ROTULO_PERIODO = {DIARIA: 'Data', SEMANAL: 'Semana de', MENSAL: 'Mês'}
+
+
+def resolucao_para_intervalo(inicio, fim, max_pontos: int = PONTOS_POR_GRAFICO) -> str:
+    """
+    Resolução (DIARIA, SEMANAL ou MENSAL) com a qual o intervalo [inicio, fim] cabe em max_pontos.
+    """
+    dias = (pd.Timestamp(fim) - pd.Timestamp(inicio)).days + 1
+    if dias <= max_pontos:
+        return DIARIA
+    if dias / 7 <= max_pontos:
+        return SEMANAL
+    return MENSAL
+
+
+def inicio_do_periodo(datas: pd.Series, resolucao: str) -> pd.Series:
+    """
+    Primeiro dia do período (dia, semana iniciada na segunda ou mês) de cada data, como datetime64.
+    """
+    datas = pd.to_datetime(datas).dt.normalize()
+    if resolucao == SEMANAL:
+        return datas - pd.to_timedelta(datas.dt.weekday, unit='D')
+    if resolucao == MENSAL:
+        return datas - pd.to_timedelta(datas.dt.day - 1, unit='D')
+    return datas
+
+
+def agrupar_por_periodo(df: pd.DataFrame, resolucao: str, coluna_data: str = 'Dia', colunas_soma=None) -> pd.DataFrame:
+    """
+    Soma as colunas dadas (todas as numéricas, por padrão) por período; a coluna de data passa a
+    ser o primeiro dia de cada período, no mesmo tipo (date) das séries diárias.
+    """
+    if resolucao == DIARIA or df.empty:
+        return df
+    colunas_soma = colunas_soma or [coluna for coluna in df.columns if coluna != coluna_data and pd.api.types.is_numeric_dtype(df[coluna])]
+    periodos = inicio_do_periodo(df[coluna_data], resolucao).rename(coluna_data)
+    agrupado = df[colunas_soma].groupby(periodos).sum().reset_index()
+    agrupado[coluna_data] = agrupado[coluna_data].dt.date
+    return agrupado
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_pontos: int) -> np.ndarray:
+    """
+    Posições dos n_pontos escolhidos pelo Largest-Triangle-Three-Buckets: o primeiro e o último
+    ponto são mantidos e, em cada faixa intermediária, fica o ponto que forma o maior triângulo
+    com o escolhido na faixa anterior e a média da faixa seguinte.
+
+    Pontos com x ou y nulo (NaN, ex.: dias sem TMO) ficam de fora quando a série é reduzida: um
+    NaN na média da faixa seguinte anularia todas as áreas, e a faixa ficaria com o primeiro ponto.
+    """
+    n = len(x)
+    if n_pontos >= n or n_pontos < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    finitos = np.isfinite(x) & np.isfinite(y)
+    if not finitos.all():
+        posicoes = np.flatnonzero(finitos)
+        return posicoes[lttb(x[posicoes], y[posicoes], n_pontos)]
+    # Limites das n_pontos - 2 faixas entre o primeiro e o último ponto
+    limites = np.linspace(1, n - 1, n_pontos - 1).astype('int64')
+
+    escolhidos = np.empty(n_pontos, dtype='int64')
+    escolhidos[0], escolhidos[-1] = 0, n - 1
+    anterior = 0
+    for i in range(n_pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        seguinte = slice(fim, limites[i + 2]) if i + 2 < len(limites) else slice(n - 1, n)
+        x_medio, y_medio = x[seguinte].mean(), y[seguinte].mean()
+        areas = np.abs(
+            (x[anterior] - x_medio) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (y_medio - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        escolhidos[i + 1] = anterior
+    return escolhidos
+
+
+def reduzir_serie(df: pd.DataFrame, coluna_y, coluna_x: str = 'Dia', max_pontos: int = PONTOS_POR_GRAFICO) -> pd.DataFrame:
+    """
+    Mantém no máximo max_pontos linhas da série (ordenada por coluna_x), escolhidas pelo LTTB.
+    coluna_y pode ser o nome de uma coluna ou uma Series numérica alinhada ao DataFrame; linhas
+    com y nulo são descartadas quando a série é reduzida.
+    """
+    if len(df) <= max_pontos:
+        return df
+    y = df[coluna_y] if isinstance(coluna_y, str) else coluna_y
+    x = pd.to_datetime(df[coluna_x]).to_numpy(dtype='datetime64[ns]').view('int64')
+    return df.iloc[lttb(x, y.to_numpy(dtype='float64'), max_pontos)]
@@ -0,0 +1,419 @@
+# Backup do dataset em segundo plano. A ingestão só grava localmente e agenda o backup; um
+# trabalhador (thread única por processo) consome a fila, divide os arquivos em blocos
+# endereçados pelo SHA-256 do conteúdo e envia apenas os blocos que o remoto ainda não tem.
+# Cada backup termina com a descrição do instantâneo (arquivo -> lista de blocos), a partir da
+# qual restaurar_backup remonta o dataset.
+#
+# Remoto (o primeiro configurado):
+#   - UNIMED_BACKUP_DIR: diretório local ou montado, com a semântica de um bucket (chave -> objeto);
+#   - GITHUB_TOKEN + GITHUB_REPO (GITHUB_BRANCH, padrão 'main'): repositório GitHub, um arquivo por objeto.
+# Sem remoto configurado, o backup fica desativado.
+#
+# Layout no remoto:
+#   objetos/<2 primeiros hex>/<sha256>    blocos de até TAMANHO_BLOCO bytes, imutáveis
+#   instantaneos/<diretório>.json         último instantâneo enviado do dataset
+import base64
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from .storage import ARQUIVO_INDICE, ARQUIVO_MANIFESTO, arquivos_do_manifesto, normalizar_manifesto
+
+TAMANHO_BLOCO = int(float(os.getenv("UNIMED_BACKUP_BLOCO_MB", "4")) * 2**20)
+
+# Tentativas por backup e espera (em segundos, dobrando a cada falha) entre elas
+TENTATIVAS = int(os.getenv("UNIMED_BACKUP_TENTATIVAS", "5"))
+ESPERA_INICIAL = 1.0
+ESPERA_MAXIMA = 60.0
+
+# Estados reportados por estado_backup()
+NA_FILA = 'na fila'
+ENVIANDO = 'enviando'
+AGUARDANDO = 'aguardando nova tentativa'
+CONCLUIDO = 'concluído'
+FALHOU = 'falhou'
+DESATIVADO = 'desativado'
+
+
+class ErroRemoto(Exception):
+    """
+    Falha de comunicação com o remoto; o backup é tentado novamente.
+    """
+
+
+class DestinoDiretorio:
+    """
+    Remoto em um diretório do sistema de arquivos. As chaves são caminhos relativos, como
+    em um bucket S3, e cada objeto é gravado em um temporário e publicado com os.replace.
+    """
+
+    def __init__(self, raiz: str):
+        self.raiz = raiz
+
+    def __repr__(self):
+        return f'DestinoDiretorio({self.raiz!r})'
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.raiz, *chave.split('/'))
+
+    def existe(self, chave: str) -> bool:
+        return os.path.exists(self._caminho(chave))
+
+    def enviar(self, chave: str, conteudo: bytes):
+        caminho = self._caminho(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(conteudo)
+        os.replace(temporario, caminho)
+
+    def ler(self, chave: str) -> bytes:
+        with open(self._caminho(chave), 'rb') as arquivo:
+            return arquivo.read()
+
+
+class DestinoGitHub:
+    """
+    Remoto em um repositório GitHub (API de conteúdo), com um arquivo por objeto sob `prefixo`.
+    Os blocos têm no máximo TAMANHO_BLOCO bytes, bem abaixo do limite de tamanho da API.
+    """
+
+    def __init__(self, token: str, repo: str, branch: str = 'main', prefixo: str = 'backup', timeout: float = 30):
+        self.repo = repo
+        self.branch = branch
+        self.prefixo = prefixo
+        self.timeout = timeout
+        self.sessao = requests.Session()
+        self.sessao.headers.update({
+            "Authorization": f"token {token}",
+            "Accept": "application/vnd.github.v3+json"
+        })
+
+    def __repr__(self):
+        return f'DestinoGitHub({self.repo!r}, {self.branch!r})'
+
+    def _url(self, chave: str) -> str:
+        return f"https://api.github.com/repos/{self.repo}/contents/{self.prefixo}/{chave}"
+
+    def _consultar(self, chave: str):
+        try:
+            resposta = self.sessao.get(self._url(chave), params={'ref': self.branch}, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise ErroRemoto(str(e)) from e
+        if resposta.status_code == 404:
+            return None
+        if resposta.status_code != 200:
+            raise ErroRemoto(f'GitHub respondeu {resposta.status_code}: {resposta.text[:200]}')
+        return resposta.json()
+
+    def existe(self, chave: str) -> bool:
+        return self._consultar(chave) is not None
+
+    def enviar(self, chave: str, conteudo: bytes):
+        payload = {
+            "message": f"Backup {chave}",
+            "content": base64.b64encode(conteudo).decode(),
+            "branch": self.branch
+        }
+        atual = self._consultar(chave)
+        if atual is not None:
+            payload["sha"] = atual["sha"]
+        try:
+            resposta = self.sessao.put(self._url(chave), json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise ErroRemoto(str(e)) from e
+        if resposta.status_code not in (200, 201):
+            raise ErroRemoto(f'GitHub respondeu {resposta.status_code}: {resposta.text[:200]}')
+
+    def ler(self, chave: str) -> bytes:
+        try:
+            resposta = self.sessao.get(
+                self._url(chave), params={'ref': self.branch}, timeout=self.timeout,
+                headers={"Accept": "application/vnd.github.raw"}
+            )
+        except requests.RequestException as e:
+            raise ErroRemoto(str(e)) from e
+        if resposta.status_code != 200:
+            raise ErroRemoto(f'GitHub respondeu {resposta.status_code}: {resposta.text[:200]}')
+        return resposta.content
+
+
+def destino_configurado():
+    """
+    Remoto definido pelas variáveis de ambiente, ou None quando nenhum está configurado.
+    """
+    if os.getenv("UNIMED_BACKUP_DIR"):
+        return DestinoDiretorio(os.getenv("UNIMED_BACKUP_DIR"))
+    if os.getenv("GITHUB_TOKEN") and os.getenv("GITHUB_REPO"):
+        return DestinoGitHub(os.getenv("GITHUB_TOKEN"), os.getenv("GITHUB_REPO"), os.getenv("GITHUB_BRANCH", "main"))
+    return None
+
+
+def chave_objeto(hash_bloco: str) -> str:
+    return f'objetos/{hash_bloco[:2]}/{hash_bloco}'
+
+
+def chave_instantaneo(diretorio: str) -> str:
+    return f'instantaneos/{os.path.basename(os.path.normpath(diretorio))}.json'
+
+
+def dividir_em_blocos(conteudo: bytes, tamanho_bloco: int = TAMANHO_BLOCO):
+    """
+    Divide o conteúdo em blocos de tamanho fixo, devolvendo pares (sha256, bloco).
+    """
+    for inicio in range(0, max(len(conteudo), 1), tamanho_bloco):
+        bloco = conteudo[inicio:inicio + tamanho_bloco]
+        yield hashlib.sha256(bloco).hexdigest(), bloco
+
+
+def _ler_bytes(caminho: str) -> bytes:
+    with open(caminho, 'rb') as arquivo:
+        return arquivo.read()
+
+
+class TrabalhadorBackup:
+    """
+    Fila de backups atendida por uma thread em segundo plano.
+
+    Parâmetros:
+        - destino: Remoto com os métodos existe(chave), enviar(chave, conteudo) e ler(chave).
+        - tentativas: Quantidade máxima de tentativas por backup.
+        - espera_inicial, espera_maxima: Espera entre tentativas, dobrando a cada falha.
+
+    Pedidos repetidos para um dataset que ainda está na fila são agrupados em um só. Os blocos
+    confirmados no remoto e os hashes dos arquivos do dataset (imutáveis) ficam em memória, então
+    um backup depois de uma ingestão lê e envia só os arquivos novos e o manifesto.
+    """
+
+    def __init__(self, destino, tentativas=TENTATIVAS, espera_inicial=ESPERA_INICIAL, espera_maxima=ESPERA_MAXIMA):
+        self.destino = destino
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self._fila = queue.Queue()
+        self._pendentes = set()
+        self._estados = {}
+        self._objetos_enviados = set()
+        self._blocos_por_arquivo = {}
+        self._ultimo_instantaneo = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def agendar(self, diretorio: str):
+        chave = os.path.abspath(diretorio)
+        with self._lock:
+            if chave in self._pendentes:
+                return
+            self._pendentes.add(chave)
+            self._atualizar_estado(chave, estado=NA_FILA, tentativa=0, mensagem=None)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name='backup', daemon=True)
+                self._thread.start()
+        self._fila.put(diretorio)
+
+    def estado(self, diretorio: str) -> dict:
+        with self._lock:
+            return dict(self._estados.get(os.path.abspath(diretorio), {}))
+
+    def aguardar(self):
+        """
+        Bloqueia até a fila esvaziar (para benchmarks e scripts; o dashboard nunca espera).
+        """
+        self._fila.join()
+
+    def _atualizar_estado(self, chave, **campos):
+        estado = self._estados.setdefault(chave, {})
+        estado.update(campos, atualizado_em=datetime.now().isoformat(timespec='seconds'))
+
+    def _executar(self):
+        while True:
+            diretorio = self._fila.get()
+            chave = os.path.abspath(diretorio)
+            with self._lock:
+                # Pedidos feitos a partir daqui entram de novo na fila, pois podem trazer dados novos
+                self._pendentes.discard(chave)
+            try:
+                self._processar(diretorio, chave)
+            finally:
+                self._fila.task_done()
+
+    def _processar(self, diretorio: str, chave: str):
+        for tentativa in range(1, self.tentativas + 1):
+            with self._lock:
+                self._atualizar_estado(chave, estado=ENVIANDO, tentativa=tentativa)
+            try:
+                resultado = self.enviar_instantaneo(diretorio)
+            except (ErroRemoto, OSError, ValueError) as e:
+                if tentativa == self.tentativas:
+                    with self._lock:
+                        self._atualizar_estado(chave, estado=FALHOU, mensagem=f'{type(e).__name__}: {e}')
+                    return
+                espera = min(self.espera_inicial * 2 ** (tentativa - 1), self.espera_maxima)
+                with self._lock:
+                    self._atualizar_estado(chave, estado=AGUARDANDO, mensagem=f'{type(e).__name__}: {e}')
+                time.sleep(espera)
+                continue
+
+            with self._lock:
+                self._atualizar_estado(chave, estado=CONCLUIDO, mensagem=None, **resultado)
+            return
+
+    def _instantaneo_local(self, diretorio: str) -> tuple:
+        """
+        Conteúdo do manifesto e arquivos referenciados por ele. O manifesto é publicado de forma
+        atômica e os arquivos que ele referencia são imutáveis, então não é preciso travar o dataset.
+        """
+        manifesto = _ler_bytes(os.path.join(diretorio, ARQUIVO_MANIFESTO))
+        conteudo = normalizar_manifesto(json.loads(manifesto))
+        arquivos = arquivos_do_manifesto(conteudo)
+        if not conteudo.get('indices') and os.path.exists(os.path.join(diretorio, ARQUIVO_INDICE)):
+            # Índice de datasets anteriores à referência no manifesto; deixa de existir na próxima ingestão
+            arquivos.append(ARQUIVO_INDICE)
+        return manifesto, arquivos
+
+    def _blocos_arquivo_imutavel(self, diretorio: str, arquivo: str, pendentes: dict, novos: dict) -> dict:
+        caminho = os.path.abspath(os.path.join(diretorio, arquivo))
+        estado = os.stat(caminho)
+        assinatura = (caminho, estado.st_size, estado.st_mtime_ns)
+        # Só entram no cache arquivos com todos os blocos já confirmados no remoto
+        descricao = self._blocos_por_arquivo.get(assinatura)
+        if descricao is None:
+            descricao = novos[assinatura] = self._descrever(_ler_bytes(caminho), pendentes)
+        return descricao
+
+    def _descrever(self, conteudo: bytes, pendentes: dict) -> dict:
+        blocos = []
+        for hash_bloco, bloco in dividir_em_blocos(conteudo):
+            blocos.append(hash_bloco)
+            if hash_bloco not in self._objetos_enviados:
+                pendentes[hash_bloco] = bloco
+        return {'tamanho': len(conteudo), 'blocos': blocos}
+
+    def enviar_instantaneo(self, diretorio: str) -> dict:
+        """
+        Envia ao remoto os blocos que ele ainda não tem e, por fim, a descrição do instantâneo.
+        Fragmentos removidos por uma compactação no meio do caminho fazem o manifesto ser relido.
+
+        Retorna a quantidade de blocos e bytes enviados nesta execução.
+        """
+        for tentativa in range(3):
+            manifesto, arquivos = self._instantaneo_local(diretorio)
+            pendentes, novos = {}, {}
+            try:
+                descricao = {
+                    arquivo: self._blocos_arquivo_imutavel(diretorio, arquivo, pendentes, novos)
+                    for arquivo in arquivos
+                }
+                break
+            except FileNotFoundError:
+                if tentativa == 2:
+                    raise
+
+        descricao[ARQUIVO_MANIFESTO] = self._descrever(manifesto, pendentes)
+
+        chave = os.path.abspath(diretorio)
+        if descricao == self._ultimo_instantaneo.get(chave):
+            return {'blocos_enviados': 0, 'bytes_enviados': 0}
+
+        enviados = bytes_enviados = 0
+        for hash_bloco, bloco in pendentes.items():
+            # Blocos são endereçados pelo conteúdo: se já existem no remoto, não são reenviados
+            if not self.destino.existe(chave_objeto(hash_bloco)):
+                self.destino.enviar(chave_objeto(hash_bloco), bloco)
+                enviados += 1
+                bytes_enviados += len(bloco)
+            self._objetos_enviados.add(hash_bloco)
+
+        instantaneo = {
+            'diretorio': os.path.basename(os.path.normpath(diretorio)),
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'tamanho_bloco': TAMANHO_BLOCO,
+            'arquivos': descricao,
+        }
+        self.destino.enviar(
+            chave_instantaneo(diretorio),
+            json.dumps(instantaneo, ensure_ascii=False, indent=2).encode('utf-8')
+        )
+        self._ultimo_instantaneo[chave] = descricao
+
+        # Esquece os fragmentos do dataset que deixaram de existir (ex.: removidos pela compactação)
+        atuais = {os.path.abspath(os.path.join(diretorio, arquivo)) for arquivo in arquivos}
+        self._blocos_por_arquivo = {
+            assinatura: blocos for assinatura, blocos in self._blocos_por_arquivo.items()
+            if not assinatura[0].startswith(chave + os.sep) or assinatura[0] in atuais
+        }
+        self._blocos_por_arquivo.update(novos)
+        return {'blocos_enviados': enviados, 'bytes_enviados': bytes_enviados}
+
+
+def restaurar_backup(destino, diretorio: str, destino_local: str = None) -> list:
+    """
+    Remonta em `destino_local` (padrão: o próprio `diretorio`) o último instantâneo enviado do
+    dataset, conferindo o hash de cada bloco. Devolve a lista de arquivos restaurados.
+    """
+    destino_local = destino_local or diretorio
+    instantaneo = json.loads(destino.ler(chave_instantaneo(diretorio)))
+
+    # O manifesto é publicado por último, para que o dataset só apareça depois de completo
+    arquivos = sorted(instantaneo['arquivos'], key=lambda nome: nome == ARQUIVO_MANIFESTO)
+    for arquivo in arquivos:
+        partes = []
+        for hash_bloco in instantaneo['arquivos'][arquivo]['blocos']:
+            bloco = destino.ler(chave_objeto(hash_bloco))
+            if hashlib.sha256(bloco).hexdigest() != hash_bloco:
+                raise ValueError(f'Bloco corrompido no backup: {hash_bloco}')
+            partes.append(bloco)
+
+        caminho = os.path.join(destino_local, arquivo)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f'{caminho}.restauracao.tmp'
+        with open(temporario, 'wb') as saida:
+            saida.write(b''.join(partes))
+        os.replace(temporario, caminho)
+    return arquivos
+
+
+_trabalhador = None
+_trabalhador_lock = threading.Lock()
+
+
+def trabalhador_backup():
+    """
+    Trabalhador do processo, criado no primeiro uso com o remoto configurado (None se não houver).
+    """
+    global _trabalhador
+    with _trabalhador_lock:
+        if _trabalhador is None:
+            destino = destino_configurado()
+            if destino is None:
+                return None
+            _trabalhador = TrabalhadorBackup(destino)
+        return _trabalhador
+
+
+def agendar_backup(diretorio: str) -> bool:
+    """
+    Coloca o backup do dataset na fila e retorna imediatamente. Retorna False quando não há remoto configurado.
+    """
+    trabalhador = trabalhador_backup()
+    if trabalhador is None:
+        return False
+    trabalhador.agendar(diretorio)
+    return True
+
+
+def estado_backup(diretorio: str) -> dict:
+    """
+    Situação do último backup agendado do dataset: 'estado', 'tentativa', 'mensagem' (erro da
+    última falha), 'blocos_enviados', 'bytes_enviados' e 'atualizado_em'.
+    """
+    trabalhador = trabalhador_backup()
+    if trabalhador is None:
+        return {'estado': DESATIVADO}
+    return trabalhador.estado(diretorio)
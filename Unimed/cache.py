@@ -0,0 +1,282 @@
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def tamanho_em_bytes(valor):
+    """
+    Estima quanto um valor ocupa em memória, para controle do orçamento do cache.
+    """
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        try:
+            uso = valor.memory_usage(index=True, deep=True)
+        except ValueError:
+            # memory_usage(deep=True) não aceita arrays de objetos somente leitura
+            uso = valor.memory_usage(index=True, deep=False)
+        return int(uso.sum()) if isinstance(uso, pd.Series) else int(uso)
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, (bytes, bytearray, str)):
+        return len(valor)
+    return 1024
+
+
+def congelar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Marca os arrays de um DataFrame como somente leitura.
+
+    Qualquer escrita in-place (ex.: df.loc[...] = ...) passa a gerar erro, enquanto
+    atribuições de colunas inteiras em uma cópia rasa continuam funcionando normalmente.
+    """
+    for bloco in df._mgr.blocks:
+        valores = bloco.values
+        for array in (valores, getattr(valores, '_ndarray', None), getattr(valores, '_codes', None)):
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+    return df
+
+
+class CacheLRU:
+    """
+    Cache LRU compartilhado entre threads (sessões do Streamlit), limitado por memória.
+
+    Parâmetros:
+        - limite_bytes: Orçamento máximo de memória; as entradas menos usadas são descartadas primeiro.
+        - ttl: Validade das entradas em segundos (None não expira por tempo).
+
+    As consultas são contadas em `acertos` e `falhas` (ver estatisticas()).
+    """
+
+    def __init__(self, limite_bytes, ttl=None):
+        self.limite_bytes = limite_bytes
+        self.ttl = ttl
+        self.acertos = 0
+        self.falhas = 0
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[2] is not None and entrada[2] <= time.monotonic():
+                self._bytes -= self._entradas.pop(chave)[1]
+                entrada = None
+            if entrada is None:
+                self.falhas += 1
+                return padrao
+            self.acertos += 1
+            self._entradas.move_to_end(chave)
+            return entrada[0]
+
+    def guardar(self, chave, valor, tamanho=None):
+        tamanho = tamanho_em_bytes(valor) if tamanho is None else tamanho
+        expira_em = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if chave in self._entradas:
+                self._bytes -= self._entradas.pop(chave)[1]
+            if tamanho > self.limite_bytes:
+                return valor
+            self._entradas[chave] = (valor, tamanho, expira_em)
+            self._bytes += tamanho
+            while self._bytes > self.limite_bytes:
+                _, (_, tamanho_removido, _) = self._entradas.popitem(last=False)
+                self._bytes -= tamanho_removido
+        return valor
+
+    def invalidar(self, predicado):
+        """
+        Remove todas as entradas cuja chave satisfaz o predicado.
+        """
+        with self._lock:
+            for chave in [c for c in self._entradas if predicado(c)]:
+                self._bytes -= self._entradas.pop(chave)[1]
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        """
+        Acertos, falhas, taxa de acerto, entradas e bytes em uso desde a criação do cache.
+        """
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+                'entradas': len(self._entradas),
+                'bytes': self._bytes
+            }
+
+    def __len__(self):
+        return len(self._entradas)
+
+    @property
+    def bytes_em_uso(self):
+        return self._bytes
+
+
+# Cache de DataFrames carregados do disco, compartilhado por todas as sessões do processo.
+# O orçamento pode ser ajustado pela variável de ambiente UNIMED_CACHE_MB.
+cache_dados = CacheLRU(int(os.getenv("UNIMED_CACHE_MB", "512")) * 1024 * 1024)
+
+# Resultados das funções de cálculo memorizadas com @memorizar, também compartilhados entre sessões.
+# Orçamento em UNIMED_CACHE_CALCULOS_MB e validade (segundos) em UNIMED_CACHE_CALCULOS_TTL.
+cache_calculos = CacheLRU(
+    int(os.getenv("UNIMED_CACHE_CALCULOS_MB", "128")) * 1024 * 1024,
+    ttl=float(os.getenv("UNIMED_CACHE_CALCULOS_TTL", "3600"))
+)
+
+# Especificações JSON das figuras do Plotly (ver figura_memorizada em charts.py), também compartilhadas
+# entre sessões. A chave inclui o hash dos dados agregados, então não há o que invalidar quando os
+# dados mudam: as entradas antigas só deixam de ser consultadas. Orçamento em UNIMED_CACHE_FIGURAS_MB.
+cache_figuras = CacheLRU(int(os.getenv("UNIMED_CACHE_FIGURAS_MB", "32")) * 1024 * 1024)
+
+
+def _enderecos(serie: pd.Series):
+    """
+    Endereços de memória dos buffers de uma coluna, ou None quando o tipo não é reconhecido.
+    """
+    valores = serie.array
+    arrays = [getattr(valores, atributo, None) for atributo in ('_codes', '_ndarray', '_data', '_mask')]
+    arrays = [array for array in arrays if isinstance(array, np.ndarray)]
+    if arrays:
+        return tuple((array.__array_interface__['data'][0], array.strides) for array in arrays)
+
+    pa_array = getattr(valores, '_pa_array', None)
+    if pa_array is not None:
+        return tuple(
+            (pedaco.offset, len(pedaco), tuple(buffer.address for buffer in pedaco.buffers() if buffer is not None))
+            for pedaco in pa_array.chunks
+        )
+    return None
+
+
+def _impressao(df: pd.DataFrame):
+    """
+    Identifica as linhas, colunas e buffers de um DataFrame sem ler os dados.
+    """
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        return None
+    enderecos = []
+    for coluna, serie in df.items():
+        endereco = _enderecos(serie)
+        if endereco is None:
+            return None
+        enderecos.append((coluna, serie.dtype, endereco))
+    return len(df), tuple(enderecos)
+
+
+def marcar_versao(df: pd.DataFrame, versao) -> pd.DataFrame:
+    """
+    Associa ao DataFrame (em df.attrs) a versão dos dados de que ele veio, usada por @memorizar.
+
+    A versão só continua valendo enquanto o DataFrame tiver exatamente as mesmas linhas e os mesmos
+    buffers: o pandas propaga attrs para filtros e cópias, e esses derivados deixam de ser reconhecidos.
+    Deve ser chamada com os arrays já congelados (congelar_dataframe).
+    """
+    impressao = _impressao(df)
+    if impressao is not None:
+        df.attrs['versao_dataset'] = (versao, impressao)
+    return df
+
+
+def versao_dataframe(df: pd.DataFrame):
+    """
+    Versão registrada por marcar_versao, ou None se o DataFrame não é mais o mesmo que foi marcado.
+    """
+    marcada = df.attrs.get('versao_dataset')
+    if marcada is None:
+        return None
+    versao, impressao = marcada
+    return versao if _impressao(df) == impressao else None
+
+
+class _NaoMemorizavel(Exception):
+    pass
+
+
+_AUSENTE = object()
+
+
+def _chave_argumento(valor):
+    if isinstance(valor, pd.DataFrame):
+        versao = versao_dataframe(valor)
+        if versao is None:
+            raise _NaoMemorizavel
+        return ('DataFrame', versao, tuple(valor.columns))
+    if isinstance(valor, (list, tuple, pd.Series, pd.Index, np.ndarray, pd.Categorical)):
+        return tuple(_chave_argumento(item) for item in valor)
+    if isinstance(valor, (set, frozenset)):
+        return frozenset(_chave_argumento(item) for item in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((chave, _chave_argumento(item)) for chave, item in valor.items()))
+    try:
+        hash(valor)
+    except TypeError:
+        raise _NaoMemorizavel
+    return valor
+
+
+def _versoes(chave_argumentos):
+    if isinstance(chave_argumentos, tuple):
+        if len(chave_argumentos) == 3 and chave_argumentos[0] == 'DataFrame':
+            yield chave_argumentos[1]
+        else:
+            for item in chave_argumentos:
+                yield from _versoes(item)
+
+
+def _entregar(resultado):
+    # O resultado guardado é compartilhado entre sessões: cada chamada recebe uma cópia rasa
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        return resultado.copy(deep=False)
+    if isinstance(resultado, tuple):
+        return tuple(_entregar(item) for item in resultado)
+    return resultado
+
+
+def _congelar(resultado):
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        return congelar_dataframe(resultado)
+    if isinstance(resultado, tuple):
+        return tuple(_congelar(item) for item in resultado)
+    return resultado
+
+
+def memorizar(funcao):
+    """
+    Memoriza uma função de cálculo pura no cache_calculos.
+
+    A chave é o nome da função mais os argumentos; DataFrames entram pela versão registrada em
+    marcar_versao (dataset, intervalo de datas, colunas e, quando filtrado, o analista). Chamadas com
+    DataFrames sem versão reconhecida (filtrados ou alterados pelo chamador) são apenas executadas.
+
+    Só funções puras podem ser memorizadas: nada de st.* (que não se repetiria num acerto) nem de
+    escrita nos DataFrames recebidos. O resultado volta como cópia rasa de arrays somente leitura.
+    """
+    nome = f'{funcao.__module__}.{funcao.__qualname__}'
+
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        try:
+            argumentos = _chave_argumento((args, kwargs))
+        except _NaoMemorizavel:
+            return funcao(*args, **kwargs)
+
+        chave = (nome, tuple(_versoes(argumentos)), argumentos)
+        resultado = cache_calculos.obter(chave, _AUSENTE)
+        if resultado is _AUSENTE:
+            resultado = cache_calculos.guardar(chave, _congelar(funcao(*args, **kwargs)))
+        return _entregar(resultado)
+
+    return envolvida
+
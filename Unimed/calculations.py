@@ -4,53 +4,79 @@ import plotly.express as px
 import math
 import streamlit as st
 from io import BytesIO
-import requests
-import base64
-from datetime import timedelta
+from datetime import datetime, timedelta
+from .backup import agendar_backup, estado_backup
+from .cache import cache_calculos, cache_dados, congelar_dataframe, marcar_versao, tamanho_em_bytes
+from .charts import datas_em_ms, eixo_datas
+from .formatacao import formatar_hms, formatar_min_seg
+from .metricas import FINALIZACOES_TMO_GERAL, calcular_sla, calcular_grafico_tmo_analista_por_mes, calcular_metricas_por_analista, calcular_tabela_ranking, calcular_tempo_ocioso_por_analista, calcular_tempo_ocioso_por_dia, calcular_tmo_cadastro_atualizacao_por_fila, calcular_tmo_por_fila, calcular_tmo_por_mes_formatado, calcular_tmo_por_mes_longo, dividir_tempo, somar_metricas
+from .planilha import ler_xlsx_em_blocos
+from .resumo import resumo_vazio
+from .storage import anexar_blocos, anexar_linhas, assinatura_dataset, criar_dataset, diretorio_dataset, diretorio_sla, existe_dataset, intervalo_datas, ler_dataset, ler_resumo
+
+# Colunas persistidas com tipos nativos no parquet (duração e data/hora)
+COLUNAS_DURACAO = ['TEMPO MÉDIO OPERACIONAL']
+COLUNAS_DATA = ['DATA DE CONCLUSÃO DA TAREFA', 'DATA DE INÍCIO DA TAREFA']
+
+# Colunas de baixa cardinalidade guardadas como dicionário no parquet e carregadas como category,
+# para que filtros e agrupamentos trabalhem sobre códigos inteiros em vez de comparar textos
+COLUNAS_CATEGORICAS = ['FILA', 'FINALIZAÇÃO', 'SITUAÇÃO DA TAREFA', 'USUÁRIO QUE CONCLUIU A TAREFA']
+
+# Colunas lidas por cada visão do dashboard; as demais (textos livres, CPF, CNPJ...) não são carregadas
+COLUNAS_VISAO_GERAL = [
+    'NÚMERO DO PROTOCOLO',
+    'USUÁRIO QUE CONCLUIU A TAREFA',
+    'SITUAÇÃO DA TAREFA',
+    'TEMPO MÉDIO OPERACIONAL',
+    'DATA DE CONCLUSÃO DA TAREFA',
+    'FINALIZAÇÃO',
+    'FILA',
+    'TAREFA',
+    'TP CAUSA (TP COMPLEMENTO)'
+]
+COLUNAS_METRICAS_INDIVIDUAIS = COLUNAS_VISAO_GERAL + ['DATA DE INÍCIO DA TAREFA']
+COLUNAS_DIARIO_DE_BORDO = [
+    'DATA CRIAÇÃO PROTOCOLO',
+    'DATA DE CONCLUSÃO DA TAREFA',
+    'FILA',
+    'TAREFA'
+]
 
-def load_data(usuario: str) -> pd.DataFrame:
+def normalizar_tipos(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Carrega os dados de um arquivo .parquet baseado no nome do usuário.
-    Se o arquivo não existir, cria um novo com colunas padrão.
+    Converte 'TEMPO MÉDIO OPERACIONAL' para timedelta, as datas de início/conclusão da tarefa
+    para datetime e as colunas de COLUNAS_CATEGORICAS para category, uma única vez na ingestão.
+    Colunas que já estão tipadas não são reprocessadas.
+
+    Agrupamentos sobre colunas category devem usar observed=True, para não gerar grupos vazios.
     """
-    parquet_file = f'dados_acumulados_{usuario}.parquet'
+    for coluna in COLUNAS_DURACAO:
+        if coluna in df.columns and not pd.api.types.is_timedelta64_dtype(df[coluna]):
+            df[coluna] = pd.to_timedelta(df[coluna], errors='coerce')
 
-    try:
-        if os.path.exists(parquet_file):
-            df_total = pd.read_parquet(parquet_file)
+    for coluna in COLUNAS_DATA:
+        if coluna in df.columns and not pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            df[coluna] = pd.to_datetime(df[coluna], format='%d/%m/%Y %H:%M:%S', errors='coerce')
 
-            if 'Justificativa' not in df_total.columns:
-                df_total['Justificativa'] = ""
-        else:
-            raise FileNotFoundError
-
-    except (FileNotFoundError, ValueError, OSError):
-        st.toast("📁 Arquivo não encontrado ou corrompido. Criando novo arquivo vazio.")
-        df_total = pd.DataFrame(columns=[
-            'NÚMERO DO PROTOCOLO',
-            'USUÁRIO QUE CONCLUIU A TAREFA',
-            'SITUAÇÃO DA TAREFA',
-            'TEMPO MÉDIO OPERACIONAL',
-            'DATA DE CONCLUSÃO DA TAREFA',
-            'FINALIZAÇÃO',
-            'Justificativa'
-        ])
-        df_total.to_parquet(parquet_file, index=False)
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
 
-    return df_total
+    return df
 
-def save_data(df: pd.DataFrame, usuario: str) -> bool:
+def preparar_para_gravacao(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Salva os dados do DataFrame localmente em formato Parquet, remove robôs e duplicatas reais
-    (comparadas com o histórico) e realiza upload para o GitHub.
+    Limpa um lote antes de gravá-lo: remove robôs e colunas descartadas, tipa as colunas de
+    tempo e converte para texto as colunas que podem gerar erro no Parquet.
     """
-    parquet_file = f'dados_acumulados_{usuario}.parquet'
-
     if 'Justificativa' not in df.columns:
         df['Justificativa'] = ""
 
     df = df.drop(columns=['Nº DA OAB'], errors='ignore')
 
+    # Tipagem feita uma única vez aqui, para que o parquet já guarde duração e datas nativas
+    df = normalizar_tipos(df)
+
     # Remove registros de robôs
     if 'USUÁRIO QUE CONCLUIU A TAREFA' in df.columns:
         df = df[
@@ -58,273 +84,240 @@ def save_data(df: pd.DataFrame, usuario: str) -> bool:
             ~df['USUÁRIO QUE CONCLUIU A TAREFA'].str.lower().isin(['robohub_amil', 'robohub_uni'])
         ]
 
-    # Carrega dados existentes
-    df_existente = load_data(usuario)
-
-    # Verifica duplicatas reais (dados do upload que já existem no histórico)
-    duplicatas = pd.merge(df, df_existente, how='inner')
-    if not duplicatas.empty:
-        st.toast(f"🧹 {len(duplicatas)} linha(s) do novo arquivo já existiam no histórico e foram ignoradas.")
-
-    # Junta os dados e remove duplicatas completas
-    df_total = pd.concat([df_existente, df], ignore_index=True)
-    df_total.drop_duplicates(keep='first', inplace=True)
-
     # 🔧 Conversão leve de colunas específicas que podem gerar erro no Parquet
     colunas_problema = ['CÓDIGO DO BENEFICIÁRIO', 'CPF', 'CNPJ', 'ID PROJURIS']
     for col in colunas_problema:
-        if col in df_total.columns:
-            df_total[col] = df_total[col].astype(str)
+        if col in df.columns:
+            df[col] = df[col].astype(str)
 
-    # Salva o arquivo final
-    df_total.to_parquet(parquet_file, index=False)
-    st.toast(f"💾 Arquivo '{parquet_file}' salvo localmente com sucesso.")
-
-    # Upload para GitHub
-    token = os.getenv("GITHUB_TOKEN")
-    repo = os.getenv("GITHUB_REPO")
-    branch = os.getenv("GITHUB_BRANCH", "main")
+    return df
 
-    if not all([token, repo]):
-        st.toast("⚠️ Token ou repositório GitHub não configurados. Upload não realizado.")
+def migrar_parquet_legado(usuario: str) -> bool:
+    """
+    Converte o antigo arquivo único 'dados_acumulados_<usuario>.parquet' no dataset em fragmentos.
+    O arquivo original é mantido intacto como cópia de segurança.
+    """
+    parquet_file = f'dados_acumulados_{usuario}.parquet'
+    if not os.path.exists(parquet_file):
         return False
 
-    api_url = f"https://api.github.com/repos/{repo}/contents/{parquet_file}"
-
-    try:
-        with open(parquet_file, "rb") as f:
-            content = base64.b64encode(f.read()).decode()
-
-        response = requests.get(api_url, headers={"Authorization": f"token {token}"})
-        sha = response.json().get("sha") if response.status_code == 200 else None
-
-        payload = {
-            "message": f"Atualizando {parquet_file}",
-            "content": content,
-            "branch": branch
-        }
-        if sha:
-            payload["sha"] = sha
-
-        headers = {
-            "Authorization": f"token {token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-
-        r = requests.put(api_url, json=payload, headers=headers)
-
-        if r.status_code in [200, 201]:
-            st.toast(f"✅ Arquivo '{parquet_file}' atualizado com sucesso no GitHub.")
-            return True
-        else:
-            st.toast(f"❌ Erro ao atualizar o GitHub: {r.text}")
-            return False
+    df_legado = preparar_para_gravacao(pd.read_parquet(parquet_file))
+    anexar_linhas(diretorio_dataset(usuario), df_legado)
+    return True
+
+def _dataframe_vazio(columns=None) -> pd.DataFrame:
+    return normalizar_tipos(pd.DataFrame(columns=columns if columns is not None else [
+        'NÚMERO DO PROTOCOLO',
+        'USUÁRIO QUE CONCLUIU A TAREFA',
+        'SITUAÇÃO DA TAREFA',
+        'TEMPO MÉDIO OPERACIONAL',
+        'DATA DE CONCLUSÃO DA TAREFA',
+        'FINALIZAÇÃO',
+        'Justificativa'
+    ]))
+
+def load_data(usuario: str, date_from=None, date_to=None, columns=None) -> pd.DataFrame:
+    """
+    Carrega os dados acumulados do usuário a partir do dataset particionado por mês.
+    Se o dataset não existir, migra o antigo arquivo único ou cria um dataset vazio; um erro
+    de leitura de um dataset existente devolve um DataFrame vazio sem tocar nos arquivos.
 
-    except Exception as e:
-        st.toast(f"❌ Erro inesperado ao enviar para o GitHub: {e}")
-        return False
+    Parâmetros:
+        - usuario: Usuário logado.
+        - date_from, date_to: Intervalo (inclusivo) da data de conclusão. Apenas as partições
+          mensais do intervalo são lidas e o filtro é aplicado já na leitura do parquet.
+        - columns: Colunas a carregar (None carrega todas). Colunas que não existem no
+          histórico são ignoradas, como acontecia com planilhas antigas sem elas.
+
+    As colunas de duração e data já vêm tipadas da ingestão.
+
+    A leitura é memorizada em um cache compartilhado entre as sessões, chaveado por
+    usuário, caminho, versão do manifesto (contador de publicações), intervalo e colunas. O DataFrame devolvido é uma
+    cópia rasa de arrays somente leitura: novas colunas podem ser atribuídas, mas escritas in-place não.
+    A chave também fica registrada como versão do DataFrame, para as funções com @memorizar.
+    """
+    diretorio = diretorio_dataset(usuario)
+    colunas = tuple(columns) if columns is not None else None
 
-def calcular_tmo_por_dia(df: pd.DataFrame) -> pd.DataFrame:
-    df['Dia'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA']).dt.date
-    df['SITUAÇÃO DA TAREFA'] = df['SITUAÇÃO DA TAREFA'].str.upper()
-    df['TEMPO MÉDIO OPERACIONAL'] = pd.to_timedelta(df['TEMPO MÉDIO OPERACIONAL'], errors='coerce')
+    try:
+        if not existe_dataset(diretorio) and not migrar_parquet_legado(usuario):
+            raise FileNotFoundError
 
-    df_finalizados = df[df['SITUAÇÃO DA TAREFA'].isin(['FINALIZADA', 'CANCELADA'])].copy()
+        caminho = os.path.abspath(diretorio)
+        versao = assinatura_dataset(diretorio)
+        chave = (usuario, caminho, *versao, date_from, date_to, colunas)
+        df_total = cache_dados.obter(chave)
 
-    df_tmo = df_finalizados.groupby('Dia').agg(
-        Tempo_Total=('TEMPO MÉDIO OPERACIONAL', 'sum'),
-        Total_Finalizados_Cancelados=('SITUAÇÃO DA TAREFA', 'count')
-    ).reset_index()
+        if df_total is None:
+            df_total = ler_dataset(diretorio, date_from, date_to, columns)
+            if df_total.columns.empty:
+                df_total = _dataframe_vazio(columns)
+            else:
+                # Fragmentos com dicionários diferentes voltam como texto após a concatenação
+                df_total = normalizar_tipos(df_total)
 
-    df_tmo['TMO'] = df_tmo['Tempo_Total'] / df_tmo['Total_Finalizados_Cancelados']
+            if 'Justificativa' not in df_total.columns and (columns is None or 'Justificativa' in columns):
+                df_total['Justificativa'] = ""
 
-    # Cria coluna formatada separada
-    df_tmo['TMO_Formatado'] = df_tmo['TMO'].apply(format_timedelta)
+            # Descarta leituras de versões antigas do mesmo usuário antes de guardar a nova
+            cache_dados.invalidar(lambda c: c[0] == usuario and c[1] == caminho and tuple(c[2:4]) != versao)
+            tamanho = tamanho_em_bytes(df_total)
+            cache_dados.guardar(chave, marcar_versao(congelar_dataframe(df_total), chave), tamanho)
 
-    return df_tmo[['Dia', 'TMO', 'TMO_Formatado']]
+        df_total = df_total.copy(deep=False)
 
-def calcular_tmo_por_dia_geral(df):
-    # Certifica-se de que a coluna de data está no formato correto
-    df['Dia'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA']).dt.date
+    except (FileNotFoundError, ValueError, OSError):
+        df_total = _dataframe_vazio(columns)
+        if existe_dataset(diretorio):
+            # Falha de leitura de um dataset que existe (disco indisponível, arquivo em uso...): nada é gravado
+            st.toast("⚠️ Não foi possível ler o histórico agora. Nenhum dado foi alterado; recarregue a página.")
+        else:
+            st.toast("📁 Histórico não encontrado. Criando um novo histórico vazio.")
+            criar_dataset(diretorio)
 
-    # Filtra tarefas finalizadas ou canceladas, pois estas são relevantes para o cálculo do TMO
-    df_finalizados = df[df['SITUAÇÃO DA TAREFA'].isin(['Finalizado', 'Cancelada'])].copy()
-    
-    # Agrupamento por dia para calcular o tempo médio diário
-    df_tmo = df_finalizados.groupby('Dia').agg(
-        Tempo_Total=('TEMPO MÉDIO OPERACIONAL', 'sum'),  # Soma total do tempo por dia
-        Total_Finalizados_Cancelados=('SITUAÇÃO DA TAREFA', 'count')  # Total de tarefas finalizadas/canceladas por dia
-    ).reset_index()
+    return df_total
 
-    # Calcula o TMO (Tempo Médio Operacional) diário
-    df_tmo['TMO'] = df_tmo['Tempo_Total'] / df_tmo['Total_Finalizados_Cancelados']
-    
-    # Remove valores nulos e formata o tempo médio para o gráfico
-    df_tmo['TMO'] = df_tmo['TMO'].fillna(pd.Timedelta(seconds=0))  # Preenche com zero se houver NaN
-    df_tmo['TMO_Formatado'] = df_tmo['TMO'].apply(format_timedelta)  # Formata para exibição
-    
-    return df_tmo[['Dia', 'TMO', 'TMO_Formatado']]
+def load_resumo_diario(usuario: str, date_from=None, date_to=None) -> pd.DataFrame:
+    """
+    Carrega o resumo diário do usuário (analista x dia x fila x finalização x situação, com
+    Quantidade, Quantidade_TMO e Tempo_Total), mantido pelo save_data a cada ingestão.
 
-def calcular_produtividade_diaria(df):
-    # Garante que a coluna 'Próximo' esteja em formato de data
-    df['Dia'] = df['DATA DE CONCLUSÃO DA TAREFA'].dt.date
+    Os cálculos diários e mensais (produtividade, TMO por dia/mês, melhor dia) aceitam este
+    resumo no lugar das tarefas, e assim o custo passa a depender dos dias do período e não da
+    quantidade de tarefas. A leitura usa o mesmo cache compartilhado de load_data.
+    """
+    diretorio = diretorio_dataset(usuario)
 
-    # Agrupa e soma os status para calcular a produtividade
-    df_produtividade = df.groupby('Dia').agg(
-        Finalizado=('FINALIZAÇÃO', 'count'),
-    ).reset_index()
+    try:
+        if not existe_dataset(diretorio) and not migrar_parquet_legado(usuario):
+            return resumo_vazio()
 
-    # Calcula a produtividade total
-    df_produtividade['Produtividade'] = + df_produtividade['Finalizado'] 
-    return df_produtividade
+        caminho = os.path.abspath(diretorio)
+        versao = assinatura_dataset(diretorio)
+        chave = (usuario, caminho, *versao, date_from, date_to, 'resumo_diario')
+        resumo = cache_dados.obter(chave)
 
-def calcular_produtividade_diaria_cadastro(df):
-    # Garante que a coluna 'Próximo' esteja em formato de data
-    df['Dia'] = df['DATA DE CONCLUSÃO DA TAREFA'].dt.date
+        if resumo is None:
+            resumo = ler_resumo(diretorio, date_from, date_to)
+            cache_dados.invalidar(lambda c: c[0] == usuario and c[1] == caminho and tuple(c[2:4]) != versao)
+            cache_dados.guardar(chave, marcar_versao(congelar_dataframe(resumo), chave))
 
-    # Agrupa e soma os status para calcular a produtividade
-    df_produtividade_cadastro = df.groupby('Dia').agg(
-        Finalizado=('FINALIZAÇÃO', lambda x: x[x == 'Cadastro realizado'].count()),
-    ).reset_index()
+        return resumo.copy(deep=False)
 
-    # Calcula a produtividade total
-    df_produtividade_cadastro['Produtividade'] = + df_produtividade_cadastro['Finalizado']
-    return df_produtividade_cadastro
+    except (FileNotFoundError, ValueError, OSError):
+        return resumo_vazio()
 
-def calcular_produtividade_diaria_subsidios(df: pd.DataFrame) -> pd.DataFrame:
+def intervalo_datas_usuario(usuario: str) -> tuple:
     """
-    Calcula a produtividade diária apenas para as filas que contenham 'Elaborar Subsídios'.
-    A contagem considera tarefas finalizadas com qualquer status.
+    Datas mínima e máxima de conclusão do histórico do usuário, lidas do manifesto.
+    Usadas para preencher os filtros de data antes de carregar os dados.
     """
+    diretorio = diretorio_dataset(usuario)
+    try:
+        if not existe_dataset(diretorio) and not migrar_parquet_legado(usuario):
+            return None, None
+        return intervalo_datas(diretorio)
+    except (ValueError, OSError):
+        return None, None
 
-    # Garante que a coluna de data esteja corretamente formatada
-    df['Dia'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA']).dt.date
+def estado_backup_usuario(usuario: str) -> dict:
+    """
+    Situação do backup em segundo plano do dataset do usuário (ver backup.estado_backup).
+    """
+    return estado_backup(diretorio_dataset(usuario))
 
-    # Filtra apenas as filas de subsídios
-    df_subsidios = df[df['FILA'].str.contains(r'Elaborar\s+(Subsídios|Subsidios)', case=False, na=False, regex=True)]
+def exibir_estado_backup(usuario: str, em_andamento: bool):
+    """
+    Situação do backup na barra lateral. Enquanto há envio em andamento, o quadro é um
+    fragmento que se atualiza sozinho a cada 2 segundos, sem rerun da página.
+    """
+    @st.fragment(run_every=2 if em_andamento else None)
+    def quadro():
+        estado = estado_backup_usuario(usuario)
+        situacao = estado.get('estado')
+        hora = estado.get('atualizado_em', '')[11:16]
+        if situacao == 'concluído':
+            enviado = estado.get('bytes_enviados', 0) / 2**20
+            st.caption(f"☁️ Backup concluído às {hora} ({estado.get('blocos_enviados', 0)} bloco(s) novo(s), {enviado:.1f} MB).")
+        elif situacao == 'falhou':
+            st.error(f"❌ Backup falhou após {estado.get('tentativa')} tentativa(s): {estado.get('mensagem')}")
+        elif situacao == 'aguardando nova tentativa':
+            st.caption(f"⏳ Backup: tentativa {estado.get('tentativa')} falhou ({estado.get('mensagem')}); tentando novamente.")
+        else:
+            st.caption(f"⏳ Backup {situacao}...")
 
-    # Filtra tarefas finalizadas
-    df_subsidios = df_subsidios[df_subsidios['SITUAÇÃO DA TAREFA'].str.upper() == 'FINALIZADA']
+    quadro()
 
-    # Agrupa por dia e conta quantas tarefas finalizadas houve
-    df_produtividade_subsidios = df_subsidios.groupby('Dia').size().reset_index(name='Produtividade')
+def ler_planilha_enviada(arquivo, destino=st):
+    """
+    Lê a planilha enviada em blocos de linhas (ver planilha.py), exibindo em `destino` uma barra
+    com as linhas já processadas. Gera os blocos para save_data / save_sla_data, que gravam cada
+    um antes de o próximo ser lido; a barra some ao fim da leitura.
+    """
+    barra = destino.progress(0.0, text=f'Lendo "{arquivo.name}"...')
 
-    return df_produtividade_subsidios
+    def ao_ler(lidas, total):
+        if total:
+            barra.progress(min(lidas / total, 1.0), text=f'{lidas:,} de {total:,} linhas processadas'.replace(',', '.'))
+        else:
+            barra.progress(0.0, text=f'{lidas:,} linhas processadas'.replace(',', '.'))
 
-def convert_to_timedelta_for_calculations(df):
-    df['TEMPO MÉDIO OPERACIONAL'] = pd.to_timedelta(df['TEMPO MÉDIO OPERACIONAL'], errors='coerce')
-    return df
+    try:
+        yield from ler_xlsx_em_blocos(arquivo, ao_ler=ao_ler)
+    finally:
+        barra.empty()
 
-def convert_to_datetime_for_calculations(df):
-    df['DATA DE CONCLUSÃO DA TAREFA'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
-    return df
-        
-def format_timedelta(td):
-    if pd.isnull(td):
-        return "0 min"
-    total_seconds = int(td.total_seconds())
-    minutes, seconds = divmod(total_seconds, 60)
-    return f"{minutes} min {seconds}s"
-
-def format_time_delta_hms(td):
-    if pd.isnull(td):
-        return "00:00:00"
-    total_seconds = int(td.total_seconds())
-    hours, remainder = divmod(total_seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-
-def format_timedelta_grafico_tmo(td):
-    if pd.isnull(td):
-        return "00:00:00"
-    total_seconds = int(td.total_seconds())
-    hours, remainder = divmod(total_seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-
-# Função para calcular o TMO por analista
-def calcular_tmo_por_dia(df):
-    df['Dia'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA']).dt.date
-    df_finalizados = df[df['SITUAÇÃO DA TAREFA'].isin(['Finalizada', 'Cancelada'])].copy()
-    
-    # Agrupando por dia
-    df_tmo = df_finalizados.groupby('Dia').agg(
-        Tempo_Total=('TEMPO MÉDIO OPERACIONAL', 'sum'),  # Soma total do tempo
-        Total_Finalizados_Cancelados=('SITUAÇÃO DA TAREFA', 'count')  # Total de tarefas finalizadas ou canceladas
-    ).reset_index()
+def _blocos(dados):
+    return [dados] if isinstance(dados, pd.DataFrame) else dados
 
-    # Calcula o TMO (Tempo Médio Operacional)
-    df_tmo['TMO'] = df_tmo['Tempo_Total'] / df_tmo['Total_Finalizados_Cancelados']
-    
-    # Formata o tempo médio no formato HH:MM:SS
-    df_tmo['TMO'] = df_tmo['TMO'].apply(format_timedelta)
-    return df_tmo[['Dia', 'TMO']]
+def save_data(dados, usuario: str) -> bool:
+    """
+    Anexa ao histórico apenas as linhas inéditas do lote enviado, remove robôs e agenda o
+    backup em segundo plano. O lote pode ser um DataFrame ou uma sequência de blocos (ver
+    ler_planilha_enviada), gravados um a um com memória limitada.
+
+    As duplicatas são detectadas pelo índice persistido de chaves (protocolo, ID da tarefa e
+    data de conclusão), sem reler o histórico; as linhas novas viram um novo fragmento parquet
+    e a compactação dos fragmentos acontece em segundo plano. O resumo diário
+    (load_resumo_diario) recebe as linhas novas na mesma gravação.
+
+    O retorno acontece logo após a gravação local: o backup é só colocado na fila (ver backup.py)
+    e seu andamento é consultado com estado_backup_usuario. Retorna False quando não há remoto
+    de backup configurado.
+    """
+    diretorio = diretorio_dataset(usuario)
+    if not existe_dataset(diretorio):
+        migrar_parquet_legado(usuario)
 
-def calcular_tmo_por_dia_cadastro(df):
-    df['Dia'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA']).dt.date
-    df_finalizados_cadastro = df[df['FINALIZAÇÃO'] == 'CADASTRADO'].copy()
-    
-    # Agrupando por dia
-    df_tmo_cadastro = df_finalizados_cadastro.groupby('Dia').agg(
-        Tempo_Total=('TEMPO MÉDIO OPERACIONAL', 'sum'),  # Soma total do tempo
-        Total_Finalizados_Cancelados=('FINALIZAÇÃO', 'count')  # Total de tarefas finalizadas ou canceladas
-    ).reset_index()
+    resultado = anexar_blocos(diretorio, (preparar_para_gravacao(bloco) for bloco in _blocos(dados)))
 
-    # Calcula o TMO (Tempo Médio Operacional)
-    df_tmo_cadastro['TMO'] = df_tmo_cadastro['Tempo_Total'] / df_tmo_cadastro['Total_Finalizados_Cancelados']
-    
-    # Formata o tempo médio no formato HH:MM:SS
-    df_tmo_cadastro['TMO'] = df_tmo_cadastro['TMO'].apply(format_timedelta)
-    return df_tmo_cadastro[['Dia', 'TMO']]
-
-# Função para calcular o TMO por analista
-def calcular_tmo(df):
-    # Verifica se a coluna 'SITUAÇÃO DA TAREFA' existe no DataFrame
-    if 'SITUAÇÃO DA TAREFA' not in df.columns:
-        raise KeyError("A coluna 'SITUAÇÃO DA TAREFA' não foi encontrada no DataFrame.")
-
-    # Filtra as tarefas finalizadas ou canceladas
-    df_finalizados = df[df['SITUAÇÃO DA TAREFA'].isin(['Finalizada', 'Cancelada'])].copy()
-
-    # Verifica se a coluna 'TEMPO MÉDIO OPERACIONAL' existe e converte para minutos
-    if 'TEMPO MÉDIO OPERACIONAL' not in df_finalizados.columns:
-        raise KeyError("A coluna 'TEMPO MÉDIO OPERACIONAL' não foi encontrada no DataFrame.")
-    df_finalizados['TEMPO_MÉDIO_MINUTOS'] = df_finalizados['TEMPO MÉDIO OPERACIONAL'].dt.total_seconds() / 60
-
-    # Verifica se a coluna 'FILA' existe antes de aplicar o filtro
-    if 'FILA' in df_finalizados.columns:
-        # Remove protocolos da fila "DÚVIDA" com mais de 1 hora de tempo médio
-        df_finalizados = df_finalizados[~((df_finalizados['FILA'] == 'DÚVIDA') & (df_finalizados['TEMPO_MÉDIO_MINUTOS'] > 60))]
-
-    # Agrupando por analista
-    df_tmo_analista = df_finalizados.groupby('USUÁRIO QUE CONCLUIU A TAREFA').agg(
-        Tempo_Total=('TEMPO MÉDIO OPERACIONAL', lambda x: x[df_finalizados['FINALIZAÇÃO'] == 'CADASTRADO'].sum()),  # Soma total do tempo das tarefas com finalização CADASTRADO
-        Total_Tarefas=('FINALIZAÇÃO', lambda x: x[x == 'CADASTRADO'].count())  # Total de tarefas finalizadas ou canceladas por analista
-    ).reset_index()
+    if resultado['duplicadas']:
+        st.toast(f"🧹 {resultado['duplicadas']} linha(s) do novo arquivo já existiam no histórico e foram ignoradas.")
 
-    # Calcula o TMO (Tempo Médio Operacional) como média
-    df_tmo_analista['TMO'] = df_tmo_analista['Tempo_Total'] / df_tmo_analista['Total_Tarefas']
+    if resultado['novas']:
+        caminho = os.path.abspath(diretorio)
+        cache_dados.invalidar(lambda chave: chave[1] == caminho)
+        cache_calculos.invalidar(lambda chave: any(versao[0] == usuario for versao in chave[1]))
+        st.toast(f"💾 {resultado['novas']} linha(s) salvas localmente em '{diretorio}'.")
 
-    # Formata o tempo médio no formato de minutos e segundos
-    df_tmo_analista['TMO_Formatado'] = df_tmo_analista['TMO'].apply(format_timedelta_grafico_tmo)
+    # Lotes sem linhas novas não mudam o dataset; o trabalhador descarta instantâneos repetidos
+    return agendar_backup(diretorio)
 
-    return df_tmo_analista[['USUÁRIO QUE CONCLUIU A TAREFA', 'TMO_Formatado', 'TMO']]
+def convert_to_timedelta_for_calculations(df):
+    # Dados vindos de load_data já estão tipados; só converte quando necessário
+    if not pd.api.types.is_timedelta64_dtype(df['TEMPO MÉDIO OPERACIONAL']):
+        df['TEMPO MÉDIO OPERACIONAL'] = pd.to_timedelta(df['TEMPO MÉDIO OPERACIONAL'], errors='coerce')
+    return df
 
+def convert_to_datetime_for_calculations(df):
+    # Dados vindos de load_data já estão tipados; só converte quando necessário
+    if not pd.api.types.is_datetime64_any_dtype(df['DATA DE CONCLUSÃO DA TAREFA']):
+        df['DATA DE CONCLUSÃO DA TAREFA'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
+    return df
+        
 # Função para calcular o ranking dinâmico
 def calcular_ranking(df_total, selected_users):
-    # Filtra o DataFrame com os usuários selecionados
-    df_filtered = df_total[df_total['USUÁRIO QUE CONCLUIU A TAREFA'].isin(selected_users)]
-
-    df_ranking = df_filtered.groupby('USUÁRIO QUE CONCLUIU A TAREFA').agg(
-
-        Finalizado=('FINALIZAÇÃO', lambda x: x[x == 'CADASTRADO'].count()),
-        Distribuido=('FINALIZAÇÃO', lambda x: x[x == 'REALIZADO'].count()),
-        Atualizado=('FINALIZAÇÃO', lambda x: x[x == 'ATUALIZADO'].count())
-    ).reset_index()
-    df_ranking['Total'] =df_ranking['Finalizado'] + df_ranking['Distribuido'] + df_ranking['Atualizado']
-    df_ranking = df_ranking.sort_values(by  ='Total', ascending=False).reset_index(drop=True)
-    df_ranking.index += 1
-    df_ranking.index.name = 'Posição'
+    df_ranking = calcular_tabela_ranking(df_total, selected_users)
 
     # Define o tamanho dos quartis
     num_analistas = len(df_ranking)
@@ -395,60 +388,10 @@ def calcular_metrica_analista(df_analista):
 
     return total_finalizados, total_atualizado, tempo_medio_analista, tmo_cadastrado, tmo_atualizado, total_realizados, media_cadastros_por_dia, dias_trabalhados
 
-def calcular_tempo_ocioso_por_analista(df):
-    try:
-        # Converte as colunas de data para datetime, tratando erros
-        df['DATA DE INÍCIO DA TAREFA'] = pd.to_datetime(
-            df['DATA DE INÍCIO DA TAREFA'], format='%d/%m/%Y %H:%M:%S', errors='coerce'
-        )
-        df['DATA DE CONCLUSÃO DA TAREFA'] = pd.to_datetime(
-            df['DATA DE CONCLUSÃO DA TAREFA'], format='%d/%m/%Y %H:%M:%S', errors='coerce'
-        )
-
-        # Filtrar valores nulos e resetar index
-        df = df.dropna(subset=['DATA DE INÍCIO DA TAREFA', 'DATA DE CONCLUSÃO DA TAREFA']).reset_index(drop=True)
-
-        # Ordena os dados por usuário e data de início da tarefa (sem considerar fila)
-        df = df.sort_values(by=['USUÁRIO QUE CONCLUIU A TAREFA', 'DATA DE INÍCIO DA TAREFA']).reset_index(drop=True)
-
-        # Calcula o próximo horário de início da tarefa por usuário (sem considerar fila)
-        df['PRÓXIMA_TAREFA'] = df.groupby(['USUÁRIO QUE CONCLUIU A TAREFA'])['DATA DE INÍCIO DA TAREFA'].shift(-1)
-
-        # Calcula o tempo ocioso entre a conclusão de uma tarefa e o início da próxima
-        df['TEMPO OCIOSO'] = df['PRÓXIMA_TAREFA'] - df['DATA DE CONCLUSÃO DA TAREFA']
-
-        # Remove valores negativos ou muito grandes (exemplo: trocas de turno)
-        df['TEMPO OCIOSO'] = df['TEMPO OCIOSO'].apply(lambda x: x if pd.notnull(x) and pd.Timedelta(0) < x <= pd.Timedelta(hours=1) else pd.Timedelta(0))
-
-        # Agrupa os tempos ociosos por usuário e dia de conclusão, somando todas as filas
-        df_soma_ocioso = df.groupby(['USUÁRIO QUE CONCLUIU A TAREFA', df['DATA DE CONCLUSÃO DA TAREFA'].dt.date])['TEMPO OCIOSO'].sum().reset_index()
-
-        # Renomeia colunas para melhor entendimento
-        df_soma_ocioso = df_soma_ocioso.rename(columns={
-            'DATA DE CONCLUSÃO DA TAREFA': 'Data',
-            'TEMPO OCIOSO': 'Tempo Ocioso'
-        })
-
-        # Formata o tempo ocioso total como string
-        df_soma_ocioso['Tempo Ocioso'] = df_soma_ocioso['Tempo Ocioso'].astype(str).str.split("days").str[-1].str.strip()
-
-        return df_soma_ocioso[['USUÁRIO QUE CONCLUIU A TAREFA', 'Data', 'Tempo Ocioso']]
-
-    except Exception as e:
-        return pd.DataFrame({'Erro': [f'Erro: {str(e)}']})
-
-def format_timedelta_hms(td):
-    """ Formata um timedelta para HH:MM:SS """
-    if pd.isnull(td):
-        return "00:00:00"
-    total_seconds = int(td.total_seconds())
-    hours, remainder = divmod(total_seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    return f"{hours:02}:{minutes:02}:{seconds:02}"
-
 def exibir_grafico_tempo_ocioso_por_dia(df_analista, analista_selecionado, custom_colors, st):
     """
     Gera e exibe um gráfico de barras com o Tempo Ocioso diário para um analista específico.
+    Os dados vêm de calcular_tempo_ocioso_por_dia; aqui ficam só o filtro de período e o gráfico.
 
     Parâmetros:
         - df_analista: DataFrame contendo os dados de análise.
@@ -456,15 +399,7 @@ def exibir_grafico_tempo_ocioso_por_dia(df_analista, analista_selecionado, custo
         - custom_colors: Lista de cores personalizadas para o gráfico.
         - st: Referência para o módulo Streamlit (necessário para exibir os resultados).
     """
-
-    # Calcular o tempo ocioso diário por analista
-    df_ocioso = calcular_tempo_ocioso_por_analista(df_analista)
-
-    # Converter a coluna 'Tempo Ocioso' para timedelta para cálculos
-    df_ocioso['Tempo Ocioso'] = pd.to_timedelta(df_ocioso['Tempo Ocioso'], errors='coerce')
-
-    # Filtrar apenas o analista selecionado
-    df_ocioso = df_ocioso[df_ocioso['USUÁRIO QUE CONCLUIU A TAREFA'] == analista_selecionado]
+    df_ocioso = calcular_tempo_ocioso_por_dia(df_analista, analista_selecionado)
 
     # Determinar o período disponível no dataset
     data_minima = df_ocioso['Data'].min()
@@ -485,33 +420,24 @@ def exibir_grafico_tempo_ocioso_por_dia(df_analista, analista_selecionado, custo
         (df_ocioso['Data'] <= periodo_selecionado[1])
     ]
 
-    # Formatar a coluna 'Tempo Ocioso' para exibição no gráfico como HH:MM:SS
-    df_ocioso['Tempo Ocioso Formatado'] = df_ocioso['Tempo Ocioso'].apply(format_timedelta_hms)
-
-    # Converter tempo ocioso para total de segundos (para exibição correta no gráfico)
-    df_ocioso['Tempo Ocioso Segundos'] = df_ocioso['Tempo Ocioso'].dt.total_seconds()
-
     # Criar o gráfico de barras
     fig_ocioso = px.bar(
         df_ocioso, 
-        x='Data', 
+        x=datas_em_ms(df_ocioso['Data']), 
         y='Tempo Ocioso Segundos', 
-        labels={'Tempo Ocioso Segundos': 'Tempo Ocioso (HH:MM:SS)', 'Data': 'Data'},
+        labels={'Tempo Ocioso Segundos': 'Tempo Ocioso (HH:MM:SS)', 'x': 'Data'},
         text=df_ocioso['Tempo Ocioso Formatado'],  # Exibir tempo formatado nas barras
         color_discrete_sequence=custom_colors
     )
 
     # Ajuste do layout
+    horas = range(0, int(df_ocioso['Tempo Ocioso Segundos'].max() // 3600) + 1)
     fig_ocioso.update_layout(
-        xaxis=dict(
-            tickvals=df_ocioso['Data'],
-            ticktext=[f"{dia.day} {dia.strftime('%b')} {dia.year}" for dia in df_ocioso['Data']],
-            title='Data'
-        ),
+        xaxis=eixo_datas('%d %b %Y'),
         yaxis=dict(
             title='Tempo Ocioso (HH:MM:SS)',
-            tickvals=[i * 3600 for i in range(0, int(df_ocioso['Tempo Ocioso Segundos'].max() // 3600) + 1)],
-            ticktext=[format_timedelta_hms(pd.Timedelta(seconds=i * 3600)) for i in range(0, int(df_ocioso['Tempo Ocioso Segundos'].max() // 3600) + 1)]
+            tickvals=[i * 3600 for i in horas],
+            ticktext=formatar_hms(pd.to_timedelta(horas, unit='h')).tolist()
         ),
         bargap=0.2  # Espaçamento entre as barras
     )
@@ -526,12 +452,6 @@ def exibir_grafico_tempo_ocioso_por_dia(df_analista, analista_selecionado, custo
     # Exibir o gráfico na dashboard
     st.plotly_chart(fig_ocioso, use_container_width=True)
 
-def calcular_tmo_equipe_cadastro(df_total):
-    return df_total[df_total['FINALIZAÇÃO'].isin(['CADASTRADO'])]['TEMPO MÉDIO OPERACIONAL'].mean()
-
-def calcular_tmo_equipe_atualizado(df_total):
-    return df_total[df_total['FINALIZAÇÃO'].isin(['ATUALIZADO'])]['TEMPO MÉDIO OPERACIONAL'].mean()
-
 def calcular_filas_analista(df_analista):
     if 'Carteira' in df_analista.columns:
         # Filtra apenas os status relevantes para o cálculo (considerando FINALIZADO e RECLASSIFICADO)
@@ -548,7 +468,7 @@ def calcular_filas_analista(df_analista):
         ).reset_index()
 
         # Converte o TMO médio para minutos e segundos
-        carteiras_analista['TMO_médio'] = carteiras_analista['TMO_médio'].apply(format_timedelta)
+        carteiras_analista['TMO_médio'] = formatar_min_seg(carteiras_analista['TMO_médio'])
 
         # Renomeia as colunas para exibição
         carteiras_analista = carteiras_analista.rename(
@@ -563,13 +483,6 @@ def calcular_filas_analista(df_analista):
     
 
 
-def calcular_tmo_por_dia(df_analista):
-    # Filtrar apenas as tarefas com finalização "CADASTRADO"
-    df_analista = df_analista[df_analista['FINALIZAÇÃO'] == 'CADASTRADO']
-    df_analista['Dia'] = df_analista['DATA DE CONCLUSÃO DA TAREFA'].dt.date
-    tmo_por_dia = df_analista.groupby('Dia').agg(TMO=('TEMPO MÉDIO OPERACIONAL', 'mean')).reset_index()
-    return tmo_por_dia
-
 def calcular_carteiras_analista(df_analista):
     if 'Carteira' in df_analista.columns:
         filas_finalizadas = df_analista[(df_analista['Status'] == 'FINALIZADO') |
@@ -628,276 +541,53 @@ def get_points_of_attention(df):
 
     return pontos_de_atencao
 
-def calcular_tmo_por_carteira(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Gera um resumo por Fila com:
-    - Quantidade total de tarefas
-    - TMO médio para tarefas finalizadas (exceto Fora do Escopo)
-    - TMO médio para tarefas com finalização 'Fora do Escopo'
-
-    Retorna:
-        pd.DataFrame com colunas:
-        ['FILA', 'Quantidade de Tarefas', 'TMO Finalizadas', 'TMO Fora do Escopo']
-    """
-
-    def format_timedelta(td):
-        if pd.isna(td):
-            return "00:00:00"
-        total_seconds = int(td.total_seconds())
-        return f"{total_seconds // 3600:02d}:{(total_seconds % 3600) // 60:02d}:{total_seconds % 60:02d}"
-
-    # Validação das colunas obrigatórias
-    required_columns = {'FILA', 'SITUAÇÃO DA TAREFA', 'FINALIZAÇÃO', 'TEMPO MÉDIO OPERACIONAL'}
-    if not required_columns.issubset(df.columns):
-        return "As colunas necessárias não foram encontradas no DataFrame."
-
-    # Remove linhas sem tempo registrado
-    df = df.dropna(subset=['TEMPO MÉDIO OPERACIONAL'])
-
-    if not pd.api.types.is_timedelta64_dtype(df['TEMPO MÉDIO OPERACIONAL']):
-        return "A coluna 'TEMPO MÉDIO OPERACIONAL' precisa ser do tipo timedelta."
-
-    # Contagem total de tarefas por fila
-    quantidade_tarefas = df.groupby('FILA').size().reset_index(name='Quantidade de Tarefas')
-
-    # TMO de tarefas finalizadas (exceto Fora do Escopo)
-    df_finalizadas = df[
-        (df['SITUAÇÃO DA TAREFA'].str.upper() == 'FINALIZADA') &
-        (df['FINALIZAÇÃO'].str.upper() != 'FORA DO ESCOPO')
-    ]
-    tmo_finalizadas = df_finalizadas.groupby('FILA')['TEMPO MÉDIO OPERACIONAL'].mean().reset_index()
-    tmo_finalizadas.rename(columns={'TEMPO MÉDIO OPERACIONAL': 'TMO Finalizadas'}, inplace=True)
-
-    # TMO de tarefas Fora do Escopo
-    df_escopo = df[df['FINALIZAÇÃO'].str.upper() == 'FORA DO ESCOPO']
-    tmo_escopo = df_escopo.groupby('FILA')['TEMPO MÉDIO OPERACIONAL'].mean().reset_index()
-    tmo_escopo.rename(columns={'TEMPO MÉDIO OPERACIONAL': 'TMO Fora do Escopo'}, inplace=True)
-
-    # Junta tudo
-    resumo = quantidade_tarefas.merge(tmo_finalizadas, on='FILA', how='left')\
-                               .merge(tmo_escopo, on='FILA', how='left')
-
-    # Formata os campos de tempo
-    resumo['TMO Finalizadas'] = resumo['TMO Finalizadas'].apply(format_timedelta)
-    resumo['TMO Fora do Escopo'] = resumo['TMO Fora do Escopo'].apply(format_timedelta)
-
-    return resumo[['FILA', 'Quantidade de Tarefas', 'TMO Finalizadas', 'TMO Fora do Escopo']]
-
-def calcular_producao_agrupada(df):
-    required_columns = {'FILA', 'FINALIZAÇÃO', 'NÚMERO DO PROTOCOLO'}
-    if not required_columns.issubset(df.columns):
-        return "As colunas necessárias ('FILA', 'FINALIZAÇÃO', 'NÚMERO DO PROTOCOLO') não foram encontradas no DataFrame."
-
-    df_unique = df.drop_duplicates(subset=['NÚMERO DO PROTOCOLO'])
-
-    grupos = {
-        'CAPTURA ANTECIPADA': [' CADASTRO ROBÔ', 'INCIDENTE PROCESSUAL', 'CADASTRO ANS'],
-        'SHAREPOINT': ['CADASTRO SHAREPOINT', 'ATUALIZAÇÃO - SHAREPOINT'],
-        'CITAÇÃO ELETRÔNICA': ['CADASTRO CITAÇÃO ELETRÔNICA', 'ATUALIZAÇÃO CITAÇÃO ELETRÔNICA'],
-        'E-MAIL': ['CADASTRO E-MAIL', 'OFICIOS E-MAIL', 'CADASTRO DE ÓRGÃOS E OFÍCIOS'],
-        'PRE CADASTRO E DIJUR': ['PRE CADASTRO E DIJUR']
-    }
-
-    df['GRUPO'] = df['FILA'].map(lambda x: next((k for k, v in grupos.items() if x in v), 'OUTROS'))
-
-    df_agrupado = df.groupby('GRUPO').agg(
-        Cadastrado=('FINALIZAÇÃO', lambda x: (x == 'CADASTRADO').sum()),
-        Atualizado=('FINALIZAÇÃO', lambda x: (x == 'ATUALIZADO').sum()),
-        Fora_do_Escopo=('FINALIZAÇÃO', lambda x: ((x != 'CADASTRADO') & (x != 'ATUALIZADO')).sum())
-    ).reset_index()
+def _estilizar_tabela_fila(df, formatos):
+    # Conteúdo e cabeçalhos alinhados à esquerda
+    styled_df = df.style.format(formatos).set_properties(**{'text-align': 'left'})
+    return styled_df.set_table_styles([dict(selector='th', props=[('text-align', 'left')])])
 
-    return df_agrupado
-
-def calcular_producao_email_detalhada(df):
-    required_columns = {'FILA', 'FINALIZAÇÃO', 'NÚMERO DO PROTOCOLO', 'TAREFA'}
-    if not required_columns.issubset(df.columns):
-        return "As colunas necessárias ('FILA', 'FINALIZAÇÃO', 'NÚMERO DO PROTOCOLO', 'TAREFA') não foram encontradas no DataFrame."
-
-    # Filtrando apenas as filas do grupo E-MAIL
-    df_email = df[df['FILA'].isin(['CADASTRO E-MAIL', 'OFICIOS', 'CADASTRO DE ÓRGÃOS E OFÍCIOS'])]
-
-    # Separando os de CADASTRO E-MAIL para agrupar por TAREFA
-    df_cadastro_email = df_email[df_email['FILA'] == 'CADASTRO E-MAIL']
-    df_outros_email = df_email[df_email['FILA'].isin(['OFICIOS', 'CADASTRO DE ÓRGÃOS E OFÍCIOS'])]
-
-    # Agrupando CADASTRO E-MAIL por TAREFA
-    df_cadastro_email_agrupado = df_cadastro_email.groupby('TAREFA').agg(
-        Quantidade=('FILA', 'size'),
-        Cadastrado=('FINALIZAÇÃO', lambda x: (x == 'CADASTRADO').sum()),
-        Atualizado=('FINALIZAÇÃO', lambda x: (x == 'ATUALIZADO').sum()),
-        Fora_do_Escopo=('FINALIZAÇÃO', lambda x: ((x != 'CADASTRADO') & (x != 'ATUALIZADO')).sum())
-    ).reset_index()
-
-    # Agrupando os demais (OFICIOS E-MAIL e CADASTRO DE ÓRGÃOS E OFÍCIOS) por FILA
-    df_outros_email_agrupado = df_outros_email.groupby('FILA').agg(
-        Quantidade=('FILA', 'size'),
-        Cadastrado=('FINALIZAÇÃO', lambda x: (x == 'CADASTRADO').sum()),
-        Atualizado=('FINALIZAÇÃO', lambda x: (x == 'ATUALIZADO').sum()),
-        Fora_do_Escopo=('FINALIZAÇÃO', lambda x: ((x != 'CADASTRADO') & (x != 'ATUALIZADO')).sum())
-    ).reset_index().rename(columns={'FILA': 'TAREFA'})
-
-    # Concatenando os resultados
-    df_email_final = pd.concat([df_cadastro_email_agrupado, df_outros_email_agrupado], ignore_index=True)
-
-    return df_email_final
-
-def calcular_e_exibir_tmo_cadastro_atualizacao_por_fila (df_analista, format_timedelta_hms, st):
+def calcular_e_exibir_tmo_cadastro_atualizacao_por_fila (df_analista, st):
     """
-    Calcula e exibe o TMO médio de Cadastro e Atualização por Fila,
+    Exibe o TMO médio de Cadastro e Atualização por Fila (calcular_tmo_cadastro_atualizacao_por_fila),
     junto com a quantidade de tarefas realizadas, na dashboard do Streamlit.
 
     Parâmetros:
         - df_analista: DataFrame contendo os dados de análise.
-        - format_timedelta_hms: Função para formatar a duração do TMO em HH:MM:SS.
         - st: Referência para o módulo Streamlit (necessário para exibir os resultados).
     """
-    if 'FILA' in df_analista.columns and 'FINALIZAÇÃO' in df_analista.columns:
-        # Filtrar apenas as tarefas finalizadas com CADASTRADO e ATUALIZADO
-        filas_finalizadas_analista = df_analista[df_analista['FINALIZAÇÃO'].isin(['CADASTRADO', 'ATUALIZADO'])]
-
-        # Agrupar os dados por 'FILA' e calcular a quantidade de tarefas por fila
-        df_quantidade = filas_finalizadas_analista.groupby('FILA').size().reset_index(name='Quantidade')
-
-        # Calcular o TMO médio para cada fila separadamente
-        df_tmo_cadastro = filas_finalizadas_analista[filas_finalizadas_analista['FINALIZAÇÃO'] == 'CADASTRADO'].groupby('FILA')['TEMPO MÉDIO OPERACIONAL'].mean().reset_index()
-        df_tmo_atualizacao = filas_finalizadas_analista[filas_finalizadas_analista['FINALIZAÇÃO'] == 'ATUALIZADO'].groupby('FILA')['TEMPO MÉDIO OPERACIONAL'].mean().reset_index()
-
-        # Renomear colunas
-        df_tmo_cadastro.rename(columns={'TEMPO MÉDIO OPERACIONAL': 'TMO_Cadastro'}, inplace=True)
-        df_tmo_atualizacao.rename(columns={'TEMPO MÉDIO OPERACIONAL': 'TMO_Atualizacao'}, inplace=True)
-
-        # Unir os DataFrames pela Fila
-        df_resultado = df_quantidade.merge(df_tmo_cadastro, on='FILA', how='left').merge(df_tmo_atualizacao, on='FILA', how='left')
-
-        # Substituir valores NaN por Timedelta(0)
-        df_resultado.fillna(pd.Timedelta(seconds=0), inplace=True)
-
-        # Converter os TMOs para HH:MM:SS
-        df_resultado['TMO_Cadastro'] = df_resultado['TMO_Cadastro'].apply(format_timedelta_hms)
-        df_resultado['TMO_Atualizacao'] = df_resultado['TMO_Atualizacao'].apply(format_timedelta_hms)
-
-        # Renomear colunas para exibição
-        df_resultado.rename(columns={
-            'FILA': 'Fila',
-            'Quantidade': 'Quantidade',
-            'TMO_Cadastro': 'TMO Cadastro',
-            'TMO_Atualizacao': 'TMO Atualização'
-        }, inplace=True)
-
-        # Estilizar tabela no Streamlit
-        styled_df = df_resultado.style.format({'Quantidade': '{:.0f}', 'TMO Cadastro': '{}', 'TMO Atualização': '{}'}).set_properties(**{'text-align': 'left'})
-        styled_df = styled_df.set_table_styles([dict(selector='th', props=[('text-align', 'left')])])
-
-        # Exibir DataFrame estilizado na dashboard
-        st.dataframe(styled_df, hide_index=True, use_container_width=True)
-    else:
+    df_resultado = calcular_tmo_cadastro_atualizacao_por_fila(df_analista)
+    if df_resultado is None:
         st.warning("As colunas necessárias ('FILA' e 'FINALIZAÇÃO') não foram encontradas no DataFrame.")
+        return
 
-def format_timedelta_hms(td):
-    """
-    Formata um timedelta para o formato hh:mm:ss.
-    """
-    total_seconds = int(td.total_seconds())
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    seconds = total_seconds % 60
-    return f"{hours:02}:{minutes:02}:{seconds:02}"
+    styled_df = _estilizar_tabela_fila(df_resultado, {'Quantidade': '{:.0f}', 'TMO Cadastro': '{}', 'TMO Atualização': '{}'})
+    st.dataframe(styled_df, hide_index=True, use_container_width=True)
 
-def calcular_e_exibir_tmo_por_fila(df_analista, analista_selecionado, format_timedelta_hms, st):
+def calcular_e_exibir_tmo_por_fila(df_analista, analista_selecionado, st):
     """
-    Calcula e exibe o TMO médio por fila, junto com a quantidade de tarefas realizadas, 
-    para um analista específico, na dashboard Streamlit.
+    Exibe o TMO médio por fila (calcular_tmo_por_fila), junto com a quantidade de tarefas
+    realizadas, para um analista específico, na dashboard Streamlit.
 
     Parâmetros:
         - df_analista: DataFrame contendo os dados de análise.
         - analista_selecionado: Nome do analista selecionado.
-        - format_timedelta: Função para formatar a duração do TMO em minutos e segundos.
         - st: Referência para o módulo Streamlit (necessário para exibir os resultados).
     """
-    if 'FILA' in df_analista.columns:
-        # Filtrar apenas as tarefas finalizadas para cálculo do TMO
-        filas_finalizadas_analista = df_analista[df_analista['SITUAÇÃO DA TAREFA'] == 'Finalizada']
-        
-        # Agrupa por 'FILA' e calcula a quantidade e o TMO médio para cada fila
-        carteiras_analista = filas_finalizadas_analista.groupby('FILA').agg(
-            Quantidade=('FILA', 'size'),
-            TMO_médio=('TEMPO MÉDIO OPERACIONAL', 'mean')
-        ).reset_index()
-
-        # Converte o TMO médio para minutos e segundos
-        carteiras_analista['TMO_médio'] = carteiras_analista['TMO_médio'].apply(format_timedelta_hms)
-
-        # Renomeia as colunas
-        carteiras_analista = carteiras_analista.rename(columns={
-            'FILA': 'Fila', 
-            'Quantidade': 'Quantidade', 
-            'TMO_médio': 'TMO Médio por Fila'
-        })
-        
-        # Configura o estilo do DataFrame para alinhar o conteúdo à esquerda
-        styled_df = carteiras_analista.style.format({'Quantidade': '{:.0f}', 'TMO Médio por Fila': '{:s}'}).set_properties(**{'text-align': 'left'})
-        styled_df = styled_df.set_table_styles([dict(selector='th', props=[('text-align', 'left')])])
-
-        # Exibe a tabela com as colunas Fila, Quantidade e TMO Médio
-        st.dataframe(styled_df, hide_index=True, use_container_width=True)
-    else:
+    if 'FILA' not in df_analista.columns:
         st.write("A coluna 'FILA' não foi encontrada no dataframe.")
-        carteiras_analista = pd.DataFrame({'Fila': [], 'Quantidade': [], 'TMO Médio por Fila': []})
-        styled_df = carteiras_analista.style.format({'Quantidade': '{:.0f}', 'TMO Médio por Fila': '{:s}'}).set_properties(**{'text-align': 'left'})
-        styled_df = styled_df.set_table_styles([dict(selector='th', props=[('text-align', 'left')])])
-        st.dataframe(styled_df, hide_index=True, use_container_width=True)
-
-def calcular_tmo_por_mes(df):
-    # Converter coluna de tempo de análise para timedelta, se necessário
-    if df['TEMPO MÉDIO OPERACIONAL'].dtype != 'timedelta64[ns]':
-        df['TEMPO MÉDIO OPERACIONAL'] = pd.to_timedelta(df['TEMPO MÉDIO OPERACIONAL'], errors='coerce')
-    
-    # Adicionar coluna com ano e mês extraído da coluna 'Próximo'
-    df['AnoMes'] = df['DATA DE CONCLUSÃO DA TAREFA'].dt.to_period('M')
-    
-    # Filtrar apenas os protocolos com status 'FINALIZADO'
-    df_finalizados = df[df['SITUAÇÃO DA TAREFA'].isin(['Finalizada'])]
-    
-    # Agrupar por AnoMes e calcular o TMO
-    df_tmo_mes = df_finalizados.groupby('AnoMes').agg(
-        Tempo_Total=('TEMPO MÉDIO OPERACIONAL', 'sum'),
-        Total_Protocolos=('TEMPO MÉDIO OPERACIONAL', 'count')
-    ).reset_index()
-    
-    # Calcular o TMO em minutos
-    df_tmo_mes['TMO'] = (df_tmo_mes['Tempo_Total'] / pd.Timedelta(minutes=1)) / df_tmo_mes['Total_Protocolos']
-    
-    # Converter a coluna AnoMes para datetime e formatar como "Mês XX de Ano"
-    df_tmo_mes['AnoMes'] = df_tmo_mes['AnoMes'].dt.to_timestamp().dt.strftime('%B de %Y').str.capitalize()
-    
-    return df_tmo_mes[['AnoMes', 'TMO']]
-
-# Função de formatação
-def format_timedelta_mes(minutes):
-    """Formata um valor em minutos (float) como 'Xh Ym Zs' se acima de 60 minutos, caso contrário, 'X min Ys'."""
-    if minutes >= 60:
-        hours = int(minutes // 60)
-        minutes_remainder = int(minutes % 60)
-        seconds = (minutes - hours * 60 - minutes_remainder) * 60
-        seconds_int = round(seconds)
-        return f"{hours}h {minutes_remainder}m {seconds_int}s"
-    else:
-        minutes_int = int(minutes)
-        seconds = (minutes - minutes_int) * 60
-        seconds_int = round(seconds)
-        return f"{minutes_int} min {seconds_int}s"
+
+    # Exibe a tabela com as colunas Fila, Quantidade e TMO Médio
+    styled_df = _estilizar_tabela_fila(calcular_tmo_por_fila(df_analista), {'Quantidade': '{:.0f}', 'TMO Médio por Fila': '{:s}'})
+    st.dataframe(styled_df, hide_index=True, use_container_width=True)
 
 def exibir_tmo_por_mes(df):
-    # Calcule o TMO mensal usando a função importada
-    df_tmo_mes = calcular_tmo_por_mes(df)
+    # TMO mensal já formatado (calcular_tmo_por_mes_formatado)
+    df_tmo_mes = calcular_tmo_por_mes_formatado(df)
     
     # Verifique se há dados para exibir
     if df_tmo_mes.empty:
         st.warning("Nenhum dado finalizado disponível para calcular o TMO mensal.")
     else:
-        # Formatar a coluna TMO como "X min Ys"
-        df_tmo_mes['TMO_Formatado'] = df_tmo_mes['TMO'].apply(format_timedelta_mes)
-        
         st.subheader("Tempo Médio Operacional Mensal")
         
         # Crie um multiselect para os meses
@@ -933,20 +623,18 @@ def exibir_tmo_por_mes(df):
         st.plotly_chart(fig, use_container_width=True)
         
 def exibir_dataframe_tmo_formatado(df):
-    # Calcule o TMO mensal usando a função `calcular_tmo_por_mes`
-    df_tmo_mes = calcular_tmo_por_mes(df)
+    # TMO mensal já formatado (calcular_tmo_por_mes_formatado)
+    df_tmo_mes = calcular_tmo_por_mes_formatado(df)
     
     # Verifique se há dados para exibir
     if df_tmo_mes.empty:
         st.warning("Nenhum dado finalizado disponível para calcular o TMO mensal.")
         return None
     
-    # Adicionar a coluna "Tempo Médio Operacional" com base no TMO calculado
-    df_tmo_mes['Tempo Médio Operacional'] = df_tmo_mes['TMO'].apply(format_timedelta_mes)
-    df_tmo_mes['Mês'] = df_tmo_mes['AnoMes']
-    
     # Selecionar as colunas para exibição
-    df_tmo_formatado = df_tmo_mes[['Mês', 'Tempo Médio Operacional']]
+    df_tmo_formatado = df_tmo_mes[['AnoMes', 'TMO_Formatado']].rename(
+        columns={'AnoMes': 'Mês', 'TMO_Formatado': 'Tempo Médio Operacional'}
+    )
     
     st.dataframe(df_tmo_formatado, use_container_width=True, hide_index=True)
     
@@ -980,44 +668,6 @@ def export_dataframe(df):
     else:
         st.warning("Selecione pelo menos uma coluna para exportar.")
         
-def calcular_melhor_tmo_por_dia(df_analista):
-    """
-    Calcula o melhor TMO de cadastro por dia para o analista.
-
-    Parâmetros:
-        - df_analista: DataFrame filtrado para o analista.
-
-    Retorna:
-        - O dia com o melhor TMO de cadastro e o valor do TMO.
-    """
-    # Filtrar apenas as finalizações do tipo 'CADASTRADO'
-    df_cadastro = df_analista[df_analista['FINALIZAÇÃO'] == 'CADASTRADO']
-
-    # Calcula o TMO por dia para o tipo 'CADASTRADO'
-    df_tmo_por_dia = calcular_tmo_por_dia(df_cadastro)
-
-    # Identifica o dia com o menor TMO
-    if not df_tmo_por_dia.empty:
-        melhor_dia = df_tmo_por_dia.loc[df_tmo_por_dia['TMO'].idxmin()]
-        return melhor_dia['Dia'], melhor_dia['TMO']
-
-    # Retorna None caso não haja dados para 'CADASTRADO'
-    return None, None
-
-def calcular_melhor_dia_por_cadastro(df_analista):
-    # Agrupa os dados por dia e conta os cadastros
-    if 'FINALIZAÇÃO' in df_analista.columns and 'DATA DE CONCLUSÃO DA TAREFA' in df_analista.columns:
-        df_cadastros_por_dia = df_analista[df_analista['FINALIZAÇÃO'] == 'CADASTRADO'].groupby(
-            df_analista['DATA DE CONCLUSÃO DA TAREFA'].dt.date
-        ).size().reset_index(name='Quantidade')
-        
-        # Identifica o dia com maior quantidade de cadastros
-        if not df_cadastros_por_dia.empty:
-            melhor_dia = df_cadastros_por_dia.loc[df_cadastros_por_dia['Quantidade'].idxmax()]
-            return melhor_dia['DATA DE CONCLUSÃO DA TAREFA'], melhor_dia['Quantidade']
-    
-    return None, 0
-
 def exibir_tmo_por_mes_analista(df_analista, analista_selecionado):
     """
     Exibe o gráfico e a tabela do TMO mensal para um analista específico com filtro por mês.
@@ -1026,17 +676,14 @@ def exibir_tmo_por_mes_analista(df_analista, analista_selecionado):
         - df_analista: DataFrame filtrado para o analista.
         - analista_selecionado: Nome do analista selecionado.
     """
-    # Calcular o TMO por mês
-    df_tmo_mes = calcular_tmo_por_mes(df_analista)
+    # TMO por mês já formatado
+    df_tmo_mes = calcular_tmo_por_mes_formatado(df_analista)
 
     # Verificar se há dados para exibir
     if df_tmo_mes.empty:
         st.warning(f"Não há dados para calcular o TMO mensal do analista {analista_selecionado}.")
         return None
 
-    # Formatar o TMO para exibição
-    df_tmo_mes['TMO_Formatado'] = df_tmo_mes['TMO'].apply(format_timedelta_mes)
-
     # Criar multiselect para os meses disponíveis
     meses_disponiveis = df_tmo_mes['AnoMes'].unique()
     meses_selecionados = st.multiselect(
@@ -1067,84 +714,18 @@ def exibir_tmo_por_mes_analista(df_analista, analista_selecionado):
     st.plotly_chart(fig, use_container_width=True)
 
     # Criar e exibir a tabela com os dados formatados
-    df_tmo_mes_filtrado['Mês'] = df_tmo_mes_filtrado['AnoMes']  # Renomear para exibição
-    df_tmo_formatado = df_tmo_mes_filtrado[['Mês', 'TMO_Formatado']].rename(columns={'TMO_Formatado': 'Tempo Médio Operacional'})
+    df_tmo_formatado = df_tmo_mes_filtrado[['AnoMes', 'TMO_Formatado']].rename(
+        columns={'AnoMes': 'Mês', 'TMO_Formatado': 'Tempo Médio Operacional'}
+    )
     st.dataframe(df_tmo_formatado, use_container_width=True, hide_index=True)
 
     return df_tmo_formatado
 
 
-def calcular_grafico_tmo_analista_por_mes(df_analista):
-    """
-    Calcula o TMO Geral, Cadastro e Atualização por mês para um analista específico.
-    
-    Parâmetro:
-        - df_analista: DataFrame contendo as tarefas do analista.
-    
-    Retorna:
-        - DataFrame com TMO_Geral, TMO_Cadastro e TMO_Atualizacao por mês.
-    """
-    if df_analista.empty:
-        return pd.DataFrame(columns=['AnoMes', 'TMO_Geral', 'TMO_Cadastro', 'TMO_Atualizacao'])
-    
-    # Converter 'TEMPO MÉDIO OPERACIONAL' para timedelta se necessário
-    if not pd.api.types.is_timedelta64_dtype(df_analista['TEMPO MÉDIO OPERACIONAL']):
-        df_analista['TEMPO MÉDIO OPERACIONAL'] = pd.to_timedelta(df_analista['TEMPO MÉDIO OPERACIONAL'], errors='coerce')
-
-    df_analista['AnoMes'] = df_analista['DATA DE CONCLUSÃO DA TAREFA'].dt.to_period('M').astype(str)
-
-    df_geral = df_analista[df_analista['SITUAÇÃO DA TAREFA'].isin(['Finalizada', 'Cancelada'])]
-    df_cadastro = df_analista[df_analista['FINALIZAÇÃO'] == 'Cadastro realizado']
-    df_atualizacao = df_analista[df_analista['FINALIZAÇÃO'] == 'ATUALIZADO']
-
-    def calcular_tmo(df, nome_coluna):
-        if df.empty:
-            return pd.DataFrame(columns=['AnoMes', nome_coluna])
-        
-        df_tmo = df.groupby('AnoMes').agg(
-            Tempo_Total=('TEMPO MÉDIO OPERACIONAL', 'sum'),
-            Total_Protocolos=('TEMPO MÉDIO OPERACIONAL', 'count')
-        ).reset_index()
-        
-        df_tmo[nome_coluna] = df_tmo['Tempo_Total'] / df_tmo['Total_Protocolos']
-        df_tmo = df_tmo[['AnoMes', nome_coluna]]
-        
-        return df_tmo
-
-    df_tmo_geral = calcular_tmo(df_geral, 'TMO_Geral')
-    df_tmo_cadastro = calcular_tmo(df_cadastro, 'TMO_Cadastro')
-    df_tmo_atualizacao = calcular_tmo(df_atualizacao, 'TMO_Atualizacao')
-
-    df_tmo_mes = df_tmo_geral.merge(df_tmo_cadastro, on='AnoMes', how='left').merge(df_tmo_atualizacao, on='AnoMes', how='left')
-
-    df_tmo_mes.fillna(pd.Timedelta(seconds=0), inplace=True)
-    df_tmo_mes['AnoMes'] = pd.to_datetime(df_tmo_mes['AnoMes'], errors='coerce')  # Converter para datetime
-    df_tmo_mes['AnoMes'] = df_tmo_mes['AnoMes'].dt.strftime('%B de %Y').str.capitalize()
-
-    return df_tmo_mes
-
-def format_timedelta_grafico_tmo_analista(td):
-    """Formata um timedelta no formato HH:MM:SS"""
-    if pd.isna(td) or td == pd.Timedelta(seconds=0):
-        return "00:00:00"
-    
-    total_seconds = int(td.total_seconds())
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    seconds = total_seconds % 60
-
-    return f"{hours:02}:{minutes:02}:{seconds:02}"
-
-def format_timedelta_hms(timedelta_value):
-    """Formata um timedelta em HH:MM:SS"""
-    total_seconds = int(timedelta_value.total_seconds())
-    hours, remainder = divmod(total_seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    return f"{hours:02}:{minutes:02}:{seconds:02}"
-
 def exibir_grafico_tmo_analista_por_mes(df_analista, analista_selecionado):
     """
     Exibe um gráfico de barras agrupadas do TMO mensal (Geral, Cadastro, Atualização) para um analista específico.
+    Os dados vêm de calcular_grafico_tmo_analista_por_mes; aqui ficam o filtro de meses, o gráfico e a tabela.
 
     Parâmetros:
         - df_analista: DataFrame filtrado para o analista.
@@ -1158,10 +739,6 @@ def exibir_grafico_tmo_analista_por_mes(df_analista, analista_selecionado):
         st.warning(f"Não há dados para calcular o TMO mensal do analista {analista_selecionado}.")
         return None
 
-    # Formatar os tempos para HH:MM:SS
-    for col in ['TMO_Geral', 'TMO_Cadastro', 'TMO_Atualizacao']:
-        df_tmo_mes[col + '_Formatado'] = df_tmo_mes[col].apply(format_timedelta_hms)
-
     # Criar um multiselect para filtrar os meses disponíveis
     meses_disponiveis = df_tmo_mes['AnoMes'].unique()
     meses_selecionados = st.multiselect(
@@ -1178,24 +755,8 @@ def exibir_grafico_tmo_analista_por_mes(df_analista, analista_selecionado):
         st.warning("Nenhum dado disponível para os meses selecionados.")
         return None
 
-    # Transformar os dados para exibição no gráfico (de wide para long format)
-    df_tmo_long = df_tmo_mes_filtrado.melt(
-        id_vars=['AnoMes'], 
-        value_vars=['TMO_Geral', 'TMO_Cadastro', 'TMO_Atualizacao'], 
-        var_name='Tipo de TMO', 
-        value_name='Tempo Médio Operacional'
-    )
-
-    # Criar dicionário correto para mapear valores formatados
-    format_dict = df_tmo_mes_filtrado.set_index('AnoMes')[
-        ['TMO_Geral_Formatado', 'TMO_Cadastro_Formatado', 'TMO_Atualizacao_Formatado']
-    ].stack().reset_index()
-
-    format_dict.columns = ['AnoMes', 'Tipo de TMO', 'Tempo Formatado']
-    format_dict['Tipo de TMO'] = format_dict['Tipo de TMO'].str.replace('_Formatado', '')
-
-    # Converter `format_dict` para dicionário correto
-    format_map = format_dict.set_index(['AnoMes', 'Tipo de TMO'])['Tempo Formatado'].to_dict()
+    # Dados no formato longo, com o rótulo de cada barra
+    df_tmo_long = calcular_tmo_por_mes_longo(df_tmo_mes_filtrado)
 
     # Definir a paleta de cores extraída da imagem
     custom_colors = {
@@ -1204,27 +765,18 @@ def exibir_grafico_tmo_analista_por_mes(df_analista, analista_selecionado):
         'TMO_Atualizacao': '#a3330f'   # Vermelho queimado escuro
     }
 
-    # Criar rótulos corrigidos
-    tipo_tmo_label = {
-        'TMO_Geral': 'Geral',
-        'TMO_Cadastro': 'Cadastro',
-        'TMO_Atualizacao': 'Atualização'
-    }
-
-    df_tmo_long['Texto_Rotulo'] = df_tmo_long.apply(
-        lambda row: f"{tipo_tmo_label[row['Tipo de TMO']]} - {format_map.get((row['AnoMes'], row['Tipo de TMO']), '')}",
-        axis=1
-    )
+    # O TMO vai em minutos (float64, enviado como array tipado); o HH:MM:SS fica no rótulo de cada barra
+    df_tmo_long['TMO_minutos'] = pd.to_timedelta(df_tmo_long['Tempo Médio Operacional']) / pd.Timedelta(minutes=1)
 
     # Criar o gráfico de barras
     fig = px.bar(
         df_tmo_long,
         x='AnoMes',
-        y='Tempo Médio Operacional',
+        y='TMO_minutos',
         color='Tipo de TMO',
         text=df_tmo_long['Texto_Rotulo'],
         barmode='group',
-        labels={'AnoMes': 'Mês', 'Tempo Médio Operacional': 'Tempo Médio Operacional (HH:MM:SS)'},
+        labels={'AnoMes': 'Mês', 'TMO_minutos': 'Tempo Médio Operacional (min)'},
         color_discrete_map=custom_colors
     )
 
@@ -1247,38 +799,6 @@ def exibir_grafico_tmo_analista_por_mes(df_analista, analista_selecionado):
 
     return df_tmo_formatado
 
-def calcular_tmo_personalizado(df):
-    """
-    Calcula o TMO considerando as regras específicas para cada tipo de tarefa.
-
-    Parâmetros:
-        - df: DataFrame com os dados filtrados.
-
-    Retorno:
-        - DataFrame com TMO calculado por analista.
-    """
-    # Filtrar tarefas por tipo de finalização
-    total_finalizados = len(df[df['FINALIZAÇÃO'] == 'CADASTRADO'])
-    total_realizados = len(df[df['FINALIZAÇÃO'] == 'REALIZADO'])
-    total_atualizado = len(df[df['FINALIZAÇÃO'] == 'ATUALIZADO'])
-
-    # Calcular o tempo total por tipo de finalização
-    tempo_total_cadastrado = df[df['FINALIZAÇÃO'] == 'CADASTRADO']['TEMPO MÉDIO OPERACIONAL'].sum()
-    tempo_total_atualizado = df[df['FINALIZAÇÃO'] == 'ATUALIZADO']['TEMPO MÉDIO OPERACIONAL'].sum()
-    tempo_total_realizado = df[df['FINALIZAÇÃO'] == 'REALIZADO']['TEMPO MÉDIO OPERACIONAL'].sum()
-
-    # Calcular o tempo médio por tipo de finalização
-    tmo_cadastrado = tempo_total_cadastrado / total_finalizados if total_finalizados > 0 else pd.Timedelta(0)
-    tmo_atualizado = tempo_total_atualizado / total_atualizado if total_atualizado > 0 else pd.Timedelta(0)
-
-    # Calcular o TMO geral
-    tempo_total_analista = tempo_total_cadastrado + tempo_total_atualizado + tempo_total_realizado
-    total_tarefas = total_finalizados + total_atualizado + total_realizados
-    tempo_medio_analista = tempo_total_analista / total_tarefas if total_tarefas > 0 else pd.Timedelta(0)
-
-    return tempo_medio_analista
-
-
 def exportar_planilha_com_tmo(df, periodo_selecionado, analistas_selecionados, tmo_tipo='GERAL'):
     """
     Exporta uma planilha com informações do período selecionado, analistas, TMO (geral, cadastrado ou cadastrado com tipo) e quantidade de tarefas,
@@ -1298,41 +818,34 @@ def exportar_planilha_com_tmo(df, periodo_selecionado, analistas_selecionados, t
         (df['USUÁRIO QUE CONCLUIU A TAREFA'].isin(analistas_selecionados))
     ]
 
-    # Calcular o TMO e a quantidade por analista
-    analistas = []
-    tmos = []
-    quantidades = []
-    tipos_causa = []  # Para armazenar os tipos de "TP CAUSA (TP COMPLEMENTO)"
-
-    for analista in analistas_selecionados:
-        df_analista = df_filtrado[df_filtrado['USUÁRIO QUE CONCLUIU A TAREFA'] == analista]
-        if tmo_tipo == 'GERAL':
-            # Considerar apenas as finalizações "CADASTRADO", "REALIZADO" e "ATUALIZADO"
-            df_relevante = df_analista[df_analista['FINALIZAÇÃO'].isin(['CADASTRADO', 'REALIZADO', 'ATUALIZADO'])]
-        elif tmo_tipo == 'CADASTRADO':
-            # Considerar apenas as finalizações "CADASTRADO"
-            df_relevante = df_analista[df_analista['FINALIZAÇÃO'] == 'CADASTRADO']
-        elif tmo_tipo == 'CADASTRADO_DETALHADO':
-            # Considerar apenas as finalizações "CADASTRADO" e detalhar por "TP CAUSA (TP COMPLEMENTO)"
-            df_relevante = df_analista[df_analista['FINALIZAÇÃO'] == 'CADASTRADO']
-            causa_detalhes = df_relevante.groupby('TP CAUSA (TP COMPLEMENTO)').size().reset_index(name='Quantidade')
-            tipos_causa.append(causa_detalhes)
-        else:
-            st.error("Tipo de TMO inválido selecionado.")
-            return
+    if tmo_tipo not in ['GERAL', 'CADASTRADO', 'CADASTRADO_DETALHADO']:
+        st.error("Tipo de TMO inválido selecionado.")
+        return
 
-        tmo_analista = calcular_tmo_personalizado(df_relevante)
-        quantidade_analista = len(df_relevante)
+    # Calcular o TMO e a quantidade por analista em uma única passagem
+    finalizacoes = FINALIZACOES_TMO_GERAL if tmo_tipo == 'GERAL' else ['CADASTRADO']
+    metricas = somar_metricas(calcular_metricas_por_analista(df_filtrado), finalizacoes, analistas_selecionados)
+    analistas = list(analistas_selecionados)
 
-        analistas.append(analista)
-        tmos.append(tmo_analista)
-        quantidades.append(quantidade_analista)
+    tipos_causa = []  # Para armazenar os tipos de "TP CAUSA (TP COMPLEMENTO)"
+    if tmo_tipo == 'CADASTRADO_DETALHADO':
+        # Detalhar as tarefas "CADASTRADO" por "TP CAUSA (TP COMPLEMENTO)" para todos os analistas de uma vez
+        df_cadastrado = df_filtrado[df_filtrado['FINALIZAÇÃO'] == 'CADASTRADO']
+        causas = df_cadastrado.groupby(
+            [df_cadastrado['USUÁRIO QUE CONCLUIU A TAREFA'].astype(object), 'TP CAUSA (TP COMPLEMENTO)']
+        ).size().reset_index(name='Quantidade')
+        causas_por_analista = dict(tuple(causas.groupby('USUÁRIO QUE CONCLUIU A TAREFA')))
+        vazio = causas.iloc[0:0]
+        tipos_causa = [
+            causas_por_analista.get(analista, vazio)[['TP CAUSA (TP COMPLEMENTO)', 'Quantidade']]
+            for analista in analistas
+        ]
 
     # Criar o DataFrame de resumo
     df_resumo = pd.DataFrame({
         'Analista': analistas,
-        'TMO': tmos,
-        'Quantidade': quantidades
+        'TMO': dividir_tempo(metricas['Tempo_Total'], metricas['Quantidade']).fillna(pd.Timedelta(0)).to_numpy(),
+        'Quantidade': metricas['Quantidade'].to_numpy()
     })
 
     # Adicionar o período ao DataFrame exportado
@@ -1340,9 +853,7 @@ def exportar_planilha_com_tmo(df, periodo_selecionado, analistas_selecionados, t
     df_resumo['Período Final'] = data_final
 
     # Formatar o TMO como HH:MM:SS
-    df_resumo['TMO'] = df_resumo['TMO'].apply(
-        lambda x: f"{int(x.total_seconds() // 3600):02}:{int((x.total_seconds() % 3600) // 60):02}:{int(x.total_seconds() % 60):02}"
-    )
+    df_resumo['TMO'] = formatar_hms(df_resumo['TMO'])
 
     # Calcular a média do TMO em segundos
     tmo_segundos = [timedelta(hours=int(t.split(":")[0]), minutes=int(t.split(":")[1]), seconds=int(t.split(":")[2])).total_seconds() for t in df_resumo['TMO']]
@@ -1396,7 +907,7 @@ def exportar_planilha_com_tmo(df, periodo_selecionado, analistas_selecionados, t
 import pandas as pd
 import streamlit as st
 from io import BytesIO
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 def exportar_planilha_com_tmo_completo(df, periodo_selecionado, analistas_selecionados):
     """
@@ -1415,51 +926,23 @@ def exportar_planilha_com_tmo_completo(df, periodo_selecionado, analistas_seleci
         (df['USUÁRIO QUE CONCLUIU A TAREFA'].isin(analistas_selecionados))
     ]
 
-    # Criar listas para armazenar os dados por analista
-    analistas = []
-    tmo_cadastrado = []
-    quantidade_cadastrado = []
-    tmo_atualizado = []
-    quantidade_atualizado = []
-
-    for analista in analistas_selecionados:
-        df_analista = df_filtrado[df_filtrado['USUÁRIO QUE CONCLUIU A TAREFA'] == analista]
-
-        # Cálculo para Cadastro
-        df_cadastro = df_analista[df_analista['FINALIZAÇÃO'] == 'CADASTRADO']
-        tmo_cadastro_analista = df_cadastro['TEMPO MÉDIO OPERACIONAL'].mean()
-        total_cadastro = len(df_cadastro)
-
-        # Cálculo para Atualizado
-        df_atualizado = df_analista[df_analista['FINALIZAÇÃO'] == 'ATUALIZADO']
-        tmo_atualizado_analista = df_atualizado['TEMPO MÉDIO OPERACIONAL'].mean()
-        total_atualizado = len(df_atualizado)
-
-        # Adicionar valores às listas
-        analistas.append(analista)
-        tmo_cadastrado.append(tmo_cadastro_analista)
-        quantidade_cadastrado.append(total_cadastro)
-        tmo_atualizado.append(tmo_atualizado_analista)
-        quantidade_atualizado.append(total_atualizado)
+    # Calcular as métricas de todos os analistas em uma única passagem
+    metricas = calcular_metricas_por_analista(df_filtrado)
+    cadastro = somar_metricas(metricas, ['CADASTRADO'], analistas_selecionados)
+    atualizado = somar_metricas(metricas, ['ATUALIZADO'], analistas_selecionados)
 
     # Criar DataFrame de resumo
     df_resumo = pd.DataFrame({
-        'Analista': analistas,
-        'TMO Cadastro': tmo_cadastrado,
-        'Quantidade Cadastro': quantidade_cadastrado,
-        'TMO Atualizado': tmo_atualizado,
-        'Quantidade Atualização': quantidade_atualizado
+        'Analista': list(analistas_selecionados),
+        'TMO Cadastro': dividir_tempo(cadastro['Tempo_Total'], cadastro['Quantidade_TMO']).to_numpy(),
+        'Quantidade Cadastro': cadastro['Quantidade'].to_numpy(),
+        'TMO Atualizado': dividir_tempo(atualizado['Tempo_Total'], atualizado['Quantidade_TMO']).to_numpy(),
+        'Quantidade Atualização': atualizado['Quantidade'].to_numpy()
     })
 
     # Converter TMO para HH:MM:SS (removendo frações de segundos)
-    def format_tmo(tmo):
-        if pd.notnull(tmo):
-            total_seconds = int(tmo.total_seconds())  # Removendo frações
-            return str(timedelta(seconds=total_seconds))
-        return '00:00:00'
-
-    df_resumo['TMO Cadastro'] = df_resumo['TMO Cadastro'].apply(format_tmo)
-    df_resumo['TMO Atualizado'] = df_resumo['TMO Atualizado'].apply(format_tmo)
+    df_resumo['TMO Cadastro'] = formatar_hms(df_resumo['TMO Cadastro'])
+    df_resumo['TMO Atualizado'] = formatar_hms(df_resumo['TMO Atualizado'])
 
     # Criar um arquivo Excel em memória
     buffer = BytesIO()
@@ -1501,23 +984,21 @@ def exportar_relatorio_detalhado_por_analista(df, periodo_selecionado, analistas
         (df['FINALIZAÇÃO'] == 'CADASTRADO')  # Apenas tarefas cadastradas
     ]
 
+    # Calcular TMO e quantidade por dia de todos os analistas em uma única passagem
+    metricas = somar_metricas(calcular_metricas_por_analista(df_filtrado, por_dia=True), ['CADASTRADO'])
+    metricas['TMO'] = dividir_tempo(metricas['Tempo_Total'], metricas['Quantidade'])
+    metricas_por_analista = dict(tuple(metricas.reset_index().groupby('USUÁRIO QUE CONCLUIU A TAREFA')))
+
     buffer = BytesIO()
     with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
         # Criar relatório detalhado por analista
         for analista in analistas_selecionados:
-            df_analista = df_filtrado[df_filtrado['USUÁRIO QUE CONCLUIU A TAREFA'] == analista]
-            
-            # Calcular TMO e quantidade por dia
-            df_tmo_por_dia = df_analista.groupby(df_analista['DATA DE CONCLUSÃO DA TAREFA'].dt.date).agg(
-                TMO=('TEMPO MÉDIO OPERACIONAL', lambda x: x.sum() / len(x) if len(x) > 0 else pd.Timedelta(0)),
-                Quantidade=('DATA DE CONCLUSÃO DA TAREFA', 'count')
-            ).reset_index()
-            df_tmo_por_dia.rename(columns={'DATA DE CONCLUSÃO DA TAREFA': 'Dia'}, inplace=True)
+            if analista not in metricas_por_analista:
+                continue
+            df_tmo_por_dia = metricas_por_analista[analista][['Dia', 'TMO', 'Quantidade']].reset_index(drop=True)
 
             # Formatar TMO como HH:MM:SS
-            df_tmo_por_dia['TMO'] = df_tmo_por_dia['TMO'].apply(
-                lambda x: f"{int(x.total_seconds() // 3600):02}:{int((x.total_seconds() % 3600) // 60):02}:{int(x.total_seconds() % 60):02}"
-            )
+            df_tmo_por_dia['TMO'] = formatar_hms(df_tmo_por_dia['TMO'])
 
             # Adicionar coluna de analista
             df_tmo_por_dia.insert(0, 'Analista', analista)
@@ -1564,27 +1045,6 @@ def exportar_relatorio_detalhado_por_analista(df, periodo_selecionado, analistas
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
 
-def calcular_tmo_geral(df):
-    """
-    Calcula o TMO Geral considerando todas as tarefas finalizadas.
-    """
-    df_finalizados = df[df['FINALIZAÇÃO'].isin(['CADASTRADO', 'REALIZADO', 'ATUALIZADO'])]
-    return df_finalizados['TEMPO MÉDIO OPERACIONAL'].mean()
-
-def calcular_tmo_cadastro(df):
-    """
-    Calcula o TMO apenas para tarefas finalizadas como "CADASTRADO".
-    """
-    df_cadastro = df[df['FINALIZAÇÃO'] == 'CADASTRADO']
-    return df_cadastro['TEMPO MÉDIO OPERACIONAL'].mean()
-
-def calcular_tempo_ocioso(df):
-    """
-    Calcula o tempo ocioso total por analista.
-    """
-    df_ocioso = df.groupby('USUÁRIO QUE CONCLUIU A TAREFA')['TEMPO OCIOSO'].sum().reset_index()
-    return df_ocioso
-
 def gerar_relatorio_tmo_completo(df, periodo_selecionado, analistas_selecionados):
     """
     Gera um relatório Excel com TMO de Cadastro, TMO Geral, Quantidade de Cadastro,
@@ -1599,20 +1059,27 @@ def gerar_relatorio_tmo_completo(df, periodo_selecionado, analistas_selecionados
         (df['USUÁRIO QUE CONCLUIU A TAREFA'].isin(analistas_selecionados))
     ].copy()  # Criar uma cópia para evitar alterações no DataFrame original
 
-    # 🔹 Calcular o tempo ocioso por analista
-    df_tempo_ocioso = calcular_tempo_ocioso_por_analista(df_filtrado)
+    # 🔹 Calcular o tempo ocioso de todos os analistas em uma única passagem
+    tempos_ociosos = calcular_tempo_ocioso_por_analista(df_filtrado, por_dia=False)
+    tempos_ociosos = tempos_ociosos.set_index('USUÁRIO QUE CONCLUIU A TAREFA')['Tempo Ocioso']
+
+    # 🔹 Calcular as métricas de todos os analistas em uma única passagem
+    metricas = calcular_metricas_por_analista(df_filtrado)
+    geral = somar_metricas(metricas, FINALIZACOES_TMO_GERAL, analistas_selecionados)
+    cadastro = somar_metricas(metricas, ['CADASTRADO'], analistas_selecionados)
+    total = somar_metricas(metricas, None, analistas_selecionados)
+    tmos_geral = dividir_tempo(geral['Tempo_Total'], geral['Quantidade_TMO'])
+    tmos_cadastro = dividir_tempo(cadastro['Tempo_Total'], cadastro['Quantidade_TMO'])
 
     buffer = BytesIO()
     with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
         for analista in analistas_selecionados:
-            df_analista = df_filtrado[df_filtrado['USUÁRIO QUE CONCLUIU A TAREFA'] == analista]
-            tmo_geral = calcular_tmo_geral(df_analista)
-            tmo_cadastro = calcular_tmo_cadastro(df_analista)
-            total_cadastros = len(df_analista[df_analista['FINALIZAÇÃO'] == 'CADASTRADO'])
-            total_protocolos = len(df_analista)
+            tmo_geral = tmos_geral[analista]
+            tmo_cadastro = tmos_cadastro[analista]
+            total_cadastros = cadastro.at[analista, 'Quantidade']
+            total_protocolos = total.at[analista, 'Quantidade']
 
-            # 🔹 Ajuste para acessar a coluna correta do DataFrame `df_tempo_ocioso`
-            tempo_ocioso = df_tempo_ocioso[df_tempo_ocioso['USUÁRIO QUE CONCLUIU A TAREFA'] == analista]['TEMPO OCIOSO'].sum() if not df_tempo_ocioso.empty else pd.Timedelta(0)
+            tempo_ocioso = tempos_ociosos.get(analista, pd.Timedelta(0))
 
             # 🔹 Criar DataFrame com os dados do relatório
             df_resumo = pd.DataFrame({
@@ -1625,9 +1092,9 @@ def gerar_relatorio_tmo_completo(df, periodo_selecionado, analistas_selecionados
             })
 
             # 🔹 Converter TMO e Tempo Ocioso para HH:MM:SS
-            df_resumo['TMO Geral'] = df_resumo['TMO Geral'].apply(lambda x: str(timedelta(seconds=x.total_seconds())) if pd.notnull(x) else '00:00:00')
-            df_resumo['TMO Cadastro'] = df_resumo['TMO Cadastro'].apply(lambda x: str(timedelta(seconds=x.total_seconds())) if pd.notnull(x) else '00:00:00')
-            df_resumo['Tempo Ocioso'] = df_resumo['Tempo Ocioso'].apply(lambda x: str(timedelta(seconds=x.total_seconds())) if pd.notnull(x) else '00:00:00')
+            df_resumo['TMO Geral'] = formatar_hms(df_resumo['TMO Geral'])
+            df_resumo['TMO Cadastro'] = formatar_hms(df_resumo['TMO Cadastro'])
+            df_resumo['Tempo Ocioso'] = formatar_hms(df_resumo['Tempo Ocioso'])
 
             # 🔹 Escrever no Excel
             df_resumo.to_excel(writer, index=False, sheet_name=analista[:31])
@@ -1667,12 +1134,12 @@ def gerar_relatorio_html(df, data_inicio_antes, data_fim_antes, data_inicio_depo
     ]
 
     # 🔹 Calcular TMO e quantidade de tarefas por analista
-    df_tmo_antes = df_antes.groupby('USUÁRIO QUE CONCLUIU A TAREFA').agg(
+    df_tmo_antes = df_antes.groupby('USUÁRIO QUE CONCLUIU A TAREFA', observed=True).agg(
         TMO=('TEMPO MÉDIO OPERACIONAL', lambda x: x.mean() if len(x) > 0 else pd.Timedelta(0)),
         Quantidade=('DATA DE CONCLUSÃO DA TAREFA', 'count')
     ).reset_index()
 
-    df_tmo_depois = df_depois.groupby('USUÁRIO QUE CONCLUIU A TAREFA').agg(
+    df_tmo_depois = df_depois.groupby('USUÁRIO QUE CONCLUIU A TAREFA', observed=True).agg(
         TMO=('TEMPO MÉDIO OPERACIONAL', lambda x: x.mean() if len(x) > 0 else pd.Timedelta(0)),
         Quantidade=('DATA DE CONCLUSÃO DA TAREFA', 'count')
     ).reset_index()
@@ -1680,15 +1147,9 @@ def gerar_relatorio_html(df, data_inicio_antes, data_fim_antes, data_inicio_depo
     # 🔹 Unir os dois DataFrames para comparação
     df_comparativo = pd.merge(df_tmo_antes, df_tmo_depois, on="USUÁRIO QUE CONCLUIU A TAREFA", how="outer", suffixes=("_antes", "_depois"))
 
-    # 🔹 Função para formatar TMO no formato HH:MM:SS
-    def format_tmo(value):
-        if pd.isnull(value) or value == pd.Timedelta(0):
-            return "00:00:00"
-        total_seconds = value.total_seconds()
-        return f"{int(total_seconds // 3600):02}:{int((total_seconds % 3600) // 60):02}:{int(total_seconds % 60):02}"
-
-    df_comparativo['TMO_antes'] = df_comparativo['TMO_antes'].apply(format_tmo)
-    df_comparativo['TMO_depois'] = df_comparativo['TMO_depois'].apply(format_tmo)
+    # 🔹 Formatar TMO no formato HH:MM:SS
+    df_comparativo['TMO_antes'] = formatar_hms(df_comparativo['TMO_antes'])
+    df_comparativo['TMO_depois'] = formatar_hms(df_comparativo['TMO_depois'])
 
     # 🔹 Criar os dados para o gráfico
     nomes_analistas = df_comparativo['USUÁRIO QUE CONCLUIU A TAREFA'].tolist()
@@ -1840,15 +1301,13 @@ def gerar_relatorio_html_tmo(df, data_inicio, data_fim):
     tmo_medio_geral = df_filtrado['TEMPO MÉDIO OPERACIONAL'].mean()
     
     # Agrupar dados por analista
-    df_tmo_analista = df_filtrado.groupby('USUÁRIO QUE CONCLUIU A TAREFA').agg(
+    df_tmo_analista = df_filtrado.groupby('USUÁRIO QUE CONCLUIU A TAREFA', observed=True).agg(
         TMO=('TEMPO MÉDIO OPERACIONAL', lambda x: x.mean() if len(x) > 0 else pd.Timedelta(0)),
         Quantidade=('DATA DE CONCLUSÃO DA TAREFA', 'count')
     ).reset_index()
 
     # Formatar TMO para exibição
-    df_tmo_analista['TMO'] = df_tmo_analista['TMO'].apply(
-        lambda x: f"{int(x.total_seconds() // 3600):02}:{int((x.total_seconds() % 3600) // 60):02}:{int(x.total_seconds() % 60):02}"
-    )
+    df_tmo_analista['TMO'] = formatar_hms(df_tmo_analista['TMO'])
 
     # Organizar os dados para gráfico
     nomes_analistas = df_tmo_analista['USUÁRIO QUE CONCLUIU A TAREFA'].tolist()
@@ -1997,69 +1456,165 @@ COLUNAS_ESSENCIAIS = [
     'FINALIZAÇÃO'
 ]
 
-def load_sla_data(usuario):
+# Colunas de data do histórico de SLA, guardadas como datetime no parquet
+COLUNAS_DATA_SLA = [
+    'DATA CRIAÇÃO PROTOCOLO',
+    'DATA CRIAÇÃO DA TAREFA',
+    'DATA DE INÍCIO DA TAREFA',
+    'DATA DE CONCLUSÃO DA TAREFA'
+]
+
+# O histórico de SLA é particionado (e filtrado na leitura) pela data de criação do protocolo
+COLUNA_PARTICAO_SLA = 'DATA CRIAÇÃO PROTOCOLO'
+
+def _sla_vazio(columns=None) -> pd.DataFrame:
+    df_sla = pd.DataFrame(columns=columns if columns is not None else COLUNAS_ESSENCIAIS)
+    for coluna in COLUNAS_DATA_SLA:
+        if coluna in df_sla.columns:
+            df_sla[coluna] = df_sla[coluna].astype('datetime64[ns]')
+    return df_sla
+
+def _converter_datas_sla(serie: pd.Series) -> pd.Series:
     """
-    Carrega ou cria a planilha de SLA para o usuário especificado.
-    
+    Converte datas vindas da planilha: texto no formato DD/MM/AAAA HH:MM:SS ou, na falta dele,
+    qualquer formato com o dia primeiro. Células já lidas como data são mantidas.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    datas = pd.to_datetime(serie, format='%d/%m/%Y %H:%M:%S', errors='coerce')
+    restantes = datas.isna() & serie.notna()
+    if restantes.any():
+        datas[restantes] = pd.to_datetime(serie[restantes].astype(str), format='mixed', dayfirst=True, errors='coerce')
+    return datas
+
+def preparar_sla_para_gravacao(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tipa um lote de SLA antes de gravá-lo: completa as colunas de COLUNAS_ESSENCIAIS, converte
+    as datas de COLUNAS_DATA_SLA para datetime e o TMO para timedelta, e passa para texto as
+    colunas com valores de tipos misturados (o Parquet exige um tipo por coluna).
+    """
+    df = df.copy(deep=False)
+    for coluna in COLUNAS_ESSENCIAIS:
+        if coluna not in df.columns:
+            df[coluna] = None
+
+    for coluna in COLUNAS_DATA_SLA:
+        df[coluna] = _converter_datas_sla(df[coluna])
+
+    for coluna in COLUNAS_DURACAO:
+        if not pd.api.types.is_timedelta64_dtype(df[coluna]):
+            df[coluna] = pd.to_timedelta(df[coluna].astype(str).where(df[coluna].notna()), errors='coerce')
+
+    for coluna in df.columns:
+        if df[coluna].dtype == object:
+            df[coluna] = df[coluna].where(df[coluna].isna(), df[coluna].astype(str))
+
+    return df
+
+def _criar_dataset_sla(diretorio: str):
+    criar_dataset(diretorio, coluna_particao=COLUNA_PARTICAO_SLA, colunas_chave=COLUNAS_ESSENCIAIS, com_resumo=False)
+
+def migrar_sla_legado(usuario: str) -> bool:
+    """
+    Converte a antiga planilha 'sla_amil_<usuario>.xlsx' no histórico de SLA em parquet.
+    A planilha original é mantida intacta como cópia de segurança.
+    """
+    sla_file = f'sla_amil_{usuario}.xlsx'
+    if not os.path.exists(sla_file):
+        return False
+
+    diretorio = diretorio_sla(usuario)
+    _criar_dataset_sla(diretorio)
+    anexar_blocos(diretorio, (preparar_sla_para_gravacao(bloco) for bloco in ler_xlsx_em_blocos(sla_file)))
+    return True
+
+def load_sla_data(usuario, columns=None, date_from=None, date_to=None):
+    """
+    Carrega o histórico de SLA do usuário.
+
     Parâmetros:
-        - usuario: Nome do usuário para identificar o arquivo de SLA.
-        
+        - usuario: Nome do usuário para identificar o histórico de SLA.
+        - columns: Colunas a carregar (None carrega todas).
+        - date_from, date_to: Intervalo (inclusivo) da data de criação do protocolo. Apenas as
+          partições mensais do intervalo são lidas e o filtro é aplicado na leitura do parquet.
+
     Retorna:
-        - Um DataFrame com os dados de SLA.
+        - Um DataFrame com os dados de SLA, com as colunas de data já tipadas.
+
+    O histórico fica em um dataset parquet particionado pela data de criação do protocolo (o
+    mesmo formato do histórico de tarefas; ver storage.py), e a leitura usa o cache compartilhado
+    de load_data. A antiga planilha xlsx é migrada na primeira leitura e não é mais gravada.
+    Sem histórico, ou se a leitura falhar, devolve um DataFrame vazio sem gravar nada.
     """
-    sla_file = f'sla_amil_{usuario}.xlsx'  # Nome do arquivo de SLA
+    diretorio = diretorio_sla(usuario)
+    colunas = tuple(columns) if columns is not None else None
+
     try:
-        if os.path.exists(sla_file):
-            df_sla = pd.read_excel(sla_file)
+        if not existe_dataset(diretorio) and not migrar_sla_legado(usuario):
+            return _sla_vazio(columns)
+
+        caminho = os.path.abspath(diretorio)
+        versao = assinatura_dataset(diretorio)
+        chave = (usuario, caminho, *versao, date_from, date_to, colunas)
+        df_sla = cache_dados.obter(chave)
 
-            # Adiciona colunas ausentes no arquivo existente
-            for coluna in COLUNAS_ESSENCIAIS:
+        if df_sla is None:
+            df_sla = ler_dataset(diretorio, date_from, date_to, columns)
+            if df_sla.columns.empty:
+                df_sla = _sla_vazio(columns)
+
+            # Adiciona colunas ausentes no histórico
+            for coluna in (columns if columns is not None else COLUNAS_ESSENCIAIS):
                 if coluna not in df_sla.columns:
                     df_sla[coluna] = None
-        else:
-            raise FileNotFoundError
-        
+
+            cache_dados.invalidar(lambda c: c[0] == usuario and c[1] == caminho and tuple(c[2:4]) != versao)
+            cache_dados.guardar(chave, marcar_versao(congelar_dataframe(df_sla), chave))
+
+        return df_sla.copy(deep=False)
+
     except (FileNotFoundError, ValueError, OSError):
-        # Cria um DataFrame vazio com as colunas essenciais e salva um novo arquivo
-        df_sla = pd.DataFrame(columns=COLUNAS_ESSENCIAIS)
-        df_sla.to_excel(sla_file, index=False)
-    
-    return df_sla
+        st.toast("⚠️ Não foi possível ler o histórico de SLA agora. Nenhum dado foi alterado; recarregue a página.")
+        return _sla_vazio(columns)
 
-def save_sla_data(df, usuario):
+def intervalo_datas_sla(usuario: str) -> tuple:
     """
-    Salva o DataFrame de SLA no arquivo correspondente ao usuário,
-    verificando e evitando duplicatas.
-
-    Parâmetros:
-        - df: DataFrame com os dados de SLA.
-        - usuario: Nome do usuário para identificar o arquivo de SLA.
+    Datas mínima e máxima de criação de protocolo do histórico de SLA, lidas do manifesto.
     """
-    sla_file = f'sla_amil_{usuario}.xlsx'  # Nome do arquivo de SLA
-
-    # Carregar os dados existentes
-    if os.path.exists(sla_file):
-        existing_data = pd.read_excel(sla_file)
-    else:
-        existing_data = pd.DataFrame(columns=COLUNAS_ESSENCIAIS)
+    diretorio = diretorio_sla(usuario)
+    try:
+        if not existe_dataset(diretorio) and not migrar_sla_legado(usuario):
+            return None, None
+        return intervalo_datas(diretorio)
+    except (ValueError, OSError):
+        return None, None
 
-    # Adicionar colunas ausentes antes de salvar
-    for coluna in COLUNAS_ESSENCIAIS:
-        if coluna not in df.columns:
-            df[coluna] = None
-        if coluna not in existing_data.columns:
-            existing_data[coluna] = None
+def save_sla_data(dados, usuario):
+    """
+    Anexa ao histórico de SLA do usuário as linhas do lote que ainda não existem nele.
 
-    # Combinar os novos dados com os existentes, evitando duplicatas
-    combined_data = pd.concat([existing_data, df]).drop_duplicates(subset=COLUNAS_ESSENCIAIS, keep='first')
+    Parâmetros:
+        - dados: DataFrame com os dados de SLA ou sequência de blocos (ver ler_planilha_enviada).
+        - usuario: Nome do usuário para identificar o histórico de SLA.
+
+    Retorna a quantidade de linhas não salvas por já existirem. As duplicatas são detectadas
+    pelo índice persistido de impressões digitais de 64 bits de COLUNAS_ESSENCIAIS, sem reler o
+    histórico: busca binária nos trechos do índice abertos com mmap, O(m log n) para m linhas do
+    lote e n do histórico, e um trecho novo com as chaves do lote (ver storage.anexar_blocos). As
+    linhas novas viram fragmentos parquet e o backup é agendado em segundo plano.
+    """
+    diretorio = diretorio_sla(usuario)
+    if not existe_dataset(diretorio):
+        migrar_sla_legado(usuario)
+    _criar_dataset_sla(diretorio)
 
-    # Contar o número de linhas que não foram adicionadas
-    linhas_nao_salvas = len(existing_data) + len(df) - len(combined_data)
+    resultado = anexar_blocos(diretorio, (preparar_sla_para_gravacao(bloco) for bloco in _blocos(dados)))
 
-    # Salvar o DataFrame combinado no arquivo Excel
-    combined_data.to_excel(sla_file, index=False)
+    caminho = os.path.abspath(diretorio)
+    cache_dados.invalidar(lambda chave: chave[1] == caminho)
+    agendar_backup(diretorio)
 
-    return linhas_nao_salvas
+    return resultado['duplicadas']
 
 def calcular_entrada_protocolos_por_dia(df):
     """
@@ -2181,49 +1736,38 @@ def exibir_entrada_por_dia(df_entrada_formatado):
         st.write(f"**Total: {total}**")
 
 
-def gerar_planilha_sla(df):
+def gerar_planilha_sla(df, data_inicio=None, data_fim=None):
     """
-    Gera uma planilha Excel com abas separadas por dia, contendo as filas, entrada e quantidade tratada de protocolos.
+    Gera uma planilha Excel com abas separadas por dia, contendo as filas, entrada, quantidade tratada e
+    quantidade tratada no prazo de protocolos.
 
     Parâmetros:
         - df: DataFrame com os dados de SLA.
+        - data_inicio, data_fim: Intervalo das datas de criação do protocolo (ver calcular_sla).
 
     Retorna:
         - Um botão de download para a planilha gerada.
     """
-
-    # Filtrar filas e tarefas específicas
-    filas_interessadas = [' CADASTRO ROBÔ', 'INCIDENTE PROCESSUAL', 'CADASTRO ANS']
-
-    # Garantir que as colunas de data estão no formato datetime
-    df['DATA CRIAÇÃO PROTOCOLO'] = pd.to_datetime(df['DATA CRIAÇÃO PROTOCOLO'], errors='coerce')
-    df['DATA DE CONCLUSÃO DA TAREFA'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA'], errors='coerce')
+    # Mesmo cálculo das métricas do painel (memorizado), já agregado por dia e fila
+    por_dia, _, _ = calcular_sla(df, data_inicio, data_fim)
 
     # Criar um arquivo Excel em memória
     buffer = BytesIO()
     with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-        for dia, df_dia in df.groupby(df['DATA CRIAÇÃO PROTOCOLO'].dt.date):
-            # Filtrar apenas as filas relevantes para o dia
-            df_dia = df_dia[df_dia['FILA'].isin(filas_interessadas)]
-            
-            # Calcular entradas e tratados por fila
-            entradas = df_dia.groupby('FILA').size().reset_index(name='ENTRADA')
-            tratados = df_dia[df_dia['DATA DE CONCLUSÃO DA TAREFA'].notnull()].groupby('FILA').size().reset_index(name='TRATADOS')
-
-            # Mesclar entradas e tratados
-            resultado = pd.merge(entradas, tratados, on='FILA', how='outer').fillna(0)
-            resultado['ENTRADA'] = resultado['ENTRADA'].astype(int)
-            resultado['TRATADOS'] = resultado['TRATADOS'].astype(int)
+        for dia, resultado in por_dia.groupby('DIA', sort=True):
+            resultado = resultado[['FILA', 'ENTRADAS', 'TRATADOS', 'SLA_OK']].rename(columns={'ENTRADAS': 'ENTRADA', 'SLA_OK': 'NO PRAZO'})
 
             # Adicionar total e SLA
-            total_entradas = resultado['ENTRADA'].sum()
-            total_tratados = resultado['TRATADOS'].sum()
-            sla = f"{(total_tratados / total_entradas) * 100:.2f}%" if total_entradas > 0 else "0%"
+            total_entradas, total_tratados, total_no_prazo = resultado[['ENTRADA', 'TRATADOS', 'NO PRAZO']].sum()
+            sla = f"{(total_no_prazo / total_entradas) * 100:.2f}%"
 
             # Adicionar as linhas de total e SLA
             resultado = pd.concat([
                 resultado,
-                pd.DataFrame({'FILA': ['TOTAL DE ENTRADAS', 'SLA'], 'ENTRADA': [total_entradas, None], 'TRATADOS': [total_tratados, sla]})
+                pd.DataFrame({
+                    'FILA': ['TOTAL DE ENTRADAS', 'SLA'], 'ENTRADA': [total_entradas, None],
+                    'TRATADOS': [total_tratados, None], 'NO PRAZO': [total_no_prazo, sla]
+                })
             ], ignore_index=True)
 
             # Escrever no Excel
@@ -2234,6 +1778,7 @@ def gerar_planilha_sla(df):
             worksheet.set_column('A:A', 20)  # Largura da coluna FILA
             worksheet.set_column('B:B', 10)  # Largura da coluna ENTRADA
             worksheet.set_column('C:C', 10)  # Largura da coluna TRATADOS
+            worksheet.set_column('D:D', 10)  # Largura da coluna NO PRAZO
 
     buffer.seek(0)
 
@@ -2247,54 +1792,18 @@ def gerar_planilha_sla(df):
 
 def calcular_sla_por_fila(df, data_inicio, data_fim):
     """
-    Calcula o SLA por fila, considerando o intervalo de datas no formato DD/MM/AAAA.
+    Calcula o SLA por fila no intervalo de datas de criação do protocolo (date ou DD/MM/AAAA),
+    com prazo de D+PRAZO_SLA dias úteis (ver calcular_sla).
     
     Parâmetros:
         - df: DataFrame contendo os dados de SLA.
-        - data_inicio: Data de início do filtro (formato DD/MM/AAAA).
-        - data_fim: Data de fim do filtro (formato DD/MM/AAAA).
+        - data_inicio: Data de início do filtro.
+        - data_fim: Data de fim do filtro (inclusiva).
     
     Retorna:
         - resumo: DataFrame com as informações de SLA por fila.
         - sla_geral: Percentual de SLA geral (todas as filas).
     """
-    filas = [' CADASTRO ROBÔ', 'INCIDENTE PROCESSUAL', 'CADASTRO ANS']
-    tarefas_interesse = ['CADASTRAR ROBO', 'CADASTRAR ANS', 'ATUALIZAR']
-    prazo_sla = 3  # SLA de D+3
-
-    # Garantir que as colunas de data sejam convertidas corretamente
-    df['DATA CRIAÇÃO PROTOCOLO'] = pd.to_datetime(df['DATA CRIAÇÃO PROTOCOLO'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
-    df['DATA DE CONCLUSÃO DA TAREFA'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
-
-    # Filtrar pelo intervalo de datas no formato correto
-    df = df[
-        (df['DATA CRIAÇÃO PROTOCOLO'] >= pd.to_datetime(data_inicio, dayfirst=True)) & 
-        (df['DATA CRIAÇÃO PROTOCOLO'] <= pd.to_datetime(data_fim, dayfirst=True))
-    ]
-
-    # Filtrar apenas as filas de interesse
-    df = df[df['FILA'].isin(filas)]
-
-    # Filtrar apenas as tarefas de interesse
-    df = df[df['TAREFA'].isin(tarefas_interesse)]
-
-    # Calcular se o SLA foi cumprido (D+3)
-    df['SLA_OK'] = (
-        (df['DATA DE CONCLUSÃO DA TAREFA'] - df['DATA CRIAÇÃO PROTOCOLO']).dt.days <= prazo_sla
-    )
-
-    # Agrupar por fila e calcular as métricas
-    resumo = df.groupby('FILA').agg(
-        ENTRADAS=('DATA CRIAÇÃO PROTOCOLO', 'count'),
-        TRATADOS=('DATA DE CONCLUSÃO DA TAREFA', 'count'),
-        SLA_OK=('SLA_OK', 'sum')
-    ).reset_index()
-
-    # Calcular o percentual de SLA para cada fila
-    resumo['% SLA'] = ((resumo['SLA_OK'] / resumo['ENTRADAS']) * 100).round(2)
-
-    # Calcular o SLA geral
-    sla_geral = (resumo['SLA_OK'].sum() / resumo['ENTRADAS'].sum() * 100).round(2)
-
+    _, resumo, sla_geral = calcular_sla(df, data_inicio, data_fim)
     return resumo, sla_geral
 
@@ -1,9 +1,102 @@
 import plotly.express as px
 import os
+import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.graph_objs as go
 import streamlit as st
+import functools
+import hashlib
+import json
+import plotly.io as pio
+from .amostragem import DIARIA, FORMATO_DATA, ROTULO_PERIODO, agrupar_por_periodo, inicio_do_periodo, reduzir_serie, resolucao_para_intervalo
+from .cache import cache_figuras
+from .formatacao import formatar_hms, formatar_min_seg
+from .resumo import como_resumo_diario
+
+def _chave_figura(valor):
+    """
+    Parte da chave do cache de figuras: DataFrames e Series entram pelo hash do conteúdo (são os
+    dados já agregados, de poucas linhas), listas e dicionários pelos itens.
+    """
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        conteudo = pd.util.hash_pandas_object(valor, index=False).to_numpy()
+        colunas = tuple(valor.columns) if isinstance(valor, pd.DataFrame) else (valor.name,)
+        tipos = tuple(map(str, valor.dtypes)) if isinstance(valor, pd.DataFrame) else (str(valor.dtype),)
+        return (colunas, tipos, len(valor), hashlib.blake2b(conteudo.tobytes(), digest_size=16).hexdigest())
+    if isinstance(valor, (list, tuple)):
+        return tuple(_chave_figura(item) for item in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((chave, _chave_figura(item)) for chave, item in valor.items()))
+    return valor
+
+def datas_em_ms(datas) -> np.ndarray:
+    """
+    Datas (date, Timestamp ou texto) como milissegundos desde 1970 (float64, NaN para datas nulas),
+    à meia-noite de cada dia. Os eixos de data do Plotly.js não têm fuso: o número é exibido como
+    hora UTC, então a meia-noite coincide com a marca do dia no eixo. O Plotly envia arrays numéricos do numpy como arrays tipados em
+    base64; datas iriam como uma lista de textos ISO. Usar com um eixo do tipo 'date' (ver
+    eixo_datas), que formata os rótulos e o hover.
+    """
+    datas = pd.to_datetime(pd.Series(datas)).dt.normalize()
+    ms = datas.to_numpy(dtype='datetime64[ms]').view('int64').astype('float64')
+    ms[datas.isna().to_numpy()] = np.nan
+    return ms
+
+def eixo_datas(formato, titulo='Data'):
+    """
+    Eixo X de datas recebidas como números (datas_em_ms): marcas e hover formatados pelo Plotly.
+    """
+    return dict(type='date', tickformat=formato, hoverformat=formato, title=titulo)
+
+def figura_memorizada(construir):
+    """
+    Guarda no cache_figuras a especificação (JSON) da figura montada por construir(*args, **kwargs).
+
+    A chave é o nome da função, os argumentos (ver _chave_figura) e o template padrão do Plotly
+    (o tema do Streamlit). Num acerto a figura é remontada a partir do JSON sem validação, sem
+    passar pelo plotly.express; cada chamada recebe uma figura nova, que pode ser alterada à vontade.
+    """
+    nome = f'{construir.__module__}.{construir.__qualname__}'
+
+    @functools.wraps(construir)
+    def envolvida(*args, **kwargs):
+        chave = (nome, _chave_figura((args, kwargs)), pio.templates.default)
+        especificacao = cache_figuras.obter(chave)
+        if especificacao is not None:
+            return go.Figure(json.loads(especificacao), _validate=False)
+        fig = construir(*args, **kwargs)
+        if fig is not None:
+            cache_figuras.guardar(chave, pio.to_json(fig, validate=False))
+        return fig
+
+    return envolvida
+
+@figura_memorizada
+def _figura_produtividade_diaria(df_filtrado, custom_colors, titulo_eixo_y, rotulo_y):
+    # Criar gráfico de linha com pontos
+    fig = px.line(
+        df_filtrado,
+        x=datas_em_ms(df_filtrado['Dia']),
+        y='Produtividade',
+        color_discrete_sequence=custom_colors,
+        labels={'Produtividade': rotulo_y, 'x': 'Data'},
+        line_shape='linear',
+        markers=True
+    )
+
+    # Melhorar a formatação do hover e eixo X
+    fig.update_traces(
+        hovertemplate='Data = %{x}<br>Produtividade = %{y}'
+    )
+
+    fig.update_layout(
+        xaxis=eixo_datas(FORMATO_DATA[DIARIA]),
+        yaxis=dict(
+            title=titulo_eixo_y
+        )
+    )
+    return fig
 
 def plot_produtividade_diaria(df_produtividade, custom_colors_unimed):
     if df_produtividade.empty or 'Dia' not in df_produtividade.columns or 'Produtividade' not in df_produtividade.columns:
@@ -30,32 +123,10 @@ def plot_produtividade_diaria(df_produtividade, custom_colors_unimed):
         (df_produtividade['Dia'] <= periodo_selecionado_plot_produtividade[1])
     ]
 
-    # Criar gráfico de linha com pontos
-    fig = px.line(
-        df_filtrado,
-        x='Dia',
-        y='Produtividade',
-        color_discrete_sequence=custom_colors_unimed,
-        labels={'Produtividade': 'Total de Cadastros', 'Dia': 'Data'},
-        line_shape='linear',
-        markers=True
-    )
+    # Intervalos longos: a série é reduzida no servidor (LTTB) antes de ir para o navegador
+    df_filtrado = reduzir_serie(df_filtrado, 'Produtividade')
 
-    # Melhorar a formatação do hover e eixo X
-    fig.update_traces(
-        hovertemplate='Data = %{x|%d/%m/%Y}<br>Produtividade = %{y}'
-    )
-
-    fig.update_layout(
-        xaxis=dict(
-            tickvals=df_filtrado['Dia'],
-            ticktext=[f"{dia.day}/{dia.month}/{dia.year}" for dia in df_filtrado['Dia']],
-            title='Data'
-        ),
-        yaxis=dict(
-            title='Total de Cadastros'
-        )
-    )
+    fig = _figura_produtividade_diaria(df_filtrado, custom_colors_unimed, 'Total de Cadastros', 'Total de Cadastros')
 
     # Exibir o gráfico na dashboard
     st.plotly_chart(fig, use_container_width=True)
@@ -85,32 +156,10 @@ def plot_produtividade_diaria_cadastros(df_produtividade_cadastro, custom_colors
         (df_produtividade_cadastro['Dia'] <= periodo_selecionado_produtividade[1])
     ]
 
-    # Criar gráfico de linha com pontos
-    fig = px.line(
-        df_filtrado,
-        x='Dia',
-        y='Produtividade',
-        color_discrete_sequence=custom_colors,
-        labels={'Produtividade': 'Total de Cadastros', 'Dia': 'Data'},
-        line_shape='linear',
-        markers=True
-    )
-
-    # Melhorar a formatação do hover e eixo X
-    fig.update_traces(
-        hovertemplate='Data = %{x|%d/%m/%Y}<br>Produtividade = %{y}'
-    )
+    # Intervalos longos: a série é reduzida no servidor (LTTB) antes de ir para o navegador
+    df_filtrado = reduzir_serie(df_filtrado, 'Produtividade')
 
-    fig.update_layout(
-        xaxis=dict(
-            tickvals=df_filtrado['Dia'],
-            ticktext=[f"{dia.day}/{dia.month}/{dia.year}" for dia in df_filtrado['Dia']],
-            title='Data'
-        ),
-        yaxis=dict(
-            title='Total de Cadastros'
-        )
-    )
+    fig = _figura_produtividade_diaria(df_filtrado, custom_colors, 'Total de Cadastros', 'Total de Cadastros')
 
     # Exibir o gráfico na dashboard
     st.plotly_chart(fig, use_container_width=True)
@@ -140,36 +189,39 @@ def plot_produtividade_diaria_subsidios(df_produtividade, custom_colors_unimed):
         (df_produtividade['Dia'] <= periodo_selecionado[1])
     ]
 
-    # Criar gráfico de linha com pontos
-    fig = px.line(
-        df_filtrado,
-        x='Dia',
-        y='Produtividade',
-        labels={'Produtividade': 'Tarefas de Subsídios', 'Dia': 'Data'},
+    # Intervalos longos: a série é reduzida no servidor (LTTB) antes de ir para o navegador
+    df_filtrado = reduzir_serie(df_filtrado, 'Produtividade')
+
+    # Linha e marcadores na primeira cor da paleta
+    fig = _figura_produtividade_diaria(df_filtrado, custom_colors_unimed[:1], 'Total de Tarefas', 'Tarefas de Subsídios')
+
+    st.plotly_chart(fig, use_container_width=True)
+
+@figura_memorizada
+def _figura_tmo_diario(df_tmo_filtrado, custom_colors):
+    # Gráfico de linha com pontos; o TMO vai em minutos no eixo e formatado no texto e no hover
+    fig_tmo_linha = px.line(
+        x=datas_em_ms(df_tmo_filtrado['Dia']),
+        y=df_tmo_filtrado['TMO'].dt.total_seconds().to_numpy() / 60,
+        labels={'y': 'Tempo Médio Operacional (min)', 'x': 'Data'},
+        color_discrete_sequence=custom_colors,
         line_shape='linear',
         markers=True
     )
 
-    # Aplica cor personalizada
-    fig.update_traces(line=dict(color=custom_colors_unimed[0]), marker=dict(color=custom_colors_unimed[0]))
-
-    # Hover e layout
-    fig.update_traces(
-        hovertemplate='Data = %{x|%d/%m/%Y}<br>Produtividade = %{y}'
+    fig_tmo_linha.update_traces(
+        text=df_tmo_filtrado['TMO_Formatado'],
+        textposition='top center',
+        hovertemplate='Data = %{x}<br>TMO = %{text}'
     )
 
-    fig.update_layout(
-        xaxis=dict(
-            tickvals=df_filtrado['Dia'],
-            ticktext=[f"{dia.day}/{dia.month}/{dia.year}" for dia in df_filtrado['Dia']],
-            title='Data'
-        ),
+    fig_tmo_linha.update_layout(
+        xaxis=eixo_datas(FORMATO_DATA[DIARIA]),
         yaxis=dict(
-            title='Total de Tarefas'
+            title='Tempo Médio Operacional (HH:MM:SS)'
         )
     )
-
-    st.plotly_chart(fig, use_container_width=True)
+    return fig_tmo_linha
 
 def plot_tmo_por_dia(df_tmo: pd.DataFrame, custom_colors: list):
     if df_tmo.empty or 'Dia' not in df_tmo.columns or 'TMO' not in df_tmo.columns:
@@ -201,33 +253,15 @@ def plot_tmo_por_dia(df_tmo: pd.DataFrame, custom_colors: list):
         (df_tmo['Dia'] <= periodo_tmo_selecionado[1])
     ]
 
-    # Constrói o gráfico
-    fig_tmo_linha = px.line(
-        df_tmo_filtrado,
-        x='Dia',
-        y=df_tmo_filtrado['TMO'].dt.total_seconds() / 60,
-        labels={'y': 'Tempo Médio Operacional (min)', 'Dia': 'Data'},
-        color_discrete_sequence=custom_colors,
-        line_shape='linear',
-        markers=True
-    )
+    # Intervalos longos: a série é reduzida no servidor (LTTB) antes de ir para o navegador
+    df_tmo_filtrado = reduzir_serie(df_tmo_filtrado, df_tmo_filtrado['TMO'].dt.total_seconds())
 
-    fig_tmo_linha.update_traces(
-        text=df_tmo_filtrado['TMO_Formatado'],
-        textposition='top center',
-        hovertemplate='Data = %{x|%d/%m/%Y}<br>TMO = %{text}'
-    )
+    # calcular_tmo_por_dia devolve só o TMO; o texto é formatado apenas para os pontos exibidos
+    if 'TMO_Formatado' not in df_tmo_filtrado:
+        df_tmo_filtrado = df_tmo_filtrado.assign(TMO_Formatado=formatar_hms(df_tmo_filtrado['TMO']))
 
-    fig_tmo_linha.update_layout(
-        xaxis=dict(
-            tickvals=df_tmo_filtrado['Dia'],
-            ticktext=[f"{dia.day}/{dia.month}/{dia.year}" for dia in df_tmo_filtrado['Dia']],
-            title='Data'
-        ),
-        yaxis=dict(
-            title='Tempo Médio Operacional (HH:MM:SS)'
-        )
-    )
+    # Constrói o gráfico
+    fig_tmo_linha = _figura_tmo_diario(df_tmo_filtrado[['Dia', 'TMO', 'TMO_Formatado']], custom_colors)
 
     return fig_tmo_linha
 
@@ -241,10 +275,7 @@ def plot_tmo_por_dia_cadastro(df_tmo_cadastro, custom_colors):
         df_tmo_cadastro['TMO'] = pd.to_timedelta(df_tmo_cadastro['TMO'])
 
     # Converter TMO para formato HH:MM:SS
-    df_tmo_cadastro['TMO_Formatado'] = df_tmo_cadastro['TMO'].apply(
-        lambda x: f"{int(x.total_seconds() // 3600):02}:{int((x.total_seconds() % 3600) // 60):02}:{int(x.total_seconds() % 60):02}"
-        if pd.notnull(x) else "00:00:00"
-    )
+    df_tmo_cadastro['TMO_Formatado'] = formatar_hms(df_tmo_cadastro['TMO'])
 
     # Definir período mínimo e máximo para o slider
     df_tmo_cadastro = df_tmo_cadastro.sort_values(by='Dia')
@@ -266,47 +297,25 @@ def plot_tmo_por_dia_cadastro(df_tmo_cadastro, custom_colors):
         (df_tmo_cadastro['Dia'] <= periodo_tmo_cadastro_selecionado[1])
     ]
 
-    # Criar gráfico de linha com pontos
-    fig_tmo_cadastro_linha = px.line(
-        df_tmo_cadastro_filtrado,
-        x='Dia',
-        y=df_tmo_cadastro_filtrado['TMO'].dt.total_seconds() / 60,  # Converte TMO para minutos
-        labels={'y': 'Tempo Médio Operacional (min)', 'Dia': 'Data'},
-        color_discrete_sequence=custom_colors,
-        line_shape='linear',
-        markers=True
-    )
+    # Intervalos longos: a série é reduzida no servidor (LTTB) antes de ir para o navegador
+    df_tmo_cadastro_filtrado = reduzir_serie(df_tmo_cadastro_filtrado, df_tmo_cadastro_filtrado['TMO'].dt.total_seconds())
 
-    # Melhorar a formatação do hover e eixo X
-    fig_tmo_cadastro_linha.update_traces(
-        text=df_tmo_cadastro_filtrado['TMO_Formatado'],
-        textposition='top center',
-        hovertemplate='Data = %{x|%d/%m/%Y}<br>TMO = %{text}'
-    )
-
-    fig_tmo_cadastro_linha.update_layout(
-        xaxis=dict(
-            tickvals=df_tmo_cadastro_filtrado['Dia'],
-            ticktext=[f"{dia.day}/{dia.month}/{dia.year}" for dia in df_tmo_cadastro_filtrado['Dia']],
-            title='Data'
-        ),
-        yaxis=dict(
-            title='Tempo Médio Operacional (HH:MM:SS)'
-        )
-    )
+    # Criar gráfico de linha com pontos
+    fig_tmo_cadastro_linha = _figura_tmo_diario(df_tmo_cadastro_filtrado[['Dia', 'TMO', 'TMO_Formatado']], custom_colors)
 
     return fig_tmo_cadastro_linha
 
-def plot_status_pie(total_parcial, total_nao_tratada, total_completa, custom_colors):
-    fig_status = px.pie(
-        names=['Subsídio Parcial', 'Fora do Escopo', 'Subsídio Completo'],
-        values=[total_parcial, total_nao_tratada, total_completa],
+@figura_memorizada
+def _figura_pizza(nomes, valores, custom_colors, hovertemplate):
+    fig = px.pie(
+        names=nomes,
+        values=valores,
         color_discrete_sequence=custom_colors
     )
-    fig_status.update_traces(
-        hovertemplate='Tarefas %{label} = %{value}<extra></extra>',
+    fig.update_traces(
+        hovertemplate=hovertemplate,
     )
-    fig_status.update_layout(
+    fig.update_layout(
         legend=dict(
             orientation="h",
             yanchor="top",
@@ -315,29 +324,18 @@ def plot_status_pie(total_parcial, total_nao_tratada, total_completa, custom_col
             x=0.5
         )
     )
-    return fig_status
-
-def format_timedelta_grafico_tmo(td):
-    if pd.isnull(td):
-        return "00:00:00"
-    total_seconds = int(td.total_seconds())
-    hours, remainder = divmod(total_seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return fig
 
-def grafico_tmo(df_tmo_analista, custom_colors):
-    # Verifica se o DataFrame está vazio
-    if df_tmo_analista.empty:
-        return None  # Retorna None se não houver dados
-    
-    # Certifica-se de que a coluna 'TMO' é do tipo timedelta
-    if 'TMO' not in df_tmo_analista or not pd.api.types.is_timedelta64_dtype(df_tmo_analista['TMO']):
-        raise ValueError("A coluna 'TMO' precisa estar no formato timedelta. Verifique os dados.")
-
-    # Certifique-se de que 'TMO_Formatado' existe para exibição no gráfico
-    if 'TMO_Formatado' not in df_tmo_analista:
-        df_tmo_analista['TMO_Formatado'] = df_tmo_analista['TMO'].apply(format_timedelta_grafico_tmo)
+def plot_status_pie(total_parcial, total_nao_tratada, total_completa, custom_colors):
+    return _figura_pizza(
+        ['Subsídio Parcial', 'Fora do Escopo', 'Subsídio Completo'],
+        [total_parcial, total_nao_tratada, total_completa],
+        custom_colors,
+        'Tarefas %{label} = %{value}<extra></extra>'
+    )
 
+@figura_memorizada
+def _figura_tmo_analista(df_tmo_analista, custom_colors):
     # Cria o gráfico de barras
     fig_tmo_analista = px.bar(
         df_tmo_analista,
@@ -358,25 +356,30 @@ def grafico_tmo(df_tmo_analista, custom_colors):
     )
     return fig_tmo_analista
 
+def grafico_tmo(df_tmo_analista, custom_colors):
+    # Verifica se o DataFrame está vazio
+    if df_tmo_analista.empty:
+        return None  # Retorna None se não houver dados
+    
+    # Certifica-se de que a coluna 'TMO' é do tipo timedelta
+    if 'TMO' not in df_tmo_analista or not pd.api.types.is_timedelta64_dtype(df_tmo_analista['TMO']):
+        raise ValueError("A coluna 'TMO' precisa estar no formato timedelta. Verifique os dados.")
+
+    # Certifique-se de que 'TMO_Formatado' existe para exibição no gráfico
+    if 'TMO_Formatado' not in df_tmo_analista:
+        df_tmo_analista['TMO_Formatado'] = formatar_hms(df_tmo_analista['TMO'])
+
+    # Cria o gráfico de barras
+    fig_tmo_analista = _figura_tmo_analista(df_tmo_analista[['USUÁRIO QUE CONCLUIU A TAREFA', 'TMO', 'TMO_Formatado']], custom_colors)
+    return fig_tmo_analista
+
 def grafico_status_analista(total_parcial_analista, total_fora_analista, total_completo_analista, custom_colors):
-    fig_status = px.pie(
-        names=['Subsídio Parcial', 'Fora do Escopo', 'Subsídio Completo'],
-        values=[total_parcial_analista, total_fora_analista, total_completo_analista],
-        color_discrete_sequence=custom_colors
-    )
-    fig_status.update_traces(
-        hovertemplate='Tarefas %{label} = %{value}<extra></extra>',
-    )
-    fig_status.update_layout(
-        legend=dict(
-            orientation="h",
-            yanchor="top",
-            y=-0.1,
-            xanchor="center",
-            x=0.5
-        )
+    return _figura_pizza(
+        ['Subsídio Parcial', 'Fora do Escopo', 'Subsídio Completo'],
+        [total_parcial_analista, total_fora_analista, total_completo_analista],
+        custom_colors,
+        'Tarefas %{label} = %{value}<extra></extra>'
     )
-    return fig_status
 
 import plotly.express as px
 
@@ -400,25 +403,11 @@ def exibir_grafico_tp_causa(df_analista, analista_selecionado, custom_colors, st
         tp_causa_counts.columns = ['TP Causa', 'Quantidade']
 
         # Criar o gráfico de pizza
-        fig_tp_causa = px.pie(
-            names=tp_causa_counts['TP Causa'],
-            values=tp_causa_counts['Quantidade'],
-            color_discrete_sequence=custom_colors
-        )
-
-        # Personalizar o hover e layout do gráfico
-        fig_tp_causa.update_traces(
-            hovertemplate='Causa %{label} = %{value}<extra></extra>',
-        )
-
-        fig_tp_causa.update_layout(
-            legend=dict(
-                orientation="h",
-                yanchor="top",
-                y=-0.1,
-                xanchor="center",
-                x=0.5
-            )
+        fig_tp_causa = _figura_pizza(
+            tp_causa_counts['TP Causa'],
+            tp_causa_counts['Quantidade'],
+            custom_colors,
+            'Causa %{label} = %{value}<extra></extra>'
         )
 
         # Exibir o gráfico na dashboard
@@ -441,29 +430,16 @@ def exibir_grafico_filas_realizadas(df_analista, analista_selecionado, custom_co
 
     if 'FILA' in df_analista.columns:
         # Contar a quantidade de tarefas por fila
-        filas_feitas_analista = df_analista['FILA'].dropna().value_counts().reset_index()
+        filas_feitas_analista = df_analista['FILA'].dropna().value_counts()
+        filas_feitas_analista = filas_feitas_analista[filas_feitas_analista > 0].reset_index()
         filas_feitas_analista.columns = ['Tarefa', 'Quantidade']
 
         # Criar o gráfico de pizza
-        fig_filas_feitas_analista = px.pie(
-            names=filas_feitas_analista['Tarefa'],
-            values=filas_feitas_analista['Quantidade'],
-            color_discrete_sequence=custom_colors
-        )
-
-        # Personalizar o hover e layout do gráfico
-        fig_filas_feitas_analista.update_traces(
-            hovertemplate='Tarefas %{label} = %{value}<extra></extra>',
-        )
-
-        fig_filas_feitas_analista.update_layout(
-            legend=dict(
-                orientation="h",
-                yanchor="top",
-                y=-0.1,
-                xanchor="center",
-                x=0.5
-            )
+        fig_filas_feitas_analista = _figura_pizza(
+            filas_feitas_analista['Tarefa'],
+            filas_feitas_analista['Quantidade'],
+            custom_colors,
+            'Tarefas %{label} = %{value}<extra></extra>'
         )
 
         # Exibir o gráfico na dashboard
@@ -471,17 +447,30 @@ def exibir_grafico_filas_realizadas(df_analista, analista_selecionado, custom_co
     else:
         st.write("A coluna 'FILA' não foi encontrada no dataframe.")
         
-def format_timedelta_Chart(td):
-    """
-    Formata um objeto Timedelta em uma string no formato 'X min Y s'.
+@figura_memorizada
+def _figura_tmo_por_dia_analista(df_tmo_analista, custom_colors, resolucao):
+    # Criar o gráfico de barras
+    fig_tmo_analista = px.bar(
+        df_tmo_analista, 
+        x=datas_em_ms(df_tmo_analista['Dia']), 
+        y='TMO_minutos', 
+        labels={'TMO_minutos': 'TMO (min)', 'x': 'Data'},
+        text=df_tmo_analista['TMO_formatado'],  # Exibe o tempo formatado nas barras
+        color_discrete_sequence=custom_colors
+    )
+    
+    fig_tmo_analista.update_layout(
+        xaxis=eixo_datas(FORMATO_DATA[resolucao]),
+        yaxis=dict(title='TMO (min)'),
+        bargap=0.2  # Espaçamento entre as barras
+    )
 
-    Parâmetros:
-        - td: Timedelta a ser formatado.
-    """
-    total_seconds = td.total_seconds()
-    minutes = int(total_seconds // 60)
-    seconds = int(total_seconds % 60)
-    return f"{minutes} min {seconds}s"
+    # Personalizar o gráfico
+    fig_tmo_analista.update_traces(
+        hovertemplate=f'{ROTULO_PERIODO[resolucao]}: %{{x}}<br>TMO: %{{text}}',  # Formato do hover
+        textfont_color='white'  # Define a cor do texto como branco
+    )
+    return fig_tmo_analista
 
 def exibir_grafico_tmo_por_dia(df_analista, analista_selecionado, calcular_tmo_por_dia, custom_colors, st):
     """
@@ -508,16 +497,6 @@ def exibir_grafico_tmo_por_dia(df_analista, analista_selecionado, calcular_tmo_p
         st.warning("Não há valores válidos de TMO disponíveis.")
         return
 
-    # Preencher valores NaN com um timedelta de 0 segundos para evitar erros
-    df_tmo_analista['TMO'] = df_tmo_analista['TMO'].fillna(pd.Timedelta(seconds=0))
-
-    # Converter a coluna "TMO" (Timedelta) para minutos e segundos
-    df_tmo_analista['TMO_segundos'] = df_tmo_analista['TMO'].dt.total_seconds()
-    df_tmo_analista['TMO_minutos'] = df_tmo_analista['TMO_segundos'] / 60
-
-    # Formatar TMO para exibição como "HH:MM:SS"
-    df_tmo_analista['TMO_formatado'] = df_tmo_analista['TMO'].apply(format_timedelta_Chart)
-
     # Verificar se a coluna 'Dia' existe e contém dados válidos
     if 'Dia' not in df_tmo_analista.columns or df_tmo_analista['Dia'].isna().all():
         st.warning("Não há dados de datas disponíveis.")
@@ -554,34 +533,58 @@ def exibir_grafico_tmo_por_dia(df_analista, analista_selecionado, calcular_tmo_p
         st.warning("Não há registros de TMO para o período selecionado.")
         return
 
+    # Intervalos longos viram barras semanais ou mensais; o TMO de cada período é recalculado
+    # sobre o resumo diário (tempo total / tarefas), e não como média das médias diárias
+    resolucao = resolucao_para_intervalo(*periodo_selecionado_tmo)
+    if resolucao != DIARIA:
+        resumo = como_resumo_diario(df_analista)
+        resumo = resumo[
+            (resumo['Dia'] >= pd.Timestamp(periodo_selecionado_tmo[0])) &
+            (resumo['Dia'] <= pd.Timestamp(periodo_selecionado_tmo[1]))
+        ]
+        df_tmo_analista = calcular_tmo_por_dia(resumo.assign(Dia=inicio_do_periodo(resumo['Dia'], resolucao)))
+
+    # Preencher valores NaN com um timedelta de 0 segundos para evitar erros
+    df_tmo_analista['TMO'] = df_tmo_analista['TMO'].fillna(pd.Timedelta(seconds=0))
+
+    # Converter a coluna "TMO" (Timedelta) para minutos e segundos
+    df_tmo_analista['TMO_segundos'] = df_tmo_analista['TMO'].dt.total_seconds()
+    df_tmo_analista['TMO_minutos'] = df_tmo_analista['TMO_segundos'] / 60
+
+    # Formatar TMO para exibição como "HH:MM:SS"
+    df_tmo_analista['TMO_formatado'] = formatar_min_seg(df_tmo_analista['TMO'])
+
     # Criar o gráfico de barras
-    fig_tmo_analista = px.bar(
-        df_tmo_analista, 
-        x='Dia', 
-        y='TMO_minutos', 
-        labels={'TMO_minutos': 'TMO (min)', 'Dia': 'Data'},
-        text=df_tmo_analista['TMO_formatado'],  # Exibe o tempo formatado nas barras
+    fig_tmo_analista = _figura_tmo_por_dia_analista(df_tmo_analista[['Dia', 'TMO_minutos', 'TMO_formatado']], custom_colors, resolucao)
+
+    # Exibir o gráfico na dashboard
+    st.plotly_chart(fig_tmo_analista, use_container_width=True)
+
+@figura_memorizada
+def _figura_quantidade_por_dia(df_quantidade_analista, custom_colors, resolucao):
+    # Criar o gráfico de barras
+    fig_quantidade_analista = px.bar(
+        df_quantidade_analista, 
+        x=datas_em_ms(df_quantidade_analista['Dia']), 
+        y='Quantidade', 
+        labels={'Quantidade': 'Quantidade de Tarefas', 'x': 'Data'},
+        text='Quantidade',  # Exibe a quantidade nas barras
         color_discrete_sequence=custom_colors
     )
-    
-    fig_tmo_analista.update_layout(
-        xaxis=dict(
-            tickvals=df_tmo_analista['Dia'],
-            ticktext=[f"{dia.day} {dia.strftime('%b')} {dia.year}" for dia in df_tmo_analista['Dia']],
-            title='Data'
-        ),
-        yaxis=dict(title='TMO (min)'),
+
+    # Ajuste para melhorar a legibilidade
+    fig_quantidade_analista.update_layout(
+        xaxis=eixo_datas(FORMATO_DATA[resolucao]),
+        yaxis=dict(title='Quantidade de Tarefas'),
         bargap=0.2  # Espaçamento entre as barras
     )
 
     # Personalizar o gráfico
-    fig_tmo_analista.update_traces(
-        hovertemplate='Data: %{x}<br>TMO: %{text}',  # Formato do hover
+    fig_quantidade_analista.update_traces(
+        hovertemplate=f'{ROTULO_PERIODO[resolucao]}: %{{x}}<br>Quantidade: %{{y}}',  # Formato do hover
         textfont_color='white'  # Define a cor do texto como branco
     )
-
-    # Exibir o gráfico na dashboard
-    st.plotly_chart(fig_tmo_analista, use_container_width=True)
+    return fig_quantidade_analista
 
 def exibir_grafico_quantidade_por_dia(df_analista, analista_selecionado, custom_colors, st):
     """
@@ -621,32 +624,12 @@ def exibir_grafico_quantidade_por_dia(df_analista, analista_selecionado, custom_
         (df_quantidade_analista['Dia'] <= periodo_selecionado[1])
     ]
 
-    # Criar o gráfico de barras
-    fig_quantidade_analista = px.bar(
-        df_quantidade_analista, 
-        x='Dia', 
-        y='Quantidade', 
-        labels={'Quantidade': 'Quantidade de Tarefas', 'Dia': 'Data'},
-        text='Quantidade',  # Exibe a quantidade nas barras
-        color_discrete_sequence=custom_colors
-    )
-
-    # Ajuste para melhorar a legibilidade
-    fig_quantidade_analista.update_layout(
-        xaxis=dict(
-            tickvals=df_quantidade_analista['Dia'],
-            ticktext=[f"{dia.day} {dia.strftime('%b')} {dia.year}" for dia in df_quantidade_analista['Dia']],  # Formato Dia Mês Ano
-            title='Data'
-        ),
-        yaxis=dict(title='Quantidade de Tarefas'),
-        bargap=0.2  # Espaçamento entre as barras
-    )
+    # Intervalos longos viram barras semanais ou mensais com a soma de cada período
+    resolucao = resolucao_para_intervalo(*periodo_selecionado)
+    df_quantidade_analista = agrupar_por_periodo(df_quantidade_analista, resolucao, colunas_soma=['Quantidade'])
 
-    # Personalizar o gráfico
-    fig_quantidade_analista.update_traces(
-        hovertemplate='Data: %{x}<br>Quantidade: %{y}',  # Formato do hover
-        textfont_color='white'  # Define a cor do texto como branco
-    )
+    # Criar o gráfico de barras
+    fig_quantidade_analista = _figura_quantidade_por_dia(df_quantidade_analista, custom_colors, resolucao)
 
     # Exibir o gráfico na dashboard
     st.plotly_chart(fig_quantidade_analista, use_container_width=True)
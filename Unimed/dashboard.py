@@ -1,10 +1,321 @@
 import streamlit as st
 import pandas as pd
-from io import BytesIO
-from .calculations import calcular_tmo_equipe_cadastro, format_time_delta_hms, calcular_e_exibir_tmo_cadastro_atualizacao_por_fila, format_timedelta_hms,exibir_grafico_tmo_analista_por_mes, format_timedelta_grafico_tmo_analista, exibir_grafico_tempo_ocioso_por_dia, calcular_producao_email_detalhada, calcular_producao_agrupada, exportar_planilha_com_tmo_completo, gerar_relatorio_html, download_html, download_html_tmo, gerar_relatorio_html_tmo, load_sla_data, calcular_sla_por_fila, gerar_planilha_sla, calcular_entrada_protocolos_por_dia, calcular_entrada_por_dia_e_fila, exibir_entrada_por_dia, save_sla_data, calcular_tmo_equipe_atualizado, calcular_produtividade_diaria, calcular_tmo_por_dia_cadastro, calcular_produtividade_diaria_cadastro, calcular_tmo_por_dia, convert_to_timedelta_for_calculations, convert_to_datetime_for_calculations, save_data, load_data, format_timedelta, calcular_ranking, calcular_filas_analista, calcular_metrica_analista, calcular_carteiras_analista,exportar_relatorio_detalhado_por_analista, get_points_of_attention, calcular_tmo_por_carteira, calcular_tmo, calcular_e_exibir_tmo_por_fila, calcular_tmo_por_mes, exibir_tmo_por_mes, exibir_dataframe_tmo_formatado, export_dataframe, calcular_tempo_ocioso_por_analista, calcular_melhor_tmo_por_dia, calcular_melhor_dia_por_cadastro, exibir_tmo_por_mes_analista, exportar_planilha_com_tmo, calcular_tmo_geral, calcular_tmo_cadastro, calcular_tempo_ocioso, gerar_relatorio_tmo_completo, calcular_produtividade_diaria_subsidios
-from .charts import plot_produtividade_diaria, plot_tmo_por_dia_cadastro, plot_tmo_por_dia_cadastro, exibir_grafico_tp_causa, plot_produtividade_diaria_cadastros, plot_tmo_por_dia, plot_status_pie, grafico_tmo, grafico_status_analista, exibir_grafico_filas_realizadas, exibir_grafico_tmo_por_dia, exibir_grafico_quantidade_por_dia, plot_produtividade_diaria_subsidios
+from .calculations import exibir_grafico_tmo_analista_por_mes, exibir_grafico_tempo_ocioso_por_dia, exportar_planilha_com_tmo_completo, download_html, load_sla_data, intervalo_datas_sla, calcular_sla_por_fila, gerar_planilha_sla, save_sla_data, ler_planilha_enviada, save_data, estado_backup_usuario, exibir_estado_backup, load_data, load_resumo_diario, intervalo_datas_usuario, COLUNAS_VISAO_GERAL, COLUNAS_METRICAS_INDIVIDUAIS, COLUNAS_DIARIO_DE_BORDO, calcular_ranking, calcular_metrica_analista, exportar_relatorio_detalhado_por_analista, calcular_e_exibir_tmo_por_fila, exibir_tmo_por_mes, exibir_dataframe_tmo_formatado, exportar_planilha_com_tmo
+from .metricas import PRAZO_SLA, calcular_tmo_equipe_cadastro, format_timedelta_hms, calcular_tmo_equipe_atualizado, calcular_produtividade_diaria, calcular_tmo_por_dia_cadastro, calcular_produtividade_diaria_cadastro, calcular_tmo_por_dia, filtrar_analista, format_timedelta, calcular_tmo_por_carteira, calcular_tmo, calcular_tempo_ocioso_por_analista, calcular_melhor_tmo_por_dia, calcular_melhor_dia_por_cadastro, calcular_produtividade_diaria_subsidios
+from .formatacao import formatar_hms
+from .charts import plot_produtividade_diaria, plot_tmo_por_dia_cadastro, exibir_grafico_tp_causa, plot_produtividade_diaria_cadastros, plot_tmo_por_dia, grafico_tmo, exibir_grafico_filas_realizadas, exibir_grafico_tmo_por_dia, exibir_grafico_quantidade_por_dia, plot_produtividade_diaria_subsidios
+from .perfil import instrumentar, instrumentar_streamlit, marcar_visao, perfilar_rerun, secao
 from datetime import datetime
 
+# Com o modo de perfil ligado (ver perfil.py), cada chamada a estas funções e a st.plotly_chart vira uma seção do rerun
+instrumentar(globals())
+instrumentar_streamlit()
+
+# Painéis do dashboard. Cada um é um fragmento: interagir com ele (slider, seleção, aba,
+# expander) reexecuta só o painel, com os dados recebidos na última execução completa da página.
+# Abas e expanders guardam o estado (on_change="rerun") e só calculam o conteúdo quando abertos.
+
+@st.fragment
+@perfilar_rerun
+def painel(titulo, exibir, *args, **kwargs):
+    """
+    Painel com borda, título e o conteúdo desenhado por exibir(*args, **kwargs).
+    """
+    with st.container(border=True):
+        st.subheader(titulo)
+        exibir(*args, **kwargs)
+
+@st.fragment
+@perfilar_rerun
+def painel_tmo_por_fila(df_total):
+    expander = st.expander("Tempo Médio por Fila", key="expander_tmo_por_fila", on_change="rerun")
+    if not expander.open:
+        return
+    with expander:
+        df_tmo_por_carteira = calcular_tmo_por_carteira(df_total)
+        if isinstance(df_tmo_por_carteira, str):
+            st.write(df_tmo_por_carteira)  # Exibe mensagem de erro se as colunas não existirem
+        else:
+            st.dataframe(df_tmo_por_carteira, use_container_width=True, hide_index=True)
+
+def _exibir_abas(rotulos, key, graficos, df, cores):
+    """
+    Abas com um gráfico cada; só a aba aberta calcula e desenha o seu.
+    graficos: lista de (subtítulo, função de cálculo, função de gráfico), na ordem dos rótulos.
+    """
+    abas = st.tabs(rotulos, key=key, on_change="rerun")
+    for aba, (subtitulo, calcular, plotar) in zip(abas, graficos):
+        if not aba.open:
+            continue
+        with aba:
+            with st.container(border=True):
+                st.subheader(subtitulo)
+                fig = plotar(calcular(df), cores)
+                if fig:
+                    st.plotly_chart(fig)
+
+@st.fragment
+@perfilar_rerun
+def painel_produtividade_diaria(df_resumo, cores):
+    _exibir_abas(
+        ["Produtividade Diária", "Produtividade Diária - Cadastros", "Produtividade Diária - Subsídios"],
+        "abas_produtividade_diaria",
+        [
+            ("Produtividade Diária - Total das Tarefas Tratadas", calcular_produtividade_diaria, plot_produtividade_diaria),
+            ("Produtividade Diária - Tarefas Cadastradas", calcular_produtividade_diaria_cadastro, plot_produtividade_diaria_cadastros),
+            ("Produtividade Diária - Subsídios", calcular_produtividade_diaria_subsidios, plot_produtividade_diaria_subsidios),
+        ],
+        df_resumo, cores
+    )
+
+@st.fragment
+@perfilar_rerun
+def painel_tmo_diario(df_resumo, cores):
+    _exibir_abas(
+        ["TMO Geral Diário", "TMO Cadastro Diário"],
+        "abas_tmo_diario",
+        [
+            ("Tempo Médio Operacional Diario - Geral", calcular_tmo_por_dia, plot_tmo_por_dia),
+            ("Tempo Médio Operacional Diário - Cadastros", calcular_tmo_por_dia_cadastro, plot_tmo_por_dia_cadastro),
+        ],
+        df_resumo, cores
+    )
+
+@st.fragment
+@perfilar_rerun
+def painel_tmo_por_mes(df_resumo):
+    expander = st.expander("Tempo Médio Operacional por Mês", key="expander_tmo_por_mes", on_change="rerun")
+    if not expander.open:
+        return
+    with expander:
+        exibir_tmo_por_mes(df_resumo)
+        # Exibir o DataFrame formatado na seção correspondente
+        exibir_dataframe_tmo_formatado(df_resumo)
+
+@st.fragment
+@perfilar_rerun
+def painel_tmo_por_analista(df_total, cores):
+    with st.container(border=True):
+        # Filtro de analistas
+        st.subheader("Tempo Médio Operacional por Analista")
+        df_tmo_analista = calcular_tmo(df_total)
+        analistas = df_tmo_analista['USUÁRIO QUE CONCLUIU A TAREFA'].unique()
+
+        selected_analistas = st.multiselect(
+            "Selecione os Analistas:",
+            options=analistas
+        )
+
+        # Mostrar o gráfico de TMO
+        df_tmo_analista_filtered = df_tmo_analista[df_tmo_analista['USUÁRIO QUE CONCLUIU A TAREFA'].isin(selected_analistas)]
+        fig_tmo_analista = grafico_tmo(df_tmo_analista_filtered, cores)
+        if fig_tmo_analista:
+            st.plotly_chart(fig_tmo_analista)
+        else:
+            st.write("Nenhum analista selecionado")
+
+@st.fragment
+@perfilar_rerun
+def painel_ranking(df_total):
+    with st.container(border=True):
+        # Seleção de usuários para o ranking
+        default_users = [
+            "amandacampos_amil",
+            "eduardaantevere_amil",
+            "fabianapietro_amil",
+            "luizfernandes_amil",
+            "fernandaferreira_amil",
+            "jennifercosta_amil",
+            "elianeabreu",
+            "sararodrigues_amil",
+            "camilabarros_amil"
+        ]
+
+        st.subheader("Ranking de Produtividade")
+
+        # Selecione os usuários
+        users = df_total['USUÁRIO QUE CONCLUIU A TAREFA'].unique()
+
+        selected_users = st.multiselect(
+            "Selecione os Analistas:",
+            options=users,
+            key="analistas_multiselect"
+        )
+
+        # Calcular o ranking
+        styled_df_ranking = calcular_ranking(df_total, selected_users)
+
+        # Exibir a tabela de ranking
+        st.dataframe(styled_df_ranking, width=2000)
+
+@st.fragment
+@perfilar_rerun
+def painel_exportacao(df_total):
+    expander = st.expander("Exportar Dados", key="expander_exportar_dados", on_change="rerun")
+    if not expander.open:
+        return
+    with expander:
+        try:    
+            # Seleção do período
+            data_inicial_relatorio = st.date_input(
+                "Data Inicial Relatório", 
+                df_total['DATA DE CONCLUSÃO DA TAREFA'].min().date()
+            )
+            data_final_relatorio = st.date_input(
+                "Data Final Relatório", 
+                df_total['DATA DE CONCLUSÃO DA TAREFA'].max().date()
+            )
+
+            # Seleção de analistas
+            analistas_disponiveis = df_total['USUÁRIO QUE CONCLUIU A TAREFA'].unique()
+            analistas_selecionados = st.multiselect(
+                "Selecione os analistas", 
+                options=analistas_disponiveis, 
+                default=analistas_disponiveis
+            )
+
+            # Seleção do tipo de TMO
+            tmo_tipo = st.radio(
+                "Selecione o tipo de TMO para exportação:",
+                options=['GERAL', 'CADASTRADO', 'CADASTRADO_DETALHADO'],
+                index=0,
+                help=(
+                    "Escolha 'GERAL' para considerar todas as tarefas, "
+                    "'CADASTRADO' para considerar apenas finalizações de CADASTRO, "
+                    "ou 'CADASTRADO_DETALHADO' para incluir detalhes dos tipos de 'TP CAUSA (TP COMPLEMENTO)'."
+                )
+            )
+
+            # Botão para exportar a planilha padrão
+            if st.button("Exportar Planilha Resumida"):
+                periodo_selecionado = (data_inicial_relatorio, data_final_relatorio)
+                exportar_planilha_com_tmo(df_total, periodo_selecionado, analistas_selecionados, tmo_tipo)
+
+            # Botão para exportar a planilha detalhada por analista
+            if st.button("Exportar Relatório Detalhado por Analista"):
+                periodo_selecionado = (data_inicial_relatorio, data_final_relatorio)
+                exportar_relatorio_detalhado_por_analista(df_total, periodo_selecionado, analistas_selecionados)
+
+            # Adicionar botão de exportação para o novo relatório
+            if st.button("Exportar Planilha Completa de TMO"):
+                periodo_selecionado = (data_inicial_relatorio, data_final_relatorio)
+                exportar_planilha_com_tmo_completo(df_total, periodo_selecionado, analistas_selecionados)
+
+        except ValueError as e:
+            st.warning("Ocorreu um erro ao processar as datas. Verifique se as informações de data estão corretas no seu arquivo. Detalhes do erro:")
+            st.code(str(e))
+
+        except Exception as e:
+            st.warning("Ocorreu um erro inesperado. Por favor, tente novamente. Detalhes do erro:")
+            st.code(str(e))
+
+@st.fragment
+@perfilar_rerun
+def painel_relatorio_html(df_total):
+    expander = st.expander("Exportar Relatório de TMO em HTML", key="expander_relatorio_html", on_change="rerun")
+    if not expander.open:
+        return
+    with expander:
+        # 🔹 Seleção de períodos antes e depois da mudança
+        st.subheader("Selecione os períodos para comparação")
+        col1, col2 = st.columns(2)
+
+        with col1:
+            data_inicio_antes = st.date_input("Data Inicial Antes", df_total['DATA DE CONCLUSÃO DA TAREFA'].min().date())
+            data_fim_antes = st.date_input("Data Final Antes", df_total['DATA DE CONCLUSÃO DA TAREFA'].max().date())
+
+        with col2:
+            data_inicio_depois = st.date_input("Data Inicial Depois", df_total['DATA DE CONCLUSÃO DA TAREFA'].min().date())
+            data_fim_depois = st.date_input("Data Final Depois", df_total['DATA DE CONCLUSÃO DA TAREFA'].max().date())
+
+        # 🔹 Seleção de usuários
+        usuarios_disponiveis = df_total['USUÁRIO QUE CONCLUIU A TAREFA'].unique()
+        usuarios_selecionados = st.multiselect(
+            "Selecione os usuários para o relatório",
+            options=usuarios_disponiveis,
+            default=usuarios_disponiveis
+        )
+
+        # 🔹 Botão para baixar o HTML
+        if st.button("Gerar e Baixar Relatório HTML"):
+            download_html(df_total, data_inicio_antes, data_fim_antes, data_inicio_depois, data_fim_depois, usuarios_selecionados)
+
+@st.fragment
+@perfilar_rerun
+def painel_tempo_ocioso(df_analista, analista_selecionado, cores):
+    expander = st.expander("Tempo Ocioso", key="expander_tempo_ocioso", on_change="rerun")
+    if not expander.open:
+        return
+    with expander:
+        st.subheader(f"Tempo Ocioso")
+        try:
+            exibir_grafico_tempo_ocioso_por_dia(df_analista, analista_selecionado, cores, st)
+            df_tempo_ocioso = calcular_tempo_ocioso_por_analista(df_analista)
+        except Exception as e:
+            # O cálculo memorizado não guarda falhas; a mensagem vale só para este rerun
+            df_tempo_ocioso = pd.DataFrame({'Erro': [f'Erro: {str(e)}']})
+        if 'Tempo Ocioso' in df_tempo_ocioso.columns:
+            with secao('formatação do tempo ocioso'):
+                df_tempo_ocioso['Tempo Ocioso'] = formatar_hms(df_tempo_ocioso['Tempo Ocioso'])
+        st.dataframe(df_tempo_ocioso, hide_index=True, use_container_width=True)
+
+@st.fragment
+@perfilar_rerun
+def painel_evolucao_tmo(df_analista, analista_selecionado):
+    expander = st.expander("Evolução TMO", key="expander_evolucao_tmo", on_change="rerun")
+    if not expander.open:
+        return
+    with expander:
+        st.subheader(f"Tempo Médio Operacional Mensal")
+        exibir_grafico_tmo_analista_por_mes(df_analista, analista_selecionado)
+
+@st.fragment
+@perfilar_rerun
+def painel_sla(usuario):
+    # Filtro de data para análise de SLA; os limites vêm do manifesto do histórico, sem ler os dados
+    sla_min, sla_max = intervalo_datas_sla(usuario)
+
+    st.subheader("Filtro de Data")
+    if sla_min is None:
+        st.info("Nenhum dado de SLA carregado ainda. Faça o upload de uma planilha de SLA.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            data_inicio = st.date_input("Data de início", sla_min.date())
+        with col2:
+            data_fim = st.date_input("Data de fim", sla_max.date())
+
+        if data_inicio > data_fim:
+            st.error("A data de início não pode ser posterior à data de fim!")
+        else:
+            # Apenas as partições do intervalo são lidas, já filtradas pela data de criação do protocolo
+            sla_filtrado = load_sla_data(
+                usuario, columns=COLUNAS_DIARIO_DE_BORDO,
+                date_from=data_inicio, date_to=data_fim
+            )
+
+            # Calcular SLA geral
+            resultado, sla_geral = calcular_sla_por_fila(sla_filtrado, data_inicio, data_fim)
+
+            # Exibir SLA Geral
+            st.metric(label="SLA Geral", value=f"{sla_geral}%", help=f"SLA de todas as filas dentro do prazo de D+{PRAZO_SLA} dias úteis")
+
+            # Exibir métricas por fila
+            for _, row in resultado.iterrows():
+                if row['FILA'] != 'TOTAL':
+                    st.metric(
+                        label=row['FILA'],
+                        value=f"{row['% SLA']}%",
+                        delta=f"Entradas: {row['ENTRADAS']} | Tratados: {row['TRATADOS']}",
+                        delta_color="off",
+                        help=f"SLA da fila '{row['FILA']}' dentro do intervalo selecionado"
+                    )
+
+            # Botão para exportar planilha formatada
+            if st.button("Exportar Planilha de SLA"):
+                gerar_planilha_sla(sla_filtrado, data_inicio, data_fim)
+
+@perfilar_rerun
 def dashboard():
     hide_footer_style = """ 
     <style>
@@ -113,37 +424,38 @@ def dashboard():
                 """
     st.markdown(hide_streamlit_style, unsafe_allow_html=True) 
     
-    # Carregar dados
+    # Os dados são carregados em cada visão, já filtrados pelo período selecionado
     usuario_logado = st.session_state.usuario_logado
-    df_total = load_data(usuario_logado)
 
     # Sidebar
     st.sidebar.header("Navegação")
     opcao_selecionada = st.sidebar.selectbox("Escolha uma visão", ["Visão Geral", "Métricas Individuais", "Diário de Bordo"])
+    marcar_visao(opcao_selecionada)
     
     # Carregar nova planilha
     uploaded_file = st.sidebar.file_uploader("Carregar nova planilha", type=["xlsx"])
 
-    if uploaded_file is not None:
-        df_new = pd.read_excel(uploaded_file)
-        df_total = pd.concat([df_total, df_new], ignore_index=True)
-        save_data(df_total, usuario_logado)
+    # O arquivo continua no uploader nos reruns seguintes; cada envio é gravado uma única vez
+    if uploaded_file is not None and st.session_state.get('planilha_gravada') != uploaded_file.file_id:
+        # A planilha é lida e gravada em blocos, com memória limitada (a leitura entra no tempo do
+        # save_data); apenas o lote novo é enviado, o histórico não é relido nem regravado
+        backup_agendado = save_data(ler_planilha_enviada(uploaded_file, st.sidebar), usuario_logado)
+        st.session_state.planilha_gravada = uploaded_file.file_id
         st.sidebar.success(f'Arquivo "{uploaded_file.name}" carregado com sucesso!')
-        sucesso = save_data(df_total, usuario_logado)
-        if sucesso:
-            st.toast("Backup no GitHub concluído com sucesso!", icon="✅")
-        else:
-            st.toast("Erro ao fazer backup no GitHub.", icon="❌")
-        
+        if not backup_agendado:
+            st.toast("⚠️ Backup remoto não configurado. Os dados ficaram salvos apenas localmente.")
+
+    # O backup roda em segundo plano; o quadro se atualiza sozinho enquanto houver envio pendente
+    estado = estado_backup_usuario(usuario_logado)
+    if estado.get('estado') not in (None, 'desativado'):
+        with st.sidebar:
+            exibir_estado_backup(usuario_logado, em_andamento=estado['estado'] not in ('concluído', 'falhou'))
+
 
     if usuario_logado == "andrew@unimed" and not hasattr(st.session_state, 'bianca_welcomed'):
         st.toast("Bem-vindo, Andrew!", icon=":material/account_circle:")
         st.session_state.bianca_welcomed = True
 
-    # Converte para cálculos temporários
-    df_total = convert_to_timedelta_for_calculations(df_total)
-    df_total = convert_to_datetime_for_calculations(df_total)
-    
     ms = st.session_state
 
     # Verifique se a chave 'themes' existe no session_state
@@ -219,9 +531,10 @@ def dashboard():
         
         st.title("Produtividade Geral" + " " + "" + " " + ":material/groups:")
 
-        # Filtros de data
-        min_date = df_total['DATA DE CONCLUSÃO DA TAREFA'].min().date() if not df_total.empty else datetime.today().date()
-        max_date = df_total['DATA DE CONCLUSÃO DA TAREFA'].max().date() if not df_total.empty else datetime.today().date()
+        # Filtros de data (limites lidos do manifesto, sem carregar o histórico)
+        data_minima, data_maxima = intervalo_datas_usuario(usuario_logado)
+        min_date = data_minima.date() if data_minima is not None else datetime.today().date()
+        max_date = data_maxima.date() if data_maxima is not None else datetime.today().date()
         
         st.subheader("Filtro por Data")
         col1, col2 = st.columns(2)
@@ -233,47 +546,51 @@ def dashboard():
         if data_inicial > data_final:
             st.sidebar.error("A data inicial não pode ser posterior à data final!")
 
-        df_total = df_total[(df_total['DATA DE CONCLUSÃO DA TAREFA'].dt.date >= data_inicial) & (df_total['DATA DE CONCLUSÃO DA TAREFA'].dt.date <= data_final)]
-
-        # Métricas de produtividade
-        total_finalizados = len(df_total[df_total['FINALIZAÇÃO'] == 'Cadastro realizado'])
-        total_atualizados = len(df_total[df_total['SITUAÇÃO DA TAREFA'] == 'Cancelada'])
-        total_distribuidos = len(df_total[df_total['FINALIZAÇÃO'] == 'REALIZADO'])
-        total_geral = total_finalizados + total_atualizados + total_distribuidos
-
-        # Calcular tempo médio geral, verificando se o total geral é maior que zero
-        if total_geral > 0:
-            tempo_medio = (
-                df_total[df_total['FINALIZAÇÃO'] == 'Cadastro realizado']['TEMPO MÉDIO OPERACIONAL'].sum() +
-                df_total[df_total['FINALIZAÇÃO'] == 'ATUALIZADO']['TEMPO MÉDIO OPERACIONAL'].sum() +
-                df_total[df_total['FINALIZAÇÃO'] == 'REALIZADO']['TEMPO MÉDIO OPERACIONAL'].sum()
-            ) / total_geral
-        else:
-            tempo_medio = pd.Timedelta(0)  # Define como 0 se não houver dados
+        # Lê apenas as partições, linhas e colunas usadas por esta visão
+        df_total = load_data(usuario_logado, data_inicial, data_final, columns=COLUNAS_VISAO_GERAL)
+        # Séries diárias e mensais saem do resumo diário, sem reagrupar as tarefas
+        df_resumo = load_resumo_diario(usuario_logado, data_inicial, data_final)
+
+        with secao('métricas de produtividade'):
+            # Métricas de produtividade
+            total_finalizados = len(df_total[df_total['FINALIZAÇÃO'] == 'Cadastro realizado'])
+            total_atualizados = len(df_total[df_total['SITUAÇÃO DA TAREFA'] == 'Cancelada'])
+            total_distribuidos = len(df_total[df_total['FINALIZAÇÃO'] == 'REALIZADO'])
+            total_geral = total_finalizados + total_atualizados + total_distribuidos
+
+            # Calcular tempo médio geral, verificando se o total geral é maior que zero
+            if total_geral > 0:
+                tempo_medio = (
+                    df_total[df_total['FINALIZAÇÃO'] == 'Cadastro realizado']['TEMPO MÉDIO OPERACIONAL'].sum() +
+                    df_total[df_total['FINALIZAÇÃO'] == 'ATUALIZADO']['TEMPO MÉDIO OPERACIONAL'].sum() +
+                    df_total[df_total['FINALIZAÇÃO'] == 'REALIZADO']['TEMPO MÉDIO OPERACIONAL'].sum()
+                ) / total_geral
+            else:
+                tempo_medio = pd.Timedelta(0)  # Define como 0 se não houver dados
 
-        # Calcular tempo médio de cadastros, verificando se o total de cadastros é maior que zero
-        if total_finalizados > 0:
-            tempo_medio_cadastros = (
-                df_total[df_total['FINALIZAÇÃO'] == 'Cadastro realizado']['TEMPO MÉDIO OPERACIONAL'].sum()
-            ) / total_finalizados
-        else:
-            tempo_medio_cadastros = pd.Timedelta(0)
+            # Calcular tempo médio de cadastros, verificando se o total de cadastros é maior que zero
+            if total_finalizados > 0:
+                tempo_medio_cadastros = (
+                    df_total[df_total['FINALIZAÇÃO'] == 'Cadastro realizado']['TEMPO MÉDIO OPERACIONAL'].sum()
+                ) / total_finalizados
+            else:
+                tempo_medio_cadastros = pd.Timedelta(0)
 
-        # Calcular tempo médio de atualizações, verificando se o total de atualizações é maior que zero
-        if total_atualizados > 0:
-            tempo_medio_autalizacoes = (
-                df_total[df_total['FINALIZAÇÃO'] == 'ATUALIZADO']['TEMPO MÉDIO OPERACIONAL'].sum()
-            ) / total_atualizados
-        else:
-            tempo_medio_autalizacoes = pd.Timedelta(0)
+            # Calcular tempo médio de atualizações, verificando se o total de atualizações é maior que zero
+            if total_atualizados > 0:
+                tempo_medio_autalizacoes = (
+                    df_total[df_total['FINALIZAÇÃO'] == 'ATUALIZADO']['TEMPO MÉDIO OPERACIONAL'].sum()
+                ) / total_atualizados
+            else:
+                tempo_medio_autalizacoes = pd.Timedelta(0)
 
-        # Calcular tempo médio de distribuições, verificando se o total de distribuições é maior que zero
-        if total_distribuidos > 0:
-            tempo_medio_distribuicoes = (
-                df_total[df_total['FINALIZAÇÃO'] == 'REALIZADO']['TEMPO MÉDIO OPERACIONAL'].sum()
-            ) / total_distribuidos
-        else:
-            tempo_medio_distribuicoes = pd.Timedelta(0)
+            # Calcular tempo médio de distribuições, verificando se o total de distribuições é maior que zero
+            if total_distribuidos > 0:
+                tempo_medio_distribuicoes = (
+                    df_total[df_total['FINALIZAÇÃO'] == 'REALIZADO']['TEMPO MÉDIO OPERACIONAL'].sum()
+                ) / total_distribuidos
+            else:
+                tempo_medio_distribuicoes = pd.Timedelta(0)
             
         st.write(
             """
@@ -289,136 +606,31 @@ def dashboard():
         col1, col2, col3 = st.columns(3)
         with col1:
             with st.container(border=True):
-                st.metric("Métricas de Cadastro", total_geral, delta=f"Tempo Médio - " + format_time_delta_hms(tempo_medio), delta_color="off", help="Engloba todas as tarefas finalizadas e exibe o tempo médio geral.")
+                st.metric("Métricas de Cadastro", total_geral, delta=f"Tempo Médio - " + format_timedelta_hms(tempo_medio), delta_color="off", help="Engloba todas as tarefas finalizadas e exibe o tempo médio geral.")
         with col2:
             with st.container(border=True):
-                st.metric("Métricas de Cadastro", total_finalizados, delta=f"Tempo Médio - " + format_time_delta_hms(tempo_medio_cadastros), delta_color="off", help="Tempo médio das tarefas cadastradas.")
+                st.metric("Métricas de Cadastro", total_finalizados, delta=f"Tempo Médio - " + format_timedelta_hms(tempo_medio_cadastros), delta_color="off", help="Tempo médio das tarefas cadastradas.")
         with col3:
             with st.container(border=True):
                 st.metric("Métricas de Subsídios", total_atualizados, delta=f"Tempo Médio - " + format_timedelta(tempo_medio_autalizacoes), delta_color="off", help="Tempo médio das tarefas atualizadas.")
         
         # Expander com Total Geral --- Sendo a soma de todos os cadastros, reclassificados e andamentos
-        with st.expander("Tempo Médio por Fila"):
-            df_tmo_por_carteira = calcular_tmo_por_carteira(df_total)
-            if isinstance(df_tmo_por_carteira, str):
-                st.write(df_tmo_por_carteira)  # Exibe mensagem de erro se as colunas não existirem
-            else:
-                st.dataframe(df_tmo_por_carteira, use_container_width=True, hide_index=True)
-        
-        # Calculando e exibindo gráficos
-        df_produtividade = calcular_produtividade_diaria(df_total)
-        
-        df_produtividade_cadastro = calcular_produtividade_diaria_cadastro(df_total)
-        
-        df_produtividade_subsidios = calcular_produtividade_diaria_subsidios(df_total)
-        
-        df_tmo = calcular_tmo_por_dia(df_total) 
-        
-        df_tmo_cadastro = calcular_tmo_por_dia_cadastro(df_total)  
-        
+        painel_tmo_por_fila(df_total)
+
+        # Gráficos diários: cada grupo de abas é um painel, e só a aba aberta é calculada
         col1, col2 = st.columns(2)
-        
         with col1:
-            
-            tab1, tab2, tab3 = st.tabs(["Produtividade Diária", "Produtividade Diária - Cadastros", "Produtividade Diária - Subsídios"])
-            
-            with tab1:
-                with st.container(border=True):
-                    st.subheader("Produtividade Diária - Total das Tarefas Tratadas")
-                    fig_produtividade = plot_produtividade_diaria(df_produtividade, custom_colors_unimed)
-                    if fig_produtividade:
-                        st.plotly_chart(fig_produtividade)
-            
-            with tab2:
-                with st.container(border=True):
-                    st.subheader("Produtividade Diária - Tarefas Cadastradas")
-                    fig_produtividade = plot_produtividade_diaria_cadastros(df_produtividade_cadastro, custom_colors_unimed)
-                    if fig_produtividade:
-                        st.plotly_chart(fig_produtividade)
-            
-            with tab3:
-                
-                with st.container(border=True):
-                    st.subheader("Produtividade Diária - Subsídios")                     
-                    fig_produtividade = plot_produtividade_diaria_subsidios(df_produtividade_subsidios, custom_colors_unimed)
-                    if fig_produtividade:
-                        st.plotly_chart(fig_produtividade)
-                        
+            painel_produtividade_diaria(df_resumo, custom_colors_unimed)
         with col2:
-        
-            tab1, tab2 = st.tabs(["TMO Geral Diário", "TMO Cadastro Diário"])
-            
-            with tab1:
-                with st.container(border=True):
-                    st.subheader("Tempo Médio Operacional Diario - Geral")
-                    fig_tmo = plot_tmo_por_dia(df_tmo, custom_colors)
-                    if fig_tmo:
-                        st.plotly_chart(fig_tmo)
-                        
-            with tab2:
-                with st.container(border=True):
-                    st.subheader("Tempo Médio Operacional Diário - Cadastros")
-                    fig_tmo = plot_tmo_por_dia_cadastro(df_tmo_cadastro, custom_colors)
-                    if fig_tmo:
-                        st.plotly_chart(fig_tmo)
-                            
-        with st.expander("Tempo Médio Operacional por Mês"):
-                exibir_tmo_por_mes(df_total)
-                # Exibir o DataFrame formatado na seção correspondente
-                df_tmo_formatado = exibir_dataframe_tmo_formatado(df_total)
-                
-                #Grafico de TMO por Analista
-                df_tmo_analista = calcular_tmo(df_total)
-
-        with st.container(border=True):
-            # Filtro de analistas
-            st.subheader("Tempo Médio Operacional por Analista")
-            analistas = df_tmo_analista['USUÁRIO QUE CONCLUIU A TAREFA'].unique()
-                        
-            selected_analistas = st.multiselect(
-                "Selecione os Analistas:",
-                options=analistas
-            )
+            painel_tmo_diario(df_resumo, custom_colors)
 
-            # Mostrar o gráfico de TMO
-            df_tmo_analista_filtered = df_tmo_analista[df_tmo_analista['USUÁRIO QUE CONCLUIU A TAREFA'].isin(selected_analistas)]
-            fig_tmo_analista = grafico_tmo(df_tmo_analista_filtered, custom_colors)
-            if fig_tmo_analista:
-                st.plotly_chart(fig_tmo_analista)  
-            else:   
-                st.write("Nenhum analista selecionado")
-        
-        with st.container(border=True):
-            # Seleção de usuários para o ranking
-            default_users = [
-                "amandacampos_amil",
-                "eduardaantevere_amil",
-                "fabianapietro_amil",
-                "luizfernandes_amil",
-                "fernandaferreira_amil",
-                "jennifercosta_amil",
-                "elianeabreu",
-                "sararodrigues_amil",
-                "camilabarros_amil"
-            ]
-            
-            st.subheader("Ranking de Produtividade")
-            
-            # Selecione os usuários
-            users = df_total['USUÁRIO QUE CONCLUIU A TAREFA'].unique()
-            
-            selected_users = st.multiselect(
-                "Selecione os Analistas:",
-                options=users,
-                key="analistas_multiselect"
-            )
+        painel_tmo_por_mes(df_resumo)
+
+        #Grafico de TMO por Analista
+        painel_tmo_por_analista(df_total, custom_colors)
+
+        painel_ranking(df_total)
 
-            # Calcular o ranking
-            styled_df_ranking = calcular_ranking(df_total, selected_users)
-            
-            # Exibir a tabela de ranking
-            st.dataframe(styled_df_ranking, width=2000)
-            
                 # Injetando CSS e JavaScript para aumentar o tamanho do modal
         st.markdown("""
             <style>
@@ -444,94 +656,19 @@ def dashboard():
         if st.button("Abrir Power BI"):
             abrir_bi()
         
-        with st.expander("Exportar Dados"):
-            try:    
-                # Seleção do período
-                data_inicial_relatorio = st.date_input(
-                    "Data Inicial Relatório", 
-                    df_total['DATA DE CONCLUSÃO DA TAREFA'].min().date()
-                )
-                data_final_relatorio = st.date_input(
-                    "Data Final Relatório", 
-                    df_total['DATA DE CONCLUSÃO DA TAREFA'].max().date()
-                )
-
-                # Seleção de analistas
-                analistas_disponiveis = df_total['USUÁRIO QUE CONCLUIU A TAREFA'].unique()
-                analistas_selecionados = st.multiselect(
-                    "Selecione os analistas", 
-                    options=analistas_disponiveis, 
-                    default=analistas_disponiveis
-                )
-
-                # Seleção do tipo de TMO
-                tmo_tipo = st.radio(
-                    "Selecione o tipo de TMO para exportação:",
-                    options=['GERAL', 'CADASTRADO', 'CADASTRADO_DETALHADO'],
-                    index=0,
-                    help=(
-                        "Escolha 'GERAL' para considerar todas as tarefas, "
-                        "'CADASTRADO' para considerar apenas finalizações de CADASTRO, "
-                        "ou 'CADASTRADO_DETALHADO' para incluir detalhes dos tipos de 'TP CAUSA (TP COMPLEMENTO)'."
-                    )
-                )
-
-                # Botão para exportar a planilha padrão
-                if st.button("Exportar Planilha Resumida"):
-                    periodo_selecionado = (data_inicial_relatorio, data_final_relatorio)
-                    exportar_planilha_com_tmo(df_total, periodo_selecionado, analistas_selecionados, tmo_tipo)
-
-                # Botão para exportar a planilha detalhada por analista
-                if st.button("Exportar Relatório Detalhado por Analista"):
-                    periodo_selecionado = (data_inicial_relatorio, data_final_relatorio)
-                    exportar_relatorio_detalhado_por_analista(df_total, periodo_selecionado, analistas_selecionados)
-                    
-                # Adicionar botão de exportação para o novo relatório
-                if st.button("Exportar Planilha Completa de TMO"):
-                    periodo_selecionado = (data_inicial_relatorio, data_final_relatorio)
-                    exportar_planilha_com_tmo_completo(df_total, periodo_selecionado, analistas_selecionados)
-
-            except ValueError as e:
-                st.warning("Ocorreu um erro ao processar as datas. Verifique se as informações de data estão corretas no seu arquivo. Detalhes do erro:")
-                st.code(str(e))
-
-            except Exception as e:
-                st.warning("Ocorreu um erro inesperado. Por favor, tente novamente. Detalhes do erro:")
-                st.code(str(e))
+        painel_exportacao(df_total)
 
         if not df_total.empty:
-            with st.expander("Exportar Relatório de TMO em HTML"):
-                # 🔹 Seleção de períodos antes e depois da mudança
-                st.subheader("Selecione os períodos para comparação")
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    data_inicio_antes = st.date_input("Data Inicial Antes", df_total['DATA DE CONCLUSÃO DA TAREFA'].min().date())
-                    data_fim_antes = st.date_input("Data Final Antes", df_total['DATA DE CONCLUSÃO DA TAREFA'].max().date())
-
-                with col2:
-                    data_inicio_depois = st.date_input("Data Inicial Depois", df_total['DATA DE CONCLUSÃO DA TAREFA'].min().date())
-                    data_fim_depois = st.date_input("Data Final Depois", df_total['DATA DE CONCLUSÃO DA TAREFA'].max().date())
-
-                # 🔹 Seleção de usuários
-                usuarios_disponiveis = df_total['USUÁRIO QUE CONCLUIU A TAREFA'].unique()
-                usuarios_selecionados = st.multiselect(
-                    "Selecione os usuários para o relatório",
-                    options=usuarios_disponiveis,
-                    default=usuarios_disponiveis
-                )
+            painel_relatorio_html(df_total)
 
-                # 🔹 Botão para baixar o HTML
-                if st.button("Gerar e Baixar Relatório HTML"):
-                    download_html(df_total, data_inicio_antes, data_fim_antes, data_inicio_depois, data_fim_depois, usuarios_selecionados)
-        
     elif opcao_selecionada == "Métricas Individuais":
         st.title("Métricas Individuais")
         
         # Filtro de data
         st.subheader("Filtro por Data")
-        min_date = df_total['DATA DE CONCLUSÃO DA TAREFA'].min().date() if not df_total.empty else datetime.today().date()
-        max_date = df_total['DATA DE CONCLUSÃO DA TAREFA'].max().date() if not df_total.empty else datetime.today().date()
+        data_minima, data_maxima = intervalo_datas_usuario(usuario_logado)
+        min_date = data_minima.date() if data_minima is not None else datetime.today().date()
+        max_date = data_maxima.date() if data_maxima is not None else datetime.today().date()
 
         col1, col2 = st.columns(2)
         with col1:
@@ -542,9 +679,11 @@ def dashboard():
         if data_inicial > data_final:
             st.error("A data inicial não pode ser posterior à data final!")
 
-        df_total = df_total[(df_total['DATA DE CONCLUSÃO DA TAREFA'].dt.date >= data_inicial) & (df_total['DATA DE CONCLUSÃO DA TAREFA'].dt.date <= data_final)]
+        df_total = load_data(usuario_logado, data_inicial, data_final, columns=COLUNAS_METRICAS_INDIVIDUAIS)
         analista_selecionado = st.selectbox('Selecione o analista', df_total['USUÁRIO QUE CONCLUIU A TAREFA'].unique())
-        df_analista = df_total[df_total['USUÁRIO QUE CONCLUIU A TAREFA'] == analista_selecionado].copy()
+        df_analista = filtrar_analista(df_total, analista_selecionado)
+        df_resumo = load_resumo_diario(usuario_logado, data_inicial, data_final)
+        df_resumo_analista = filtrar_analista(df_resumo, analista_selecionado)
 
         # Chama as funções de cálculo
         tmo_equipe_cadastro = calcular_tmo_equipe_cadastro(df_total)
@@ -597,8 +736,8 @@ def dashboard():
             else:
                 pass     
 
-        melhor_dia_tmo, melhor_tmo = calcular_melhor_tmo_por_dia(df_analista)
-        melhor_dia_cadastro, quantidade_cadastro = calcular_melhor_dia_por_cadastro(df_analista)
+        melhor_dia_tmo, melhor_tmo = calcular_melhor_tmo_por_dia(df_resumo_analista)
+        melhor_dia_cadastro, quantidade_cadastro = calcular_melhor_dia_por_cadastro(df_resumo_analista)
     
         # with st.expander("Melhor TMO e Quantidade de Cadastro"):
         #     col1, col2 = st.columns(2)
@@ -617,36 +756,26 @@ def dashboard():
         #                 st.metric("Melhor Dia de Cadastros", "Sem dados")
         # Exibe o DataFrame estilizado com as filas realizadas pelo analista
         
-        with st.container(border=True):
-            st.subheader(f"Tempo Médio por Fila")
-            calcular_e_exibir_tmo_por_fila(
-                df_analista=df_analista, 
-                analista_selecionado=analista_selecionado, 
-                format_timedelta_hms=format_timedelta_hms, 
-                st=st
-            )
+        painel(
+            "Tempo Médio por Fila", calcular_e_exibir_tmo_por_fila,
+            df_analista=df_analista,
+            analista_selecionado=analista_selecionado,
+            st=st
+        )
 
         # with st.expander("TMO por Fila - Cadastro e Atualização"):
-        #     calcular_e_exibir_tmo_cadastro_atualizacao_por_fila(df_analista, format_timedelta_hms, st)
-            
-        with st.expander("Tempo Ocioso"):
-                st.subheader(f"Tempo Ocioso")
-                exibir_grafico_tempo_ocioso_por_dia(df_analista, analista_selecionado, custom_colors, st)
-                df_tempo_ocioso = calcular_tempo_ocioso_por_analista(df_analista)
-                st.dataframe(df_tempo_ocioso, hide_index=True, use_container_width=True)
-                
-        
-        with st.expander("Evolução TMO"):
-            st.subheader(f"Tempo Médio Operacional Mensal")
-            exibir_grafico_tmo_analista_por_mes(df_analista, analista_selecionado)
+        #     calcular_e_exibir_tmo_cadastro_atualizacao_por_fila(df_analista, st)
+
+        painel_tempo_ocioso(df_analista, analista_selecionado, custom_colors)
+
+        painel_evolucao_tmo(df_analista, analista_selecionado)
 
         col1, col2 = st.columns(2)
         with col1:
             # Gráfico de TMO por dia usando a função do `graph.py`
-            with st.container(border=True):
-                st.subheader(f"Tempo Médio Operacional por Dia")
-                exibir_grafico_tmo_por_dia(
-                df_analista=df_analista,
+            painel(
+                "Tempo Médio Operacional por Dia", exibir_grafico_tmo_por_dia,
+                df_analista=df_resumo_analista,
                 analista_selecionado=analista_selecionado,
                 calcular_tmo_por_dia=calcular_tmo_por_dia,
                 custom_colors=custom_colors,
@@ -655,30 +784,26 @@ def dashboard():
 
         with col2:
             # Gráfico de TMO por dia usando a função do `graph.py`
-            with st.container(border=True):
-                st.subheader(f"Quantidade de Tarefas por Dia")
-                exibir_grafico_quantidade_por_dia(
-                    df_analista=df_analista,
-                    analista_selecionado=analista_selecionado,
-                    custom_colors=custom_colors,
-                    st=st
+            painel(
+                "Quantidade de Tarefas por Dia", exibir_grafico_quantidade_por_dia,
+                df_analista=df_analista,
+                analista_selecionado=analista_selecionado,
+                custom_colors=custom_colors,
+                st=st
             )
-        
+
         col1, col2 = st.columns(2)
         with col1:
-            with st.container(border=True):
-                st.subheader(f"Filas Realizadas")                    
-                exibir_grafico_filas_realizadas(
-                    df_analista=df_analista,
-                    analista_selecionado=analista_selecionado,
-                    custom_colors=custom_colors,
-                    st=st
-                )
+            painel(
+                "Filas Realizadas", exibir_grafico_filas_realizadas,
+                df_analista=df_analista,
+                analista_selecionado=analista_selecionado,
+                custom_colors=custom_colors,
+                st=st
+            )
         with col2:
-            with st.container(border=True):
-                st.subheader(f"Tarefas Cadastradas por TP CAUSA")
-                exibir_grafico_tp_causa(df_analista, analista_selecionado, custom_colors, st)
-                
+            painel("Tarefas Cadastradas por TP CAUSA", exibir_grafico_tp_causa, df_analista, analista_selecionado, custom_colors, st)
+
     elif opcao_selecionada == "Diário de Bordo":
 
 
@@ -687,64 +812,22 @@ def dashboard():
 
         if uploaded_file:
             usuario = st.session_state.usuario_logado
-            sla_data = load_sla_data(usuario)
-
-            # Ler o novo arquivo
-            novo_sla_data = pd.read_excel(uploaded_file)
 
-            # Salvar os dados, verificando duplicatas
-            linhas_nao_salvas = save_sla_data(novo_sla_data, usuario)
+            # Ler o novo arquivo em blocos e salvar cada um, verificando duplicatas (uma vez por envio)
+            if st.session_state.get('sla_gravada') != uploaded_file.file_id:
+                linhas_nao_salvas = save_sla_data(ler_planilha_enviada(uploaded_file), usuario)
+                st.session_state.sla_gravada = uploaded_file.file_id
 
-            if linhas_nao_salvas > 0:
-                st.warning(f"{linhas_nao_salvas} linhas não foram salvas porque já existem no banco de dados.")
-            else:
-                st.success("Todos os dados foram carregados com sucesso!")
+                if linhas_nao_salvas > 0:
+                    st.warning(f"{linhas_nao_salvas} linhas não foram salvas porque já existem no banco de dados.")
+                else:
+                    st.success("Todos os dados foram carregados com sucesso!")
 
             # Atualizar e exibir os dados
             sla_data = load_sla_data(usuario)
             st.dataframe(sla_data, use_container_width=True, hide_index=True)
 
-        # Filtro de data para análise de SLA
-        sla_data = load_sla_data(st.session_state.usuario_logado)
-        sla_data['DATA CRIAÇÃO PROTOCOLO'] = pd.to_datetime(sla_data['DATA CRIAÇÃO PROTOCOLO'], errors='coerce')
-        sla_data['DATA DE CONCLUSÃO DA TAREFA'] = pd.to_datetime(sla_data['DATA DE CONCLUSÃO DA TAREFA'], errors='coerce')
-
-        st.subheader("Filtro de Data")
-        col1, col2 = st.columns(2)
-        with col1:
-            data_inicio = st.date_input("Data de início", sla_data['DATA CRIAÇÃO PROTOCOLO'].min().date())
-        with col2:
-            data_fim = st.date_input("Data de fim", sla_data['DATA CRIAÇÃO PROTOCOLO'].max().date())
-
-        if data_inicio > data_fim:
-            st.error("A data de início não pode ser posterior à data de fim!")
-        else:
-            # Filtrar dados com base no intervalo de datas
-            sla_filtrado = sla_data[
-                (sla_data['DATA CRIAÇÃO PROTOCOLO'].dt.date >= data_inicio) &
-                (sla_data['DATA CRIAÇÃO PROTOCOLO'].dt.date <= data_fim)
-            ]
-
-            # Calcular SLA geral
-            resultado, sla_geral = calcular_sla_por_fila(sla_filtrado, data_inicio, data_fim)
-
-            # Exibir SLA Geral
-            st.metric(label="SLA Geral", value=f"{sla_geral}%", help="SLA de todas as filas dentro do intervalo de D+3")
-
-            # Exibir métricas por fila
-            for _, row in resultado.iterrows():
-                if row['FILA'] != 'TOTAL':
-                    st.metric(
-                        label=row['FILA'],
-                        value=f"{row['% SLA']}%",
-                        delta=f"Entradas: {row['ENTRADAS']} | Tratados: {row['TRATADOS']}",
-                        delta_color="off",
-                        help=f"SLA da fila '{row['FILA']}' dentro do intervalo selecionado"
-                    )
-
-            # Botão para exportar planilha formatada
-            if st.button("Exportar Planilha de SLA"):
-                gerar_planilha_sla(sla_filtrado)
+        painel_sla(st.session_state.usuario_logado)
 
     if st.sidebar.button("Logout", icon=":material/logout:"):
         st.session_state.logado = False
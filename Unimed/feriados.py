@@ -0,0 +1,73 @@
+# Calendário de dias úteis dos prazos em D+N (ex.: o SLA). São úteis as segundas a sextas que não
+# são feriado. Os feriados nacionais (os de data fixa e a Sexta-feira da Paixão, que depende da
+# Páscoa) são calculados para cada ano; os demais (municipais, pontos facultativos, emendas) ficam
+# no arquivo UNIMED_FERIADOS (padrão 'feriados.txt', na pasta de execução), uma data DD/MM/AAAA por
+# linha. Linhas vazias, o que vem depois de '#' e datas inválidas são ignorados.
+import functools
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+ARQUIVO_FERIADOS = os.getenv("UNIMED_FERIADOS", "feriados.txt")
+
+# (mês, dia) dos feriados nacionais de data fixa
+FERIADOS_FIXOS = [(1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (12, 25)]
+
+# Dia Nacional de Zumbi e da Consciência Negra (20/11), feriado nacional desde 2024 (Lei 14.759/2023)
+ANO_CONSCIENCIA_NEGRA = 2024
+
+
+def pascoa(ano: int) -> date:
+    """
+    Domingo de Páscoa do ano no calendário gregoriano (algoritmo de Meeus/Jones/Butcher).
+    """
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def feriados_nacionais(ano: int) -> list:
+    feriados = [date(ano, mes, dia) for mes, dia in FERIADOS_FIXOS]
+    if ano >= ANO_CONSCIENCIA_NEGRA:
+        feriados.append(date(ano, 11, 20))
+    feriados.append(pascoa(ano) - timedelta(days=2))
+    return feriados
+
+
+@functools.lru_cache(maxsize=4)
+def _ler_arquivo(arquivo: str, modificado_em: float) -> tuple:
+    with open(arquivo, encoding='utf-8') as origem:
+        linhas = [linha.split('#', 1)[0].strip() for linha in origem]
+    datas = pd.to_datetime(pd.Series([linha for linha in linhas if linha], dtype=object), format='%d/%m/%Y', errors='coerce')
+    return tuple(sorted(set(datas.dropna().dt.date)))
+
+
+def ler_feriados(arquivo: str = ARQUIVO_FERIADOS) -> tuple:
+    """
+    Feriados do arquivo, ordenados e sem repetição; vazio se o arquivo não existe. O arquivo só é
+    relido quando muda.
+    """
+    try:
+        return _ler_arquivo(arquivo, os.path.getmtime(arquivo))
+    except FileNotFoundError:
+        return ()
+
+
+@functools.lru_cache(maxsize=16)
+def calendario(ano_inicio: int, ano_fim: int, feriados: tuple = ()) -> np.busdaycalendar:
+    """
+    Calendário do numpy (np.busday_offset, np.busday_count) com os feriados nacionais de
+    ano_inicio a ano_fim mais as datas de `feriados`.
+    """
+    datas = [feriado for ano in range(ano_inicio, ano_fim + 1) for feriado in feriados_nacionais(ano)]
+    return np.busdaycalendar(weekmask='1111100', holidays=np.array(datas + list(feriados), dtype='datetime64[D]'))
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# Textos pré-montados para os inteiros mais comuns, para não formatar número a número
+_NUMEROS = np.array([str(i) for i in range(10000)], dtype=object)
+_DOIS_DIGITOS = np.array([f'{i:02d}' for i in range(100)], dtype=object)
+
+
+def _como_series(valores) -> pd.Series:
+    if isinstance(valores, pd.Series):
+        return valores
+    return pd.Series(valores)
+
+
+def _segundos_inteiros(duracoes: pd.Series) -> tuple:
+    """
+    Converte uma Series de durações em segundos inteiros (truncando as frações, como int()).
+
+    Retorna o array de segundos e a máscara das posições nulas (NaT), que ficam com zero.
+    """
+    if not pd.api.types.is_timedelta64_dtype(duracoes) and duracoes.isna().all():
+        # Ex.: Series só com NaT, que o pandas infere como datetime
+        duracoes = pd.Series(pd.NaT, index=duracoes.index, dtype='timedelta64[ns]')
+    duracoes = pd.to_timedelta(duracoes, errors='coerce')
+    nulos = duracoes.isna().to_numpy()
+    nanos = duracoes.to_numpy(dtype='timedelta64[ns]').view('int64')
+    segundos = np.where(nanos < 0, -(-nanos // 10**9), nanos // 10**9)
+    segundos[nulos] = 0
+    return segundos, nulos
+
+
+def _texto(valores: np.ndarray, dois_digitos: bool = False) -> np.ndarray:
+    """
+    Converte um array de inteiros em textos; com dois_digitos, preenche com zero à esquerda.
+    """
+    tabela = _DOIS_DIGITOS if dois_digitos else _NUMEROS
+    texto = np.empty(len(valores), dtype=object)
+    na_tabela = (valores >= 0) & (valores < len(tabela))
+    texto[na_tabela] = tabela[valores[na_tabela]]
+    if not na_tabela.all():
+        formato = '{:02d}' if dois_digitos else '{:d}'
+        texto[~na_tabela] = [formato.format(valor) for valor in valores[~na_tabela].tolist()]
+    return texto
+
+def formatar_hms(duracoes) -> pd.Series:
+    """
+    Formata uma Series de durações como 'HH:MM:SS'. Valores nulos viram '00:00:00'.
+    """
+    duracoes = _como_series(duracoes)
+    segundos, _ = _segundos_inteiros(duracoes)
+    horas, resto = np.divmod(segundos, 3600)
+    minutos, segundos = np.divmod(resto, 60)
+    texto = _texto(horas, True) + ':' + _texto(minutos, True) + ':' + _texto(segundos, True)
+    return pd.Series(texto, index=duracoes.index, dtype=object)
+
+
+def formatar_min_seg(duracoes, nulo: str = '0 min') -> pd.Series:
+    """
+    Formata uma Series de durações como 'X min Ys'. Valores nulos recebem o texto de `nulo`.
+    """
+    duracoes = _como_series(duracoes)
+    segundos, nulos = _segundos_inteiros(duracoes)
+    minutos, segundos = np.divmod(segundos, 60)
+    texto = _texto(minutos) + ' min ' + _texto(segundos) + 's'
+    texto[nulos] = nulo
+    return pd.Series(texto, index=duracoes.index, dtype=object)
+
+
+def formatar_minutos(minutos) -> pd.Series:
+    """
+    Formata uma Series de minutos (float) como 'Xh Ym Zs' a partir de 60 minutos e como
+    'X min Ys' abaixo disso. Os segundos são arredondados; valores nulos viram '0 min 0s'.
+    """
+    minutos = _como_series(minutos)
+    valores = pd.to_numeric(minutos, errors='coerce').to_numpy(dtype='float64')
+    nulos = np.isnan(valores)
+    valores = np.where(nulos, 0.0, valores)
+
+    texto = np.empty(len(valores), dtype=object)
+
+    longo = valores >= 60
+    longos = valores[longo]
+    horas = np.floor_divide(longos, 60)
+    resto_minutos = np.trunc(np.mod(longos, 60))
+    segundos = np.round((longos - horas * 60 - resto_minutos) * 60)
+    texto[longo] = (
+        _texto(horas.astype('int64')) + 'h ' + _texto(resto_minutos.astype('int64')) + 'm '
+        + _texto(segundos.astype('int64')) + 's'
+    )
+
+    curtos = valores[~longo]
+    minutos_inteiros = np.trunc(curtos)
+    segundos = np.round((curtos - minutos_inteiros) * 60)
+    texto[~longo] = _texto(minutos_inteiros.astype('int64')) + ' min ' + _texto(segundos.astype('int64')) + 's'
+    return pd.Series(texto, index=minutos.index, dtype=object)
@@ -0,0 +1,801 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import marcar_versao, memorizar, versao_dataframe
+from .feriados import calendario, ler_feriados
+from .formatacao import formatar_hms, formatar_min_seg, formatar_minutos
+from .resumo import como_resumo_diario
+
+# Camada de cálculo do dashboard: funções puras que recebem e devolvem DataFrames/valores, sem
+# Streamlit nem Plotly. As funções de exibição (calculations.py, charts.py) só desenham o que
+# vem daqui; assim os cálculos podem ser memorizados, medidos em benchmarks/ e rodados sem a interface.
+
+def format_timedelta(td):
+    """ Formata um único timedelta como 'X min Ys'. Para colunas, use formatar_min_seg. """
+    return formatar_min_seg(pd.Series([td], dtype='timedelta64[ns]')).iloc[0]
+
+def format_timedelta_hms(td):
+    """ Formata um único timedelta como HH:MM:SS. Para colunas, use formatar_hms. """
+    return formatar_hms(pd.Series([td], dtype='timedelta64[ns]')).iloc[0]
+
+def contar_por_grupo(df, chave, coluna, valores):
+    """
+    Conta, para cada grupo de `chave`, quantas linhas têm `coluna` igual a cada um dos `valores`.
+
+    A contagem é uma tabela cruzada calculada sobre códigos inteiros (factorize + bincount),
+    em uma única passagem e sem funções Python executadas por grupo.
+
+    Parâmetros:
+        - df: DataFrame com os dados.
+        - chave: Coluna usada para agrupar.
+        - coluna: Coluna cujos valores são contados.
+        - valores: Lista de valores a contar.
+
+    Retorno:
+        - DataFrame indexado pelos grupos de `chave` (na mesma ordem de um groupby), com a coluna
+          'Total' (linhas do grupo) e uma coluna por valor. Grupos sem ocorrências recebem zero.
+    """
+    codigos_chave, grupos = pd.factorize(df[chave], sort=True)
+    codigos_valor = pd.Categorical(df[coluna], categories=valores).codes
+
+    # Linhas sem chave são descartadas, como no groupby; o código 0 acumula os demais valores
+    validas = codigos_chave >= 0
+    largura = len(valores) + 1
+    tabela = np.bincount(
+        codigos_chave[validas].astype(np.int64) * largura + codigos_valor[validas] + 1,
+        minlength=len(grupos) * largura
+    ).reshape(len(grupos), largura)
+
+    contagem = pd.DataFrame(tabela[:, 1:], index=pd.Index(grupos, name=chave), columns=valores)
+    contagem.insert(0, 'Total', tabela.sum(axis=1))
+    return contagem
+
+def _contar_finalizacoes(df, chave):
+    """
+    Quantidade, Cadastrado, Atualizado e Fora_do_Escopo (demais finalizações) por grupo de `chave`.
+    """
+    contagem = contar_por_grupo(df, chave, 'FINALIZAÇÃO', ['CADASTRADO', 'ATUALIZADO'])
+    contagem['Fora_do_Escopo'] = contagem['Total'] - contagem['CADASTRADO'] - contagem['ATUALIZADO']
+    return contagem.rename(columns={'Total': 'Quantidade', 'CADASTRADO': 'Cadastrado', 'ATUALIZADO': 'Atualizado'})
+
+def dividir_tempo(tempo_total, quantidade):
+    """
+    Divide o tempo total pela quantidade, devolvendo NaT onde a quantidade é zero.
+    """
+    return tempo_total / quantidade.where(quantidade > 0)
+
+# Finalizações consideradas no TMO geral dos relatórios
+FINALIZACOES_TMO_GERAL = ['CADASTRADO', 'REALIZADO', 'ATUALIZADO']
+
+def calcular_metricas_por_analista(df, por_dia=False):
+    """
+    Calcula, em uma única passagem de groupby, as métricas de 'TEMPO MÉDIO OPERACIONAL'
+    para cada par (analista, FINALIZAÇÃO) e, opcionalmente, para cada dia.
+
+    Parâmetros:
+        - df: DataFrame com os dados (já filtrado por período/analistas, se for o caso).
+        - por_dia: Se True, agrupa também pelo dia de conclusão (coluna 'Dia').
+
+    Retorno:
+        - DataFrame com as colunas de agrupamento e:
+            - Quantidade: total de tarefas (linhas) do grupo.
+            - Quantidade_TMO: tarefas com TMO preenchido.
+            - Tempo_Total: soma do TMO do grupo.
+    """
+    chaves = [df['USUÁRIO QUE CONCLUIU A TAREFA'], df['FINALIZAÇÃO']]
+    if por_dia:
+        chaves.append(df['DATA DE CONCLUSÃO DA TAREFA'].dt.normalize().rename('Dia'))
+
+    metricas = df.groupby(chaves, observed=True, dropna=False)['TEMPO MÉDIO OPERACIONAL'].agg(
+        Quantidade='size',
+        Quantidade_TMO='count',
+        Tempo_Total='sum'
+    ).reset_index()
+
+    # O resultado é pequeno: volta para texto/date para facilitar reindex e exportação
+    metricas['USUÁRIO QUE CONCLUIU A TAREFA'] = metricas['USUÁRIO QUE CONCLUIU A TAREFA'].astype(object)
+    metricas['FINALIZAÇÃO'] = metricas['FINALIZAÇÃO'].astype(object)
+    if por_dia:
+        metricas['Dia'] = metricas['Dia'].dt.date
+
+    return metricas
+
+def somar_metricas(metricas, finalizacoes=None, analistas=None):
+    """
+    Soma as métricas de calcular_metricas_por_analista para um conjunto de finalizações.
+
+    Parâmetros:
+        - metricas: Resultado de calcular_metricas_por_analista.
+        - finalizacoes: Lista de finalizações a considerar (None considera todas).
+        - analistas: Se informado, o resultado é reindexado nessa ordem, com zeros para
+          analistas sem tarefas.
+
+    Retorno:
+        - DataFrame indexado por analista (e 'Dia', se as métricas forem diárias) com
+          Quantidade, Quantidade_TMO e Tempo_Total.
+    """
+    if finalizacoes is not None:
+        metricas = metricas[metricas['FINALIZAÇÃO'].isin(finalizacoes)]
+
+    chaves = ['USUÁRIO QUE CONCLUIU A TAREFA'] + (['Dia'] if 'Dia' in metricas.columns else [])
+    soma = metricas.groupby(chaves)[['Quantidade', 'Quantidade_TMO', 'Tempo_Total']].sum()
+
+    if analistas is not None:
+        soma = soma.reindex(analistas)
+        soma[['Quantidade', 'Quantidade_TMO']] = soma[['Quantidade', 'Quantidade_TMO']].fillna(0).astype(int)
+        soma['Tempo_Total'] = soma['Tempo_Total'].fillna(pd.Timedelta(0))
+
+    return soma
+
+def calcular_tmo_personalizado(df):
+    """
+    Calcula o TMO considerando as regras específicas para cada tipo de tarefa.
+
+    Parâmetros:
+        - df: DataFrame com os dados filtrados.
+
+    Retorno:
+        - TMO geral (tempo total de CADASTRADO, ATUALIZADO e REALIZADO dividido pela quantidade de tarefas).
+    """
+    soma = somar_metricas(calcular_metricas_por_analista(df), FINALIZACOES_TMO_GERAL).sum()
+    total_tarefas = soma.get('Quantidade', 0)
+    return soma['Tempo_Total'] / total_tarefas if total_tarefas > 0 else pd.Timedelta(0)
+
+def calcular_tmo_geral(df):
+    """
+    Calcula o TMO Geral considerando todas as tarefas finalizadas.
+    """
+    df_finalizados = df[df['FINALIZAÇÃO'].isin(['CADASTRADO', 'REALIZADO', 'ATUALIZADO'])]
+    return df_finalizados['TEMPO MÉDIO OPERACIONAL'].mean()
+
+def calcular_tmo_cadastro(df):
+    """
+    Calcula o TMO apenas para tarefas finalizadas como "CADASTRADO".
+    """
+    df_cadastro = df[df['FINALIZAÇÃO'] == 'CADASTRADO']
+    return df_cadastro['TEMPO MÉDIO OPERACIONAL'].mean()
+
+@memorizar
+def filtrar_analista(df: pd.DataFrame, analista) -> pd.DataFrame:
+    """
+    Linhas de um analista em um DataFrame de load_data ou load_resumo_diario.
+
+    O recorte recebe uma versão própria (a do DataFrame de origem mais o analista), de modo que os
+    cálculos memorizados sobre ele também são reaproveitados entre reruns e sessões. Como os demais
+    resultados memorizados, volta como cópia rasa de arrays somente leitura.
+    """
+    df_analista = df[df['USUÁRIO QUE CONCLUIU A TAREFA'] == analista].reset_index(drop=True)
+    df_analista.attrs.pop('versao_dataset', None)
+    versao = versao_dataframe(df)
+    if versao is not None:
+        marcar_versao(df_analista, (*versao, ('analista', analista)))
+    return df_analista
+
+@memorizar
+def calcular_produtividade_diaria(df):
+    """
+    Quantidade diária de tarefas com finalização preenchida.
+    Aceita o resumo diário (load_resumo_diario) ou as tarefas.
+    """
+    resumo = como_resumo_diario(df)
+    finalizado = resumo['Quantidade'].where(resumo['FINALIZAÇÃO'].notna(), 0)
+    df_produtividade = finalizado.groupby(resumo['Dia']).sum().rename('Finalizado').reset_index()
+    df_produtividade['Dia'] = df_produtividade['Dia'].dt.date
+
+    # Calcula a produtividade total
+    df_produtividade['Produtividade'] = df_produtividade['Finalizado']
+    return df_produtividade
+
+@memorizar
+def calcular_produtividade_diaria_cadastro(df):
+    """
+    Quantidade diária de tarefas com finalização 'Cadastro realizado' (dias sem cadastro ficam com zero).
+    Aceita o resumo diário (load_resumo_diario) ou as tarefas.
+    """
+    resumo = como_resumo_diario(df)
+    finalizado = resumo['Quantidade'].where(resumo['FINALIZAÇÃO'] == 'Cadastro realizado', 0)
+    df_produtividade_cadastro = finalizado.groupby(resumo['Dia']).sum().rename('Finalizado').reset_index()
+    df_produtividade_cadastro['Dia'] = df_produtividade_cadastro['Dia'].dt.date
+
+    # Calcula a produtividade total
+    df_produtividade_cadastro['Produtividade'] = df_produtividade_cadastro['Finalizado']
+    return df_produtividade_cadastro
+
+@memorizar
+def calcular_produtividade_diaria_subsidios(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula a produtividade diária apenas para as filas que contenham 'Elaborar Subsídios'.
+    A contagem considera tarefas finalizadas com qualquer status.
+    Aceita o resumo diário (load_resumo_diario) ou as tarefas.
+    """
+    resumo = como_resumo_diario(df)
+
+    # Filtra apenas as filas de subsídios finalizadas; os textos são testados uma vez por categoria
+    # (o código -1, de valores nulos, cai no False acrescentado ao final)
+    filas = resumo['FILA'].astype('category').cat
+    situacoes = resumo['SITUAÇÃO DA TAREFA'].astype('category').cat
+    fila_subsidio = np.append(filas.categories.str.contains(r'Elaborar\s+(?:Subsídios|Subsidios)', case=False, regex=True), False)
+    finalizada = np.append(situacoes.categories.str.upper() == 'FINALIZADA', False)
+    resumo = resumo[fila_subsidio[filas.codes.to_numpy()] & finalizada[situacoes.codes.to_numpy()]]
+
+    # Agrupa por dia e soma quantas tarefas finalizadas houve
+    df_produtividade_subsidios = resumo.groupby('Dia')['Quantidade'].sum().rename('Produtividade').reset_index()
+    df_produtividade_subsidios['Dia'] = df_produtividade_subsidios['Dia'].dt.date
+
+    return df_produtividade_subsidios
+
+@memorizar
+def calcular_tmo_por_dia(df_analista):
+    """
+    TMO médio diário das tarefas 'CADASTRADO' (NaT nos dias sem TMO preenchido).
+    Aceita o resumo diário (load_resumo_diario) ou as tarefas.
+    """
+    resumo = como_resumo_diario(df_analista)
+    resumo = resumo[resumo['FINALIZAÇÃO'] == 'CADASTRADO']
+    tmo_por_dia = resumo.groupby('Dia')[['Tempo_Total', 'Quantidade_TMO']].sum().reset_index()
+    tmo_por_dia['Dia'] = tmo_por_dia['Dia'].dt.date
+    tmo_por_dia['TMO'] = dividir_tempo(tmo_por_dia['Tempo_Total'], tmo_por_dia['Quantidade_TMO'])
+    return tmo_por_dia[['Dia', 'TMO']]
+
+@memorizar
+def calcular_tmo_por_dia_cadastro(df):
+    """
+    TMO diário das tarefas 'CADASTRADO' (tempo total / tarefas), formatado como 'X min Ys'.
+    Aceita o resumo diário (load_resumo_diario) ou as tarefas.
+    """
+    resumo = como_resumo_diario(df)
+    resumo = resumo[resumo['FINALIZAÇÃO'] == 'CADASTRADO']
+
+    # Agrupando por dia
+    df_tmo_cadastro = resumo.groupby('Dia')[['Tempo_Total', 'Quantidade']].sum().reset_index()
+    df_tmo_cadastro['Dia'] = df_tmo_cadastro['Dia'].dt.date
+
+    # Calcula o TMO (Tempo Médio Operacional)
+    df_tmo_cadastro['TMO'] = df_tmo_cadastro['Tempo_Total'] / df_tmo_cadastro['Quantidade']
+
+    df_tmo_cadastro['TMO'] = formatar_min_seg(df_tmo_cadastro['TMO'])
+    return df_tmo_cadastro[['Dia', 'TMO']]
+
+@memorizar
+def calcular_tmo_por_mes(df):
+    """
+    TMO mensal (em minutos) das tarefas finalizadas.
+    Aceita o resumo diário (load_resumo_diario) ou as tarefas.
+    """
+    resumo = como_resumo_diario(df)
+
+    # Filtrar apenas os protocolos com status 'FINALIZADO'
+    resumo = resumo[resumo['SITUAÇÃO DA TAREFA'] == 'Finalizada']
+
+    # Agrupar por AnoMes e calcular o TMO
+    df_tmo_mes = resumo.groupby(resumo['Dia'].dt.to_period('M').rename('AnoMes'))[['Tempo_Total', 'Quantidade_TMO']].sum().reset_index()
+
+    # Calcular o TMO em minutos
+    df_tmo_mes['TMO'] = (df_tmo_mes['Tempo_Total'] / pd.Timedelta(minutes=1)) / df_tmo_mes['Quantidade_TMO']
+    
+    # Converter a coluna AnoMes para datetime e formatar como "Mês XX de Ano"
+    df_tmo_mes['AnoMes'] = df_tmo_mes['AnoMes'].dt.to_timestamp().dt.strftime('%B de %Y').str.capitalize()
+    
+    return df_tmo_mes[['AnoMes', 'TMO']]
+
+@memorizar
+def calcular_tmo_por_mes_formatado(df):
+    """
+    calcular_tmo_por_mes com a coluna 'TMO_Formatado' ('Xh Ym Zs' ou 'X min Ys'), usada nos
+    rótulos do gráfico e nas tabelas mensais.
+    """
+    df_tmo_mes = calcular_tmo_por_mes(df)
+    df_tmo_mes['TMO_Formatado'] = formatar_minutos(df_tmo_mes['TMO'])
+    return df_tmo_mes
+
+@memorizar
+def calcular_melhor_tmo_por_dia(df_analista):
+    """
+    Calcula o melhor TMO de cadastro por dia para o analista.
+
+    Parâmetros:
+        - df_analista: DataFrame filtrado para o analista.
+
+    Retorna:
+        - O dia com o melhor TMO de cadastro e o valor do TMO.
+    """
+    # Filtrar apenas as finalizações do tipo 'CADASTRADO'
+    df_cadastro = df_analista[df_analista['FINALIZAÇÃO'] == 'CADASTRADO']
+
+    # Calcula o TMO por dia para o tipo 'CADASTRADO'
+    df_tmo_por_dia = calcular_tmo_por_dia(df_cadastro)
+
+    # Identifica o dia com o menor TMO
+    if not df_tmo_por_dia.empty:
+        melhor_dia = df_tmo_por_dia.loc[df_tmo_por_dia['TMO'].idxmin()]
+        return melhor_dia['Dia'], melhor_dia['TMO']
+
+    # Retorna None caso não haja dados para 'CADASTRADO'
+    return None, None
+
+@memorizar
+def calcular_melhor_dia_por_cadastro(df_analista):
+    """
+    Dia com mais tarefas 'CADASTRADO' e a quantidade delas.
+    Aceita o resumo diário (load_resumo_diario) ou as tarefas.
+    """
+    if 'FINALIZAÇÃO' in df_analista.columns and ('DATA DE CONCLUSÃO DA TAREFA' in df_analista.columns or 'Dia' in df_analista.columns):
+        resumo = como_resumo_diario(df_analista)
+        df_cadastros_por_dia = resumo[resumo['FINALIZAÇÃO'] == 'CADASTRADO'].groupby('Dia')['Quantidade'].sum()
+
+        # Identifica o dia com maior quantidade de cadastros
+        if not df_cadastros_por_dia.empty:
+            melhor_dia = df_cadastros_por_dia.idxmax()
+            return melhor_dia.date(), df_cadastros_por_dia[melhor_dia]
+    
+    return None, 0
+
+@memorizar
+def calcular_tmo(df):
+    # Verifica se a coluna 'SITUAÇÃO DA TAREFA' existe no DataFrame
+    if 'SITUAÇÃO DA TAREFA' not in df.columns:
+        raise KeyError("A coluna 'SITUAÇÃO DA TAREFA' não foi encontrada no DataFrame.")
+
+    # Filtra as tarefas finalizadas ou canceladas
+    df_finalizados = df[df['SITUAÇÃO DA TAREFA'].isin(['Finalizada', 'Cancelada'])].copy()
+
+    # Verifica se a coluna 'TEMPO MÉDIO OPERACIONAL' existe e converte para minutos
+    if 'TEMPO MÉDIO OPERACIONAL' not in df_finalizados.columns:
+        raise KeyError("A coluna 'TEMPO MÉDIO OPERACIONAL' não foi encontrada no DataFrame.")
+    df_finalizados['TEMPO_MÉDIO_MINUTOS'] = df_finalizados['TEMPO MÉDIO OPERACIONAL'].dt.total_seconds() / 60
+
+    # Verifica se a coluna 'FILA' existe antes de aplicar o filtro
+    if 'FILA' in df_finalizados.columns:
+        # Remove protocolos da fila "DÚVIDA" com mais de 1 hora de tempo médio
+        df_finalizados = df_finalizados[~((df_finalizados['FILA'] == 'DÚVIDA') & (df_finalizados['TEMPO_MÉDIO_MINUTOS'] > 60))]
+
+    # Agrupando por analista: soma do tempo e total de tarefas com finalização CADASTRADO
+    cadastrado = df_finalizados['FINALIZAÇÃO'] == 'CADASTRADO'
+    df_tmo_analista = df_finalizados['TEMPO MÉDIO OPERACIONAL'].where(cadastrado).groupby(
+        df_finalizados['USUÁRIO QUE CONCLUIU A TAREFA'], observed=True
+    ).sum().rename('Tempo_Total').to_frame()
+    df_tmo_analista['Total_Tarefas'] = contar_por_grupo(
+        df_finalizados, 'USUÁRIO QUE CONCLUIU A TAREFA', 'FINALIZAÇÃO', ['CADASTRADO']
+    )['CADASTRADO']
+    df_tmo_analista = df_tmo_analista.reset_index()
+
+    # Calcula o TMO (Tempo Médio Operacional) como média
+    df_tmo_analista['TMO'] = df_tmo_analista['Tempo_Total'] / df_tmo_analista['Total_Tarefas']
+
+    # Formata o tempo médio no formato de minutos e segundos
+    df_tmo_analista['TMO_Formatado'] = formatar_hms(df_tmo_analista['TMO'])
+
+    return df_tmo_analista[['USUÁRIO QUE CONCLUIU A TAREFA', 'TMO_Formatado', 'TMO']]
+
+@memorizar
+def calcular_tabela_ranking(df_total, selected_users):
+    """
+    Finalizado, Distribuido, Atualizado e Total por analista selecionado, ordenado pelo Total
+    (índice 'Posição' a partir de 1).
+    """
+    # Filtra o DataFrame com os usuários selecionados
+    df_filtered = df_total[df_total['USUÁRIO QUE CONCLUIU A TAREFA'].isin(selected_users)]
+
+    df_ranking = contar_por_grupo(
+        df_filtered, 'USUÁRIO QUE CONCLUIU A TAREFA', 'FINALIZAÇÃO', ['CADASTRADO', 'REALIZADO', 'ATUALIZADO']
+    ).drop(columns='Total').rename(
+        columns={'CADASTRADO': 'Finalizado', 'REALIZADO': 'Distribuido', 'ATUALIZADO': 'Atualizado'}
+    ).reset_index()
+    df_ranking['Total'] =df_ranking['Finalizado'] + df_ranking['Distribuido'] + df_ranking['Atualizado']
+    df_ranking = df_ranking.sort_values(by  ='Total', ascending=False).reset_index(drop=True)
+    df_ranking.index += 1
+    df_ranking.index.name = 'Posição'
+
+    return df_ranking
+
+@memorizar
+def calcular_tmo_equipe_cadastro(df_total):
+    return df_total[df_total['FINALIZAÇÃO'].isin(['CADASTRADO'])]['TEMPO MÉDIO OPERACIONAL'].mean()
+
+@memorizar
+def calcular_tmo_equipe_atualizado(df_total):
+    return df_total[df_total['FINALIZAÇÃO'].isin(['ATUALIZADO'])]['TEMPO MÉDIO OPERACIONAL'].mean()
+
+@memorizar
+def calcular_tmo_por_carteira(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Gera um resumo por Fila com:
+    - Quantidade total de tarefas
+    - TMO médio para tarefas finalizadas (exceto Fora do Escopo)
+    - TMO médio para tarefas com finalização 'Fora do Escopo'
+
+    Retorna:
+        pd.DataFrame com colunas:
+        ['FILA', 'Quantidade de Tarefas', 'TMO Finalizadas', 'TMO Fora do Escopo']
+    """
+
+    # Validação das colunas obrigatórias
+    required_columns = {'FILA', 'SITUAÇÃO DA TAREFA', 'FINALIZAÇÃO', 'TEMPO MÉDIO OPERACIONAL'}
+    if not required_columns.issubset(df.columns):
+        return "As colunas necessárias não foram encontradas no DataFrame."
+
+    # Remove linhas sem tempo registrado
+    df = df.dropna(subset=['TEMPO MÉDIO OPERACIONAL'])
+
+    if not pd.api.types.is_timedelta64_dtype(df['TEMPO MÉDIO OPERACIONAL']):
+        return "A coluna 'TEMPO MÉDIO OPERACIONAL' precisa ser do tipo timedelta."
+
+    # Contagem total de tarefas por fila
+    quantidade_tarefas = df.groupby('FILA', observed=True).size().reset_index(name='Quantidade de Tarefas')
+
+    # TMO de tarefas finalizadas (exceto Fora do Escopo)
+    df_finalizadas = df[
+        (df['SITUAÇÃO DA TAREFA'].str.upper() == 'FINALIZADA') &
+        (df['FINALIZAÇÃO'].str.upper() != 'FORA DO ESCOPO')
+    ]
+    tmo_finalizadas = df_finalizadas.groupby('FILA', observed=True)['TEMPO MÉDIO OPERACIONAL'].mean().reset_index()
+    tmo_finalizadas.rename(columns={'TEMPO MÉDIO OPERACIONAL': 'TMO Finalizadas'}, inplace=True)
+
+    # TMO de tarefas Fora do Escopo
+    df_escopo = df[df['FINALIZAÇÃO'].str.upper() == 'FORA DO ESCOPO']
+    tmo_escopo = df_escopo.groupby('FILA', observed=True)['TEMPO MÉDIO OPERACIONAL'].mean().reset_index()
+    tmo_escopo.rename(columns={'TEMPO MÉDIO OPERACIONAL': 'TMO Fora do Escopo'}, inplace=True)
+
+    # Junta tudo
+    resumo = quantidade_tarefas.merge(tmo_finalizadas, on='FILA', how='left')\
+                               .merge(tmo_escopo, on='FILA', how='left')
+
+    # Formata os campos de tempo
+    resumo['TMO Finalizadas'] = formatar_hms(resumo['TMO Finalizadas'])
+    resumo['TMO Fora do Escopo'] = formatar_hms(resumo['TMO Fora do Escopo'])
+
+    return resumo[['FILA', 'Quantidade de Tarefas', 'TMO Finalizadas', 'TMO Fora do Escopo']]
+
+@memorizar
+def calcular_producao_agrupada(df):
+    required_columns = {'FILA', 'FINALIZAÇÃO', 'NÚMERO DO PROTOCOLO'}
+    if not required_columns.issubset(df.columns):
+        return "As colunas necessárias ('FILA', 'FINALIZAÇÃO', 'NÚMERO DO PROTOCOLO') não foram encontradas no DataFrame."
+
+    grupos = {
+        'CAPTURA ANTECIPADA': [' CADASTRO ROBÔ', 'INCIDENTE PROCESSUAL', 'CADASTRO ANS'],
+        'SHAREPOINT': ['CADASTRO SHAREPOINT', 'ATUALIZAÇÃO - SHAREPOINT'],
+        'CITAÇÃO ELETRÔNICA': ['CADASTRO CITAÇÃO ELETRÔNICA', 'ATUALIZAÇÃO CITAÇÃO ELETRÔNICA'],
+        'E-MAIL': ['CADASTRO E-MAIL', 'OFICIOS E-MAIL', 'CADASTRO DE ÓRGÃOS E OFÍCIOS'],
+        'PRE CADASTRO E DIJUR': ['PRE CADASTRO E DIJUR']
+    }
+
+    # O grupo é resolvido uma vez por fila distinta e expandido pelos códigos da coluna FILA
+    fila_para_grupo = {fila: grupo for grupo, filas in grupos.items() for fila in filas}
+    filas = df['FILA'].astype('category')
+    grupo_por_fila = [fila_para_grupo.get(fila, 'OUTROS') for fila in filas.cat.categories] + ['OUTROS']
+    codigos_grupo, nomes_grupo = pd.factorize(pd.Index(grupo_por_fila), sort=True)
+    grupo = pd.Categorical.from_codes(codigos_grupo[filas.cat.codes], categories=nomes_grupo)
+
+    df_agrupado = _contar_finalizacoes(df.assign(GRUPO=grupo), 'GRUPO').drop(columns='Quantidade').reset_index()
+
+    return df_agrupado
+
+@memorizar
+def calcular_producao_email_detalhada(df):
+    required_columns = {'FILA', 'FINALIZAÇÃO', 'NÚMERO DO PROTOCOLO', 'TAREFA'}
+    if not required_columns.issubset(df.columns):
+        return "As colunas necessárias ('FILA', 'FINALIZAÇÃO', 'NÚMERO DO PROTOCOLO', 'TAREFA') não foram encontradas no DataFrame."
+
+    # Filtrando apenas as filas do grupo E-MAIL
+    df_email = df[df['FILA'].isin(['CADASTRO E-MAIL', 'OFICIOS', 'CADASTRO DE ÓRGÃOS E OFÍCIOS'])]
+
+    # Separando os de CADASTRO E-MAIL para agrupar por TAREFA
+    df_cadastro_email = df_email[df_email['FILA'] == 'CADASTRO E-MAIL']
+    df_outros_email = df_email[df_email['FILA'].isin(['OFICIOS', 'CADASTRO DE ÓRGÃOS E OFÍCIOS'])]
+
+    # Agrupando CADASTRO E-MAIL por TAREFA
+    df_cadastro_email_agrupado = _contar_finalizacoes(df_cadastro_email, 'TAREFA').reset_index()
+
+    # Agrupando os demais (OFICIOS E-MAIL e CADASTRO DE ÓRGÃOS E OFÍCIOS) por FILA
+    df_outros_email_agrupado = _contar_finalizacoes(df_outros_email, 'FILA').reset_index().rename(columns={'FILA': 'TAREFA'})
+
+    # Concatenando os resultados
+    df_email_final = pd.concat([df_cadastro_email_agrupado, df_outros_email_agrupado], ignore_index=True)
+
+    return df_email_final
+
+@memorizar
+def calcular_tmo_por_fila(df_analista):
+    """
+    Quantidade e TMO médio (HH:MM:SS) por fila das tarefas finalizadas do analista.
+
+    Retorno:
+        - DataFrame com 'Fila', 'Quantidade' e 'TMO Médio por Fila' (vazio se não houver a coluna 'FILA').
+    """
+    if 'FILA' not in df_analista.columns:
+        return pd.DataFrame({'Fila': [], 'Quantidade': [], 'TMO Médio por Fila': []})
+
+    # Filtrar apenas as tarefas finalizadas para cálculo do TMO
+    filas_finalizadas_analista = df_analista[df_analista['SITUAÇÃO DA TAREFA'] == 'Finalizada']
+
+    # Agrupa por 'FILA' e calcula a quantidade e o TMO médio para cada fila
+    carteiras_analista = filas_finalizadas_analista.groupby('FILA', observed=True).agg(
+        Quantidade=('FILA', 'size'),
+        TMO_médio=('TEMPO MÉDIO OPERACIONAL', 'mean')
+    ).reset_index()
+
+    # Converte o TMO médio para HH:MM:SS
+    carteiras_analista['TMO_médio'] = formatar_hms(carteiras_analista['TMO_médio'])
+
+    return carteiras_analista.rename(columns={'FILA': 'Fila', 'TMO_médio': 'TMO Médio por Fila'})
+
+@memorizar
+def calcular_tmo_cadastro_atualizacao_por_fila(df_analista):
+    """
+    Quantidade de tarefas CADASTRADO/ATUALIZADO e o TMO médio (HH:MM:SS) de cada uma por fila.
+
+    Retorno:
+        - DataFrame com 'Fila', 'Quantidade', 'TMO Cadastro' e 'TMO Atualização', ou None se
+          faltarem as colunas 'FILA' ou 'FINALIZAÇÃO'.
+    """
+    if 'FILA' not in df_analista.columns or 'FINALIZAÇÃO' not in df_analista.columns:
+        return None
+
+    # Filtrar apenas as tarefas finalizadas com CADASTRADO e ATUALIZADO
+    filas_finalizadas_analista = df_analista[df_analista['FINALIZAÇÃO'].isin(['CADASTRADO', 'ATUALIZADO'])]
+
+    # Agrupar os dados por 'FILA' e calcular a quantidade de tarefas por fila
+    df_quantidade = filas_finalizadas_analista.groupby('FILA', observed=True).size().reset_index(name='Quantidade')
+
+    # Calcular o TMO médio para cada fila separadamente
+    tempos = filas_finalizadas_analista['TEMPO MÉDIO OPERACIONAL']
+    finalizacao = filas_finalizadas_analista['FINALIZAÇÃO']
+    por_fila = filas_finalizadas_analista['FILA']
+    df_tmo_cadastro = tempos[finalizacao == 'CADASTRADO'].groupby(por_fila, observed=True).mean().rename('TMO_Cadastro').reset_index()
+    df_tmo_atualizacao = tempos[finalizacao == 'ATUALIZADO'].groupby(por_fila, observed=True).mean().rename('TMO_Atualizacao').reset_index()
+
+    # Unir os DataFrames pela Fila
+    df_resultado = df_quantidade.merge(df_tmo_cadastro, on='FILA', how='left').merge(df_tmo_atualizacao, on='FILA', how='left')
+
+    # Converter os TMOs para HH:MM:SS (filas sem tarefas do tipo ficam com 00:00:00)
+    df_resultado['TMO_Cadastro'] = formatar_hms(df_resultado['TMO_Cadastro'])
+    df_resultado['TMO_Atualizacao'] = formatar_hms(df_resultado['TMO_Atualizacao'])
+
+    return df_resultado.rename(columns={
+        'FILA': 'Fila',
+        'TMO_Cadastro': 'TMO Cadastro',
+        'TMO_Atualizacao': 'TMO Atualização'
+    })
+
+# Intervalos entre tarefas acima deste limite (ex.: trocas de turno) não contam como tempo ocioso
+LIMITE_TEMPO_OCIOSO = pd.Timedelta(hours=1)
+
+def _como_datas(datas: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(datas):
+        return datas
+    return pd.to_datetime(datas, format='%d/%m/%Y %H:%M:%S', errors='coerce')
+
+def _nanossegundos(datas: pd.Series) -> np.ndarray:
+    return _como_datas(datas).to_numpy(dtype='datetime64[ns]').view('int64')
+
+def calcular_intervalos_ociosos(df, limite=LIMITE_TEMPO_OCIOSO) -> pd.Series:
+    """
+    Calcula, para cada tarefa, o tempo ocioso até o início da próxima tarefa do mesmo analista.
+
+    Os cálculos são feitos sobre arrays int64 de nanossegundos: as tarefas são ordenadas por
+    (analista, início) com um único lexsort, e intervalos negativos, nulos ou acima do `limite`
+    são zerados com máscaras. Tarefas sem início/conclusão ou sem analista ficam com zero.
+
+    Retorno:
+        - Series de timedelta alinhada ao índice de `df`.
+    """
+    inicio = _nanossegundos(df['DATA DE INÍCIO DA TAREFA'])
+    fim = _nanossegundos(df['DATA DE CONCLUSÃO DA TAREFA'])
+    analistas = pd.factorize(df['USUÁRIO QUE CONCLUIU A TAREFA'])[0]
+
+    validas = np.flatnonzero((inicio != np.iinfo(np.int64).min) & (fim != np.iinfo(np.int64).min) & (analistas >= 0))
+    ordem = validas[np.lexsort((inicio[validas], analistas[validas]))]
+
+    # Próxima tarefa = linha seguinte na ordenação, desde que seja do mesmo analista
+    mesmo_analista = analistas[ordem[1:]] == analistas[ordem[:-1]]
+    intervalo = inicio[ordem[1:]] - fim[ordem[:-1]]
+    intervalo = np.where(mesmo_analista & (intervalo > 0) & (intervalo <= limite.value), intervalo, 0)
+
+    ocioso = np.zeros(len(df), dtype=np.int64)
+    ocioso[ordem[:-1]] = intervalo
+    return pd.Series(ocioso.view('timedelta64[ns]'), index=df.index, name='Tempo Ocioso')
+
+@memorizar
+def calcular_tempo_ocioso_por_analista(df, por_dia=True):
+    """
+    Soma o tempo ocioso entre tarefas consecutivas de cada analista, para todos os analistas
+    do DataFrame de uma só vez.
+
+    Parâmetros:
+        - df: DataFrame com as tarefas (início, conclusão e analista).
+        - por_dia: Se True, soma por analista e dia de conclusão (colunas 'Data' e 'Tempo Ocioso');
+          se False, devolve apenas o total por analista.
+
+    O 'Tempo Ocioso' é devolvido como timedelta; a formatação fica a cargo de quem exibe. Erros
+    (ex.: colunas ausentes) são propagados, para que não fiquem memorizados: quem exibe decide
+    como mostrá-los.
+    """
+    inicio = _como_datas(df['DATA DE INÍCIO DA TAREFA'])
+    conclusao = _como_datas(df['DATA DE CONCLUSÃO DA TAREFA'])
+    validas = inicio.notna() & conclusao.notna()
+
+    ocioso = calcular_intervalos_ociosos(df)[validas]
+    chaves = [df['USUÁRIO QUE CONCLUIU A TAREFA'][validas]]
+    if por_dia:
+        chaves.append(conclusao[validas].dt.date.rename('Data'))
+
+    # Agrupa os tempos ociosos por usuário (e dia de conclusão), somando todas as filas
+    return ocioso.groupby(chaves, observed=True).sum().reset_index()
+
+def calcular_tempo_ocioso(df):
+    """
+    Calcula o tempo ocioso total por analista.
+    """
+    return calcular_tempo_ocioso_por_analista(df, por_dia=False)
+
+@memorizar
+def calcular_tempo_ocioso_por_dia(df_analista, analista_selecionado):
+    """
+    Tempo ocioso diário de um analista, pronto para o gráfico: 'Data', 'Tempo Ocioso',
+    'Tempo Ocioso Formatado' (HH:MM:SS) e 'Tempo Ocioso Segundos'.
+    """
+    df_ocioso = calcular_tempo_ocioso_por_analista(df_analista)
+    df_ocioso = df_ocioso[df_ocioso['USUÁRIO QUE CONCLUIU A TAREFA'] == analista_selecionado].reset_index(drop=True)
+    df_ocioso['Tempo Ocioso Formatado'] = formatar_hms(df_ocioso['Tempo Ocioso'])
+    df_ocioso['Tempo Ocioso Segundos'] = df_ocioso['Tempo Ocioso'].dt.total_seconds()
+    return df_ocioso
+
+# Colunas do TMO mensal por analista e o rótulo de cada uma no gráfico
+TIPOS_TMO_MES = {'TMO_Geral': 'Geral', 'TMO_Cadastro': 'Cadastro', 'TMO_Atualizacao': 'Atualização'}
+
+@memorizar
+def calcular_grafico_tmo_analista_por_mes(df_analista):
+    """
+    Calcula o TMO Geral, Cadastro e Atualização por mês para um analista específico.
+
+    Parâmetro:
+        - df_analista: DataFrame contendo as tarefas do analista.
+
+    Retorna:
+        - DataFrame com TMO_Geral, TMO_Cadastro e TMO_Atualizacao por mês e as mesmas colunas
+          formatadas como HH:MM:SS (sufixo '_Formatado').
+    """
+    if df_analista.empty:
+        return pd.DataFrame(columns=['AnoMes', *TIPOS_TMO_MES, *[tipo + '_Formatado' for tipo in TIPOS_TMO_MES]])
+
+    # Converter 'TEMPO MÉDIO OPERACIONAL' para timedelta se necessário
+    tempos = df_analista['TEMPO MÉDIO OPERACIONAL']
+    if not pd.api.types.is_timedelta64_dtype(tempos):
+        tempos = pd.to_timedelta(tempos, errors='coerce')
+
+    df_analista = df_analista.assign(**{
+        'TEMPO MÉDIO OPERACIONAL': tempos,
+        'AnoMes': df_analista['DATA DE CONCLUSÃO DA TAREFA'].dt.to_period('M').astype(str)
+    })
+
+    df_geral = df_analista[df_analista['SITUAÇÃO DA TAREFA'].isin(['Finalizada', 'Cancelada'])]
+    df_cadastro = df_analista[df_analista['FINALIZAÇÃO'] == 'Cadastro realizado']
+    df_atualizacao = df_analista[df_analista['FINALIZAÇÃO'] == 'ATUALIZADO']
+
+    def calcular_tmo(df, nome_coluna):
+        if df.empty:
+            return pd.DataFrame(columns=['AnoMes', nome_coluna])
+
+        df_tmo = df.groupby('AnoMes').agg(
+            Tempo_Total=('TEMPO MÉDIO OPERACIONAL', 'sum'),
+            Total_Protocolos=('TEMPO MÉDIO OPERACIONAL', 'count')
+        ).reset_index()
+
+        df_tmo[nome_coluna] = df_tmo['Tempo_Total'] / df_tmo['Total_Protocolos']
+        df_tmo = df_tmo[['AnoMes', nome_coluna]]
+
+        return df_tmo
+
+    df_tmo_geral = calcular_tmo(df_geral, 'TMO_Geral')
+    df_tmo_cadastro = calcular_tmo(df_cadastro, 'TMO_Cadastro')
+    df_tmo_atualizacao = calcular_tmo(df_atualizacao, 'TMO_Atualizacao')
+
+    df_tmo_mes = df_tmo_geral.merge(df_tmo_cadastro, on='AnoMes', how='left').merge(df_tmo_atualizacao, on='AnoMes', how='left')
+
+    df_tmo_mes.fillna(pd.Timedelta(seconds=0), inplace=True)
+    df_tmo_mes['AnoMes'] = pd.to_datetime(df_tmo_mes['AnoMes'], errors='coerce')  # Converter para datetime
+    df_tmo_mes['AnoMes'] = df_tmo_mes['AnoMes'].dt.strftime('%B de %Y').str.capitalize()
+
+    # Formatar os tempos para HH:MM:SS
+    for tipo in TIPOS_TMO_MES:
+        df_tmo_mes[tipo + '_Formatado'] = formatar_hms(df_tmo_mes[tipo])
+
+    return df_tmo_mes
+
+def calcular_tmo_por_mes_longo(df_tmo_mes):
+    """
+    Passa o resultado de calcular_grafico_tmo_analista_por_mes para o formato longo do gráfico de
+    barras agrupadas: 'AnoMes', 'Tipo de TMO', 'Tempo Médio Operacional' e 'Texto_Rotulo'
+    (ex.: 'Cadastro - 00:04:10').
+    """
+    df_tmo_long = df_tmo_mes.melt(
+        id_vars=['AnoMes'],
+        value_vars=list(TIPOS_TMO_MES),
+        var_name='Tipo de TMO',
+        value_name='Tempo Médio Operacional'
+    )
+    # As duas transformações percorrem as colunas na mesma ordem, então as linhas ficam alinhadas
+    formatados = df_tmo_mes[[tipo + '_Formatado' for tipo in TIPOS_TMO_MES]].to_numpy().ravel(order='F')
+    df_tmo_long['Texto_Rotulo'] = df_tmo_long['Tipo de TMO'].map(TIPOS_TMO_MES) + ' - ' + formatados
+    return df_tmo_long
+
+# Filas e tarefas consideradas no SLA e prazo, em dias úteis após a criação do protocolo (D+N)
+FILAS_SLA = [' CADASTRO ROBÔ', 'INCIDENTE PROCESSUAL', 'CADASTRO ANS']
+TAREFAS_SLA = ['CADASTRAR ROBO', 'CADASTRAR ANS', 'ATUALIZAR']
+PRAZO_SLA = int(os.getenv("UNIMED_PRAZO_SLA", "3"))
+
+def _percentual(parte, total):
+    return (parte / total.where(total > 0) * 100).fillna(0.0).round(2)
+
+@memorizar
+def _agregar_sla(df, data_inicio, data_fim, prazo, feriados):
+    criacao = _como_datas(df['DATA CRIAÇÃO PROTOCOLO']).dt.normalize()
+    conclusao = _como_datas(df['DATA DE CONCLUSÃO DA TAREFA']).dt.normalize()
+
+    selecionadas = criacao.notna() & df['FILA'].isin(FILAS_SLA) & df['TAREFA'].isin(TAREFAS_SLA)
+    if data_inicio is not None:
+        selecionadas &= criacao >= pd.to_datetime(data_inicio, dayfirst=True).normalize()
+    if data_fim is not None:
+        selecionadas &= criacao <= pd.to_datetime(data_fim, dayfirst=True).normalize()
+    criacao, conclusao, filas = criacao[selecionadas], conclusao[selecionadas], df['FILA'][selecionadas]
+
+    # Prazo de cada protocolo: N dias úteis após o dia de criação (criado em dia não útil, conta a
+    # partir do próximo dia útil). Os feriados nacionais cobrem até o ano seguinte ao da última criação.
+    dias_criacao = criacao.to_numpy(dtype='datetime64[D]')
+    anos = dias_criacao.astype('datetime64[Y]').astype(np.int64) + 1970
+    limite = np.busday_offset(
+        dias_criacao, prazo, roll='forward',
+        busdaycal=calendario(int(anos.min(initial=2000)), int(anos.max(initial=2000)) + 1, feriados)
+    )
+    tratado = conclusao.notna().to_numpy()
+    no_prazo = tratado & (conclusao.to_numpy(dtype='datetime64[D]') <= limite)
+
+    # Contagens por (dia, fila) em uma passagem, sobre códigos inteiros; filas e totais são somas delas
+    codigos_dia, dias = pd.factorize(criacao, sort=True)
+    codigos_fila, nomes_filas = pd.factorize(filas, sort=True)
+    nomes_filas = np.asarray(nomes_filas, dtype=object)
+    grupos = codigos_dia.astype(np.int64) * len(nomes_filas) + codigos_fila
+    n_grupos = len(dias) * len(nomes_filas)
+    contagens = np.stack([
+        np.bincount(grupos, minlength=n_grupos),
+        np.bincount(grupos, weights=tratado, minlength=n_grupos),
+        np.bincount(grupos, weights=no_prazo, minlength=n_grupos)
+    ], axis=1).astype(np.int64)
+
+    por_dia = pd.DataFrame(contagens, columns=['ENTRADAS', 'TRATADOS', 'SLA_OK'])
+    por_dia.insert(0, 'FILA', np.tile(nomes_filas, len(dias)))
+    por_dia.insert(0, 'DIA', np.repeat(np.asarray(dias, dtype='datetime64[ns]'), len(nomes_filas)))
+    por_dia = por_dia[por_dia['ENTRADAS'] > 0].reset_index(drop=True)
+    por_dia['% SLA'] = _percentual(por_dia['SLA_OK'], por_dia['ENTRADAS'])
+
+    por_fila = pd.DataFrame(contagens.reshape(len(dias), len(nomes_filas), 3).sum(axis=0), columns=['ENTRADAS', 'TRATADOS', 'SLA_OK'])
+    por_fila.insert(0, 'FILA', nomes_filas)
+    por_fila['% SLA'] = _percentual(por_fila['SLA_OK'], por_fila['ENTRADAS'])
+
+    entradas = int(por_fila['ENTRADAS'].sum())
+    sla_geral = round(por_fila['SLA_OK'].sum() / entradas * 100, 2) if entradas else 0.0
+    return por_dia, por_fila, float(sla_geral)
+
+def calcular_sla(df, data_inicio=None, data_fim=None, prazo=PRAZO_SLA, feriados=None):
+    """
+    Calcula o SLA das filas de FILAS_SLA (tarefas de TAREFAS_SLA): um protocolo está no prazo
+    quando a tarefa é concluída até `prazo` dias úteis após o dia de criação (D+N).
+
+    Parâmetros:
+        - df: DataFrame com os dados de SLA (datas de criação e conclusão, fila e tarefa).
+        - data_inicio, data_fim: Intervalo (inclusivo) das datas de criação do protocolo, como
+          date, Timestamp ou texto DD/MM/AAAA; None não limita.
+        - prazo: Dias úteis do prazo (UNIMED_PRAZO_SLA, padrão 3).
+        - feriados: Datas sem expediente além dos feriados nacionais; por padrão, as do arquivo
+          de feriados (ver feriados.py).
+
+    Retorno:
+        - por_dia: 'DIA' (criação), 'FILA', 'ENTRADAS', 'TRATADOS', 'SLA_OK' e '% SLA'.
+        - por_fila: as mesmas colunas, sem 'DIA', somadas no intervalo.
+        - sla_geral: Percentual no prazo de todas as filas (0.0 sem entradas).
+    """
+    feriados = ler_feriados() if feriados is None else tuple(sorted(pd.to_datetime(list(feriados)).date))
+    return _agregar_sla(df, data_inicio, data_fim, prazo, feriados)
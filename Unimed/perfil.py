@@ -0,0 +1,283 @@
+# Perfil por rerun do dashboard: modo opcional que cronometra cada seção nomeada (leitura dos
+# dados, conversões, filtros, cálculos, montagem e envio dos gráficos), mostra o resultado em um
+# painel recolhível ao fim da página e acrescenta cada amostra a um log local em JSON Lines.
+#
+# Ativação:
+#   - UNIMED_PERFIL=1 liga o modo para todos os usuários;
+#   - UNIMED_PERFIL_USUARIOS="a@unimed,b@unimed" liga só para os usuários (administradores) listados.
+# O log vai para UNIMED_PERFIL_LOG (padrão 'perfil_reruns.jsonl').
+#
+# Por padrão o perfil só cronometra. Pico de memória e maiores alocações dependem do tracemalloc,
+# que é global ao processo e deixa todas as sessões mais lentas (inclusive as sem perfil); por isso
+# ficam atrás de uma chave própria, UNIMED_PERFIL_MEMORIA=1, para investigações pontuais.
+#
+# Uso no dashboard: @perfilar_rerun em dashboard(), instrumentar(globals()) para cronometrar as
+# funções importadas e `with secao('nome'):` para trechos inline. Com o modo desligado, seções e
+# funções instrumentadas custam uma consulta a um threading.local por chamada. Cada sessão do
+# Streamlit roda o script em uma thread própria, então o perfil ativo é guardado por thread.
+#
+# Os painéis do dashboard são fragmentos (@st.fragment) também decorados com @perfilar_rerun:
+# dentro de um rerun completo viram uma seção dele; quando só o fragmento é reexecutado, geram a
+# própria amostra, com o nome do painel no campo 'visao'.
+import functools
+import json
+import linecache
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from .cache import cache_calculos, cache_dados, cache_figuras
+
+ARQUIVO_LOG_PERFIL = os.getenv("UNIMED_PERFIL_LOG", "perfil_reruns.jsonl")
+
+# Prefixos das funções cronometradas quando chamadas a partir do dashboard
+PREFIXOS_INSTRUMENTADOS = (
+    'load_', 'save_', 'intervalo_datas_', 'convert_', 'filtrar_', 'calcular_', 'get_', 'plot_', 'grafico_',
+    'exibir_', 'export_', 'exportar_', 'gerar_', 'download_'
+)
+
+# Quantidade de alocações exibidas e gravadas por rerun
+TOP_ALOCACOES = 10
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+def perfil_habilitado(usuario) -> bool:
+    if os.getenv("UNIMED_PERFIL", "").lower() in ("1", "true", "sim"):
+        return True
+    usuarios = {u.strip() for u in os.getenv("UNIMED_PERFIL_USUARIOS", "").split(",") if u.strip()}
+    return usuario in usuarios
+
+
+def memoria_habilitada() -> bool:
+    return os.getenv("UNIMED_PERFIL_MEMORIA", "").lower() in ("1", "true", "sim")
+
+
+class PerfilRerun:
+    """
+    Amostras de um rerun: seções (nome, nível de aninhamento, início relativo e duração em
+    segundos), marca de tempo e, com `memoria`, instantâneo de memória do início.
+
+    O tracemalloc é global ao processo: com várias sessões simultâneas, as alocações e o pico
+    incluem o que as outras threads alocaram no mesmo intervalo.
+    """
+
+    def __init__(self, usuario, memoria=False):
+        self.usuario = usuario
+        self.visao = None
+        self.secoes = []
+        self.nivel = 0
+        self.memoria = memoria
+        if memoria:
+            if not tracemalloc.is_tracing():
+                # Fica ligado até o fim do processo: parar com outras threads alocando não é seguro
+                tracemalloc.start()
+            self.instantaneo = tracemalloc.take_snapshot()
+            self.memoria_inicial = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.inicio = time.perf_counter()
+
+    @contextmanager
+    def secao(self, nome):
+        nivel = self.nivel
+        self.nivel += 1
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.nivel = nivel
+            self.secoes.append((nome, nivel, inicio - self.inicio, time.perf_counter() - inicio))
+
+    def resumo(self, erro=None) -> dict:
+        total = time.perf_counter() - self.inicio
+        pico_mb, alocacoes = self._memoria() if self.memoria else (None, [])
+
+        # Tempo fora das seções de primeiro nível: widgets, textos e o próprio Streamlit
+        medido = sum(segundos for _, nivel, _, segundos in self.secoes if nivel == 0)
+        secoes = sorted(self.secoes, key=lambda secao: secao[2])
+        return {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'usuario': self.usuario,
+            'visao': self.visao,
+            'erro': erro,
+            'total_s': round(total, 6),
+            'fora_das_secoes_s': round(max(total - medido, 0.0), 6),
+            'pico_mb': pico_mb,
+            'secoes': [
+                {'nome': nome, 'nivel': nivel, 'inicio_s': round(inicio, 6), 's': round(segundos, 6)}
+                for nome, nivel, inicio, segundos in secoes
+            ],
+            'alocacoes': alocacoes,
+            'cache_dados': cache_dados.estatisticas(),
+            'cache_calculos': cache_calculos.estatisticas(),
+            'cache_figuras': cache_figuras.estatisticas(),
+        }
+
+    def _memoria(self) -> tuple:
+        """
+        Pico de memória (MB acima do início) e maiores alocações desde o início do rerun.
+        """
+        pico = tracemalloc.get_traced_memory()[1] - self.memoria_inicial
+
+        diferencas = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, linecache.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ]).compare_to(self.instantaneo, 'lineno')
+        alocacoes = [
+            {
+                'local': f'{diferenca.traceback[0].filename}:{diferenca.traceback[0].lineno}',
+                'kb': round(diferenca.size_diff / 1024, 1),
+                'blocos': diferenca.count_diff,
+            }
+            for diferenca in sorted(diferencas, key=lambda d: d.size_diff, reverse=True)[:TOP_ALOCACOES]
+            if diferenca.size_diff > 0
+        ]
+        return round(max(pico, 0) / 2**20, 3), alocacoes
+
+
+def perfil_atual():
+    return getattr(_local, 'perfil', None)
+
+
+def marcar_visao(visao):
+    """
+    Registra na amostra do rerun qual visão do dashboard foi exibida.
+    """
+    perfil = perfil_atual()
+    if perfil is not None:
+        perfil.visao = visao
+
+
+@contextmanager
+def secao(nome):
+    """
+    Cronometra o bloco como uma seção do rerun; sem perfil ativo não faz nada.
+    """
+    perfil = perfil_atual()
+    if perfil is None:
+        yield
+        return
+    with perfil.secao(nome):
+        yield
+
+
+def cronometrado(nome, funcao):
+    """
+    Envolve a função para que cada chamada vire uma seção com o nome dado.
+    """
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        perfil = perfil_atual()
+        if perfil is None:
+            return funcao(*args, **kwargs)
+        with perfil.secao(nome):
+            return funcao(*args, **kwargs)
+
+    envolvida.__perfil__ = True
+    return envolvida
+
+
+def instrumentar(namespace: dict, prefixos=PREFIXOS_INSTRUMENTADOS):
+    """
+    Substitui, no namespace dado (ex.: globals() do dashboard), as funções cujo nome começa com um
+    dos prefixos por versões cronometradas. Só as chamadas feitas a partir desse namespace são
+    medidas; os módulos de origem continuam com as funções originais.
+    """
+    for nome, objeto in list(namespace.items()):
+        if callable(objeto) and nome.startswith(prefixos) and not getattr(objeto, '__perfil__', False):
+            namespace[nome] = cronometrado(nome, objeto)
+
+
+def instrumentar_streamlit():
+    """
+    Cronometra st.plotly_chart (serialização da figura e envio ao navegador) como uma seção
+    própria, aninhada na seção que desenhou o gráfico. Idempotente.
+    """
+    if not getattr(st.plotly_chart, '__perfil__', False):
+        st.plotly_chart = cronometrado('st.plotly_chart', st.plotly_chart)
+
+
+def gravar_amostra(amostra: dict, arquivo=None):
+    """
+    Acrescenta a amostra ao log de perfis (uma linha JSON por rerun).
+    """
+    with _log_lock:
+        with open(arquivo or ARQUIVO_LOG_PERFIL, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(amostra, ensure_ascii=False, default=str) + '\n')
+
+
+def exibir_perfil(amostra: dict):
+    """
+    Detalhamento do rerun em um expander recolhido: seções, tempo fora delas, taxa de acerto dos
+    caches e, com UNIMED_PERFIL_MEMORIA, pico de memória e maiores alocações.
+    """
+    with st.expander(f"⏱️ Perfil deste rerun: {amostra['total_s'] * 1000:.0f} ms", expanded=False):
+        df_secoes = pd.DataFrame(amostra['secoes'], columns=['nome', 'nivel', 'inicio_s', 's'])
+        # Seções aninhadas (ex.: st.plotly_chart dentro de exibir_*) aparecem recuadas sob a seção que as chamou
+        df_secoes['Seção'] = df_secoes['nivel'].map(lambda nivel: '\u2003' * nivel + ('↳ ' if nivel else '')) + df_secoes['nome']
+        df_secoes['Tempo (ms)'] = (df_secoes['s'] * 1000).round(1)
+        df_secoes['% do rerun'] = (df_secoes['s'] / amostra['total_s'] * 100).round(1) if amostra['total_s'] else 0.0
+        st.dataframe(df_secoes[['Seção', 'Tempo (ms)', '% do rerun']], hide_index=True, use_container_width=True)
+        memoria = f"pico de memória: {amostra['pico_mb']:.1f} MB · " if amostra['pico_mb'] is not None else ""
+        st.caption(
+            f"Fora das seções: {amostra['fora_das_secoes_s'] * 1000:.0f} ms · {memoria}"
+            f"cache de cálculos: {amostra['cache_calculos']['taxa_acerto']:.0%} de acertos · "
+            f"cache de figuras: {amostra['cache_figuras']['taxa_acerto']:.0%} de acertos"
+        )
+
+        if amostra['alocacoes']:
+            st.markdown("**Maiores alocações do rerun**")
+            st.dataframe(pd.DataFrame(amostra['alocacoes']), hide_index=True, use_container_width=True)
+
+
+def perfilar_rerun(funcao):
+    """
+    Decorador da função de página (dashboard) e dos fragmentos: com o modo ligado para o usuário
+    logado, abre o perfil do rerun, exibe o detalhamento ao fim e grava a amostra no log. Reruns
+    interrompidos por exceção (inclusive st.rerun()) também são gravados, com o campo 'erro', mas
+    não exibidos. Chamada com um perfil já aberto (fragmento dentro do rerun completo), a função
+    vira apenas uma seção desse perfil.
+    """
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        perfil = perfil_atual()
+        if perfil is not None:
+            with perfil.secao(funcao.__name__):
+                return funcao(*args, **kwargs)
+
+        usuario = st.session_state.get('usuario_logado')
+        if not perfil_habilitado(usuario):
+            return funcao(*args, **kwargs)
+
+        perfil = _local.perfil = PerfilRerun(usuario, memoria=memoria_habilitada())
+        # dashboard() troca pela visão exibida (marcar_visao); um fragmento reexecutado fica com o próprio nome
+        perfil.visao = funcao.__name__
+        try:
+            resultado = funcao(*args, **kwargs)
+        except BaseException as e:
+            _local.perfil = None
+            _gravar(perfil.resumo(erro=f'{type(e).__name__}: {e}'))
+            raise
+
+        _local.perfil = None
+        amostra = perfil.resumo()
+        exibir_perfil(amostra)
+        _gravar(amostra)
+        return resultado
+
+    return envolvida
+
+
+def _gravar(amostra: dict):
+    try:
+        gravar_amostra(amostra)
+    except OSError as e:
+        st.toast(f"⚠️ Não foi possível gravar o log de perfil: {e}")
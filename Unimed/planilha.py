@@ -0,0 +1,312 @@
+# Leitura de planilhas xlsx em blocos de linhas, para a ingestão de uploads grandes com memória
+# limitada. O pd.read_excel monta a planilha inteira em listas Python e só depois o DataFrame,
+# com pico de memória de várias vezes o tamanho do arquivo; aqui o XML da aba é percorrido em
+# fluxo pelo openpyxl (modo somente leitura) e cada bloco vira um DataFrame pequeno, gravado e
+# descartado antes da leitura do próximo.
+#
+# Os textos de um xlsx ficam em uma tabela compartilhada (xl/sharedStrings.xml), referenciada
+# pelas células por posição. O openpyxl carrega essa tabela inteira em uma lista de str, que em
+# planilhas com muitos textos únicos (protocolos, datas como texto) é quase do tamanho dos
+# próprios dados; aqui ela vai para um arquivo temporário mapeado em memória (TextosCompartilhados),
+# e só as páginas consultadas ocupam memória, sob controle do sistema operacional.
+#
+# O mesmo vale para a aba: o parser do openpyxl limpa cada linha lida, mas ela continua presa ao
+# elemento <sheetData>, com um custo fixo por linha; _LinhasDaAba solta as linhas já lidas.
+#
+# Essa leitura usa partes internas do openpyxl (worksheet._reader, _get_source, _date_formats), testadas
+# com a versão fixada em requirements.txt. Se uma versão futura as remover ou renomear, a planilha é
+# lida pela API pública (load_workbook em modo somente leitura e iter_rows), também em blocos, mas
+# com a tabela de textos compartilhados inteira em memória.
+#
+# O resultado segue as convenções do pd.read_excel: primeira aba, primeira linha como cabeçalho
+# (vazios viram 'Unnamed: <i>' e nomes repetidos ganham '.1', '.2', ...) e tipos inferidos por
+# coluna. Linhas totalmente vazias, que o pd.read_excel mantém como NaN, são ignoradas.
+#
+# Os tipos são fixados pelo primeiro bloco e os blocos seguintes são convertidos para eles, para que
+# todos os blocos de uma planilha tenham as mesmas colunas com os mesmos tipos. Colunas com valores de
+# tipos misturados (object) viram texto, com as datas no formato DD/MM/AAAA HH:MM:SS das planilhas.
+import functools
+import mmap
+import os
+import tempfile
+from array import array
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    from openpyxl.cell.text import Text
+    from openpyxl.reader.excel import ExcelReader
+    from openpyxl.worksheet._reader import DATA_TAG, ROW_TAG, WorkSheetParser
+    from openpyxl.xml.constants import SHARED_STRINGS, SHEET_MAIN_NS
+    from openpyxl.xml.functions import iterparse
+    INTERNOS_OPENPYXL = hasattr(ExcelReader, 'read_strings') and hasattr(WorkSheetParser, 'parse_row')
+except ImportError:
+    # Sem as partes internas, só a leitura pela API pública (ver _linhas_publicas)
+    ExcelReader = WorkSheetParser = object
+    INTERNOS_OPENPYXL = False
+
+LINHAS_POR_BLOCO = int(os.getenv("UNIMED_LINHAS_POR_BLOCO", "50000"))
+
+# Posições acumuladas antes de cada descarga no arquivo temporário de posições
+_POSICOES_POR_DESCARGA = 65536
+
+# Textos decodificados mantidos em memória: os repetidos (filas, situações, analistas) viram um
+# único objeto str compartilhado pelas células, como na lista do openpyxl
+TEXTOS_EM_MEMORIA = 8192
+
+
+class TextosCompartilhados:
+    """
+    Tabela de textos compartilhados gravada em dois arquivos temporários: os textos em UTF-8,
+    um após o outro, e a posição inicial de cada um (int64). Ambos são mapeados em memória e
+    `tabela[i]` decodifica só o texto pedido (os mais consultados ficam em um cache LRU).
+    Os arquivos somem ao fechar a tabela.
+    """
+
+    def __init__(self, origem):
+        self._textos = tempfile.TemporaryFile()
+        self._posicoes = tempfile.TemporaryFile()
+        self._mapas = []
+
+        posicoes, fim, quantidade = array('q', [0]), 0, 0
+        tag = '{%s}si' % SHEET_MAIN_NS
+        raiz = None
+        for evento, no in iterparse(origem, events=('start', 'end')):
+            if raiz is None:
+                raiz = no
+            if evento != 'end' or no.tag != tag:
+                continue
+            # Mesma conversão do openpyxl (read_string_table)
+            texto = Text.from_tree(no).content.replace('x005F_', '').encode('utf-8')
+            # Elementos já lidos continuam presos à raiz mesmo limpos; soltá-los mantém a memória
+            # da leitura constante
+            raiz.clear()
+            self._textos.write(texto)
+            fim += len(texto)
+            posicoes.append(fim)
+            quantidade += 1
+            if len(posicoes) >= _POSICOES_POR_DESCARGA:
+                posicoes.tofile(self._posicoes)
+                posicoes = array('q')
+        posicoes.tofile(self._posicoes)
+        self._quantidade = quantidade
+
+        self._textos.flush()
+        self._posicoes.flush()
+        # mmap não aceita arquivo vazio
+        self._dados = self._mapear(self._textos) if fim else b''
+        self._inicios = memoryview(self._mapear(self._posicoes)).cast('q')
+        self._texto = functools.lru_cache(maxsize=TEXTOS_EM_MEMORIA)(self._decodificar)
+
+    def _mapear(self, arquivo):
+        mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapas.append(mapa)
+        return mapa
+
+    def __len__(self):
+        return self._quantidade
+
+    def __getitem__(self, posicao):
+        if not 0 <= posicao < self._quantidade:
+            raise IndexError(posicao)
+        return self._texto(posicao)
+
+    def _decodificar(self, posicao):
+        return self._dados[self._inicios[posicao]:self._inicios[posicao + 1]].decode('utf-8')
+
+    def fechar(self):
+        self._texto.cache_clear()
+        self._inicios.release()
+        for mapa in self._mapas:
+            mapa.close()
+        self._textos.close()
+        self._posicoes.close()
+
+
+class _LeitorXlsx(ExcelReader):
+    """
+    Leitor do openpyxl em modo somente leitura que guarda os textos compartilhados em uma
+    tabela TextosCompartilhados em vez de uma lista.
+    """
+
+    def __init__(self, arquivo):
+        super().__init__(arquivo, read_only=True, data_only=True, keep_links=False)
+
+    def read_strings(self):
+        tipo = self.package.find(SHARED_STRINGS)
+        if tipo is not None:
+            with self.archive.open(tipo.PartName[1:]) as origem:
+                self.shared_strings = TextosCompartilhados(origem)
+
+
+class _LinhasDaAba(WorkSheetParser):
+    """
+    Parser do openpyxl que percorre só as linhas da aba (gera (número da linha, células)) e
+    descarta cada linha já lida, mantendo constante a memória da leitura.
+    """
+
+    def parse(self):
+        dados = None
+        for evento, elemento in iterparse(self.source, events=('start', 'end')):
+            if evento == 'start':
+                if elemento.tag == DATA_TAG:
+                    dados = elemento
+            elif elemento.tag == ROW_TAG:
+                linha = self.parse_row(elemento)
+                self.row_dimensions.clear()
+                if dados is not None:
+                    dados.clear()
+                yield linha
+
+
+def _valores(celulas: list) -> tuple:
+    valores = [None] * max((celula['column'] for celula in celulas), default=0)
+    for celula in celulas:
+        valores[celula['column'] - 1] = celula['value']
+    return tuple(valores)
+
+
+def _linhas_internas(pasta, textos):
+    """
+    Valores de cada linha da primeira aba, pelo parser interno do openpyxl (_LinhasDaAba).
+    """
+    aba = pasta.worksheets[0]
+    with aba._get_source() as origem:
+        linhas = _LinhasDaAba(
+            origem, textos, data_only=True, epoch=pasta.epoch,
+            date_formats=pasta._date_formats, timedelta_formats=pasta._timedelta_formats
+        ).parse()
+        for _, celulas in linhas:
+            yield _valores(celulas)
+
+
+def _linhas_publicas(pasta):
+    """
+    Valores de cada linha da primeira aba pela API pública do openpyxl (modo somente leitura).
+    A dimensão gravada na planilha é descartada: errada, ela cortaria linhas ou colunas.
+    """
+    aba = pasta.worksheets[0]
+    aba.reset_dimensions()
+    yield from aba.iter_rows(values_only=True)
+
+
+def _internos_disponiveis(pasta) -> bool:
+    return hasattr(pasta.worksheets[0], '_get_source') and hasattr(pasta, '_date_formats') and hasattr(pasta, '_timedelta_formats')
+
+
+def _nomes_colunas(cabecalho: tuple) -> list:
+    while cabecalho and cabecalho[-1] is None:
+        cabecalho = cabecalho[:-1]
+    nomes, vistos = [], {}
+    for i, nome in enumerate(cabecalho):
+        nome = f'Unnamed: {i}' if nome is None else nome
+        repeticoes = vistos.get(nome, 0)
+        vistos[nome] = repeticoes + 1
+        nomes.append(f'{nome}.{repeticoes}' if repeticoes else nome)
+    return nomes
+
+
+def _bloco(linhas: list, colunas: list) -> pd.DataFrame:
+    df = pd.DataFrame(linhas, columns=colunas)
+    # Como no pd.read_excel, colunas sem nenhum valor ficam como float (NaN), e não object (None)
+    vazias = [coluna for coluna in df.columns if df[coluna].dtype == object and df[coluna].isna().all()]
+    if linhas and vazias:
+        df[vazias] = df[vazias].astype('float64')
+    return df
+
+
+def _texto(valor) -> str:
+    return valor.strftime('%d/%m/%Y %H:%M:%S') if isinstance(valor, datetime) else str(valor)
+
+
+def _como_texto(serie: pd.Series) -> pd.Series:
+    return serie.astype(object).map(_texto, na_action='ignore').astype('str')
+
+
+def _tipar(df: pd.DataFrame, tipos: dict) -> pd.DataFrame:
+    """
+    Converte o bloco para os tipos de `tipos` (coluna -> dtype), preenchido no primeiro bloco.
+    Uma coluna object (valores de tipos misturados) em qualquer bloco passa a texto dali em diante;
+    quando a conversão para o tipo fixado falha (ex.: inteiros e, depois, células vazias), vale o
+    tipo do bloco.
+    """
+    for coluna in df.columns:
+        serie, tipo = df[coluna], tipos.get(coluna)
+        ja_texto = isinstance(serie.dtype, pd.StringDtype)
+        if serie.dtype == object or (isinstance(tipo, pd.StringDtype) and not ja_texto):
+            df[coluna] = _como_texto(serie)
+        elif tipo is not None and not ja_texto and serie.dtype != tipo:
+            try:
+                df[coluna] = serie.astype(tipo)
+            except (TypeError, ValueError):
+                pass
+        tipos[coluna] = df[coluna].dtype
+    return df
+
+
+def ler_xlsx_em_blocos(arquivo, linhas_por_bloco: int = LINHAS_POR_BLOCO, ao_ler=None):
+    """
+    Lê a primeira aba da planilha e gera um DataFrame a cada `linhas_por_bloco` linhas.
+
+    Parâmetros:
+        - arquivo: Caminho ou arquivo aberto (ex.: o UploadedFile do Streamlit).
+        - ao_ler: Função chamada após cada bloco com (linhas lidas até agora, total estimado),
+          para exibir o andamento. O total vem da dimensão gravada na planilha e pode faltar
+          (None) ou não ser exato.
+
+    Uma planilha sem linhas de dados gera um único DataFrame vazio com as colunas do cabeçalho.
+    """
+    leitor = pasta = None
+    try:
+        if INTERNOS_OPENPYXL:
+            leitor = _LeitorXlsx(arquivo)
+            leitor.read()
+            pasta = leitor.wb
+        else:
+            pasta = load_workbook(arquivo, read_only=True, data_only=True, keep_links=False)
+        aba = pasta.worksheets[0]
+        # A dimensão gravada na planilha pode faltar ou estar errada; serve só para o andamento
+        total = aba.max_row - 1 if aba.max_row else None
+
+        if leitor is not None and _internos_disponiveis(pasta):
+            linhas = _linhas_internas(pasta, leitor.shared_strings)
+        else:
+            linhas = _linhas_publicas(pasta)
+
+        try:
+            colunas = []
+            for cabecalho in linhas:
+                if any(valor is not None for valor in cabecalho):
+                    colunas = _nomes_colunas(tuple(cabecalho))
+                    break
+            largura = len(colunas)
+            vazia = (None,) * largura
+
+            bloco, lidas, tipos = [], 0, {}
+            for linha in linhas:
+                # Linhas mais curtas (células vazias no fim) são completadas; as mais longas, cortadas
+                linha = tuple(linha[:largura]) + vazia[len(linha):]
+                if all(valor is None for valor in linha):
+                    continue
+                bloco.append(linha)
+                if len(bloco) == linhas_por_bloco:
+                    lidas += len(bloco)
+                    yield _tipar(_bloco(bloco, colunas), tipos)
+                    bloco = []
+                    if ao_ler is not None:
+                        ao_ler(lidas, total)
+
+            if bloco or not lidas:
+                lidas += len(bloco)
+                yield _tipar(_bloco(bloco, colunas), tipos)
+                if ao_ler is not None:
+                    ao_ler(lidas, total)
+        finally:
+            linhas.close()
+    finally:
+        if pasta is not None:
+            pasta.close()
+        if leitor is not None and isinstance(leitor.shared_strings, TextosCompartilhados):
+            leitor.shared_strings.fechar()
@@ -0,0 +1,90 @@
+import pandas as pd
+
+# Chaves do resumo diário: uma linha por analista, dia, fila, finalização e situação
+COLUNAS_RESUMO = ['USUÁRIO QUE CONCLUIU A TAREFA', 'Dia', 'FILA', 'FINALIZAÇÃO', 'SITUAÇÃO DA TAREFA']
+METRICAS_RESUMO = ['Quantidade', 'Quantidade_TMO', 'Tempo_Total']
+
+# Colunas das tarefas necessárias para montar o resumo
+COLUNAS_ORIGEM_RESUMO = [
+    'USUÁRIO QUE CONCLUIU A TAREFA',
+    'DATA DE CONCLUSÃO DA TAREFA',
+    'FILA',
+    'FINALIZAÇÃO',
+    'SITUAÇÃO DA TAREFA',
+    'TEMPO MÉDIO OPERACIONAL'
+]
+
+
+def resumo_vazio() -> pd.DataFrame:
+    resumo = pd.DataFrame({coluna: pd.Series(dtype=object) for coluna in COLUNAS_RESUMO})
+    resumo['Dia'] = pd.Series(dtype='datetime64[ns]')
+    resumo['Quantidade'] = pd.Series(dtype='int64')
+    resumo['Quantidade_TMO'] = pd.Series(dtype='int64')
+    resumo['Tempo_Total'] = pd.Series(dtype='timedelta64[ns]')
+    return resumo
+
+
+def _categorizar(resumo: pd.DataFrame) -> pd.DataFrame:
+    for coluna in COLUNAS_RESUMO:
+        if coluna != 'Dia' and not isinstance(resumo[coluna].dtype, pd.CategoricalDtype):
+            resumo[coluna] = resumo[coluna].astype('category')
+    return resumo
+
+
+def resumir_por_dia(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrupa as tarefas por (analista, dia, FILA, FINALIZAÇÃO, SITUAÇÃO DA TAREFA).
+
+    Retorno:
+        - DataFrame com as colunas de COLUNAS_RESUMO ('Dia' normalizado para meia-noite) e:
+            - Quantidade: total de tarefas (linhas) do grupo.
+            - Quantidade_TMO: tarefas com TMO preenchido.
+            - Tempo_Total: soma do TMO do grupo.
+
+    Tarefas sem data de conclusão não entram no resumo; valores nulos nas demais chaves
+    formam grupos próprios.
+    """
+    if df.empty or 'DATA DE CONCLUSÃO DA TAREFA' not in df.columns:
+        return _categorizar(resumo_vazio())
+
+    datas = df['DATA DE CONCLUSÃO DA TAREFA']
+    if not pd.api.types.is_datetime64_any_dtype(datas):
+        datas = pd.to_datetime(datas, errors='coerce')
+    tempos = df['TEMPO MÉDIO OPERACIONAL'] if 'TEMPO MÉDIO OPERACIONAL' in df.columns else pd.Series(pd.NaT, index=df.index, dtype='timedelta64[ns]')
+
+    chaves = [
+        df[coluna] if coluna in df.columns else pd.Series(None, index=df.index, dtype=object, name=coluna)
+        for coluna in COLUNAS_RESUMO if coluna != 'Dia'
+    ]
+    chaves.insert(1, datas.dt.normalize().rename('Dia'))
+
+    resumo = tempos.groupby(chaves, observed=True, dropna=False).agg(
+        Quantidade='size',
+        Quantidade_TMO='count',
+        Tempo_Total='sum'
+    ).reset_index()
+    resumo = resumo[resumo['Dia'].notna()].reset_index(drop=True)
+    return _categorizar(resumo)
+
+
+def somar_resumos(resumos: list) -> pd.DataFrame:
+    """
+    Junta resumos de lotes diferentes somando as métricas das mesmas chaves.
+    """
+    resumos = [resumo for resumo in resumos if not resumo.empty]
+    if not resumos:
+        return _categorizar(resumo_vazio())
+
+    juntos = pd.concat([resumo.astype({c: object for c in COLUNAS_RESUMO if c != 'Dia'}) for resumo in resumos], ignore_index=True)
+    soma = juntos.groupby(COLUNAS_RESUMO, dropna=False)[METRICAS_RESUMO].sum().reset_index()
+    return _categorizar(soma)
+
+
+def como_resumo_diario(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aceita tanto o resumo diário (de load_resumo_diario) quanto as tarefas brutas; estas são
+    resumidas na hora. Assim os cálculos diários e mensais trabalham sempre sobre o resumo.
+    """
+    if all(coluna in df.columns for coluna in METRICAS_RESUMO + ['Dia']):
+        return df
+    return resumir_por_dia(df)
@@ -0,0 +1,820 @@
+import json
+import logging
+import os
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    # Sem fcntl (Windows), a trava de escrita vale só entre as sessões do próprio processo
+    fcntl = None
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .resumo import COLUNAS_ORIGEM_RESUMO, resumir_por_dia, resumo_vazio, somar_resumos
+
+# Colunas que identificam uma tarefa concluída; usadas para detectar linhas já ingeridas
+COLUNAS_CHAVE = ['NÚMERO DO PROTOCOLO', 'ID TAREFA', 'DATA DE CONCLUSÃO DA TAREFA']
+
+# Chave do SipHash da segunda impressão digital de cada linha (a primeira usa a chave padrão do pandas)
+CHAVE_HASH_SECUNDARIA = 'unimed-chave-2nd'
+
+ARQUIVO_MANIFESTO = 'manifesto.json'
+ARQUIVO_TRAVA = '.trava'
+
+# Índice de chaves dos datasets gravados antes de o manifesto apontar para o índice
+ARQUIVO_INDICE = 'indice_chaves.npy'
+
+# O índice de chaves é uma lista de trechos ordenados ('indices' no manifesto): cada ingestão grava
+# um trecho só com as chaves novas, e os trechos são abertos com mmap, de modo que a busca lê apenas
+# as páginas visitadas pela busca binária. Assim a ingestão custa o tamanho do lote (mais log do
+# histórico por chave), e não o do histórico. A compactação junta os trechos em um só.
+
+# Coluna usada para particionar o dataset por mês; linhas sem data vão para a partição 'desconhecido'
+COLUNA_PARTICAO = 'DATA DE CONCLUSÃO DA TAREFA'
+PARTICAO_SEM_DATA = 'desconhecido'
+
+# Quantidade de fragmentos a partir da qual a compactação em segundo plano é disparada
+LIMITE_FRAGMENTOS = int(os.getenv("UNIMED_LIMITE_FRAGMENTOS", "8"))
+
+_travas = {}
+_travas_lock = threading.Lock()
+_compactando = set()
+
+_log = logging.getLogger(__name__)
+
+
+def diretorio_dataset(usuario: str) -> str:
+    """
+    Diretório onde ficam os fragmentos parquet, o manifesto e o índice de chaves do usuário.
+    """
+    return f'dados_acumulados_{usuario}'
+
+
+def diretorio_sla(usuario: str) -> str:
+    """
+    Diretório do histórico de SLA do usuário, no mesmo formato do dataset de tarefas.
+    """
+    return f'sla_amil_{usuario}'
+
+
+class TravaDataset:
+    """
+    Trava de escrita de um dataset, com um único escritor por vez: exclui as sessões do processo
+    (threading.Lock) e os outros processos (flock em ARQUIVO_TRAVA). A trava de arquivo é
+    liberada pelo sistema se o processo morrer com ela.
+
+    Leitores não usam a trava: todo arquivo é publicado já completo (ver _gravar_atomico).
+    """
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self._lock = threading.Lock()
+        self._arquivo = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            self._arquivo = open(os.path.join(self.diretorio, ARQUIVO_TRAVA), 'a+b')
+            if fcntl is not None:
+                fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+            self._lock.release()
+            raise
+        return self
+
+    def __exit__(self, *excecao):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._arquivo.close()
+            self._arquivo = None
+            self._lock.release()
+
+
+def trava(diretorio: str) -> TravaDataset:
+    """
+    Trava de escrita do dataset, compartilhada pelas sessões do processo.
+    """
+    with _travas_lock:
+        chave = os.path.abspath(diretorio)
+        return _travas.setdefault(chave, TravaDataset(chave))
+
+
+def _sincronizar_diretorio(diretorio: str):
+    try:
+        descritor = os.open(diretorio, os.O_RDONLY)
+    except OSError:
+        # Sistemas sem fsync de diretório (Windows)
+        return
+    try:
+        os.fsync(descritor)
+    except OSError:
+        pass
+    finally:
+        os.close(descritor)
+
+
+def _gravar_atomico(caminho: str, escrever):
+    """
+    Grava com `escrever(arquivo)` em um temporário no mesmo diretório, força o conteúdo para o
+    disco e só então o publica com os.replace. Quem lê vê o arquivo antigo ou o novo completo,
+    nunca um pela metade, mesmo que o processo caia no meio da gravação.
+    """
+    temporario = f'{caminho}.{uuid.uuid4().hex}.tmp'
+    try:
+        with open(temporario, 'wb') as arquivo:
+            escrever(arquivo)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+    _sincronizar_diretorio(os.path.dirname(caminho) or '.')
+
+
+def existe_dataset(diretorio: str) -> bool:
+    return os.path.exists(os.path.join(diretorio, ARQUIVO_MANIFESTO))
+
+
+def ler_manifesto(diretorio: str) -> dict:
+    """
+    Lê o manifesto do dataset. Cada fragmento é descrito por um dicionário com o caminho
+    relativo ('arquivo'), a partição ('mes'), a quantidade de linhas e as datas mínima e máxima.
+
+    A configuração do dataset também fica no manifesto (ver criar_dataset): 'coluna_particao',
+    'colunas_chave' e 'com_resumo'. Manifestos sem ela são do dataset de tarefas.
+
+    Fragmentos gravados antes do particionamento (apenas o nome do arquivo) são devolvidos
+    com 'mes' igual a None e sempre entram na leitura.
+
+    A chave 'resumo' aponta para o arquivo do resumo diário correspondente a esses fragmentos;
+    datasets criados antes do resumo não a possuem. 'indices' lista os trechos do índice de chaves
+    (manifestos com um único 'indice' são convertidos).
+    """
+    caminho = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return {'fragmentos': []}
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        return normalizar_manifesto(json.load(arquivo))
+
+
+def normalizar_manifesto(manifesto: dict) -> dict:
+    manifesto['fragmentos'] = [
+        fragmento if isinstance(fragmento, dict)
+        else {'arquivo': fragmento, 'mes': None, 'linhas': None, 'data_min': None, 'data_max': None}
+        for fragmento in manifesto['fragmentos']
+    ]
+    if 'indice' in manifesto:
+        indice = manifesto.pop('indice')
+        manifesto.setdefault('indices', [indice] if indice is not None else [])
+    return manifesto
+
+
+def arquivos_do_manifesto(manifesto: dict) -> list:
+    """
+    Arquivos referenciados pelo manifesto: os fragmentos e, quando existem, o resumo diário e os
+    trechos do índice de chaves. Todos são imutáveis; uma escrita grava arquivos novos e publica o manifesto.
+    """
+    arquivos = [fragmento['arquivo'] for fragmento in manifesto['fragmentos']]
+    if manifesto.get('resumo') is not None:
+        arquivos.append(manifesto['resumo'])
+    arquivos.extend(manifesto.get('indices') or [])
+    return arquivos
+
+
+def gravar_manifesto(diretorio: str, manifesto: dict):
+    """
+    Publica a nova lista de fragmentos, incrementando o contador 'versao' do manifesto.
+    O manifesto é o ponto de confirmação de toda escrita: arquivos novos só passam a fazer
+    parte do dataset quando ele é publicado. Deve ser chamada com a trava de escrita.
+    """
+    manifesto['versao'] = manifesto.get('versao', 0) + 1
+    conteudo = json.dumps(manifesto, ensure_ascii=False, indent=2).encode('utf-8')
+    _gravar_atomico(os.path.join(diretorio, ARQUIVO_MANIFESTO), lambda arquivo: arquivo.write(conteudo))
+
+
+def criar_dataset(diretorio: str, coluna_particao: str = COLUNA_PARTICAO, colunas_chave: list = None, com_resumo: bool = True):
+    """
+    Cria o dataset vazio se ele ainda não existe; um dataset existente nunca é sobrescrito.
+
+    Parâmetros:
+        - coluna_particao: Coluna de data que define a partição mensal e o filtro de datas da leitura.
+        - colunas_chave: Colunas que identificam uma linha para a deduplicação (None usa COLUNAS_CHAVE,
+          com a normalização própria das tarefas; ver calcular_chaves).
+        - com_resumo: Se a ingestão mantém o resumo diário (só faz sentido para o dataset de tarefas).
+
+    A configuração fica gravada no manifesto e vale para todas as escritas e leituras seguintes.
+    """
+    if existe_dataset(diretorio):
+        return
+    with trava(diretorio):
+        if not existe_dataset(diretorio):
+            gravar_manifesto(diretorio, {
+                'fragmentos': [],
+                'coluna_particao': coluna_particao,
+                'colunas_chave': colunas_chave,
+                'com_resumo': com_resumo,
+            })
+
+
+def _configuracao(manifesto: dict) -> tuple:
+    return (
+        manifesto.get('coluna_particao') or COLUNA_PARTICAO,
+        manifesto.get('colunas_chave'),
+        manifesto.get('com_resumo', True),
+    )
+
+
+def versao_dataset(diretorio: str) -> int:
+    """
+    Contador de versões do dataset, incrementado a cada publicação do manifesto.
+    """
+    return ler_manifesto(diretorio).get('versao', 0)
+
+
+def assinatura_dataset(diretorio: str) -> tuple:
+    """
+    Identifica a versão atual do dataset (contador do manifesto e mtime), para uso em chaves de cache.
+    O mtime distingue manifestos gravados antes do contador.
+    """
+    estado = os.stat(os.path.join(diretorio, ARQUIVO_MANIFESTO))
+    return versao_dataset(diretorio), estado.st_mtime_ns
+
+
+def _limites(date_from=None, date_to=None) -> tuple:
+    """
+    Converte o intervalo de datas (inclusivo, por dia) em limites [inicio, fim) de Timestamp.
+    """
+    inicio = pd.Timestamp(date_from) if date_from is not None else None
+    fim = pd.Timestamp(date_to) + pd.Timedelta(days=1) if date_to is not None else None
+    return inicio, fim
+
+
+def selecionar_fragmentos(manifesto: dict, date_from=None, date_to=None) -> list:
+    """
+    Descarta, pelas estatísticas do manifesto, os fragmentos que não têm linhas no intervalo.
+    Sem intervalo, todos os fragmentos são mantidos.
+    """
+    inicio, fim = _limites(date_from, date_to)
+    if inicio is None and fim is None:
+        return list(manifesto['fragmentos'])
+
+    selecionados = []
+    for fragmento in manifesto['fragmentos']:
+        if fragmento['mes'] is None:
+            selecionados.append(fragmento)
+            continue
+        if fragmento['data_min'] is None:
+            continue
+        if inicio is not None and pd.Timestamp(fragmento['data_max']) < inicio:
+            continue
+        if fim is not None and pd.Timestamp(fragmento['data_min']) >= fim:
+            continue
+        selecionados.append(fragmento)
+    return selecionados
+
+
+def _ler_fragmento(caminho: str, date_from=None, date_to=None, columns=None, coluna_particao=COLUNA_PARTICAO) -> pd.DataFrame:
+    """
+    Lê um fragmento aplicando a projeção de colunas e o filtro de datas diretamente no leitor parquet.
+    """
+    esquema = pq.read_schema(caminho).names
+    colunas = [c for c in columns if c in esquema] if columns is not None else None
+
+    filtros = []
+    inicio, fim = _limites(date_from, date_to)
+    if coluna_particao in esquema:
+        if inicio is not None:
+            filtros.append((coluna_particao, '>=', inicio))
+        if fim is not None:
+            filtros.append((coluna_particao, '<', fim))
+
+    tabela = pq.read_table(caminho, columns=colunas, filters=filtros or None)
+    return tabela.to_pandas()
+
+
+def ler_dataset(diretorio: str, date_from=None, date_to=None, columns=None) -> pd.DataFrame:
+    """
+    Lê os fragmentos listados no manifesto e devolve um único DataFrame.
+
+    Parâmetros:
+        - date_from, date_to: Intervalo (inclusivo) da coluna de partição (data de conclusão, no
+          dataset de tarefas). Apenas as partições mensais que cruzam o intervalo são abertas,
+          e as linhas fora dele são descartadas na leitura.
+        - columns: Lista de colunas a carregar; colunas inexistentes são ignoradas.
+
+    Se uma compactação remover um fragmento durante a leitura, o manifesto é relido.
+    """
+    for tentativa in range(3):
+        manifesto = ler_manifesto(diretorio)
+        coluna_particao = _configuracao(manifesto)[0]
+        try:
+            partes = [
+                _ler_fragmento(os.path.join(diretorio, fragmento['arquivo']), date_from, date_to, columns, coluna_particao)
+                for fragmento in selecionar_fragmentos(manifesto, date_from, date_to)
+            ]
+            break
+        except FileNotFoundError:
+            if tentativa == 2:
+                raise
+
+    if not partes:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(partes, ignore_index=True)
+
+
+def intervalo_datas(diretorio: str) -> tuple:
+    """
+    Datas mínima e máxima da coluna de partição (data de conclusão, no dataset de tarefas),
+    obtidas do manifesto sem ler os dados. Retorna (None, None) quando não há datas.
+    """
+    manifesto = ler_manifesto(diretorio)
+    coluna_particao = _configuracao(manifesto)[0]
+    minimos, maximos = [], []
+    for fragmento in manifesto['fragmentos']:
+        if fragmento['mes'] is None:
+            datas = _ler_fragmento(os.path.join(diretorio, fragmento['arquivo']), columns=[coluna_particao], coluna_particao=coluna_particao)
+            fragmento = {**fragmento, **_estatisticas(datas, coluna_particao)}
+        if fragmento['data_min'] is not None:
+            minimos.append(pd.Timestamp(fragmento['data_min']))
+            maximos.append(pd.Timestamp(fragmento['data_max']))
+
+    if not minimos:
+        return None, None
+    return min(minimos), max(maximos)
+
+
+def _normalizar_chaves(df: pd.DataFrame, colunas: list = None) -> pd.DataFrame:
+    """
+    Valores que identificam cada linha, normalizados para que a mesma linha vinda de planilhas
+    diferentes seja sempre igual: protocolo como texto e ID da tarefa como número (COLUNAS_CHAVE)
+    ou, com colunas dadas, datas e durações como tais e os demais valores como texto (123, 123.0
+    e '123' são iguais; vazios viram ''). Datas e durações vão para nanossegundos, já que a
+    unidade lida varia entre planilhas e parquet.
+    """
+    chaves = pd.DataFrame(index=df.index)
+    if colunas is None:
+        chaves['protocolo'] = df['NÚMERO DO PROTOCOLO'].astype(str).str.strip() if 'NÚMERO DO PROTOCOLO' in df.columns else ''
+        chaves['id_tarefa'] = pd.to_numeric(df['ID TAREFA'], errors='coerce').astype('float64') if 'ID TAREFA' in df.columns else np.nan
+        chaves['conclusao'] = _em_nanossegundos(df['DATA DE CONCLUSÃO DA TAREFA']) if 'DATA DE CONCLUSÃO DA TAREFA' in df.columns else pd.NaT
+        return chaves
+
+    for coluna in colunas:
+        serie = df[coluna] if coluna in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if pd.api.types.is_datetime64_any_dtype(serie) or pd.api.types.is_timedelta64_dtype(serie):
+            chaves[coluna] = _em_nanossegundos(serie)
+        else:
+            texto = serie.astype(object).where(serie.notna(), '').astype(str).str.strip()
+            chaves[coluna] = texto.str.replace(r'\.0$', '', regex=True)
+    return chaves
+
+
+def _em_nanossegundos(serie: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(serie) and getattr(serie.dt, 'tz', None) is None:
+        return serie.astype('datetime64[ns]')
+    if pd.api.types.is_timedelta64_dtype(serie):
+        return serie.astype('timedelta64[ns]')
+    return serie
+
+
+def calcular_chaves(df: pd.DataFrame, colunas: list = None) -> np.ndarray:
+    """
+    Calcula duas impressões digitais independentes de 64 bits por linha (array n x 2 de uint64),
+    a partir de COLUNAS_CHAVE ou das colunas dadas, já normalizadas (ver _normalizar_chaves).
+
+    A primeira é a usada na busca no índice; a segunda separa as linhas distintas que colidem na
+    primeira, de modo que uma colisão nunca descarta uma linha nova.
+    """
+    return _impressoes(_normalizar_chaves(df, colunas))
+
+
+def _impressoes(normalizadas: pd.DataFrame) -> np.ndarray:
+    if not len(normalizadas):
+        return np.empty((0, 2), dtype=np.uint64)
+    return np.column_stack([
+        pd.util.hash_pandas_object(normalizadas, index=False).to_numpy(dtype=np.uint64),
+        pd.util.hash_pandas_object(normalizadas, index=False, hash_key=CHAVE_HASH_SECUNDARIA).to_numpy(dtype=np.uint64),
+    ])
+
+
+def ordenar_chaves(chaves: np.ndarray) -> np.ndarray:
+    return chaves[np.lexsort((chaves[:, 1], chaves[:, 0]))]
+
+
+def carregar_indices(diretorio: str, manifesto: dict) -> tuple:
+    """
+    Abre (com mmap, sem ler os dados) os trechos ordenados do índice com as chaves (pares de
+    impressões digitais) de todas as linhas já gravadas.
+
+    Retorna (indices, refeito). Índices gravados antes da segunda impressão digital (uma chave
+    por linha), ou ausentes, são refeitos a partir dos fragmentos em um único trecho; `refeito`
+    indica que ele precisa ser publicado mesmo que o lote não traga linhas novas.
+    """
+    nomes = manifesto.get('indices') or []
+    if not nomes and os.path.exists(os.path.join(diretorio, ARQUIVO_INDICE)):
+        nomes = [ARQUIVO_INDICE]
+    indices = [np.load(os.path.join(diretorio, nome), mmap_mode='r') for nome in nomes]
+    if all(indice.ndim == 2 for indice in indices) and (sum(len(indice) for indice in indices) or not manifesto['fragmentos']):
+        return indices, False
+    return [_reconstruir_indice(diretorio, manifesto)], True
+
+
+def _reconstruir_indice(diretorio: str, manifesto: dict) -> np.ndarray:
+    coluna_particao, colunas_chave, _ = _configuracao(manifesto)
+    colunas = colunas_chave if colunas_chave is not None else COLUNAS_CHAVE
+    partes = [
+        calcular_chaves(
+            _ler_fragmento(os.path.join(diretorio, fragmento['arquivo']), columns=colunas, coluna_particao=coluna_particao),
+            colunas_chave
+        )
+        for fragmento in manifesto['fragmentos']
+    ]
+    if not partes:
+        return np.empty((0, 2), dtype=np.uint64)
+    return ordenar_chaves(np.concatenate(partes))
+
+
+def gravar_indice(diretorio: str, indice: np.ndarray) -> str:
+    """
+    Grava um trecho do índice em um arquivo novo e devolve seu nome, que só passa a valer quando
+    for publicado no manifesto junto com os fragmentos correspondentes.
+
+    O trecho é gravado coluna a coluna (ordem Fortran): a primeira impressão digital fica contígua
+    no arquivo e a busca binária sobre o mmap não precisa copiá-la.
+    """
+    arquivo = f"indice_chaves-{uuid.uuid4().hex[:12]}.npy"
+    _gravar_atomico(os.path.join(diretorio, arquivo), lambda saida: np.save(saida, np.asfortranarray(indice)))
+    return arquivo
+
+
+def _no_indice(chaves: np.ndarray, indice: np.ndarray) -> np.ndarray:
+    ja_existe = np.zeros(len(chaves), dtype=bool)
+    if not len(indice) or not len(chaves):
+        return ja_existe
+    primeiras = indice[:, 0]
+    esquerda = np.searchsorted(primeiras, chaves[:, 0], side='left')
+    direita = np.searchsorted(primeiras, chaves[:, 0], side='right')
+    unicas = (direita - esquerda) == 1
+    ja_existe[unicas] = indice[esquerda[unicas], 1] == chaves[unicas, 1]
+    # Mais de uma linha gravada com a mesma primeira impressão (colisão): confere a segunda em todas
+    for posicao in np.flatnonzero((direita - esquerda) > 1):
+        ja_existe[posicao] = (indice[esquerda[posicao]:direita[posicao], 1] == chaves[posicao, 1]).any()
+    return ja_existe
+
+
+def filtrar_novas(chaves: np.ndarray, indices: list, normalizadas: pd.DataFrame = None) -> np.ndarray:
+    """
+    Máscara das linhas cuja chave ainda não está em nenhum dos trechos do índice nem se repete
+    dentro do próprio lote.
+
+    A busca em cada trecho ordenado é binária pela primeira impressão digital, e a segunda
+    confirma o par; o custo é O(m log n) para m chaves do lote e n do histórico. Dentro do lote,
+    as repetições apontadas pelas impressões são confirmadas valor a valor em `normalizadas`
+    (ver _normalizar_chaves), quando dado.
+    """
+    ja_existe = np.zeros(len(chaves), dtype=bool)
+    for indice in indices:
+        ja_existe |= _no_indice(chaves, indice)
+
+    repetida_no_lote = pd.DataFrame(chaves).duplicated(keep='first').to_numpy()
+    if normalizadas is not None and repetida_no_lote.any():
+        repetida_no_lote = normalizadas.duplicated(keep='first').to_numpy()
+    return ~ja_existe & ~repetida_no_lote
+
+
+def _nome_fragmento() -> str:
+    return f"part-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+
+
+def _particoes(df: pd.DataFrame, coluna_particao=COLUNA_PARTICAO) -> pd.Series:
+    """
+    Partição mensal ('YYYY-MM') de cada linha, pela coluna de partição (data de conclusão, no dataset de tarefas).
+    """
+    if coluna_particao not in df.columns:
+        return pd.Series(PARTICAO_SEM_DATA, index=df.index)
+    datas = pd.to_datetime(df[coluna_particao], errors='coerce')
+    return datas.dt.strftime('%Y-%m').fillna(PARTICAO_SEM_DATA)
+
+
+def _estatisticas(df: pd.DataFrame, coluna_particao=COLUNA_PARTICAO) -> dict:
+    if coluna_particao not in df.columns:
+        return {'data_min': None, 'data_max': None}
+    datas = pd.to_datetime(df[coluna_particao], errors='coerce')
+    if datas.notna().any():
+        return {'data_min': datas.min().isoformat(), 'data_max': datas.max().isoformat()}
+    return {'data_min': None, 'data_max': None}
+
+
+def _gravar_fragmento(diretorio: str, mes: str, df: pd.DataFrame, coluna_particao=COLUNA_PARTICAO) -> dict:
+    """
+    Grava um fragmento dentro da pasta da partição (mes=YYYY-MM) e devolve sua entrada no manifesto.
+    """
+    pasta = f'mes={mes}'
+    os.makedirs(os.path.join(diretorio, pasta), exist_ok=True)
+    arquivo = f'{pasta}/{_nome_fragmento()}'
+    _gravar_atomico(os.path.join(diretorio, arquivo), lambda saida: df.to_parquet(saida, index=False))
+    return {'arquivo': arquivo, 'mes': mes, 'linhas': len(df), **_estatisticas(df, coluna_particao)}
+
+
+def anexar_linhas(diretorio: str, df: pd.DataFrame) -> dict:
+    """
+    Grava apenas as linhas inéditas do lote, com um novo fragmento parquet por mês da coluna de partição.
+
+    Retorna um dicionário com a quantidade de linhas novas, de duplicadas e a lista de
+    fragmentos criados (vazia quando nada foi gravado).
+    """
+    return anexar_blocos(diretorio, [df])
+
+
+def anexar_blocos(diretorio: str, blocos) -> dict:
+    """
+    Como anexar_linhas, para um lote que chega em blocos (ex.: uma planilha lida aos poucos, ver
+    planilha.ler_xlsx_em_blocos). Cada bloco é deduplicado contra os trechos do índice e as chaves
+    novas dos blocos anteriores, e gravado em fragmentos antes de o próximo ser lido; assim a
+    memória usada é a de um bloco mais as chaves novas do lote, qualquer que seja o histórico.
+    As chaves novas do lote viram um único trecho do índice, gravado uma vez por lote.
+
+    Todos os blocos passam a valer juntos, em uma única publicação do manifesto: um erro no meio
+    do lote descarta os fragmentos já gravados e o dataset fica como estava.
+    """
+    criar_dataset(diretorio)
+    coluna_particao, colunas_chave, com_resumo = _configuracao(ler_manifesto(diretorio))
+    resultado = {'novas': 0, 'duplicadas': 0, 'fragmentos': []}
+
+    with trava(diretorio):
+        manifesto = ler_manifesto(diretorio)
+        indices, refeito = carregar_indices(diretorio, manifesto)
+
+        # Fragmentos, resumo e índice são gravados em arquivos novos e só passam a valer juntos,
+        # na publicação do manifesto; se o processo cair antes dela, o dataset fica como estava
+        criados, chaves_lote, resumo_lote = [], [], None
+        try:
+            for df in blocos:
+                normalizadas = _normalizar_chaves(df, colunas_chave)
+                chaves = _impressoes(normalizadas)
+                mascara = filtrar_novas(chaves, indices + chaves_lote, normalizadas)
+                novas = df[mascara]
+
+                resultado['novas'] += int(mascara.sum())
+                resultado['duplicadas'] += int((~mascara).sum())
+                if novas.empty:
+                    continue
+
+                criados.extend(
+                    _gravar_fragmento(diretorio, mes, grupo, coluna_particao)
+                    for mes, grupo in novas.groupby(_particoes(novas, coluna_particao), sort=True)
+                )
+                chaves_lote.append(ordenar_chaves(chaves[mascara]))
+                if com_resumo:
+                    resumo_bloco = resumir_por_dia(novas)
+                    resumo_lote = resumo_bloco if resumo_lote is None else somar_resumos([resumo_lote, resumo_bloco])
+        except BaseException:
+            for fragmento in criados:
+                _remover_arquivo(diretorio, fragmento['arquivo'])
+            raise
+
+        if not criados and not refeito:
+            return resultado
+
+        indices_antigos = []
+        if refeito:
+            indices_antigos = (manifesto.get('indices') or []) + [ARQUIVO_INDICE]
+            manifesto['indices'] = [gravar_indice(diretorio, indices[0])]
+        elif not manifesto.get('indices') and os.path.exists(os.path.join(diretorio, ARQUIVO_INDICE)):
+            # Índice anterior à referência no manifesto: passa a ser o primeiro trecho
+            manifesto['indices'] = [ARQUIVO_INDICE]
+        if chaves_lote:
+            manifesto['indices'] = (manifesto.get('indices') or []) + [gravar_indice(diretorio, ordenar_chaves(np.concatenate(chaves_lote)))]
+
+        resumo_antigo = manifesto.get('resumo')
+        if com_resumo and resumo_lote is not None:
+            if resumo_antigo is not None:
+                anterior = _ler_arquivo_resumo(diretorio, resumo_antigo)
+            else:
+                anterior = _resumir_fragmentos(diretorio, manifesto['fragmentos'])
+            manifesto['resumo'] = _gravar_resumo(diretorio, somar_resumos([anterior, resumo_lote]))
+        else:
+            resumo_antigo = None
+        manifesto['fragmentos'].extend(criados)
+        gravar_manifesto(diretorio, manifesto)
+
+        resultado['fragmentos'] = [fragmento['arquivo'] for fragmento in criados]
+
+    _remover_arquivo(diretorio, resumo_antigo)
+    for antigo in indices_antigos:
+        _remover_arquivo(diretorio, antigo)
+
+    if len(manifesto['fragmentos']) >= LIMITE_FRAGMENTOS or len(manifesto['indices']) >= LIMITE_FRAGMENTOS:
+        agendar_compactacao(diretorio)
+
+    return resultado
+
+
+def compactar(diretorio: str):
+    """
+    Junta os fragmentos de cada partição mensal em um único arquivo e os trechos do índice de
+    chaves em um único trecho, e remove os antigos. Fragmentos anteriores ao particionamento são
+    redistribuídos nas partições mensais.
+    """
+    with trava(diretorio):
+        manifesto = ler_manifesto(diretorio)
+        _remover_orfaos(diretorio, manifesto)
+        # Uma falha nos fragmentos não impede a junção do índice; é relançada após a publicação
+        erro = None
+        try:
+            antigos = _compactar_fragmentos(diretorio, manifesto)
+        except Exception as e:
+            erro, antigos = e, []
+
+        indices = manifesto.get('indices') or []
+        if len(indices) > 1:
+            partes = [np.load(os.path.join(diretorio, nome), mmap_mode='r') for nome in indices]
+            manifesto['indices'] = [gravar_indice(diretorio, ordenar_chaves(np.concatenate(partes)))]
+            del partes
+            antigos.extend(indices)
+
+        if antigos:
+            gravar_manifesto(diretorio, manifesto)
+
+    for antigo in antigos:
+        _remover_arquivo(diretorio, antigo)
+    if erro is not None:
+        raise erro
+
+
+def _compactar_fragmentos(diretorio: str, manifesto: dict) -> list:
+    """
+    Regrava os fragmentos das partições com mais de um arquivo e atualiza a lista do manifesto
+    (sem publicá-lo). Devolve os arquivos substituídos, a remover após a publicação.
+    """
+    coluna_particao = _configuracao(manifesto)[0]
+    por_mes = {}
+    for fragmento in manifesto['fragmentos']:
+        por_mes.setdefault(fragmento['mes'], []).append(fragmento)
+
+    if None not in por_mes and all(len(fragmentos) < 2 for fragmentos in por_mes.values()):
+        return []
+
+    mantidos, antigos, novas_partes = [], [], {}
+    for mes, fragmentos in por_mes.items():
+        if mes is not None and len(fragmentos) < 2:
+            mantidos.extend(fragmentos)
+            continue
+        for fragmento in fragmentos:
+            df = pd.read_parquet(os.path.join(diretorio, fragmento['arquivo']))
+            for mes_linha, grupo in df.groupby(_particoes(df, coluna_particao), sort=False):
+                novas_partes.setdefault(mes_linha, []).append(grupo)
+            antigos.append(fragmento['arquivo'])
+
+    # Partições mantidas que recebem linhas redistribuídas também são regravadas
+    for fragmento in list(mantidos):
+        if fragmento['mes'] in novas_partes:
+            novas_partes[fragmento['mes']].insert(0, pd.read_parquet(os.path.join(diretorio, fragmento['arquivo'])))
+            antigos.append(fragmento['arquivo'])
+            mantidos.remove(fragmento)
+
+    criados = [
+        _gravar_fragmento(diretorio, mes, unificar_tipos(pd.concat(partes, ignore_index=True)), coluna_particao)
+        for mes, partes in sorted(novas_partes.items())
+    ]
+
+    manifesto['fragmentos'] = sorted(mantidos + criados, key=lambda f: f['arquivo'])
+    return antigos
+
+
+def unificar_tipos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Passa para texto as colunas de texto com valores de outros tipos misturados (ex.: a mesma
+    coluna gravada como número em um fragmento e como texto em outro, juntados por pd.concat);
+    o Parquet exige um tipo por coluna. Nulos continuam nulos.
+    """
+    for coluna in df.columns:
+        if df[coluna].dtype == object and pd.api.types.infer_dtype(df[coluna], skipna=True) not in ('string', 'empty'):
+            df[coluna] = df[coluna].where(df[coluna].isna(), df[coluna].astype(str))
+    return df
+
+
+def agendar_compactacao(diretorio: str):
+    """
+    Dispara a compactação em uma thread de segundo plano, sem bloquear a ingestão.
+    """
+    chave = os.path.abspath(diretorio)
+    with _travas_lock:
+        if chave in _compactando:
+            return
+        _compactando.add(chave)
+
+    def executar():
+        try:
+            compactar(diretorio)
+        except Exception:
+            # Sem quem a receba na thread: fica no log, e a próxima ingestão tenta de novo
+            _log.exception('Falha na compactação de %s', diretorio)
+        finally:
+            with _travas_lock:
+                _compactando.discard(chave)
+
+    threading.Thread(target=executar, name=f'compactacao-{os.path.basename(diretorio)}', daemon=True).start()
+
+
+def _remover_orfaos(diretorio: str, manifesto: dict):
+    """
+    Remove temporários e arquivos de dados que o manifesto não referencia, deixados por uma
+    escrita interrompida antes da publicação. Deve ser chamada com a trava de escrita.
+    """
+    referenciados = set(arquivos_do_manifesto(manifesto)) | {ARQUIVO_MANIFESTO, ARQUIVO_TRAVA}
+    if not manifesto.get('indices'):
+        referenciados.add(ARQUIVO_INDICE)
+    for raiz, _, arquivos in os.walk(diretorio):
+        for nome in arquivos:
+            relativo = os.path.relpath(os.path.join(raiz, nome), diretorio).replace(os.sep, '/')
+            if relativo not in referenciados and nome.endswith(('.tmp', '.parquet', '.npy')):
+                _remover_arquivo(diretorio, relativo)
+
+
+def _remover_arquivo(diretorio: str, arquivo):
+    if arquivo is None:
+        return
+    try:
+        os.remove(os.path.join(diretorio, arquivo))
+    except OSError:
+        pass
+
+
+def _gravar_resumo(diretorio: str, resumo: pd.DataFrame) -> str:
+    """
+    Grava o resumo diário em um arquivo novo (nunca sobrescreve o atual) e devolve seu nome,
+    que só passa a valer quando for publicado no manifesto.
+    """
+    arquivo = f"resumo_diario-{uuid.uuid4().hex[:12]}.parquet"
+    _gravar_atomico(os.path.join(diretorio, arquivo), lambda saida: resumo.to_parquet(saida, index=False))
+    return arquivo
+
+
+def _ler_arquivo_resumo(diretorio: str, arquivo: str, date_from=None, date_to=None) -> pd.DataFrame:
+    filtros = []
+    inicio, fim = _limites(date_from, date_to)
+    if inicio is not None:
+        filtros.append(('Dia', '>=', inicio))
+    if fim is not None:
+        filtros.append(('Dia', '<', fim))
+    return pq.read_table(os.path.join(diretorio, arquivo), filters=filtros or None).to_pandas()
+
+
+def _resumir_fragmentos(diretorio: str, fragmentos: list) -> pd.DataFrame:
+    """
+    Monta o resumo diário a partir dos fragmentos, lendo só as colunas que ele usa.
+    """
+    return somar_resumos([
+        resumir_por_dia(_ler_fragmento(os.path.join(diretorio, fragmento['arquivo']), columns=COLUNAS_ORIGEM_RESUMO))
+        for fragmento in fragmentos
+    ])
+
+
+def garantir_resumo(diretorio: str):
+    """
+    Cria o resumo diário de datasets gravados antes da existência dele, a partir dos fragmentos.
+    """
+    with trava(diretorio):
+        manifesto = ler_manifesto(diretorio)
+        if manifesto.get('resumo') is not None:
+            return
+        manifesto['resumo'] = _gravar_resumo(diretorio, _resumir_fragmentos(diretorio, manifesto['fragmentos']))
+        gravar_manifesto(diretorio, manifesto)
+
+
+def ler_resumo(diretorio: str, date_from=None, date_to=None) -> pd.DataFrame:
+    """
+    Lê o resumo diário (analista x dia x fila x finalização x situação) mantido na ingestão.
+
+    Parâmetros:
+        - date_from, date_to: Intervalo (inclusivo) de dias; o filtro é aplicado na leitura do parquet.
+
+    Se o resumo for substituído por uma ingestão durante a leitura, o manifesto é relido.
+    """
+    for tentativa in range(3):
+        manifesto = ler_manifesto(diretorio)
+        if manifesto.get('resumo') is None:
+            if not manifesto['fragmentos']:
+                return resumo_vazio()
+            garantir_resumo(diretorio)
+            manifesto = ler_manifesto(diretorio)
+        try:
+            return _ler_arquivo_resumo(diretorio, manifesto['resumo'], date_from, date_to)
+        except FileNotFoundError:
+            if tentativa == 2:
+                raise
@@ -0,0 +1,92 @@
+"""
+Compara as agregações com lambdas por grupo (implementação anterior) com a contagem
+vetorizada de contar_por_grupo, verificando que os resultados são idênticos.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_contagens [n_linhas]
+"""
+import sys
+
+import pandas as pd
+
+from Unimed.metricas import (
+    calcular_producao_agrupada,
+    calcular_producao_email_detalhada,
+    calcular_tabela_ranking,
+    calcular_tmo,
+)
+from benchmarks.dados_sinteticos import gerar_historico
+from benchmarks.medicao import comparar, sem_categorias
+
+
+# Implementações anteriores, mantidas apenas como referência de resultado e de tempo
+
+def ranking_antes(df_total, selected_users):
+    df_filtered = df_total[df_total['USUÁRIO QUE CONCLUIU A TAREFA'].isin(selected_users)]
+    df_ranking = df_filtered.groupby('USUÁRIO QUE CONCLUIU A TAREFA', observed=True).agg(
+        Finalizado=('FINALIZAÇÃO', lambda x: x[x == 'CADASTRADO'].count()),
+        Distribuido=('FINALIZAÇÃO', lambda x: x[x == 'REALIZADO'].count()),
+        Atualizado=('FINALIZAÇÃO', lambda x: x[x == 'ATUALIZADO'].count())
+    ).reset_index()
+    df_ranking['Total'] = df_ranking['Finalizado'] + df_ranking['Distribuido'] + df_ranking['Atualizado']
+    return df_ranking.sort_values(by='Total', ascending=False).reset_index(drop=True)
+
+
+def tmo_antes(df):
+    df_finalizados = df[df['SITUAÇÃO DA TAREFA'].isin(['Finalizada', 'Cancelada'])].copy()
+    df_finalizados['TEMPO_MÉDIO_MINUTOS'] = df_finalizados['TEMPO MÉDIO OPERACIONAL'].dt.total_seconds() / 60
+    df_finalizados = df_finalizados[~((df_finalizados['FILA'] == 'DÚVIDA') & (df_finalizados['TEMPO_MÉDIO_MINUTOS'] > 60))]
+    df_tmo_analista = df_finalizados.groupby('USUÁRIO QUE CONCLUIU A TAREFA', observed=True).agg(
+        Tempo_Total=('TEMPO MÉDIO OPERACIONAL', lambda x: x[df_finalizados['FINALIZAÇÃO'] == 'CADASTRADO'].sum()),
+        Total_Tarefas=('FINALIZAÇÃO', lambda x: x[x == 'CADASTRADO'].count())
+    ).reset_index()
+    df_tmo_analista['TMO'] = df_tmo_analista['Tempo_Total'] / df_tmo_analista['Total_Tarefas']
+    return df_tmo_analista[['USUÁRIO QUE CONCLUIU A TAREFA', 'TMO']]
+
+
+def _contagem_antes(df, chave):
+    return df.groupby(chave, observed=True).agg(
+        Quantidade=('FILA', 'size'),
+        Cadastrado=('FINALIZAÇÃO', lambda x: (x == 'CADASTRADO').sum()),
+        Atualizado=('FINALIZAÇÃO', lambda x: (x == 'ATUALIZADO').sum()),
+        Fora_do_Escopo=('FINALIZAÇÃO', lambda x: ((x != 'CADASTRADO') & (x != 'ATUALIZADO')).sum())
+    ).reset_index()
+
+
+def producao_agrupada_antes(df):
+    grupos = {
+        'CAPTURA ANTECIPADA': [' CADASTRO ROBÔ', 'INCIDENTE PROCESSUAL', 'CADASTRO ANS'],
+        'SHAREPOINT': ['CADASTRO SHAREPOINT', 'ATUALIZAÇÃO - SHAREPOINT'],
+        'CITAÇÃO ELETRÔNICA': ['CADASTRO CITAÇÃO ELETRÔNICA', 'ATUALIZAÇÃO CITAÇÃO ELETRÔNICA'],
+        'E-MAIL': ['CADASTRO E-MAIL', 'OFICIOS E-MAIL', 'CADASTRO DE ÓRGÃOS E OFÍCIOS'],
+        'PRE CADASTRO E DIJUR': ['PRE CADASTRO E DIJUR']
+    }
+    df['GRUPO'] = df['FILA'].map(lambda x: next((k for k, v in grupos.items() if x in v), 'OUTROS'))
+    return _contagem_antes(df, 'GRUPO').drop(columns='Quantidade')
+
+
+def producao_email_antes(df):
+    df_email = df[df['FILA'].isin(['CADASTRO E-MAIL', 'OFICIOS', 'CADASTRO DE ÓRGÃOS E OFÍCIOS'])]
+    df_cadastro_email = df_email[df_email['FILA'] == 'CADASTRO E-MAIL']
+    df_outros_email = df_email[df_email['FILA'].isin(['OFICIOS', 'CADASTRO DE ÓRGÃOS E OFÍCIOS'])]
+    return pd.concat([
+        _contagem_antes(df_cadastro_email, 'TAREFA'),
+        _contagem_antes(df_outros_email, 'FILA').rename(columns={'FILA': 'TAREFA'})
+    ], ignore_index=True)
+
+
+def main(n_linhas=1_000_000):
+    for n_analistas in (40, 400):
+        df = gerar_historico(n_linhas, n_analistas=n_analistas)
+        analistas = list(df['USUÁRIO QUE CONCLUIU A TAREFA'].cat.categories)
+        print(f'\n{n_linhas:,} linhas, {n_analistas} analistas')
+        print(f'{"função":<36} {"antes":>10} {"depois":>10} {"ganho":>9}')
+
+        comparar('calcular_tabela_ranking', ranking_antes, lambda d, u: calcular_tabela_ranking(d, u).reset_index(drop=True), df, analistas, normalizar=sem_categorias)
+        comparar('calcular_tmo', tmo_antes, lambda d: calcular_tmo(d)[['USUÁRIO QUE CONCLUIU A TAREFA', 'TMO']], df, normalizar=sem_categorias)
+        comparar('calcular_producao_agrupada', producao_agrupada_antes, calcular_producao_agrupada, df.copy(), normalizar=sem_categorias)
+        comparar('calcular_producao_email_detalhada', producao_email_antes, calcular_producao_email_detalhada, df, normalizar=sem_categorias)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
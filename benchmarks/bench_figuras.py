@@ -0,0 +1,68 @@
+"""
+Mede a montagem das figuras do dashboard com o cache de figuras frio (plotly.express e validação)
+e quente (figura remontada do JSON guardado), verificando que as especificações são idênticas.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_figuras [n_linhas]
+"""
+import json
+import sys
+import time
+
+import plotly.io as pio
+
+from Unimed.cache import cache_figuras
+from Unimed.charts import (
+    _figura_pizza,
+    _figura_produtividade_diaria,
+    _figura_quantidade_por_dia,
+    _figura_tmo_analista,
+    _figura_tmo_diario,
+)
+from Unimed.formatacao import formatar_hms
+from Unimed.metricas import calcular_produtividade_diaria, calcular_tmo, calcular_tmo_por_dia
+from Unimed.resumo import resumir_por_dia
+from benchmarks.dados_sinteticos import gerar_historico
+
+CORES = ['#00985c', '#007f4d', '#00b272', '#006645', '#33cc99', '#004d36']
+
+
+def figuras(resumo, df):
+    # As figuras de um rerun da Visão Geral, a partir dos mesmos dados agregados
+    produtividade = calcular_produtividade_diaria(resumo)
+    tmo_dia = calcular_tmo_por_dia(resumo).dropna(subset=['TMO'])
+    tmo_dia['TMO_Formatado'] = formatar_hms(tmo_dia['TMO'])
+    tmo_analista = calcular_tmo(df)
+    tmo_analista['TMO_Formatado'] = formatar_hms(tmo_analista['TMO'])
+    return [
+        (_figura_produtividade_diaria, (produtividade, CORES, 'Total de Cadastros', 'Total de Cadastros')),
+        (_figura_tmo_diario, (tmo_dia, CORES)),
+        (_figura_tmo_analista, (tmo_analista[['USUÁRIO QUE CONCLUIU A TAREFA', 'TMO', 'TMO_Formatado']], CORES)),
+        (_figura_quantidade_por_dia, (produtividade.rename(columns={'Produtividade': 'Quantidade'})[['Dia', 'Quantidade']], CORES, 'D')),
+        (_figura_pizza, (['Subsídio Parcial', 'Fora do Escopo', 'Subsídio Completo'], [10, 20, 30], CORES, 'Tarefas %{label} = %{value}<extra></extra>')),
+    ]
+
+
+def cronometrar(casos):
+    inicio = time.perf_counter()
+    especificacoes = [json.loads(pio.to_json(montar(*argumentos), validate=False)) for montar, argumentos in casos]
+    return time.perf_counter() - inicio, especificacoes
+
+
+def main(n_linhas=200_000):
+    df = gerar_historico(n_linhas)
+    casos = figuras(resumir_por_dia(df), df)
+
+    cache_figuras.limpar()
+    tempo_frio, esperadas = cronometrar(casos)
+    tempo_quente, obtidas = cronometrar(casos)
+    assert esperadas == obtidas
+
+    print(f'\n{n_linhas:,} linhas, {len(casos)} figuras')
+    print(f'{"cache frio (plotly.express)":<28} {tempo_frio:>9.3f}s')
+    print(f'{"cache quente":<28} {tempo_quente:>9.3f}s {tempo_frio / tempo_quente:>8.0f}x')
+    print(f'estatísticas: {cache_figuras.estatisticas()}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,61 @@
+"""
+Compara os formatadores de duração aplicados linha a linha (implementação anterior) com os
+formatadores vetorizados de Unimed.formatacao, verificando que os textos são idênticos.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_formatacao [n_linhas]
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from Unimed.formatacao import formatar_hms, formatar_min_seg, formatar_minutos
+from benchmarks.medicao import comparar
+
+
+# Implementações anteriores, mantidas apenas como referência de resultado e de tempo
+
+def hms_antes(td):
+    if pd.isnull(td):
+        return "00:00:00"
+    total_seconds = int(td.total_seconds())
+    hours, remainder = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def min_seg_antes(td):
+    if pd.isnull(td):
+        return "0 min"
+    total_seconds = int(td.total_seconds())
+    minutes, seconds = divmod(total_seconds, 60)
+    return f"{minutes} min {seconds}s"
+
+
+def minutos_antes(minutes):
+    if minutes >= 60:
+        hours = int(minutes // 60)
+        minutes_remainder = int(minutes % 60)
+        seconds = (minutes - hours * 60 - minutes_remainder) * 60
+        return f"{hours}h {minutes_remainder}m {round(seconds)}s"
+    minutes_int = int(minutes)
+    seconds = (minutes - minutes_int) * 60
+    return f"{minutes_int} min {round(seconds)}s"
+
+
+def main(n_linhas=1_000_000):
+    rng = np.random.default_rng(0)
+    duracoes = pd.Series(pd.to_timedelta(rng.gamma(2.0, 240.0, n_linhas), unit='s'))
+    duracoes[rng.random(n_linhas) < 0.05] = pd.NaT
+    minutos = pd.Series(rng.gamma(2.0, 20.0, n_linhas))
+
+    print(f'\n{n_linhas:,} linhas')
+    print(f'{"função":<20} {"antes":>10} {"depois":>10} {"ganho":>9}')
+    comparar('formatar_hms', lambda v: v.apply(hms_antes), formatar_hms, duracoes, largura=20)
+    comparar('formatar_min_seg', lambda v: v.apply(min_seg_antes), formatar_min_seg, duracoes, largura=20)
+    comparar('formatar_minutos', lambda v: v.apply(minutos_antes), formatar_minutos, minutos, largura=20)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
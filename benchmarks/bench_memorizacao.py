@@ -0,0 +1,75 @@
+"""
+Mede o custo de um rerun do dashboard com o cache de cálculos frio (primeira sessão) e quente
+(reruns e outras sessões sobre a mesma versão dos dados), verificando que os resultados são idênticos.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_memorizacao [n_linhas]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from Unimed.cache import cache_calculos, congelar_dataframe, marcar_versao
+from Unimed.metricas import (
+    calcular_tabela_ranking,
+    calcular_tempo_ocioso_por_analista,
+    calcular_tmo,
+    calcular_tmo_equipe_atualizado,
+    calcular_tmo_equipe_cadastro,
+    calcular_tmo_por_carteira,
+    filtrar_analista,
+)
+from benchmarks.dados_sinteticos import gerar_historico
+
+
+def rerun(df_total, analista):
+    # Os mesmos cálculos que um rerun da Visão Geral + Métricas Individuais dispara
+    usuarios = df_total['USUÁRIO QUE CONCLUIU A TAREFA'].cat.categories
+    df_analista = filtrar_analista(df_total, analista)
+    return [
+        calcular_tmo_por_carteira(df_total),
+        calcular_tmo(df_total),
+        calcular_tabela_ranking(df_total, list(usuarios)),
+        calcular_tmo_equipe_cadastro(df_total),
+        calcular_tmo_equipe_atualizado(df_total),
+        calcular_tempo_ocioso_por_analista(df_analista),
+    ]
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def comparar(esperados, obtidos):
+    for esperado, obtido in zip(esperados, obtidos):
+        if isinstance(esperado, pd.DataFrame):
+            pd.testing.assert_frame_equal(esperado, obtido)
+        else:
+            assert esperado == obtido
+
+
+def main(n_linhas=1_000_000):
+    df = gerar_historico(n_linhas)
+    # Como load_data entrega: arrays somente leitura, versão marcada e cópia rasa por sessão
+    df = marcar_versao(congelar_dataframe(df), ('usuario', 'dataset', 1, n_linhas, None, None, None))
+    analista = df['USUÁRIO QUE CONCLUIU A TAREFA'].cat.categories[0]
+
+    cache_calculos.limpar()
+    tempo_sem_versao, esperados = cronometrar(rerun, df.copy(deep=True), analista)
+    tempo_frio, obtidos_frio = cronometrar(rerun, df.copy(deep=False), analista)
+    tempo_quente, obtidos_quente = cronometrar(rerun, df.copy(deep=False), analista)
+    comparar(esperados, obtidos_frio)
+    comparar(esperados, obtidos_quente)
+
+    print(f'\n{n_linhas:,} linhas')
+    print(f'{"sem versão (não memoriza)":<28} {tempo_sem_versao:>9.3f}s')
+    print(f'{"cache frio":<28} {tempo_frio:>9.3f}s')
+    print(f'{"cache quente":<28} {tempo_quente:>9.3f}s {tempo_frio / tempo_quente:>8.0f}x')
+    print(f'estatísticas: {cache_calculos.estatisticas()}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
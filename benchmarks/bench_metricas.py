@@ -0,0 +1,111 @@
+"""
+Executa, sem Streamlit, os cálculos que antes ficavam dentro das funções calcular_e_exibir_* /
+exibir_* e compara com a parte de cálculo dessas funções (implementação anterior), verificando
+que os resultados são idênticos.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_metricas [n_linhas]
+"""
+import sys
+
+import pandas as pd
+
+from Unimed.formatacao import formatar_hms, formatar_minutos
+from Unimed.metricas import (
+    calcular_grafico_tmo_analista_por_mes,
+    calcular_tempo_ocioso_por_analista,
+    calcular_tempo_ocioso_por_dia,
+    calcular_tmo_cadastro_atualizacao_por_fila,
+    calcular_tmo_por_fila,
+    calcular_tmo_por_mes,
+    calcular_tmo_por_mes_formatado,
+    calcular_tmo_por_mes_longo,
+)
+from benchmarks.dados_sinteticos import gerar_historico
+from benchmarks.medicao import comparar
+
+
+# Implementações anteriores (a parte de cálculo das funções de exibição), mantidas apenas como
+# referência de resultado e de tempo
+
+def tmo_por_fila_antes(df_analista):
+    filas_finalizadas_analista = df_analista[df_analista['SITUAÇÃO DA TAREFA'] == 'Finalizada']
+    carteiras_analista = filas_finalizadas_analista.groupby('FILA', observed=True).agg(
+        Quantidade=('FILA', 'size'),
+        TMO_médio=('TEMPO MÉDIO OPERACIONAL', 'mean')
+    ).reset_index()
+    carteiras_analista['TMO_médio'] = formatar_hms(carteiras_analista['TMO_médio'])
+    return carteiras_analista.rename(columns={'FILA': 'Fila', 'Quantidade': 'Quantidade', 'TMO_médio': 'TMO Médio por Fila'})
+
+
+def tmo_cadastro_atualizacao_por_fila_antes(df_analista):
+    filas_finalizadas_analista = df_analista[df_analista['FINALIZAÇÃO'].isin(['CADASTRADO', 'ATUALIZADO'])]
+    df_quantidade = filas_finalizadas_analista.groupby('FILA', observed=True).size().reset_index(name='Quantidade')
+    df_tmo_cadastro = filas_finalizadas_analista[filas_finalizadas_analista['FINALIZAÇÃO'] == 'CADASTRADO'].groupby('FILA', observed=True)['TEMPO MÉDIO OPERACIONAL'].mean().reset_index()
+    df_tmo_atualizacao = filas_finalizadas_analista[filas_finalizadas_analista['FINALIZAÇÃO'] == 'ATUALIZADO'].groupby('FILA', observed=True)['TEMPO MÉDIO OPERACIONAL'].mean().reset_index()
+    df_tmo_cadastro.rename(columns={'TEMPO MÉDIO OPERACIONAL': 'TMO_Cadastro'}, inplace=True)
+    df_tmo_atualizacao.rename(columns={'TEMPO MÉDIO OPERACIONAL': 'TMO_Atualizacao'}, inplace=True)
+    df_resultado = df_quantidade.merge(df_tmo_cadastro, on='FILA', how='left').merge(df_tmo_atualizacao, on='FILA', how='left')
+    colunas_tmo = ['TMO_Cadastro', 'TMO_Atualizacao']
+    df_resultado[colunas_tmo] = df_resultado[colunas_tmo].fillna(pd.Timedelta(seconds=0))
+    df_resultado['TMO_Cadastro'] = formatar_hms(df_resultado['TMO_Cadastro'])
+    df_resultado['TMO_Atualizacao'] = formatar_hms(df_resultado['TMO_Atualizacao'])
+    return df_resultado.rename(columns={'FILA': 'Fila', 'TMO_Cadastro': 'TMO Cadastro', 'TMO_Atualizacao': 'TMO Atualização'})
+
+
+def tmo_por_mes_formatado_antes(df):
+    df_tmo_mes = calcular_tmo_por_mes(df)
+    df_tmo_mes['TMO_Formatado'] = formatar_minutos(df_tmo_mes['TMO'])
+    return df_tmo_mes
+
+
+def tempo_ocioso_por_dia_antes(df_analista, analista_selecionado):
+    df_ocioso = calcular_tempo_ocioso_por_analista(df_analista)
+    df_ocioso = df_ocioso[df_ocioso['USUÁRIO QUE CONCLUIU A TAREFA'] == analista_selecionado]
+    df_ocioso['Tempo Ocioso Formatado'] = formatar_hms(df_ocioso['Tempo Ocioso'])
+    df_ocioso['Tempo Ocioso Segundos'] = df_ocioso['Tempo Ocioso'].dt.total_seconds()
+    return df_ocioso
+
+
+def tmo_analista_por_mes_longo_antes(df_tmo_mes):
+    df_tmo_long = df_tmo_mes.melt(
+        id_vars=['AnoMes'],
+        value_vars=['TMO_Geral', 'TMO_Cadastro', 'TMO_Atualizacao'],
+        var_name='Tipo de TMO',
+        value_name='Tempo Médio Operacional'
+    )
+    format_dict = df_tmo_mes.set_index('AnoMes')[
+        ['TMO_Geral_Formatado', 'TMO_Cadastro_Formatado', 'TMO_Atualizacao_Formatado']
+    ].stack().reset_index()
+    format_dict.columns = ['AnoMes', 'Tipo de TMO', 'Tempo Formatado']
+    format_dict['Tipo de TMO'] = format_dict['Tipo de TMO'].str.replace('_Formatado', '')
+    format_map = format_dict.set_index(['AnoMes', 'Tipo de TMO'])['Tempo Formatado'].to_dict()
+    tipo_tmo_label = {'TMO_Geral': 'Geral', 'TMO_Cadastro': 'Cadastro', 'TMO_Atualizacao': 'Atualização'}
+    df_tmo_long['Texto_Rotulo'] = df_tmo_long.apply(
+        lambda row: f"{tipo_tmo_label[row['Tipo de TMO']]} - {format_map.get((row['AnoMes'], row['Tipo de TMO']), '')}",
+        axis=1
+    )
+    return df_tmo_long
+
+
+def main(n_linhas=1_000_000):
+    # O histórico de um analista tem cerca de n_linhas / 40 tarefas
+    df = gerar_historico(n_linhas)
+    analista = df['USUÁRIO QUE CONCLUIU A TAREFA'].cat.categories[0]
+    df_analista = df[df['USUÁRIO QUE CONCLUIU A TAREFA'] == analista].reset_index(drop=True)
+    df_tmo_mes = calcular_grafico_tmo_analista_por_mes(df_analista)
+
+    # A camada de cálculo roda sem a interface
+    assert 'streamlit' not in sys.modules and 'plotly' not in sys.modules
+
+    print(f'\n{n_linhas:,} linhas ({len(df_analista):,} do analista)')
+    print(f'{"função":<44} {"antes":>10} {"depois":>10} {"ganho":>9}')
+    comparar('calcular_tmo_por_fila', tmo_por_fila_antes, calcular_tmo_por_fila, df_analista, largura=44)
+    comparar('calcular_tmo_cadastro_atualizacao_por_fila', tmo_cadastro_atualizacao_por_fila_antes, calcular_tmo_cadastro_atualizacao_por_fila, df_analista, largura=44)
+    comparar('calcular_tmo_por_mes_formatado', tmo_por_mes_formatado_antes, calcular_tmo_por_mes_formatado, df, largura=44)
+    comparar('calcular_tempo_ocioso_por_dia', tempo_ocioso_por_dia_antes, calcular_tempo_ocioso_por_dia, df_analista, analista, largura=44)
+    comparar('calcular_tmo_por_mes_longo', tmo_analista_por_mes_longo_antes, calcular_tmo_por_mes_longo, df_tmo_mes, largura=44)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,48 @@
+"""
+Compara o cálculo de tempo ocioso com shift + apply por linha (implementação anterior) com o
+motor vetorizado de calcular_tempo_ocioso_por_analista, verificando que os resultados são idênticos.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_ocioso [n_linhas]
+"""
+import sys
+
+import pandas as pd
+
+from Unimed.metricas import calcular_tempo_ocioso_por_analista
+from benchmarks.dados_sinteticos import gerar_historico
+from benchmarks.medicao import comparar, cronometrar, sem_categorias
+
+
+# Implementação anterior, mantida apenas como referência de resultado e de tempo
+
+def tempo_ocioso_antes(df):
+    df = df.dropna(subset=['DATA DE INÍCIO DA TAREFA', 'DATA DE CONCLUSÃO DA TAREFA']).reset_index(drop=True)
+    df = df.sort_values(by=['USUÁRIO QUE CONCLUIU A TAREFA', 'DATA DE INÍCIO DA TAREFA'], kind='stable').reset_index(drop=True)
+    df['PRÓXIMA_TAREFA'] = df.groupby(['USUÁRIO QUE CONCLUIU A TAREFA'], observed=True)['DATA DE INÍCIO DA TAREFA'].shift(-1)
+    df['TEMPO OCIOSO'] = df['PRÓXIMA_TAREFA'] - df['DATA DE CONCLUSÃO DA TAREFA']
+    df['TEMPO OCIOSO'] = df['TEMPO OCIOSO'].apply(lambda x: x if pd.notnull(x) and pd.Timedelta(0) < x <= pd.Timedelta(hours=1) else pd.Timedelta(0))
+    df_soma_ocioso = df.groupby(['USUÁRIO QUE CONCLUIU A TAREFA', df['DATA DE CONCLUSÃO DA TAREFA'].dt.date], observed=True)['TEMPO OCIOSO'].sum().reset_index()
+    df_soma_ocioso = df_soma_ocioso.rename(columns={'DATA DE CONCLUSÃO DA TAREFA': 'Data', 'TEMPO OCIOSO': 'Tempo Ocioso'})
+    df_soma_ocioso['Tempo Ocioso'] = df_soma_ocioso['Tempo Ocioso'].astype(str).str.split("days").str[-1].str.strip()
+    return df_soma_ocioso[['USUÁRIO QUE CONCLUIU A TAREFA', 'Data', 'Tempo Ocioso']]
+
+
+def comparavel(df):
+    # A versão anterior devolvia o tempo como texto ('HH:MM:SS' dentro de um dia)
+    return sem_categorias(df.assign(**{'Tempo Ocioso': pd.to_timedelta(df['Tempo Ocioso'])}))
+
+
+def main(n_linhas=1_000_000):
+    for n_analistas in (40, 400):
+        df = gerar_historico(n_linhas, n_analistas=n_analistas)
+        print(f'\n{n_linhas:,} linhas, {n_analistas} analistas')
+
+        comparar('calcular_tempo_ocioso_por_analista', tempo_ocioso_antes, calcular_tempo_ocioso_por_analista, df, normalizar=comparavel)
+
+        tempo_equipe, _ = cronometrar(calcular_tempo_ocioso_por_analista, df, False)
+        print(f'{"  por analista (por_dia=False)":<36} {"":>10} {tempo_equipe:>9.3f}s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,122 @@
+"""
+Compara os cálculos diários e mensais feitos sobre as tarefas (implementação anterior) com os
+mesmos cálculos respondidos pelo resumo diário, verificando que os resultados são idênticos.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_resumo [n_linhas]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from Unimed.formatacao import formatar_min_seg
+from Unimed.metricas import (
+    calcular_melhor_dia_por_cadastro,
+    calcular_produtividade_diaria,
+    calcular_produtividade_diaria_cadastro,
+    calcular_produtividade_diaria_subsidios,
+    calcular_tmo_por_dia,
+    calcular_tmo_por_dia_cadastro,
+    calcular_tmo_por_mes,
+)
+from Unimed.resumo import resumir_por_dia
+from benchmarks.dados_sinteticos import gerar_historico
+from benchmarks.medicao import comparar
+
+
+# Implementações anteriores, mantidas apenas como referência de resultado e de tempo
+
+def produtividade_antes(df):
+    df['Dia'] = df['DATA DE CONCLUSÃO DA TAREFA'].dt.date
+    df_produtividade = df.groupby('Dia').agg(Finalizado=('FINALIZAÇÃO', 'count')).reset_index()
+    df_produtividade['Produtividade'] = + df_produtividade['Finalizado']
+    return df_produtividade
+
+
+def produtividade_cadastro_antes(df):
+    df['Dia'] = df['DATA DE CONCLUSÃO DA TAREFA'].dt.date
+    df_produtividade_cadastro = df.groupby('Dia').agg(
+        Finalizado=('FINALIZAÇÃO', lambda x: x[x == 'Cadastro realizado'].count()),
+    ).reset_index()
+    df_produtividade_cadastro['Produtividade'] = + df_produtividade_cadastro['Finalizado']
+    return df_produtividade_cadastro
+
+
+def produtividade_subsidios_antes(df):
+    df['Dia'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA']).dt.date
+    df_subsidios = df[df['FILA'].str.contains(r'Elaborar\s+(Subsídios|Subsidios)', case=False, na=False, regex=True)]
+    df_subsidios = df_subsidios[df_subsidios['SITUAÇÃO DA TAREFA'].str.upper() == 'FINALIZADA']
+    return df_subsidios.groupby('Dia').size().reset_index(name='Produtividade')
+
+
+def tmo_por_dia_antes(df_analista):
+    df_analista = df_analista[df_analista['FINALIZAÇÃO'] == 'CADASTRADO'].copy()
+    df_analista['Dia'] = df_analista['DATA DE CONCLUSÃO DA TAREFA'].dt.date
+    return df_analista.groupby('Dia').agg(TMO=('TEMPO MÉDIO OPERACIONAL', 'mean')).reset_index()
+
+
+def tmo_por_dia_cadastro_antes(df):
+    df['Dia'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA']).dt.date
+    df_finalizados_cadastro = df[df['FINALIZAÇÃO'] == 'CADASTRADO'].copy()
+    df_tmo_cadastro = df_finalizados_cadastro.groupby('Dia').agg(
+        Tempo_Total=('TEMPO MÉDIO OPERACIONAL', 'sum'),
+        Total_Finalizados_Cancelados=('FINALIZAÇÃO', 'count')
+    ).reset_index()
+    df_tmo_cadastro['TMO'] = df_tmo_cadastro['Tempo_Total'] / df_tmo_cadastro['Total_Finalizados_Cancelados']
+    df_tmo_cadastro['TMO'] = formatar_min_seg(df_tmo_cadastro['TMO'])
+    return df_tmo_cadastro[['Dia', 'TMO']]
+
+
+def tmo_por_mes_antes(df):
+    df['AnoMes'] = df['DATA DE CONCLUSÃO DA TAREFA'].dt.to_period('M')
+    df_finalizados = df[df['SITUAÇÃO DA TAREFA'].isin(['Finalizada'])]
+    df_tmo_mes = df_finalizados.groupby('AnoMes').agg(
+        Tempo_Total=('TEMPO MÉDIO OPERACIONAL', 'sum'),
+        Total_Protocolos=('TEMPO MÉDIO OPERACIONAL', 'count')
+    ).reset_index()
+    df_tmo_mes['TMO'] = (df_tmo_mes['Tempo_Total'] / pd.Timedelta(minutes=1)) / df_tmo_mes['Total_Protocolos']
+    df_tmo_mes['AnoMes'] = df_tmo_mes['AnoMes'].dt.to_timestamp().dt.strftime('%B de %Y').str.capitalize()
+    return df_tmo_mes[['AnoMes', 'TMO']]
+
+
+def melhor_dia_por_cadastro_antes(df_analista):
+    df_cadastros_por_dia = df_analista[df_analista['FINALIZAÇÃO'] == 'CADASTRADO'].groupby(
+        df_analista['DATA DE CONCLUSÃO DA TAREFA'].dt.date
+    ).size().reset_index(name='Quantidade')
+    melhor_dia = df_cadastros_por_dia.loc[df_cadastros_por_dia['Quantidade'].idxmax()]
+    return pd.DataFrame({'Dia': [melhor_dia['DATA DE CONCLUSÃO DA TAREFA']], 'Quantidade': [melhor_dia['Quantidade']]})
+
+
+def melhor_dia_por_cadastro_depois(resumo):
+    dia, quantidade = calcular_melhor_dia_por_cadastro(resumo)
+    return pd.DataFrame({'Dia': [dia], 'Quantidade': [quantidade]})
+
+
+def main(n_linhas=1_000_000):
+    df = gerar_historico(n_linhas)
+    inicio = time.perf_counter()
+    resumo = resumir_por_dia(df)
+    print(f'\n{n_linhas:,} linhas -> resumo com {len(resumo):,} linhas em {time.perf_counter() - inicio:.3f}s')
+    print(f'{"função":<40} {"antes":>10} {"depois":>10} {"ganho":>9}')
+
+    analista = df['USUÁRIO QUE CONCLUIU A TAREFA'].cat.categories[0]
+    df_analista = df[df['USUÁRIO QUE CONCLUIU A TAREFA'] == analista]
+    resumo_analista = resumo[resumo['USUÁRIO QUE CONCLUIU A TAREFA'] == analista]
+
+    casos = [
+        ('calcular_produtividade_diaria', produtividade_antes, calcular_produtividade_diaria, df, resumo),
+        ('calcular_produtividade_diaria_cadastro', produtividade_cadastro_antes, calcular_produtividade_diaria_cadastro, df, resumo),
+        ('calcular_produtividade_diaria_subsidios', produtividade_subsidios_antes, calcular_produtividade_diaria_subsidios, df, resumo),
+        ('calcular_tmo_por_dia', tmo_por_dia_antes, calcular_tmo_por_dia, df, resumo),
+        ('calcular_tmo_por_dia_cadastro', tmo_por_dia_cadastro_antes, calcular_tmo_por_dia_cadastro, df, resumo),
+        ('calcular_tmo_por_mes', tmo_por_mes_antes, calcular_tmo_por_mes, df, resumo),
+        ('calcular_melhor_dia_por_cadastro', melhor_dia_por_cadastro_antes, melhor_dia_por_cadastro_depois, df_analista, resumo_analista),
+    ]
+    # A versão anterior lê as tarefas (e acrescenta colunas a elas); a atual, o resumo
+    for nome, antes, depois, tarefas, resumo_caso in casos:
+        comparar(nome, lambda f=antes, d=tarefas: f(d.copy(deep=False)), lambda f=depois, r=resumo_caso: f(r), largura=40)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
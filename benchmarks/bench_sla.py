@@ -0,0 +1,73 @@
+"""
+Compara o SLA por fila e a planilha de SLA anteriores (datas reconvertidas a cada chamada e, na
+planilha, dois groupby e um merge por dia) com o motor calcular_sla, que calcula o prazo em dias
+úteis de todos os protocolos de uma vez e agrega dia, fila e total em uma passagem.
+Entradas e tratados por fila devem ser idênticos; o SLA muda de dias corridos para dias úteis.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_sla [n_linhas]
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from Unimed.metricas import FILAS_SLA, PRAZO_SLA, TAREFAS_SLA, calcular_sla
+from benchmarks.dados_sinteticos import gerar_planilha
+from benchmarks.medicao import comparar, cronometrar
+
+
+# Implementações anteriores, mantidas apenas como referência de resultado e de tempo
+
+def sla_por_fila_antes(df, data_inicio, data_fim):
+    df = df.copy(deep=False)
+    df['DATA CRIAÇÃO PROTOCOLO'] = pd.to_datetime(df['DATA CRIAÇÃO PROTOCOLO'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
+    df['DATA DE CONCLUSÃO DA TAREFA'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
+    df = df[(df['DATA CRIAÇÃO PROTOCOLO'] >= pd.to_datetime(data_inicio)) & (df['DATA CRIAÇÃO PROTOCOLO'] <= pd.to_datetime(data_fim))]
+    df = df[df['FILA'].isin(FILAS_SLA)]
+    df = df[df['TAREFA'].isin(TAREFAS_SLA)]
+    df['SLA_OK'] = (df['DATA DE CONCLUSÃO DA TAREFA'] - df['DATA CRIAÇÃO PROTOCOLO']).dt.days <= 3
+    resumo = df.groupby('FILA').agg(
+        ENTRADAS=('DATA CRIAÇÃO PROTOCOLO', 'count'),
+        TRATADOS=('DATA DE CONCLUSÃO DA TAREFA', 'count'),
+        SLA_OK=('SLA_OK', 'sum')
+    ).reset_index()
+    resumo['% SLA'] = ((resumo['SLA_OK'] / resumo['ENTRADAS']) * 100).round(2)
+    return resumo, (resumo['SLA_OK'].sum() / resumo['ENTRADAS'].sum() * 100).round(2)
+
+
+def planilha_por_dia_antes(df):
+    df = df.copy(deep=False)
+    df['DATA CRIAÇÃO PROTOCOLO'] = pd.to_datetime(df['DATA CRIAÇÃO PROTOCOLO'], errors='coerce')
+    df['DATA DE CONCLUSÃO DA TAREFA'] = pd.to_datetime(df['DATA DE CONCLUSÃO DA TAREFA'], errors='coerce')
+    abas = []
+    for dia, df_dia in df.groupby(df['DATA CRIAÇÃO PROTOCOLO'].dt.date):
+        df_dia = df_dia[df_dia['FILA'].isin(FILAS_SLA)]
+        entradas = df_dia.groupby('FILA').size().reset_index(name='ENTRADA')
+        tratados = df_dia[df_dia['DATA DE CONCLUSÃO DA TAREFA'].notnull()].groupby('FILA').size().reset_index(name='TRATADOS')
+        abas.append(pd.merge(entradas, tratados, on='FILA', how='outer').fillna(0))
+    return abas
+
+
+def por_fila(resultado):
+    # sla_por_fila_antes devolve (por_fila, geral) e calcular_sla, (por_dia, por_fila, geral)
+    return resultado[-2][['FILA', 'ENTRADAS', 'TRATADOS']]
+
+
+def main(n_linhas=1_000_000):
+    df = gerar_planilha(n_linhas)
+    # Cancela parte das conclusões, como protocolos ainda em aberto
+    df.loc[np.random.default_rng(1).random(len(df)) < 0.05, 'DATA DE CONCLUSÃO DA TAREFA'] = pd.NaT
+    inicio, fim = df['DATA CRIAÇÃO PROTOCOLO'].min().normalize(), df['DATA CRIAÇÃO PROTOCOLO'].max().normalize() + pd.Timedelta(days=1)
+    print(f'\n{n_linhas:,} linhas, prazo D+{PRAZO_SLA} dias úteis')
+
+    (_, geral_antes), (_, _, geral) = comparar('SLA por fila', sla_por_fila_antes, calcular_sla, df, inicio, fim, largura=28, normalizar=por_fila)
+    print(f'{"  SLA geral (corridos/úteis)":<28} {geral_antes:>9.2f}% {geral:>9.2f}%')
+
+    tempo_antes, abas = cronometrar(planilha_por_dia_antes, df, repeticoes=1)
+    tempo_depois, _ = cronometrar(lambda: [aba for _, aba in calcular_sla(df)[0].groupby('DIA')], repeticoes=1)
+    print(f'{"planilha: agregação por dia":<28} {tempo_antes:>9.3f}s {tempo_depois:>9.3f}s {tempo_antes / tempo_depois:>8.1f}x ({len(abas)} abas)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
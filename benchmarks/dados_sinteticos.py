@@ -0,0 +1,186 @@
+"""
+Gerador de histórico sintético no formato das planilhas de produtividade, usado nos benchmarks.
+
+Uso:
+    from benchmarks.dados_sinteticos import gerar_historico, gerar_planilha
+    df = gerar_historico(1_000_000)   # já tipado, como load_data devolve
+    lote = gerar_planilha(1_000_000)  # formato bruto da planilha, como chega ao save_data
+"""
+import numpy as np
+import pandas as pd
+
+from Unimed.formatacao import formatar_hms
+
+FINALIZACOES = ['CADASTRADO', 'ATUALIZADO', 'REALIZADO', 'FORA DO ESCOPO', 'Cadastro realizado', 'Reiterar']
+SITUACOES = ['Finalizada', 'Cancelada', 'Pendente']
+FILAS = [
+    ' CADASTRO ROBÔ', 'INCIDENTE PROCESSUAL', 'CADASTRO ANS', 'CADASTRO SHAREPOINT',
+    'ATUALIZAÇÃO - SHAREPOINT', 'CADASTRO CITAÇÃO ELETRÔNICA', 'ATUALIZAÇÃO CITAÇÃO ELETRÔNICA',
+    'CADASTRO E-MAIL', 'OFICIOS', 'CADASTRO DE ÓRGÃOS E OFÍCIOS', 'PRE CADASTRO E DIJUR', 'DÚVIDA',
+    'Cadastro', 'Elaborar Subsidios - Cadastro', 'Auditoria de Cadastro'
+]
+TAREFAS = ['CADASTRAR', 'ATUALIZAR', 'CADASTRAR ROBO', 'CADASTRAR ANS', 'ANALISAR E-MAIL']
+
+
+def gerar_historico(n_linhas, n_analistas=40, dias=180, seed=0, categorico=True):
+    """
+    Gera um DataFrame com as colunas usadas pelos cálculos do dashboard.
+
+    Parâmetros:
+        - n_linhas: Quantidade de linhas.
+        - n_analistas: Quantidade de analistas distintos.
+        - dias: Quantidade de dias cobertos a partir de 01/01/2025.
+        - seed: Semente do gerador aleatório.
+        - categorico: Se True, as colunas de baixa cardinalidade são category, como no load_data.
+    """
+    rng = np.random.default_rng(seed)
+    analistas = np.array([f'analista{i:03d}_uni' for i in range(n_analistas)], dtype=object)
+
+    inicio = pd.Timestamp('2025-01-01 08:00:00') + pd.to_timedelta(rng.integers(0, dias * 86400, n_linhas), unit='s')
+    tmo = pd.to_timedelta(rng.gamma(2.0, 300.0, n_linhas).round(), unit='s')
+
+    finalizacao = rng.choice(np.array(FINALIZACOES, dtype=object), n_linhas)
+    finalizacao[rng.random(n_linhas) < 0.01] = None
+    tmo = tmo.where(rng.random(n_linhas) >= 0.02)
+
+    df = pd.DataFrame({
+        'NÚMERO DO PROTOCOLO': np.char.add('2025-', rng.integers(0, n_linhas, n_linhas).astype(str)).astype(object),
+        'USUÁRIO QUE CONCLUIU A TAREFA': rng.choice(analistas, n_linhas),
+        'SITUAÇÃO DA TAREFA': rng.choice(np.array(SITUACOES, dtype=object), n_linhas, p=[0.8, 0.15, 0.05]),
+        'TEMPO MÉDIO OPERACIONAL': tmo,
+        'DATA DE INÍCIO DA TAREFA': inicio,
+        'DATA DE CONCLUSÃO DA TAREFA': inicio + tmo.fillna(pd.Timedelta(0)),
+        'FINALIZAÇÃO': finalizacao,
+        'FILA': rng.choice(np.array(FILAS, dtype=object), n_linhas),
+        'TAREFA': rng.choice(np.array(TAREFAS, dtype=object), n_linhas),
+    })
+
+    if categorico:
+        for coluna in ['FILA', 'FINALIZAÇÃO', 'SITUAÇÃO DA TAREFA', 'USUÁRIO QUE CONCLUIU A TAREFA']:
+            df[coluna] = df[coluna].astype('category')
+
+    return df
+
+
+# Filas da planilha de produtividade: (fila, peso, tarefa, finalizações, pesos das finalizações,
+# mediana do TMO em segundos). Pesos e medianas seguem o histórico real; as filas do SLA e as
+# finalizações CADASTRADO/ATUALIZADO entram para que todos os cálculos e relatórios tenham dados.
+FILAS_PLANILHA = [
+    ('Auditoria de Subsidios', 0.19, 'Conferir subsídio completo',
+     ['Sem Desvio - Subsídio parcial', 'Sem Desvio', 'Com desvio - Subsídio Completo', 'Sem Desvio - Subsídio completo'],
+     [0.35, 0.30, 0.20, 0.15], 420),
+    ('Aguardando Retorno', 0.15, 'Primeira Cobrança', ['Reiterar', 'Subsídio Parcial', 'Subsídio Completo'], [0.6, 0.2, 0.2], 90),
+    ('Cadastro', 0.12, 'Cadastrar', ['Cadastro realizado', 'CADASTRADO'], [0.8, 0.2], 900),
+    ('Auditoria de Cadastro', 0.08, 'Auditoria de Cadastro', ['Ajustado', 'Sem Desvio'], [0.4, 0.6], 300),
+    ('Aguardando Retorno - UNIMED', 0.06, 'Aguardando Retorno - UNIMED', ['Reiterar', 'Subsídio Completo'], [0.5, 0.5], 120),
+    ('Dúvida', 0.04, 'Etapa de Dúvida', ['Dúvida Tratada'], [1.0], 600),
+    ('Força Tarefa', 0.03, 'Força Tarefa', ['Subsídio Completo', 'Subsídio Parcial'], [0.5, 0.5], 1200),
+    ('Elaborar Subsidios - Negativa', 0.03, 'Elaborar Subsidios - Negativa', ['Subsídio Completo', 'Subsídio Parcial'], [0.6, 0.4], 1800),
+    ('Elaborar Subsidios - Complementar', 0.025, 'Elaborar Subsidios - Complementar', ['Subsídio Completo', 'Subsídio Parcial'], [0.6, 0.4], 1500),
+    ('Elaborar Subsidios - Cadastro', 0.02, 'Elaborar Subsidios - Cadastro', ['Subsídio Completo', 'Subsídio Parcial'], [0.6, 0.4], 1500),
+    (' CADASTRO ROBÔ', 0.06, 'CADASTRAR ROBO', ['CADASTRADO', 'ATUALIZADO', 'FORA DO ESCOPO'], [0.7, 0.2, 0.1], 480),
+    ('INCIDENTE PROCESSUAL', 0.04, 'ATUALIZAR', ['ATUALIZADO', 'CADASTRADO', 'REALIZADO'], [0.6, 0.3, 0.1], 600),
+    ('CADASTRO ANS', 0.03, 'CADASTRAR ANS', ['CADASTRADO', 'ATUALIZADO'], [0.8, 0.2], 720),
+    ('CADASTRO E-MAIL', 0.03, 'ANALISAR E-MAIL', ['CADASTRADO', 'ATUALIZADO', 'REALIZADO'], [0.5, 0.3, 0.2], 540),
+    ('CADASTRO SHAREPOINT', 0.02, 'CADASTRAR', ['CADASTRADO', 'ATUALIZADO'], [0.7, 0.3], 600),
+    ('ATUALIZAÇÃO - SHAREPOINT', 0.02, 'ATUALIZAR', ['ATUALIZADO', 'REALIZADO'], [0.8, 0.2], 300),
+    ('CADASTRO CITAÇÃO ELETRÔNICA', 0.015, 'CADASTRAR', ['CADASTRADO'], [1.0], 660),
+    ('ATUALIZAÇÃO CITAÇÃO ELETRÔNICA', 0.015, 'ATUALIZAR', ['ATUALIZADO'], [1.0], 360),
+    ('OFICIOS', 0.01, 'CADASTRAR', ['CADASTRADO', 'REALIZADO'], [0.5, 0.5], 900),
+    ('PRE CADASTRO E DIJUR', 0.01, 'CADASTRAR', ['REALIZADO', 'CADASTRADO'], [0.6, 0.4], 420),
+]
+CAUSAS = ['Negativa de cobertura', 'Reembolso', 'Reajuste', 'Rede credenciada', 'Danos morais', 'Home care', 'Medicamento']
+
+
+def _formatar_data_hora(datas: pd.Series) -> pd.Series:
+    return datas.dt.strftime('%d/%m/%Y %H:%M:%S').where(datas.notna())
+
+
+def gerar_planilha(n_linhas, n_analistas=25, dias=365, seed=0, datas_como_texto=False):
+    """
+    Gera um lote no formato bruto da planilha de produtividade, como chega ao save_data: as
+    colunas de COLUNAS_ESSENCIAIS mais TP CAUSA (TP COMPLEMENTO), ID PROJURIS e Justificativa,
+    com o TMO em texto 'HH:MM:SS'.
+
+    As distribuições imitam o histórico real: poucos analistas concentram a produção (pesos
+    Zipf), filas com pesos e TMO (lognormal) próprios, finalizações e tarefas dependentes da
+    fila, cerca de 3% de tarefas canceladas, inícios em horário comercial de dias úteis, dois
+    registros por protocolo em média e algumas linhas de robô, que o save_data descarta.
+
+    Parâmetros:
+        - n_linhas: Quantidade de linhas.
+        - n_analistas: Quantidade de analistas distintos.
+        - dias: Quantidade de dias cobertos a partir de 01/01/2025.
+        - seed: Semente do gerador aleatório.
+        - datas_como_texto: Se True, as datas vêm como 'dd/mm/AAAA HH:MM:SS', como no parquet legado.
+    """
+    rng = np.random.default_rng(seed)
+
+    pesos_analistas = 1.0 / np.arange(1, n_analistas + 1) ** 0.9
+    analistas = np.array([f'analista{i:03d}_uni' for i in range(n_analistas)] + ['robohub_uni'], dtype=object)
+    pesos_analistas = np.append(pesos_analistas / pesos_analistas.sum() * 0.995, 0.005)
+    usuario = rng.choice(analistas, n_linhas, p=pesos_analistas)
+
+    pesos_filas = np.array([fila[1] for fila in FILAS_PLANILHA])
+    indice_fila = rng.choice(len(FILAS_PLANILHA), n_linhas, p=pesos_filas / pesos_filas.sum())
+    fila = np.empty(n_linhas, dtype=object)
+    tarefa = np.empty(n_linhas, dtype=object)
+    finalizacao = np.empty(n_linhas, dtype=object)
+    mediana_tmo = np.empty(n_linhas)
+    for i, (nome, _, nome_tarefa, finalizacoes, pesos, mediana) in enumerate(FILAS_PLANILHA):
+        linhas = np.flatnonzero(indice_fila == i)
+        fila[linhas] = nome
+        tarefa[linhas] = nome_tarefa
+        finalizacao[linhas] = rng.choice(np.array(finalizacoes, dtype=object), len(linhas), p=pesos)
+        mediana_tmo[linhas] = mediana
+
+    cancelada = rng.random(n_linhas) < 0.032
+    situacao = np.where(cancelada, 'Cancelada', 'Finalizada').astype(object)
+    finalizacao[cancelada] = None
+
+    segundos_tmo = np.minimum(rng.lognormal(np.log(mediana_tmo), 1.0), 8 * 3600).round()
+    segundos_tmo[cancelada] = 0
+    tmo = pd.Series(pd.to_timedelta(segundos_tmo, unit='s'))
+
+    # Dias úteis a partir de 01/01/2025, com inícios entre 08:00 e 18:00
+    dias_uteis = pd.bdate_range('2025-01-01', periods=max(1, dias * 5 // 7)).to_numpy()
+    inicio = pd.Series(
+        dias_uteis[rng.integers(0, len(dias_uteis), n_linhas)]
+        + pd.to_timedelta(rng.integers(8 * 3600, 18 * 3600, n_linhas), unit='s').to_numpy()
+    )
+    conclusao = inicio + tmo
+    criacao_tarefa = inicio - pd.to_timedelta(rng.exponential(4 * 3600, n_linhas).round(), unit='s')
+    criacao_protocolo = criacao_tarefa - pd.to_timedelta(rng.exponential(86400, n_linhas).round(), unit='s')
+
+    # Protocolos com cerca de duas tarefas cada; o número segue o formato 'AAAAMMDD-017-NNNNNNN'
+    protocolo = rng.integers(0, max(1, n_linhas // 2), n_linhas)
+    numero_protocolo = criacao_protocolo.dt.strftime('%Y%m%d') + '-017-' + pd.Series(protocolo + 2_000_000).astype(str)
+
+    causa = pd.Series(rng.choice(np.array(CAUSAS, dtype=object), n_linhas)).where(finalizacao == 'CADASTRADO')
+    codigos_finalizacao = {valor: 2600.0 + i for i, valor in enumerate(pd.unique(finalizacao[~cancelada]))}
+
+    df = pd.DataFrame({
+        'DATA CRIAÇÃO PROTOCOLO': criacao_protocolo,
+        'DATA CRIAÇÃO DA TAREFA': criacao_tarefa,
+        'DATA DE INÍCIO DA TAREFA': inicio,
+        'DATA DE CONCLUSÃO DA TAREFA': conclusao,
+        'TEMPO MÉDIO OPERACIONAL': formatar_hms(tmo),
+        'NÚMERO DO PROTOCOLO': numero_protocolo,
+        'CLASSIFICAÇÃO': fila,
+        'FILA': fila,
+        'ID TAREFA': 5_000_000.0 + rng.permutation(n_linhas),
+        'TAREFA': tarefa,
+        'SITUAÇÃO DA TAREFA': situacao,
+        'USUÁRIO QUE CONCLUIU A TAREFA': usuario,
+        'ID FINALIZAÇÃO': pd.Series(finalizacao).map(codigos_finalizacao),
+        'FINALIZAÇÃO': finalizacao,
+        'TP CAUSA (TP COMPLEMENTO)': causa,
+        'ID PROJURIS': rng.integers(100_000, 200_000, n_linhas),
+        'Justificativa': None,
+    })
+
+    if datas_como_texto:
+        for coluna in ['DATA CRIAÇÃO PROTOCOLO', 'DATA CRIAÇÃO DA TAREFA', 'DATA DE INÍCIO DA TAREFA', 'DATA DE CONCLUSÃO DA TAREFA']:
+            df[coluna] = _formatar_data_hora(df[coluna])
+
+    return df
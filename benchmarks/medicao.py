@@ -0,0 +1,48 @@
+"""
+Medição comum aos benchmarks: cronometra a versão anterior e a atual de uma função, confere que
+devolvem o mesmo resultado e imprime a linha da tabela.
+
+Uso:
+    from benchmarks.medicao import comparar, cronometrar
+    tempo, resultado = cronometrar(funcao, df)
+    comparar('calcular_tmo', tmo_antes, calcular_tmo, df, largura=36)
+"""
+import time
+
+import pandas as pd
+
+
+def cronometrar(funcao, *args, repeticoes=3):
+    """
+    Melhor tempo de `repeticoes` chamadas de funcao(*args) e o resultado da última.
+    """
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def sem_categorias(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte as colunas categóricas para object, para comparar com versões que não usavam categorias.
+    """
+    return df.astype({c: object for c, t in df.dtypes.items() if isinstance(t, pd.CategoricalDtype)})
+
+
+def comparar(nome, antes, depois, *args, largura=36, normalizar=None):
+    """
+    Cronometra antes(*args) e depois(*args), confere que os resultados são iguais (sem olhar dtype nem
+    índice) e imprime nome, tempos e ganho. `normalizar` é aplicado aos dois resultados antes da
+    comparação, para as diferenças de tipo esperadas entre as versões. Devolve os resultados brutos.
+    """
+    tempo_antes, esperado = cronometrar(antes, *args)
+    tempo_depois, obtido = cronometrar(depois, *args)
+    a, b = (normalizar(esperado), normalizar(obtido)) if normalizar else (esperado, obtido)
+    if isinstance(a, pd.Series):
+        pd.testing.assert_series_equal(a.reset_index(drop=True), b.reset_index(drop=True), check_dtype=False)
+    else:
+        pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True), check_dtype=False)
+    print(f'{nome:<{largura}} {tempo_antes:>9.3f}s {tempo_depois:>9.3f}s {tempo_antes / tempo_depois:>8.1f}x')
+    return esperado, obtido
@@ -0,0 +1,346 @@
+"""
+Suíte de benchmarks sem interface: gera lotes sintéticos no formato da planilha de produtividade
+(benchmarks.dados_sinteticos.gerar_planilha), grava com save_data (também a partir do xlsx, lido
+inteiro ou em blocos), lê com load_data e mede cada função calcular_* e cada exportador sobre o
+histórico carregado.
+
+Para cada tamanho e função são registrados o melhor tempo de parede entre as repetições e o pico
+de memória de uma execução à parte com tracemalloc (alocações do Python e do numpy; buffers do
+Arrow não entram na conta). O cache de cálculos é limpo antes de cada execução, para medir o
+cálculo e não o acerto no cache. Tudo roda em um diretório temporário; o
+backup é medido à parte, contra um remoto em diretório local.
+
+O resultado vai para um JSON com o commit, as versões das bibliotecas e uma linha por
+(tamanho, função); com --comparar, imprime a razão entre os tempos de um JSON anterior e os atuais.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.suite [--tamanhos 10000 100000 ...] [--saida arquivo.json] [--comparar anterior.json]
+
+Com os tamanhos padrão (até 10M linhas) a suíte precisa de bem mais memória que os dados em si;
+em máquinas menores, escolha os tamanhos com --tamanhos.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow
+import streamlit
+import streamlit.logger
+
+from Unimed import calculations, metricas
+from Unimed.backup import DestinoDiretorio, TrabalhadorBackup
+from Unimed.cache import cache_calculos, cache_dados
+from Unimed.calculations import COLUNAS_ESSENCIAIS, load_data, load_resumo_diario, load_sla_data, save_data, save_sla_data
+from Unimed.metricas import filtrar_analista
+from Unimed.planilha import ler_xlsx_em_blocos
+from Unimed.storage import diretorio_dataset, diretorio_sla
+from benchmarks.dados_sinteticos import gerar_planilha
+
+TAMANHOS = [10_000, 100_000, 1_000_000, 10_000_000]
+USUARIO = 'benchmark@unimed'
+
+# Uma aba de xlsx comporta no máximo 1.048.576 linhas; acima disso a leitura da planilha não é medida
+LIMITE_LINHAS_XLSX = 1_048_575
+
+# Exportadores: geram o arquivo e o entregam via st.download_button, que sem interface só registra o botão
+EXPORTADORES = [
+    'export_dataframe',
+    'exportar_planilha_com_tmo',
+    'exportar_planilha_com_tmo_completo',
+    'exportar_relatorio_detalhado_por_analista',
+    'gerar_relatorio_tmo_completo',
+    'gerar_relatorio_html',
+    'download_html',
+    'gerar_relatorio_html_tmo',
+    'download_html_tmo',
+    'gerar_planilha_sla',
+]
+
+
+def casos(dados):
+    """
+    Lista de (nome, função, argumentos) a medir sobre o histórico carregado. Os argumentos são
+    montados a cada execução, já que algumas funções alteram o DataFrame recebido.
+    """
+    df = lambda: dados['df'].copy(deep=False)
+    resumo = lambda: dados['resumo'].copy(deep=False)
+    df_analista = lambda: dados['df_analista'].copy(deep=False)
+    resumo_analista = lambda: dados['resumo_analista'].copy(deep=False)
+    sla = lambda: dados['sla'].copy(deep=False)
+    analista, analistas, periodo = dados['analista'], dados['analistas'], dados['periodo']
+    inicio, fim = periodo
+    meio = inicio + (fim - inicio) / 2
+
+    return [
+        # Camada de cálculo (metricas)
+        ('calcular_metricas_por_analista', metricas.calcular_metricas_por_analista, lambda: (df(),)),
+        ('calcular_metricas_por_analista (por_dia)', metricas.calcular_metricas_por_analista, lambda: (df(), True)),
+        ('calcular_tmo_personalizado', metricas.calcular_tmo_personalizado, lambda: (df(),)),
+        ('calcular_tmo_geral', metricas.calcular_tmo_geral, lambda: (df(),)),
+        ('calcular_tmo_cadastro', metricas.calcular_tmo_cadastro, lambda: (df(),)),
+        ('calcular_produtividade_diaria', metricas.calcular_produtividade_diaria, lambda: (resumo(),)),
+        ('calcular_produtividade_diaria (tarefas)', metricas.calcular_produtividade_diaria, lambda: (df(),)),
+        ('calcular_produtividade_diaria_cadastro', metricas.calcular_produtividade_diaria_cadastro, lambda: (resumo(),)),
+        ('calcular_produtividade_diaria_subsidios', metricas.calcular_produtividade_diaria_subsidios, lambda: (resumo(),)),
+        ('calcular_tmo_por_dia', metricas.calcular_tmo_por_dia, lambda: (resumo_analista(),)),
+        ('calcular_tmo_por_dia_cadastro', metricas.calcular_tmo_por_dia_cadastro, lambda: (resumo(),)),
+        ('calcular_tmo_por_mes', metricas.calcular_tmo_por_mes, lambda: (resumo(),)),
+        ('calcular_tmo_por_mes (tarefas)', metricas.calcular_tmo_por_mes, lambda: (df(),)),
+        ('calcular_tmo_por_mes_formatado', metricas.calcular_tmo_por_mes_formatado, lambda: (resumo(),)),
+        ('calcular_melhor_tmo_por_dia', metricas.calcular_melhor_tmo_por_dia, lambda: (resumo_analista(),)),
+        ('calcular_melhor_dia_por_cadastro', metricas.calcular_melhor_dia_por_cadastro, lambda: (resumo_analista(),)),
+        ('calcular_tmo', metricas.calcular_tmo, lambda: (df(),)),
+        ('calcular_tabela_ranking', metricas.calcular_tabela_ranking, lambda: (df(), analistas)),
+        ('calcular_tmo_equipe_cadastro', metricas.calcular_tmo_equipe_cadastro, lambda: (df(),)),
+        ('calcular_tmo_equipe_atualizado', metricas.calcular_tmo_equipe_atualizado, lambda: (df(),)),
+        ('calcular_tmo_por_carteira', metricas.calcular_tmo_por_carteira, lambda: (df(),)),
+        ('calcular_producao_agrupada', metricas.calcular_producao_agrupada, lambda: (df(),)),
+        ('calcular_producao_email_detalhada', metricas.calcular_producao_email_detalhada, lambda: (df(),)),
+        ('calcular_tmo_por_fila', metricas.calcular_tmo_por_fila, lambda: (df_analista(),)),
+        ('calcular_tmo_cadastro_atualizacao_por_fila', metricas.calcular_tmo_cadastro_atualizacao_por_fila, lambda: (df_analista(),)),
+        ('calcular_intervalos_ociosos', metricas.calcular_intervalos_ociosos, lambda: (df(),)),
+        ('calcular_tempo_ocioso_por_analista', metricas.calcular_tempo_ocioso_por_analista, lambda: (df(),)),
+        ('calcular_tempo_ocioso_por_analista (equipe)', metricas.calcular_tempo_ocioso_por_analista, lambda: (df(), False)),
+        ('calcular_tempo_ocioso', metricas.calcular_tempo_ocioso, lambda: (df(),)),
+        ('calcular_tempo_ocioso_por_dia', metricas.calcular_tempo_ocioso_por_dia, lambda: (df_analista(), analista)),
+        ('calcular_grafico_tmo_analista_por_mes', metricas.calcular_grafico_tmo_analista_por_mes, lambda: (df_analista(),)),
+        ('calcular_sla', metricas.calcular_sla, lambda: (sla(), inicio, fim)),
+        ('calcular_tmo_por_mes_longo', metricas.calcular_tmo_por_mes_longo,
+         lambda: (metricas.calcular_grafico_tmo_analista_por_mes(df_analista()),)),
+
+        # Funções calcular_* da camada de exibição (calculations)
+        ('calcular_ranking', calculations.calcular_ranking, lambda: (df(), analistas)),
+        ('calcular_metrica_analista', calculations.calcular_metrica_analista, lambda: (df_analista(),)),
+        ('calcular_filas_analista', calculations.calcular_filas_analista, lambda: (df_analista(),)),
+        ('calcular_carteiras_analista', calculations.calcular_carteiras_analista, lambda: (df_analista(),)),
+        ('calcular_e_exibir_tmo_por_fila', calculations.calcular_e_exibir_tmo_por_fila, lambda: (df_analista(), analista, streamlit)),
+        ('calcular_e_exibir_tmo_cadastro_atualizacao_por_fila', calculations.calcular_e_exibir_tmo_cadastro_atualizacao_por_fila,
+         lambda: (df_analista(), streamlit)),
+        ('calcular_entrada_protocolos_por_dia', calculations.calcular_entrada_protocolos_por_dia, lambda: (sla(),)),
+        ('calcular_entrada_por_dia_e_fila', calculations.calcular_entrada_por_dia_e_fila, lambda: (sla(),)),
+        ('calcular_sla_por_fila', calculations.calcular_sla_por_fila, lambda: (sla(), inicio, fim)),
+
+        # Exportadores
+        ('export_dataframe', calculations.export_dataframe, lambda: (df_analista(),)),
+        ('exportar_planilha_com_tmo', calculations.exportar_planilha_com_tmo, lambda: (df(), periodo, analistas)),
+        ('exportar_planilha_com_tmo (CADASTRADO_DETALHADO)', calculations.exportar_planilha_com_tmo,
+         lambda: (df(), periodo, analistas, 'CADASTRADO_DETALHADO')),
+        ('exportar_planilha_com_tmo_completo', calculations.exportar_planilha_com_tmo_completo, lambda: (df(), periodo, analistas)),
+        ('exportar_relatorio_detalhado_por_analista', calculations.exportar_relatorio_detalhado_por_analista, lambda: (df(), periodo, analistas)),
+        ('gerar_relatorio_tmo_completo', calculations.gerar_relatorio_tmo_completo, lambda: (df(), periodo, analistas)),
+        ('gerar_relatorio_html', calculations.gerar_relatorio_html, lambda: (df(), inicio, meio, meio, fim, analistas)),
+        ('download_html', calculations.download_html, lambda: (df(), inicio, meio, meio, fim, analistas)),
+        ('gerar_relatorio_html_tmo', calculations.gerar_relatorio_html_tmo, lambda: (df(), inicio, fim)),
+        ('download_html_tmo', calculations.download_html_tmo, lambda: (df(), inicio, fim)),
+        ('gerar_planilha_sla', calculations.gerar_planilha_sla, lambda: (sla(), inicio, fim)),
+    ]
+
+
+def funcoes_sem_caso(nomes_medidos):
+    """
+    Funções calcular_* e exportadores dos módulos do dashboard que não aparecem na suíte.
+    """
+    esperadas = {
+        nome for modulo in (metricas, calculations) for nome, objeto in vars(modulo).items()
+        if callable(objeto) and getattr(objeto, '__module__', None) == modulo.__name__ and nome.startswith('calcular_')
+    } | set(EXPORTADORES)
+    return sorted(esperadas - {nome.split(' ')[0] for nome in nomes_medidos})
+
+
+def aguardar_compactacao():
+    for thread in threading.enumerate():
+        if thread.name.startswith('compactacao-'):
+            thread.join()
+
+
+def executar(funcao, argumentos, preparar):
+    if preparar is not None:
+        preparar()
+    args = argumentos()
+    inicio = time.perf_counter()
+    funcao(*args)
+    segundos = time.perf_counter() - inicio
+    # A compactação do save_data roda em segundo plano; fica fora do tempo e da próxima medida
+    aguardar_compactacao()
+    return segundos
+
+
+def medir(nome, funcao, argumentos, preparar=cache_calculos.limpar, repeticoes=3):
+    """
+    Melhor tempo entre as repetições e pico de memória (MB acima do que já estava alocado) de
+    uma execução à parte sob tracemalloc. Erros são registrados no lugar da medida.
+    """
+    try:
+        segundos = min(executar(funcao, argumentos, preparar) for _ in range(repeticoes))
+
+        if preparar is not None:
+            preparar()
+        args = argumentos()
+        tracemalloc.start()
+        funcao(*args)
+        pico = tracemalloc.get_traced_memory()[1]
+        # Parar o tracemalloc com outra thread alocando pode derrubar o interpretador
+        aguardar_compactacao()
+        tracemalloc.stop()
+        resultado = {'funcao': nome, 'segundos': round(segundos, 6), 'pico_mb': round(pico / 2**20, 3)}
+    except Exception as erro:
+        aguardar_compactacao()
+        tracemalloc.stop()
+        resultado = {'funcao': nome, 'segundos': None, 'pico_mb': None, 'erro': f'{type(erro).__name__}: {erro}'}
+
+    print(f'  {nome:<52} ' + (
+        f'{resultado["segundos"]:>9.3f}s {resultado["pico_mb"]:>9.1f} MB' if 'erro' not in resultado else resultado['erro']
+    ))
+    return resultado
+
+
+def medir_tamanho(n_linhas, repeticoes=3):
+    print(f'\n{n_linhas:,} linhas')
+    lote = gerar_planilha(n_linhas)
+    diretorio = diretorio_dataset(USUARIO)
+    resultados = []
+
+    def dataset_vazio():
+        shutil.rmtree(diretorio, ignore_errors=True)
+        cache_dados.limpar()
+        cache_calculos.limpar()
+
+    # Ingestão e leitura do histórico
+    resultados.append(medir('save_data (lote novo)', save_data, lambda: (lote.copy(deep=False), USUARIO), dataset_vazio, repeticoes))
+    resultados.append(medir('save_data (lote repetido)', save_data, lambda: (lote.copy(deep=False), USUARIO), None, repeticoes))
+    if n_linhas <= LIMITE_LINHAS_XLSX:
+        planilha = io.BytesIO()
+        lote.to_excel(planilha, index=False)
+        xlsx = planilha.getvalue()
+        resultados.append(medir('save_data (xlsx com pd.read_excel)', lambda: save_data(pd.read_excel(io.BytesIO(xlsx)), USUARIO), tuple, dataset_vazio, repeticoes))
+        resultados.append(medir('save_data (xlsx em blocos)', lambda: save_data(ler_xlsx_em_blocos(io.BytesIO(xlsx)), USUARIO), tuple, dataset_vazio, repeticoes))
+    resultados.append(medir('load_data (frio)', load_data, lambda: (USUARIO,), cache_dados.limpar, repeticoes))
+    resultados.append(medir('load_data (quente)', load_data, lambda: (USUARIO,), None, repeticoes))
+    resultados.append(medir('load_resumo_diario (frio)', load_resumo_diario, lambda: (USUARIO,), cache_dados.limpar, repeticoes))
+
+    # Backup (o trabalho da thread de backup, medido de forma síncrona)
+    backup = {}
+
+    def remoto_vazio():
+        shutil.rmtree('remoto_backup', ignore_errors=True)
+        backup['trabalhador'] = TrabalhadorBackup(DestinoDiretorio('remoto_backup'))
+
+    remoto_vazio()
+    resultados.append(medir('backup (instantâneo completo)', lambda: backup['trabalhador'].enviar_instantaneo(diretorio), tuple, remoto_vazio, repeticoes))
+    resultados.append(medir('backup (sem alterações)', lambda: backup['trabalhador'].enviar_instantaneo(diretorio), tuple, None, repeticoes))
+    shutil.rmtree('remoto_backup', ignore_errors=True)
+
+    df = load_data(USUARIO)
+    resumo = load_resumo_diario(USUARIO)
+    analista = df['USUÁRIO QUE CONCLUIU A TAREFA'].value_counts().index[0]
+    conclusoes = df['DATA DE CONCLUSÃO DA TAREFA']
+    dados = {
+        'df': df,
+        'resumo': resumo,
+        'df_analista': filtrar_analista(df, analista),
+        'resumo_analista': filtrar_analista(resumo, analista),
+        'analista': analista,
+        'analistas': list(df['USUÁRIO QUE CONCLUIU A TAREFA'].cat.categories),
+        'periodo': (conclusoes.min().date(), conclusoes.max().date()),
+        'sla': lote[COLUNAS_ESSENCIAIS],
+    }
+
+    # Histórico de SLA
+    remover_sla = lambda: shutil.rmtree(diretorio_sla(USUARIO), ignore_errors=True)
+    resultados.append(medir('save_sla_data (lote novo)', save_sla_data, lambda: (dados['sla'].copy(deep=False), USUARIO), remover_sla, repeticoes))
+    resultados.append(medir('save_sla_data (lote repetido)', save_sla_data, lambda: (dados['sla'].copy(deep=False), USUARIO), None, repeticoes))
+    resultados.append(medir('load_sla_data (frio)', load_sla_data, lambda: (USUARIO,), cache_dados.limpar, repeticoes))
+    resultados.append(medir('load_sla_data (quente)', load_sla_data, lambda: (USUARIO,), None, repeticoes))
+
+    for nome, funcao, argumentos in casos(dados):
+        resultados.append(medir(nome, funcao, argumentos, repeticoes=repeticoes))
+
+    sem_caso = funcoes_sem_caso(resultado['funcao'] for resultado in resultados)
+    if sem_caso:
+        print(f'  sem caso na suíte: {", ".join(sem_caso)}')
+
+    dataset_vazio()
+    remover_sla()
+    return [{'linhas': n_linhas, **resultado} for resultado in resultados]
+
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(anterior, atual):
+    tempos = {(r['linhas'], r['funcao']): r['segundos'] for r in anterior['resultados']}
+    print(f'\ncomparação com {anterior.get("commit")} ({anterior.get("data")})')
+    print(f'{"linhas":>10}  {"função":<52} {"antes":>10} {"depois":>10} {"razão":>8}')
+    for resultado in atual['resultados']:
+        antes, depois = tempos.get((resultado['linhas'], resultado['funcao'])), resultado['segundos']
+        if antes and depois:
+            print(f'{resultado["linhas"]:>10,}  {resultado["funcao"]:<52} {antes:>9.3f}s {depois:>9.3f}s {antes / depois:>7.2f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS, help='quantidades de linhas dos lotes')
+    parser.add_argument('--repeticoes', type=int, default=3, help='execuções por função (vale o melhor tempo)')
+    parser.add_argument('--saida', default=None, help='arquivo JSON de resultados (padrão: benchmark_<commit>.json)')
+    parser.add_argument('--comparar', default=None, help='JSON de uma execução anterior para comparar')
+    opcoes = parser.parse_args()
+
+    # Sem interface, cada chamada ao Streamlit avisa que não há ScriptRunContext
+    # (a configuração é lida antes, senão a primeira chamada restaura o nível dela)
+    streamlit.config.get_option('logger.level')
+    streamlit.logger.set_log_level('error')
+    for variavel in ('GITHUB_TOKEN', 'GITHUB_REPO', 'UNIMED_BACKUP_DIR'):
+        os.environ.pop(variavel, None)
+
+    commit = commit_atual()
+    saida = os.path.abspath(opcoes.saida or f'benchmark_{commit or "sem_commit"}.json')
+    anterior = None
+    if opcoes.comparar:
+        with open(opcoes.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+
+    resultados = []
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='unimed_benchmark_') as temporario:
+        # O dataset e a planilha de SLA usam caminhos relativos ao diretório atual
+        os.chdir(temporario)
+        try:
+            for n_linhas in opcoes.tamanhos:
+                resultados.extend(medir_tamanho(n_linhas, opcoes.repeticoes))
+        finally:
+            os.chdir(diretorio_original)
+
+    atual = {
+        'commit': commit,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'versoes': {'pandas': pd.__version__, 'numpy': np.__version__, 'pyarrow': pyarrow.__version__, 'streamlit': streamlit.__version__},
+        'resultados': resultados,
+    }
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(atual, f, ensure_ascii=False, indent=2)
+    print(f'\nresultados gravados em {saida}')
+
+    if anterior is not None:
+        comparar(anterior, atual)
+
+
+if __name__ == '__main__':
+    sys.exit(main())